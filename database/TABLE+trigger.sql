@@ -11,6 +11,8 @@ CREATE TABLE CAR_BRAND (
 
 -- 2. Table CAR
 -- Stores customer car information
+-- Parser ngram loại mọi token chứa stopword (vd. 'a', 'i') -> tắt stopword cho index FULLTEXT của CAR
+SET SESSION innodb_ft_enable_stopword = OFF;
 CREATE TABLE CAR (
     LicensePlate VARCHAR(255) PRIMARY KEY COMMENT 'License Plate (Primary Key)',
     BrandId INTEGER NOT NULL COMMENT 'Brand ID (Foreign Key)',
@@ -18,6 +20,14 @@ CREATE TABLE CAR (
     PhoneNumber VARCHAR(20) COMMENT 'Phone Number',
     Address NVARCHAR(255) COMMENT 'Address',
     Email VARCHAR(255) COMMENT 'Owner Email',
+    TotalDebt NUMERIC(15, 2) NOT NULL DEFAULT 0 COMMENT 'Total debt over all receptions (maintained by CAR_RECEPTION triggers)',
+    PlateKey VARCHAR(255)
+        GENERATED ALWAYS AS (UPPER(REPLACE(REPLACE(REPLACE(LicensePlate, '-', ''), '.', ''), ' ', ''))) STORED
+        COMMENT 'License plate without separators (search key)',
+    OwnerKey VARCHAR(255) NOT NULL DEFAULT '' COMMENT 'Owner name lowercased without diacritics (maintained by CAR triggers)',
+    INDEX idx_car_total_debt (TotalDebt),
+    FULLTEXT INDEX ftx_car_plate_key (PlateKey) WITH PARSER ngram,
+    FULLTEXT INDEX ftx_car_owner_key (OwnerKey) WITH PARSER ngram,
     FOREIGN KEY (BrandId) REFERENCES CAR_BRAND(BrandId)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 -- 3. Table CAR_RECEPTION
@@ -27,9 +37,18 @@ CREATE TABLE CAR_RECEPTION (
     LicensePlate VARCHAR(255) NOT NULL COMMENT 'License Plate (Foreign Key)',
     ReceptionDate DATE NOT NULL COMMENT 'Date of reception',
     Debt NUMERIC(15, 2) DEFAULT 0 COMMENT 'Total debt at the time of reception',
+    INDEX idx_car_reception_plate_date (LicensePlate, ReceptionDate),
+    INDEX idx_car_reception_date (ReceptionDate),
     FOREIGN KEY (LicensePlate) REFERENCES CAR(LicensePlate)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- 3.1. Table RECEPTION_DAILY_COUNT
+-- Stores the number of receptions per day (maintained by CAR_RECEPTION triggers)
+CREATE TABLE RECEPTION_DAILY_COUNT (
+    ReceptionDate DATE PRIMARY KEY COMMENT 'Date of reception',
+    Count INTEGER NOT NULL DEFAULT 0 COMMENT 'Number of receptions on that date'
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 -- 4. Table PARAMETER
 -- Stores configurable regulations (max cars, payment rules...)
 CREATE TABLE PARAMETER (
@@ -45,7 +64,8 @@ CREATE TABLE SUPPLIES (
     SuppliesId INTEGER AUTO_INCREMENT PRIMARY KEY COMMENT 'Supply ID (Auto-increment)',
     SuppliesName VARCHAR(255) NOT NULL COMMENT 'Supply Name',
     SuppliesPrice NUMERIC(15, 2) NOT NULL DEFAULT 0 COMMENT 'Unit Price',
-    InventoryNumber INTEGER DEFAULT 0 COMMENT 'Inventory Quantity'
+    InventoryNumber INTEGER DEFAULT 0 COMMENT 'Inventory Quantity',
+    INDEX idx_supplies_name (SuppliesName)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- 5.1. Table SUPPLIES_IMPORT
@@ -55,6 +75,34 @@ CREATE TABLE SUPPLIES_IMPORT (
     SuppliesId INTEGER NOT NULL COMMENT 'Supply ID (Foreign Key)',
     ImportAmount INTEGER NOT NULL COMMENT 'Quantity Imported',
     ImportDate DATE NOT NULL COMMENT 'Import Date',
+    INDEX idx_supplies_import_date (ImportDate),
+    FOREIGN KEY (SuppliesId) REFERENCES SUPPLIES(SuppliesId)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 5.2. Table INVENTORY_LEDGER
+-- Stores every inventory movement (opening stock, import, issue), maintained by triggers
+CREATE TABLE INVENTORY_LEDGER (
+    LedgerId INTEGER AUTO_INCREMENT PRIMARY KEY COMMENT 'Ledger Entry ID (Auto-increment)',
+    SuppliesId INTEGER NOT NULL COMMENT 'Supply ID (Foreign Key)',
+    MoveDate DATE NOT NULL COMMENT 'Movement Date',
+    Quantity INTEGER NOT NULL COMMENT 'Signed Quantity (+ in / - out)',
+    SourceType VARCHAR(10) NOT NULL COMMENT 'OPENING / IMPORT / ISSUE',
+    SourceId INTEGER NOT NULL COMMENT 'SuppliesId / ImportId / RepairDetailId',
+    INDEX idx_inventory_ledger_source (SourceType, SourceId),
+    INDEX idx_inventory_ledger_supplies_date (SuppliesId, MoveDate),
+    FOREIGN KEY (SuppliesId) REFERENCES SUPPLIES(SuppliesId)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 5.3. Table INVENTORY_MONTHLY_BALANCE
+-- Stores per-month import/issue totals and closing balance of each supply
+CREATE TABLE INVENTORY_MONTHLY_BALANCE (
+    BalanceMonth DATE NOT NULL COMMENT 'First day of month',
+    SuppliesId INTEGER NOT NULL COMMENT 'Supply ID (Foreign Key)',
+    ImportQty INTEGER NOT NULL DEFAULT 0 COMMENT 'Quantity Imported in month',
+    IssueQty INTEGER NOT NULL DEFAULT 0 COMMENT 'Quantity Issued in month',
+    EndQty INTEGER NOT NULL DEFAULT 0 COMMENT 'Closing Balance',
+    PRIMARY KEY (BalanceMonth, SuppliesId),
+    INDEX idx_inventory_balance_supplies (SuppliesId, BalanceMonth, EndQty),
     FOREIGN KEY (SuppliesId) REFERENCES SUPPLIES(SuppliesId)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
@@ -73,6 +121,8 @@ CREATE TABLE REPAIR (
     ReceptionId INTEGER NOT NULL COMMENT 'Reception ID (Foreign Key)',
     RepairDate DATE NOT NULL COMMENT 'Repair Date',
     RepairMoney NUMERIC(15, 2) DEFAULT 0 COMMENT 'Total Repair Cost',
+    INDEX idx_repair_reception (ReceptionId, RepairMoney),
+    INDEX idx_repair_date (RepairDate, ReceptionId, RepairMoney),
     FOREIGN KEY (ReceptionId) REFERENCES CAR_RECEPTION(ReceptionId)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
@@ -85,6 +135,7 @@ CREATE TABLE REPAIR_DETAILS (
     SuppliesId INTEGER NOT NULL COMMENT 'Supply ID (Foreign Key)',
     SuppliesAmount INTEGER NOT NULL DEFAULT 1 COMMENT 'Quantity of supplies used',
     WageId INTEGER COMMENT 'Wage ID (Foreign Key)',
+    INDEX idx_repair_details_repair (RepairId, SuppliesId, SuppliesAmount),
     FOREIGN KEY (RepairId) REFERENCES REPAIR(RepairId),
     FOREIGN KEY (SuppliesId) REFERENCES SUPPLIES(SuppliesId),
     FOREIGN KEY (WageId) REFERENCES WAGE(WageId)
@@ -96,7 +147,9 @@ CREATE TABLE RECEIPT (
     ReceiptId INTEGER AUTO_INCREMENT PRIMARY KEY COMMENT 'Receipt ID (Auto-increment)',
     ReceptionId INTEGER NOT NULL COMMENT 'Reception ID (Foreign Key)',
     ReceiptDate DATE NOT NULL COMMENT 'Payment Date',
-    MoneyAmount NUMERIC(15, 2) NOT NULL COMMENT 'Amount Received'
+    MoneyAmount NUMERIC(15, 2) NOT NULL COMMENT 'Amount Received',
+    INDEX idx_receipt_reception (ReceptionId, ReceiptDate),
+    INDEX idx_receipt_date (ReceiptDate)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- 10. Table REVENUE_REPORT
@@ -105,7 +158,9 @@ CREATE TABLE REVENUE_REPORT (
     ReportId INTEGER AUTO_INCREMENT PRIMARY KEY COMMENT 'Report ID',
     ReportMonth INTEGER NOT NULL COMMENT 'Report Month',
     ReportYear INTEGER NOT NULL COMMENT 'Report Year',
-    TotalRevenue NUMERIC(15, 2) DEFAULT 0 COMMENT 'Total Revenue'
+    TotalRevenue NUMERIC(15, 2) DEFAULT 0 COMMENT 'Total Revenue',
+    DataVersion INTEGER NOT NULL DEFAULT 0 COMMENT 'REPORT_DATA_VERSION.RevenueVersion at generation',
+    UNIQUE INDEX uq_revenue_report_period (ReportMonth, ReportYear)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- 11. Table REVENUE_REPORT_DETAILS
@@ -121,12 +176,25 @@ CREATE TABLE REVENUE_REPORT_DETAILS (
     FOREIGN KEY (BrandId) REFERENCES CAR_BRAND(BrandId)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- 11.1. Table REVENUE_DAILY_BRAND
+-- Stores revenue rolled up per day and car brand (maintained by REPAIR triggers)
+CREATE TABLE REVENUE_DAILY_BRAND (
+    Day DATE NOT NULL COMMENT 'Repair Date',
+    BrandId INTEGER NOT NULL COMMENT 'Brand ID (Foreign Key)',
+    Count INTEGER NOT NULL DEFAULT 0 COMMENT 'Number of repairs',
+    TotalMoney NUMERIC(15, 2) NOT NULL DEFAULT 0 COMMENT 'Total Amount',
+    PRIMARY KEY (Day, BrandId),
+    FOREIGN KEY (BrandId) REFERENCES CAR_BRAND(BrandId)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 -- 12. Table STOCK_REPORT
 -- Stores monthly inventory/stock report summary
 CREATE TABLE STOCK_REPORT (
     StockReportId INTEGER AUTO_INCREMENT PRIMARY KEY COMMENT 'Stock Report ID',
     ReportMonth INTEGER NOT NULL COMMENT 'Report Month',
-    ReportYear INTEGER NOT NULL COMMENT 'Report Year'
+    ReportYear INTEGER NOT NULL COMMENT 'Report Year',
+    DataVersion INTEGER NOT NULL DEFAULT 0 COMMENT 'Sum of REPORT_DATA_VERSION.StockVersion up to this month at generation',
+    UNIQUE INDEX uq_stock_report_period (ReportMonth, ReportYear)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- 13. Table STOCK_REPORT_DETAILS
@@ -136,11 +204,29 @@ CREATE TABLE STOCK_REPORT_DETAILS (
     StockReportId INTEGER NOT NULL COMMENT 'Stock Report ID (Foreign Key)',
     SuppliesId INTEGER NOT NULL COMMENT 'Supply ID (Foreign Key)',
     BeginQty INTEGER DEFAULT 0 COMMENT 'Beginning Inventory',
-    IssueQty INTEGER DEFAULT 0 COMMENT 'Incurred Quantity (Import/Export)',
+    ImportQty INTEGER DEFAULT 0 COMMENT 'Imported Quantity',
+    IssueQty INTEGER DEFAULT 0 COMMENT 'Issued Quantity',
     EndQty INTEGER DEFAULT 0 COMMENT 'Ending Inventory',
     FOREIGN KEY (StockReportId) REFERENCES STOCK_REPORT(StockReportId),
     FOREIGN KEY (SuppliesId) REFERENCES SUPPLIES(SuppliesId)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 14. Table REPORT_DATA_VERSION
+-- Stores per-month change counters used to detect stale stored reports
+CREATE TABLE REPORT_DATA_VERSION (
+    DataMonth DATE PRIMARY KEY COMMENT 'First day of month',
+    RevenueVersion INTEGER NOT NULL DEFAULT 0 COMMENT 'Revenue data change counter',
+    StockVersion INTEGER NOT NULL DEFAULT 0 COMMENT 'Stock data change counter'
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 15. Table CAR_CHANGE_LOG
+-- Stores one row per change of a CAR row (polled by the vehicle lookup page)
+CREATE TABLE CAR_CHANGE_LOG (
+    ChangeId BIGINT AUTO_INCREMENT PRIMARY KEY COMMENT 'Change sequence number (change token)',
+    LicensePlate VARCHAR(255) NOT NULL COMMENT 'Changed car (no foreign key: deletions are logged too)',
+    ChangedAt TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3) COMMENT 'Change time (for pruning)',
+    INDEX idx_car_change_log_time (ChangedAt)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 DELIMITER //
 DROP TRIGGER IF EXISTS trg_CheckMaxCarReception //
 CREATE TRIGGER trg_CheckMaxCarReception
@@ -155,19 +241,96 @@ BEGIN
     FROM PARAMETER 
     WHERE name = 'MaxCarReception';
 
-    -- 2. Đếm số xe đã tiếp nhận trong ngày
-    SELECT COUNT(*) INTO current_cars
-    FROM CAR_RECEPTION
+    -- 2. Tăng bộ đếm của ngày (upsert giữ khóa dòng đến hết transaction,
+    --    các máy tiếp nhận cùng lúc sẽ xếp hàng trên cùng một dòng)
+    INSERT INTO RECEPTION_DAILY_COUNT (ReceptionDate, Count)
+    VALUES (NEW.ReceptionDate, 1)
+    ON DUPLICATE KEY UPDATE Count = Count + 1;
+
+    SELECT Count INTO current_cars
+    FROM RECEPTION_DAILY_COUNT
     WHERE ReceptionDate = NEW.ReceptionDate;
 
-    -- 3. Kiểm tra: Nếu số xe hiện tại >= giới hạn thì báo lỗi
-    IF current_cars >= max_cars THEN
+    -- 3. Kiểm tra: Nếu số xe sau khi thêm > giới hạn thì báo lỗi
+    --    (lỗi trong trigger hủy luôn lần tăng bộ đếm ở bước 2)
+    IF current_cars > max_cars THEN
         SIGNAL SQLSTATE '45000'
         SET MESSAGE_TEXT = 'Lỗi: Số lượng xe tiếp nhận trong ngày đã vượt quá quy định (MaxCarReception).';
     END IF;
 END //
 DELIMITER ;
 DELIMITER //
+DROP TRIGGER IF EXISTS trg_DecreaseReceptionCount //
+CREATE TRIGGER trg_DecreaseReceptionCount
+AFTER DELETE ON CAR_RECEPTION
+FOR EACH ROW
+BEGIN
+    -- Giảm bộ đếm của ngày tương ứng với lượt tiếp nhận vừa xóa
+    UPDATE RECEPTION_DAILY_COUNT
+    SET Count = Count - 1
+    WHERE ReceptionDate = OLD.ReceptionDate;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_MoveReceptionCount //
+CREATE TRIGGER trg_MoveReceptionCount
+AFTER UPDATE ON CAR_RECEPTION
+FOR EACH ROW
+BEGIN
+    -- Đổi ngày tiếp nhận: chuyển lượt đếm từ ngày cũ sang ngày mới
+    IF NEW.ReceptionDate <> OLD.ReceptionDate THEN
+        UPDATE RECEPTION_DAILY_COUNT
+        SET Count = Count - 1
+        WHERE ReceptionDate = OLD.ReceptionDate;
+
+        INSERT INTO RECEPTION_DAILY_COUNT (ReceptionDate, Count)
+        VALUES (NEW.ReceptionDate, 1)
+        ON DUPLICATE KEY UPDATE Count = Count + 1;
+    END IF;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_AddCarDebtAfterReception //
+CREATE TRIGGER trg_AddCarDebtAfterReception
+AFTER INSERT ON CAR_RECEPTION
+FOR EACH ROW
+BEGIN
+    -- Cộng nợ của lượt tiếp nhận mới vào tổng nợ của xe
+    IF COALESCE(NEW.Debt, 0) <> 0 THEN
+        UPDATE CAR
+        SET TotalDebt = TotalDebt + NEW.Debt
+        WHERE LicensePlate = NEW.LicensePlate;
+    END IF;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SyncCarDebtAfterReceptionUpdate //
+CREATE TRIGGER trg_SyncCarDebtAfterReceptionUpdate
+AFTER UPDATE ON CAR_RECEPTION
+FOR EACH ROW
+BEGIN
+    -- Debt thay đổi do phiếu sửa chữa (tăng) hoặc phiếu thu (trg_UpdateDebtAfterReceipt, giảm)
+    IF NEW.LicensePlate = OLD.LicensePlate THEN
+        IF NOT (NEW.Debt <=> OLD.Debt) THEN
+            UPDATE CAR
+            SET TotalDebt = TotalDebt + COALESCE(NEW.Debt, 0) - COALESCE(OLD.Debt, 0)
+            WHERE LicensePlate = NEW.LicensePlate;
+        END IF;
+    ELSE
+        UPDATE CAR
+        SET TotalDebt = TotalDebt - COALESCE(OLD.Debt, 0)
+        WHERE LicensePlate = OLD.LicensePlate;
+
+        UPDATE CAR
+        SET TotalDebt = TotalDebt + COALESCE(NEW.Debt, 0)
+        WHERE LicensePlate = NEW.LicensePlate;
+    END IF;
+END //
+DELIMITER ;
+-- Lưu ý: không có trigger AFTER DELETE cho TotalDebt. Lượt tiếp nhận chỉ bị xóa bởi
+-- trg_DeleteCarBrand, câu lệnh đó đọc CAR nên trigger không được phép cập nhật CAR (lỗi 1442),
+-- và các xe liên quan cũng bị xóa ngay sau đó. Trường hợp khác: CALL sp_ReconcileCarDebt(@fixed).
+DELIMITER //
 
 DROP TRIGGER IF EXISTS trg_CheckPaymentLimit //
 
@@ -205,6 +368,475 @@ BEGIN
     WHERE ReceptionId = NEW.ReceptionId;
 END //
 DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_AddRevenueAfterRepair //
+CREATE TRIGGER trg_AddRevenueAfterRepair
+AFTER INSERT ON REPAIR
+FOR EACH ROW
+BEGIN
+    DECLARE v_brand_id INT;
+
+    -- Hiệu xe của phiếu sửa chữa: REPAIR -> CAR_RECEPTION -> CAR
+    SELECT c.BrandId INTO v_brand_id
+    FROM CAR_RECEPTION cr
+    JOIN CAR c ON cr.LicensePlate = c.LicensePlate
+    WHERE cr.ReceptionId = NEW.ReceptionId;
+
+    INSERT INTO REVENUE_DAILY_BRAND (Day, BrandId, Count, TotalMoney)
+    VALUES (NEW.RepairDate, v_brand_id, 1, COALESCE(NEW.RepairMoney, 0))
+    ON DUPLICATE KEY UPDATE
+        Count = Count + 1,
+        TotalMoney = TotalMoney + COALESCE(NEW.RepairMoney, 0);
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SyncRevenueAfterRepairUpdate //
+CREATE TRIGGER trg_SyncRevenueAfterRepairUpdate
+AFTER UPDATE ON REPAIR
+FOR EACH ROW
+BEGIN
+    DECLARE v_old_brand_id INT;
+    DECLARE v_new_brand_id INT;
+
+    -- Bỏ phần của dòng cũ rồi cộng phần của dòng mới (ngày / lượt tiếp nhận / số tiền có thể đổi)
+    SELECT c.BrandId INTO v_old_brand_id
+    FROM CAR_RECEPTION cr
+    JOIN CAR c ON cr.LicensePlate = c.LicensePlate
+    WHERE cr.ReceptionId = OLD.ReceptionId;
+
+    SELECT c.BrandId INTO v_new_brand_id
+    FROM CAR_RECEPTION cr
+    JOIN CAR c ON cr.LicensePlate = c.LicensePlate
+    WHERE cr.ReceptionId = NEW.ReceptionId;
+
+    UPDATE REVENUE_DAILY_BRAND
+    SET Count = Count - 1,
+        TotalMoney = TotalMoney - COALESCE(OLD.RepairMoney, 0)
+    WHERE Day = OLD.RepairDate AND BrandId = v_old_brand_id;
+
+    INSERT INTO REVENUE_DAILY_BRAND (Day, BrandId, Count, TotalMoney)
+    VALUES (NEW.RepairDate, v_new_brand_id, 1, COALESCE(NEW.RepairMoney, 0))
+    ON DUPLICATE KEY UPDATE
+        Count = Count + 1,
+        TotalMoney = TotalMoney + COALESCE(NEW.RepairMoney, 0);
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SubtractRevenueAfterRepairDelete //
+CREATE TRIGGER trg_SubtractRevenueAfterRepairDelete
+AFTER DELETE ON REPAIR
+FOR EACH ROW
+BEGIN
+    DECLARE v_brand_id INT;
+
+    SELECT c.BrandId INTO v_brand_id
+    FROM CAR_RECEPTION cr
+    JOIN CAR c ON cr.LicensePlate = c.LicensePlate
+    WHERE cr.ReceptionId = OLD.ReceptionId;
+
+    UPDATE REVENUE_DAILY_BRAND
+    SET Count = Count - 1,
+        TotalMoney = TotalMoney - COALESCE(OLD.RepairMoney, 0)
+    WHERE Day = OLD.RepairDate AND BrandId = v_brand_id;
+END //
+DELIMITER ;
+DELIMITER //
+DROP FUNCTION IF EXISTS fn_FoldVietnamese //
+-- Chữ thường, bỏ dấu tiếng Việt: 'Nguyễn Văn Đức' -> 'nguyen van duc'
+-- (cùng bảng chữ với utils.search_keys.fold_text phía ứng dụng)
+CREATE FUNCTION fn_FoldVietnamese(p_text VARCHAR(255) CHARSET utf8mb4)
+RETURNS VARCHAR(255) CHARSET utf8mb4
+DETERMINISTIC NO SQL
+BEGIN
+    DECLARE v_from VARCHAR(67) CHARSET utf8mb4 DEFAULT 'àáảãạăằắẳẵặâầấẩẫậèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵđ';
+    DECLARE v_to VARCHAR(67) CHARSET utf8mb4 DEFAULT 'aaaaaaaaaaaaaaaaaeeeeeeeeeeeiiiiiooooooooooooooooouuuuuuuuuuuyyyyyd';
+    DECLARE v_result VARCHAR(255) CHARSET utf8mb4 DEFAULT LOWER(p_text);
+    DECLARE i INT DEFAULT 1;
+
+    -- REPLACE so khớp phân biệt dấu nên thay được từng chữ có dấu
+    WHILE i <= CHAR_LENGTH(v_from) DO
+        SET v_result = REPLACE(v_result, SUBSTRING(v_from, i, 1), SUBSTRING(v_to, i, 1));
+        SET i = i + 1;
+    END WHILE;
+
+    RETURN TRIM(v_result);
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SetCarOwnerKeyBeforeInsert //
+CREATE TRIGGER trg_SetCarOwnerKeyBeforeInsert
+BEFORE INSERT ON CAR
+FOR EACH ROW
+BEGIN
+    SET NEW.OwnerKey = fn_FoldVietnamese(NEW.OwnerName);
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SetCarOwnerKeyBeforeUpdate //
+CREATE TRIGGER trg_SetCarOwnerKeyBeforeUpdate
+BEFORE UPDATE ON CAR
+FOR EACH ROW
+BEGIN
+    -- Chỉ chuẩn hóa lại khi tên chủ xe đổi (cập nhật nợ, SĐT... không gọi hàm gấp dấu)
+    IF NOT (NEW.OwnerName <=> OLD.OwnerName) THEN
+        SET NEW.OwnerKey = fn_FoldVietnamese(NEW.OwnerName);
+    END IF;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_MoveRevenueAfterCarBrandChange //
+CREATE TRIGGER trg_MoveRevenueAfterCarBrandChange
+AFTER UPDATE ON CAR
+FOR EACH ROW
+BEGIN
+    -- Đổi hiệu xe (sp_ReceiveCar cập nhật lại thông tin xe) -> chuyển doanh thu các phiếu sửa chữa cũ sang hiệu mới
+    IF OLD.BrandId <> NEW.BrandId THEN
+        UPDATE REVENUE_DAILY_BRAND rdb
+        JOIN (
+            SELECT r.RepairDate, COUNT(r.RepairId) AS cnt, COALESCE(SUM(r.RepairMoney), 0) AS money
+            FROM REPAIR r
+            JOIN CAR_RECEPTION cr ON r.ReceptionId = cr.ReceptionId
+            WHERE cr.LicensePlate = NEW.LicensePlate
+            GROUP BY r.RepairDate
+        ) moved ON rdb.Day = moved.RepairDate
+        SET rdb.Count = rdb.Count - moved.cnt,
+            rdb.TotalMoney = rdb.TotalMoney - moved.money
+        WHERE rdb.BrandId = OLD.BrandId;
+
+        INSERT INTO REVENUE_DAILY_BRAND (Day, BrandId, Count, TotalMoney)
+        SELECT moved.RepairDate, NEW.BrandId, moved.cnt, moved.money
+        FROM (
+            SELECT r.RepairDate, COUNT(r.RepairId) AS cnt, COALESCE(SUM(r.RepairMoney), 0) AS money
+            FROM REPAIR r
+            JOIN CAR_RECEPTION cr ON r.ReceptionId = cr.ReceptionId
+            WHERE cr.LicensePlate = NEW.LicensePlate
+            GROUP BY r.RepairDate
+        ) moved
+        ON DUPLICATE KEY UPDATE
+            Count = REVENUE_DAILY_BRAND.Count + moved.cnt,
+            TotalMoney = REVENUE_DAILY_BRAND.TotalMoney + moved.money;
+    END IF;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_LogCarChangeAfterInsert //
+CREATE TRIGGER trg_LogCarChangeAfterInsert
+AFTER INSERT ON CAR
+FOR EACH ROW
+BEGIN
+    INSERT INTO CAR_CHANGE_LOG (LicensePlate) VALUES (NEW.LicensePlate);
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_LogCarChangeAfterUpdate //
+CREATE TRIGGER trg_LogCarChangeAfterUpdate
+AFTER UPDATE ON CAR
+FOR EACH ROW
+BEGIN
+    -- Tiếp nhận, phiếu sửa chữa, phiếu thu đổi CAR.TotalDebt qua trigger của CAR_RECEPTION -> cũng được ghi ở đây
+    IF NOT (NEW.LicensePlate <=> OLD.LicensePlate
+            AND NEW.BrandId <=> OLD.BrandId
+            AND NEW.OwnerName <=> OLD.OwnerName
+            AND NEW.PhoneNumber <=> OLD.PhoneNumber
+            AND NEW.Address <=> OLD.Address
+            AND NEW.TotalDebt <=> OLD.TotalDebt) THEN
+        IF NEW.LicensePlate <> OLD.LicensePlate THEN
+            INSERT INTO CAR_CHANGE_LOG (LicensePlate) VALUES (OLD.LicensePlate);
+        END IF;
+        INSERT INTO CAR_CHANGE_LOG (LicensePlate) VALUES (NEW.LicensePlate);
+    END IF;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_LogCarChangeAfterDelete //
+CREATE TRIGGER trg_LogCarChangeAfterDelete
+AFTER DELETE ON CAR
+FOR EACH ROW
+BEGIN
+    INSERT INTO CAR_CHANGE_LOG (LicensePlate) VALUES (OLD.LicensePlate);
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_LogCarChangeAfterBrandRename //
+CREATE TRIGGER trg_LogCarChangeAfterBrandRename
+AFTER UPDATE ON CAR_BRAND
+FOR EACH ROW
+BEGIN
+    -- Tên hiệu xe hiển thị cùng từng xe -> đổi tên hiệu là thay đổi của mọi xe thuộc hiệu đó
+    IF NOT (NEW.BrandName <=> OLD.BrandName) THEN
+        INSERT INTO CAR_CHANGE_LOG (LicensePlate)
+        SELECT LicensePlate FROM CAR WHERE BrandId = NEW.BrandId;
+    END IF;
+END //
+DELIMITER ;
+-- Dọn nhật ký thay đổi cũ hơn 1 ngày (cần event_scheduler = ON, mặc định của MySQL 8).
+-- Luôn giữ dòng mới nhất để mã thay đổi hiện tại vẫn đọc được; nơi gọi có mã cũ hơn
+-- phần đã dọn sẽ được báo tải lại toàn bộ (xem VehicleLookupService.get_changes_since).
+DELIMITER //
+DROP EVENT IF EXISTS evt_PruneCarChangeLog //
+CREATE EVENT evt_PruneCarChangeLog
+ON SCHEDULE EVERY 1 HOUR
+DO
+BEGIN
+    DECLARE v_last_id BIGINT;
+
+    SELECT MAX(ChangeId) INTO v_last_id FROM CAR_CHANGE_LOG;
+
+    DELETE FROM CAR_CHANGE_LOG
+    WHERE ChangedAt < NOW(3) - INTERVAL 1 DAY
+      AND ChangeId < v_last_id;
+END //
+DELIMITER ;
+DELIMITER //
+-- Cập nhật INVENTORY_MONTHLY_BALANCE cho một biến động kho (gọi từ các trigger trên INVENTORY_LEDGER)
+-- p_import_qty / p_issue_qty có thể âm khi hoàn tác một biến động cũ
+DROP PROCEDURE IF EXISTS sp_ApplyInventoryMovement //
+CREATE PROCEDURE sp_ApplyInventoryMovement(
+    IN p_supplies_id INT,
+    IN p_move_date DATE,
+    IN p_import_qty INT,
+    IN p_issue_qty INT
+)
+BEGIN
+    DECLARE v_month DATE;
+    DECLARE v_prev_end INT DEFAULT 0;
+
+    SET v_month = p_move_date - INTERVAL (DAY(p_move_date) - 1) DAY;
+
+    -- Tháng chưa có dòng -> tạo mới với Tồn Cuối = Tồn Cuối của tháng gần nhất trước đó
+    IF NOT EXISTS (
+        SELECT 1 FROM INVENTORY_MONTHLY_BALANCE
+        WHERE BalanceMonth = v_month AND SuppliesId = p_supplies_id
+    ) THEN
+        SELECT COALESCE(
+            (SELECT EndQty FROM INVENTORY_MONTHLY_BALANCE
+             WHERE SuppliesId = p_supplies_id AND BalanceMonth < v_month
+             ORDER BY BalanceMonth DESC
+             LIMIT 1), 0) INTO v_prev_end;
+
+        INSERT INTO INVENTORY_MONTHLY_BALANCE (BalanceMonth, SuppliesId, ImportQty, IssueQty, EndQty)
+        VALUES (v_month, p_supplies_id, 0, 0, v_prev_end);
+    END IF;
+
+    UPDATE INVENTORY_MONTHLY_BALANCE
+    SET ImportQty = ImportQty + p_import_qty,
+        IssueQty = IssueQty + p_issue_qty
+    WHERE BalanceMonth = v_month AND SuppliesId = p_supplies_id;
+
+    -- Tồn Cuối của tháng này và mọi tháng sau đều thay đổi theo
+    UPDATE INVENTORY_MONTHLY_BALANCE
+    SET EndQty = EndQty + p_import_qty - p_issue_qty
+    WHERE SuppliesId = p_supplies_id AND BalanceMonth >= v_month;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_AddBalanceAfterLedgerInsert //
+CREATE TRIGGER trg_AddBalanceAfterLedgerInsert
+AFTER INSERT ON INVENTORY_LEDGER
+FOR EACH ROW
+BEGIN
+    CALL sp_ApplyInventoryMovement(NEW.SuppliesId, NEW.MoveDate,
+        GREATEST(NEW.Quantity, 0), GREATEST(-NEW.Quantity, 0));
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SyncBalanceAfterLedgerUpdate //
+CREATE TRIGGER trg_SyncBalanceAfterLedgerUpdate
+AFTER UPDATE ON INVENTORY_LEDGER
+FOR EACH ROW
+BEGIN
+    -- Hoàn tác biến động cũ rồi áp dụng biến động mới (vật tư / ngày / số lượng có thể đổi)
+    CALL sp_ApplyInventoryMovement(OLD.SuppliesId, OLD.MoveDate,
+        -GREATEST(OLD.Quantity, 0), -GREATEST(-OLD.Quantity, 0));
+    CALL sp_ApplyInventoryMovement(NEW.SuppliesId, NEW.MoveDate,
+        GREATEST(NEW.Quantity, 0), GREATEST(-NEW.Quantity, 0));
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SubtractBalanceAfterLedgerDelete //
+CREATE TRIGGER trg_SubtractBalanceAfterLedgerDelete
+AFTER DELETE ON INVENTORY_LEDGER
+FOR EACH ROW
+BEGIN
+    CALL sp_ApplyInventoryMovement(OLD.SuppliesId, OLD.MoveDate,
+        -GREATEST(OLD.Quantity, 0), -GREATEST(-OLD.Quantity, 0));
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_AddOpeningLedgerAfterSupplies //
+CREATE TRIGGER trg_AddOpeningLedgerAfterSupplies
+AFTER INSERT ON SUPPLIES
+FOR EACH ROW
+BEGIN
+    -- Tồn kho ban đầu khi tạo vật tư được ghi sổ như một lần nhập
+    IF COALESCE(NEW.InventoryNumber, 0) <> 0 THEN
+        INSERT INTO INVENTORY_LEDGER (SuppliesId, MoveDate, Quantity, SourceType, SourceId)
+        VALUES (NEW.SuppliesId, CURDATE(), NEW.InventoryNumber, 'OPENING', NEW.SuppliesId);
+    END IF;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_RemoveLedgerBeforeSuppliesDelete //
+CREATE TRIGGER trg_RemoveLedgerBeforeSuppliesDelete
+BEFORE DELETE ON SUPPLIES
+FOR EACH ROW
+BEGIN
+    DELETE FROM INVENTORY_LEDGER WHERE SuppliesId = OLD.SuppliesId;
+    DELETE FROM INVENTORY_MONTHLY_BALANCE WHERE SuppliesId = OLD.SuppliesId;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_AddLedgerAfterImport //
+CREATE TRIGGER trg_AddLedgerAfterImport
+AFTER INSERT ON SUPPLIES_IMPORT
+FOR EACH ROW
+BEGIN
+    INSERT INTO INVENTORY_LEDGER (SuppliesId, MoveDate, Quantity, SourceType, SourceId)
+    VALUES (NEW.SuppliesId, NEW.ImportDate, NEW.ImportAmount, 'IMPORT', NEW.ImportId);
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SyncLedgerAfterImportUpdate //
+CREATE TRIGGER trg_SyncLedgerAfterImportUpdate
+AFTER UPDATE ON SUPPLIES_IMPORT
+FOR EACH ROW
+BEGIN
+    UPDATE INVENTORY_LEDGER
+    SET SuppliesId = NEW.SuppliesId,
+        MoveDate = NEW.ImportDate,
+        Quantity = NEW.ImportAmount
+    WHERE SourceType = 'IMPORT' AND SourceId = NEW.ImportId;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_RemoveLedgerAfterImportDelete //
+CREATE TRIGGER trg_RemoveLedgerAfterImportDelete
+AFTER DELETE ON SUPPLIES_IMPORT
+FOR EACH ROW
+BEGIN
+    DELETE FROM INVENTORY_LEDGER
+    WHERE SourceType = 'IMPORT' AND SourceId = OLD.ImportId;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_AddLedgerAfterRepairDetail //
+CREATE TRIGGER trg_AddLedgerAfterRepairDetail
+AFTER INSERT ON REPAIR_DETAILS
+FOR EACH ROW
+BEGIN
+    -- Xuất kho ghi theo ngày của phiếu sửa chữa
+    INSERT INTO INVENTORY_LEDGER (SuppliesId, MoveDate, Quantity, SourceType, SourceId)
+    SELECT NEW.SuppliesId, r.RepairDate, -NEW.SuppliesAmount, 'ISSUE', NEW.RepairDetailId
+    FROM REPAIR r
+    WHERE r.RepairId = NEW.RepairId;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SyncLedgerAfterRepairDetailUpdate //
+CREATE TRIGGER trg_SyncLedgerAfterRepairDetailUpdate
+AFTER UPDATE ON REPAIR_DETAILS
+FOR EACH ROW
+BEGIN
+    UPDATE INVENTORY_LEDGER l
+    JOIN REPAIR r ON r.RepairId = NEW.RepairId
+    SET l.SuppliesId = NEW.SuppliesId,
+        l.MoveDate = r.RepairDate,
+        l.Quantity = -NEW.SuppliesAmount
+    WHERE l.SourceType = 'ISSUE' AND l.SourceId = NEW.RepairDetailId;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_RemoveLedgerAfterRepairDetailDelete //
+CREATE TRIGGER trg_RemoveLedgerAfterRepairDetailDelete
+AFTER DELETE ON REPAIR_DETAILS
+FOR EACH ROW
+BEGIN
+    DELETE FROM INVENTORY_LEDGER
+    WHERE SourceType = 'ISSUE' AND SourceId = OLD.RepairDetailId;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_MoveLedgerAfterRepairDateChange //
+CREATE TRIGGER trg_MoveLedgerAfterRepairDateChange
+AFTER UPDATE ON REPAIR
+FOR EACH ROW
+BEGIN
+    IF OLD.RepairDate <> NEW.RepairDate THEN
+        UPDATE INVENTORY_LEDGER l
+        JOIN REPAIR_DETAILS rd ON l.SourceType = 'ISSUE' AND l.SourceId = rd.RepairDetailId
+        SET l.MoveDate = NEW.RepairDate
+        WHERE rd.RepairId = NEW.RepairId;
+    END IF;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_BumpRevenueVersionAfterInsert //
+CREATE TRIGGER trg_BumpRevenueVersionAfterInsert
+AFTER INSERT ON REVENUE_DAILY_BRAND
+FOR EACH ROW
+BEGIN
+    -- Doanh thu của tháng thay đổi -> báo cáo doanh thu đã lưu của tháng đó hết hiệu lực
+    INSERT INTO REPORT_DATA_VERSION (DataMonth, RevenueVersion)
+    VALUES (NEW.Day - INTERVAL (DAY(NEW.Day) - 1) DAY, 1)
+    ON DUPLICATE KEY UPDATE RevenueVersion = RevenueVersion + 1;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_BumpRevenueVersionAfterUpdate //
+CREATE TRIGGER trg_BumpRevenueVersionAfterUpdate
+AFTER UPDATE ON REVENUE_DAILY_BRAND
+FOR EACH ROW
+BEGIN
+    INSERT INTO REPORT_DATA_VERSION (DataMonth, RevenueVersion)
+    VALUES (NEW.Day - INTERVAL (DAY(NEW.Day) - 1) DAY, 1)
+    ON DUPLICATE KEY UPDATE RevenueVersion = RevenueVersion + 1;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_BumpRevenueVersionAfterDelete //
+CREATE TRIGGER trg_BumpRevenueVersionAfterDelete
+AFTER DELETE ON REVENUE_DAILY_BRAND
+FOR EACH ROW
+BEGIN
+    INSERT INTO REPORT_DATA_VERSION (DataMonth, RevenueVersion)
+    VALUES (OLD.Day - INTERVAL (DAY(OLD.Day) - 1) DAY, 1)
+    ON DUPLICATE KEY UPDATE RevenueVersion = RevenueVersion + 1;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_BumpStockVersionAfterInsert //
+CREATE TRIGGER trg_BumpStockVersionAfterInsert
+AFTER INSERT ON INVENTORY_MONTHLY_BALANCE
+FOR EACH ROW
+BEGIN
+    -- Tồn kho của tháng thay đổi -> báo cáo tồn kho của tháng đó và các tháng sau hết hiệu lực
+    INSERT INTO REPORT_DATA_VERSION (DataMonth, StockVersion)
+    VALUES (NEW.BalanceMonth, 1)
+    ON DUPLICATE KEY UPDATE StockVersion = StockVersion + 1;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_BumpStockVersionAfterUpdate //
+CREATE TRIGGER trg_BumpStockVersionAfterUpdate
+AFTER UPDATE ON INVENTORY_MONTHLY_BALANCE
+FOR EACH ROW
+BEGIN
+    INSERT INTO REPORT_DATA_VERSION (DataMonth, StockVersion)
+    VALUES (NEW.BalanceMonth, 1)
+    ON DUPLICATE KEY UPDATE StockVersion = StockVersion + 1;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_BumpStockVersionAfterDelete //
+CREATE TRIGGER trg_BumpStockVersionAfterDelete
+AFTER DELETE ON INVENTORY_MONTHLY_BALANCE
+FOR EACH ROW
+BEGIN
+    INSERT INTO REPORT_DATA_VERSION (DataMonth, StockVersion)
+    VALUES (OLD.BalanceMonth, 1)
+    ON DUPLICATE KEY UPDATE StockVersion = StockVersion + 1;
+END //
+DELIMITER ;
 
 -- Trigger: Xóa hiệu xe sẽ xóa cascade các xe liên quan
 DELIMITER //
@@ -230,6 +862,9 @@ BEGIN
         WHERE c.BrandId = OLD.BrandId
     );
     
+    -- Xóa dữ liệu doanh thu tổng hợp theo ngày của hiệu này
+    DELETE FROM REVENUE_DAILY_BRAND WHERE BrandId = OLD.BrandId;
+    
     -- Xóa phiếu thu của các xe thuộc hiệu này
     DELETE FROM RECEIPT 
     WHERE ReceptionId IN (
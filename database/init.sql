@@ -25,14 +25,20 @@ USE `garagemanagement`;
 DROP TABLE IF EXISTS `repair_details`;
 DROP TABLE IF EXISTS `repair`;
 DROP TABLE IF EXISTS `receipt`;
+DROP TABLE IF EXISTS `reception_daily_count`;
 DROP TABLE IF EXISTS `car_reception`;
 DROP TABLE IF EXISTS `car`;
 DROP TABLE IF EXISTS `car_brand`;
 DROP TABLE IF EXISTS `parameter`;
+DROP TABLE IF EXISTS `report_data_version`;
+DROP TABLE IF EXISTS `car_change_log`;
+DROP TABLE IF EXISTS `revenue_daily_brand`;
 DROP TABLE IF EXISTS `revenue_report_details`;
 DROP TABLE IF EXISTS `revenue_report`;
 DROP TABLE IF EXISTS `stock_report_details`;
 DROP TABLE IF EXISTS `stock_report`;
+DROP TABLE IF EXISTS `inventory_monthly_balance`;
+DROP TABLE IF EXISTS `inventory_ledger`;
 DROP TABLE IF EXISTS `supplies`;
 DROP TABLE IF EXISTS `wage`;
 
@@ -44,6 +50,8 @@ CREATE TABLE `car_brand` (
   UNIQUE KEY `BrandName` (`BrandName`)
 ) ENGINE=InnoDB AUTO_INCREMENT=7 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
+-- Parser ngram loại mọi token chứa stopword (vd. 'a', 'i') -> tắt stopword cho index FULLTEXT của car
+SET SESSION innodb_ft_enable_stopword = OFF;
 CREATE TABLE `car` (
   `LicensePlate` varchar(255) NOT NULL COMMENT 'License Plate (Primary Key)',
   `BrandId` int NOT NULL COMMENT 'Brand ID (Foreign Key)',
@@ -51,8 +59,14 @@ CREATE TABLE `car` (
   `PhoneNumber` varchar(20) DEFAULT NULL COMMENT 'Phone Number',
   `Address` varchar(255) CHARACTER SET utf8mb3 COLLATE utf8mb3_general_ci DEFAULT NULL COMMENT 'Address',
   `Email` varchar(255) DEFAULT NULL COMMENT 'Owner Email',
+  `TotalDebt` decimal(15,2) NOT NULL DEFAULT '0.00' COMMENT 'Total debt over all receptions (maintained by CAR_RECEPTION triggers)',
+  `PlateKey` varchar(255) GENERATED ALWAYS AS (upper(replace(replace(replace(`LicensePlate`,'-',''),'.',''),' ',''))) STORED COMMENT 'License plate without separators (search key)',
+  `OwnerKey` varchar(255) NOT NULL DEFAULT '' COMMENT 'Owner name lowercased without diacritics (maintained by CAR triggers)',
   PRIMARY KEY (`LicensePlate`),
   KEY `BrandId` (`BrandId`),
+  KEY `idx_car_total_debt` (`TotalDebt`),
+  FULLTEXT KEY `ftx_car_plate_key` (`PlateKey`) /*!50100 WITH PARSER `ngram` */ ,
+  FULLTEXT KEY `ftx_car_owner_key` (`OwnerKey`) /*!50100 WITH PARSER `ngram` */ ,
   CONSTRAINT `car_ibfk_1` FOREIGN KEY (`BrandId`) REFERENCES `car_brand` (`BrandId`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
@@ -62,10 +76,17 @@ CREATE TABLE `car_reception` (
   `ReceptionDate` date NOT NULL COMMENT 'Date of reception',
   `Debt` decimal(15,2) DEFAULT '0.00' COMMENT 'Total debt at the time of reception',
   PRIMARY KEY (`ReceptionId`),
-  KEY `LicensePlate` (`LicensePlate`),
+  KEY `idx_car_reception_plate_date` (`LicensePlate`,`ReceptionDate`),
+  KEY `idx_car_reception_date` (`ReceptionDate`),
   CONSTRAINT `car_reception_ibfk_1` FOREIGN KEY (`LicensePlate`) REFERENCES `car` (`LicensePlate`)
 ) ENGINE=InnoDB AUTO_INCREMENT=7 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
+CREATE TABLE `reception_daily_count` (
+  `ReceptionDate` date NOT NULL COMMENT 'Date of reception',
+  `Count` int NOT NULL DEFAULT '0' COMMENT 'Number of receptions on that date',
+  PRIMARY KEY (`ReceptionDate`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
 CREATE TABLE `parameter` (
   `name` varchar(50) NOT NULL,
   `value` int DEFAULT NULL,
@@ -77,7 +98,9 @@ CREATE TABLE `receipt` (
   `ReceptionId` int NOT NULL COMMENT 'Reception ID (Foreign Key)',
   `ReceiptDate` date NOT NULL COMMENT 'Payment Date',
   `MoneyAmount` decimal(15,2) NOT NULL COMMENT 'Amount Received',
-  PRIMARY KEY (`ReceiptId`)
+  PRIMARY KEY (`ReceiptId`),
+  KEY `idx_receipt_reception` (`ReceptionId`,`ReceiptDate`),
+  KEY `idx_receipt_date` (`ReceiptDate`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
 CREATE TABLE `repair` (
@@ -86,7 +109,8 @@ CREATE TABLE `repair` (
   `RepairDate` date NOT NULL COMMENT 'Repair Date',
   `RepairMoney` decimal(15,2) DEFAULT '0.00' COMMENT 'Total Repair Cost',
   PRIMARY KEY (`RepairId`),
-  KEY `ReceptionId` (`ReceptionId`),
+  KEY `idx_repair_reception` (`ReceptionId`,`RepairMoney`),
+  KEY `idx_repair_date` (`RepairDate`,`ReceptionId`,`RepairMoney`),
   CONSTRAINT `repair_ibfk_1` FOREIGN KEY (`ReceptionId`) REFERENCES `car_reception` (`ReceptionId`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
@@ -95,7 +119,8 @@ CREATE TABLE `supplies` (
   `SuppliesName` varchar(255) NOT NULL COMMENT 'Supply Name',
   `SuppliesPrice` decimal(15,2) NOT NULL DEFAULT '0.00' COMMENT 'Unit Price',
   `InventoryNumber` int DEFAULT '0' COMMENT 'Inventory Quantity',
-  PRIMARY KEY (`SuppliesId`)
+  PRIMARY KEY (`SuppliesId`),
+  KEY `idx_supplies_name` (`SuppliesName`)
 ) ENGINE=InnoDB AUTO_INCREMENT=7 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
 CREATE TABLE `wage` (
@@ -114,7 +139,7 @@ CREATE TABLE `repair_details` (
   `SuppliesAmount` int NOT NULL DEFAULT '1' COMMENT 'Quantity of supplies used',
   `WageId` int DEFAULT NULL COMMENT 'Wage ID (Foreign Key)',
   PRIMARY KEY (`RepairDetailId`),
-  KEY `RepairId` (`RepairId`),
+  KEY `idx_repair_details_repair` (`RepairId`,`SuppliesId`,`SuppliesAmount`),
   KEY `SuppliesId` (`SuppliesId`),
   KEY `WageId` (`WageId`),
   CONSTRAINT `repair_details_ibfk_1` FOREIGN KEY (`RepairId`) REFERENCES `repair` (`RepairId`),
@@ -127,7 +152,9 @@ CREATE TABLE `revenue_report` (
   `ReportMonth` int NOT NULL COMMENT 'Report Month',
   `ReportYear` int NOT NULL COMMENT 'Report Year',
   `TotalRevenue` decimal(15,2) DEFAULT '0.00' COMMENT 'Total Revenue',
-  PRIMARY KEY (`ReportId`)
+  `DataVersion` int NOT NULL DEFAULT '0' COMMENT 'REPORT_DATA_VERSION.RevenueVersion at generation',
+  PRIMARY KEY (`ReportId`),
+  UNIQUE KEY `uq_revenue_report_period` (`ReportMonth`,`ReportYear`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
 CREATE TABLE `revenue_report_details` (
@@ -144,11 +171,23 @@ CREATE TABLE `revenue_report_details` (
   CONSTRAINT `revenue_report_details_ibfk_2` FOREIGN KEY (`BrandId`) REFERENCES `car_brand` (`BrandId`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
+CREATE TABLE `revenue_daily_brand` (
+  `Day` date NOT NULL COMMENT 'Repair Date',
+  `BrandId` int NOT NULL COMMENT 'Brand ID (Foreign Key)',
+  `Count` int NOT NULL DEFAULT '0' COMMENT 'Number of repairs',
+  `TotalMoney` decimal(15,2) NOT NULL DEFAULT '0.00' COMMENT 'Total Amount',
+  PRIMARY KEY (`Day`,`BrandId`),
+  KEY `BrandId` (`BrandId`),
+  CONSTRAINT `revenue_daily_brand_ibfk_1` FOREIGN KEY (`BrandId`) REFERENCES `car_brand` (`BrandId`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
 CREATE TABLE `stock_report` (
   `StockReportId` int NOT NULL AUTO_INCREMENT COMMENT 'Stock Report ID',
   `ReportMonth` int NOT NULL COMMENT 'Report Month',
   `ReportYear` int NOT NULL COMMENT 'Report Year',
-  PRIMARY KEY (`StockReportId`)
+  `DataVersion` int NOT NULL DEFAULT '0' COMMENT 'Sum of REPORT_DATA_VERSION.StockVersion up to this month at generation',
+  PRIMARY KEY (`StockReportId`),
+  UNIQUE KEY `uq_stock_report_period` (`ReportMonth`,`ReportYear`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
 CREATE TABLE `stock_report_details` (
@@ -156,7 +195,8 @@ CREATE TABLE `stock_report_details` (
   `StockReportId` int NOT NULL COMMENT 'Stock Report ID (Foreign Key)',
   `SuppliesId` int NOT NULL COMMENT 'Supply ID (Foreign Key)',
   `BeginQty` int DEFAULT '0' COMMENT 'Beginning Inventory',
-  `IssueQty` int DEFAULT '0' COMMENT 'Incurred Quantity (Import/Export)',
+  `ImportQty` int DEFAULT '0' COMMENT 'Imported Quantity',
+  `IssueQty` int DEFAULT '0' COMMENT 'Issued Quantity',
   `EndQty` int DEFAULT '0' COMMENT 'Ending Inventory',
   PRIMARY KEY (`StockDetailId`),
   KEY `StockReportId` (`StockReportId`),
@@ -165,14 +205,54 @@ CREATE TABLE `stock_report_details` (
   CONSTRAINT `stock_report_details_ibfk_2` FOREIGN KEY (`SuppliesId`) REFERENCES `supplies` (`SuppliesId`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
+CREATE TABLE `report_data_version` (
+  `DataMonth` date NOT NULL COMMENT 'First day of month',
+  `RevenueVersion` int NOT NULL DEFAULT '0' COMMENT 'Revenue data change counter',
+  `StockVersion` int NOT NULL DEFAULT '0' COMMENT 'Stock data change counter',
+  PRIMARY KEY (`DataMonth`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+CREATE TABLE `car_change_log` (
+  `ChangeId` bigint NOT NULL AUTO_INCREMENT COMMENT 'Change sequence number (change token)',
+  `LicensePlate` varchar(255) NOT NULL COMMENT 'Changed car (no foreign key: deletions are logged too)',
+  `ChangedAt` timestamp(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3) COMMENT 'Change time (for pruning)',
+  PRIMARY KEY (`ChangeId`),
+  KEY `idx_car_change_log_time` (`ChangedAt`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
 CREATE TABLE SUPPLIES_IMPORT (
     ImportId INTEGER AUTO_INCREMENT PRIMARY KEY COMMENT 'Import Transaction ID (Auto-increment)',
     SuppliesId INTEGER NOT NULL COMMENT 'Supply ID (Foreign Key)',
     ImportAmount INTEGER NOT NULL COMMENT 'Quantity Imported',
     ImportDate DATE NOT NULL COMMENT 'Import Date',
+    INDEX idx_supplies_import_date (ImportDate),
     FOREIGN KEY (SuppliesId) REFERENCES SUPPLIES(SuppliesId)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
+CREATE TABLE `inventory_ledger` (
+  `LedgerId` int NOT NULL AUTO_INCREMENT COMMENT 'Ledger Entry ID (Auto-increment)',
+  `SuppliesId` int NOT NULL COMMENT 'Supply ID (Foreign Key)',
+  `MoveDate` date NOT NULL COMMENT 'Movement Date',
+  `Quantity` int NOT NULL COMMENT 'Signed Quantity (+ in / - out)',
+  `SourceType` varchar(10) NOT NULL COMMENT 'OPENING / IMPORT / ISSUE',
+  `SourceId` int NOT NULL COMMENT 'SuppliesId / ImportId / RepairDetailId',
+  PRIMARY KEY (`LedgerId`),
+  KEY `idx_inventory_ledger_source` (`SourceType`,`SourceId`),
+  KEY `idx_inventory_ledger_supplies_date` (`SuppliesId`,`MoveDate`),
+  CONSTRAINT `inventory_ledger_ibfk_1` FOREIGN KEY (`SuppliesId`) REFERENCES `supplies` (`SuppliesId`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+CREATE TABLE `inventory_monthly_balance` (
+  `BalanceMonth` date NOT NULL COMMENT 'First day of month',
+  `SuppliesId` int NOT NULL COMMENT 'Supply ID (Foreign Key)',
+  `ImportQty` int NOT NULL DEFAULT '0' COMMENT 'Quantity Imported in month',
+  `IssueQty` int NOT NULL DEFAULT '0' COMMENT 'Quantity Issued in month',
+  `EndQty` int NOT NULL DEFAULT '0' COMMENT 'Closing Balance',
+  PRIMARY KEY (`BalanceMonth`,`SuppliesId`),
+  KEY `idx_inventory_balance_supplies` (`SuppliesId`,`BalanceMonth`,`EndQty`),
+  CONSTRAINT `inventory_monthly_balance_ibfk_1` FOREIGN KEY (`SuppliesId`) REFERENCES `supplies` (`SuppliesId`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
 
 DELIMITER //
 DROP TRIGGER IF EXISTS trg_CheckMaxCarReception //
@@ -188,19 +268,96 @@ BEGIN
     FROM PARAMETER 
     WHERE name = 'MaxCarReception';
 
-    -- 2. Đếm số xe đã tiếp nhận trong ngày
-    SELECT COUNT(*) INTO current_cars
-    FROM CAR_RECEPTION
+    -- 2. Tăng bộ đếm của ngày (upsert giữ khóa dòng đến hết transaction,
+    --    các máy tiếp nhận cùng lúc sẽ xếp hàng trên cùng một dòng)
+    INSERT INTO RECEPTION_DAILY_COUNT (ReceptionDate, Count)
+    VALUES (NEW.ReceptionDate, 1)
+    ON DUPLICATE KEY UPDATE Count = Count + 1;
+
+    SELECT Count INTO current_cars
+    FROM RECEPTION_DAILY_COUNT
     WHERE ReceptionDate = NEW.ReceptionDate;
 
-    -- 3. Kiểm tra: Nếu số xe hiện tại >= giới hạn thì báo lỗi
-    IF current_cars >= max_cars THEN
+    -- 3. Kiểm tra: Nếu số xe sau khi thêm > giới hạn thì báo lỗi
+    --    (lỗi trong trigger hủy luôn lần tăng bộ đếm ở bước 2)
+    IF current_cars > max_cars THEN
         SIGNAL SQLSTATE '45000'
         SET MESSAGE_TEXT = 'Lỗi: Số lượng xe tiếp nhận trong ngày đã vượt quá quy định (MaxCarReception).';
     END IF;
 END //
 DELIMITER ;
 DELIMITER //
+DROP TRIGGER IF EXISTS trg_DecreaseReceptionCount //
+CREATE TRIGGER trg_DecreaseReceptionCount
+AFTER DELETE ON CAR_RECEPTION
+FOR EACH ROW
+BEGIN
+    -- Giảm bộ đếm của ngày tương ứng với lượt tiếp nhận vừa xóa
+    UPDATE RECEPTION_DAILY_COUNT
+    SET Count = Count - 1
+    WHERE ReceptionDate = OLD.ReceptionDate;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_MoveReceptionCount //
+CREATE TRIGGER trg_MoveReceptionCount
+AFTER UPDATE ON CAR_RECEPTION
+FOR EACH ROW
+BEGIN
+    -- Đổi ngày tiếp nhận: chuyển lượt đếm từ ngày cũ sang ngày mới
+    IF NEW.ReceptionDate <> OLD.ReceptionDate THEN
+        UPDATE RECEPTION_DAILY_COUNT
+        SET Count = Count - 1
+        WHERE ReceptionDate = OLD.ReceptionDate;
+
+        INSERT INTO RECEPTION_DAILY_COUNT (ReceptionDate, Count)
+        VALUES (NEW.ReceptionDate, 1)
+        ON DUPLICATE KEY UPDATE Count = Count + 1;
+    END IF;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_AddCarDebtAfterReception //
+CREATE TRIGGER trg_AddCarDebtAfterReception
+AFTER INSERT ON CAR_RECEPTION
+FOR EACH ROW
+BEGIN
+    -- Cộng nợ của lượt tiếp nhận mới vào tổng nợ của xe
+    IF COALESCE(NEW.Debt, 0) <> 0 THEN
+        UPDATE CAR
+        SET TotalDebt = TotalDebt + NEW.Debt
+        WHERE LicensePlate = NEW.LicensePlate;
+    END IF;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SyncCarDebtAfterReceptionUpdate //
+CREATE TRIGGER trg_SyncCarDebtAfterReceptionUpdate
+AFTER UPDATE ON CAR_RECEPTION
+FOR EACH ROW
+BEGIN
+    -- Debt thay đổi do phiếu sửa chữa (tăng) hoặc phiếu thu (trg_UpdateDebtAfterReceipt, giảm)
+    IF NEW.LicensePlate = OLD.LicensePlate THEN
+        IF NOT (NEW.Debt <=> OLD.Debt) THEN
+            UPDATE CAR
+            SET TotalDebt = TotalDebt + COALESCE(NEW.Debt, 0) - COALESCE(OLD.Debt, 0)
+            WHERE LicensePlate = NEW.LicensePlate;
+        END IF;
+    ELSE
+        UPDATE CAR
+        SET TotalDebt = TotalDebt - COALESCE(OLD.Debt, 0)
+        WHERE LicensePlate = OLD.LicensePlate;
+
+        UPDATE CAR
+        SET TotalDebt = TotalDebt + COALESCE(NEW.Debt, 0)
+        WHERE LicensePlate = NEW.LicensePlate;
+    END IF;
+END //
+DELIMITER ;
+-- Lưu ý: không có trigger AFTER DELETE cho TotalDebt. Lượt tiếp nhận chỉ bị xóa bởi
+-- trg_DeleteCarBrand, câu lệnh đó đọc CAR nên trigger không được phép cập nhật CAR (lỗi 1442),
+-- và các xe liên quan cũng bị xóa ngay sau đó. Trường hợp khác: CALL sp_ReconcileCarDebt(@fixed).
+DELIMITER //
 
 DROP TRIGGER IF EXISTS trg_CheckPaymentLimit //
 
@@ -238,6 +395,475 @@ BEGIN
     WHERE ReceptionId = NEW.ReceptionId;
 END //
 DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_AddRevenueAfterRepair //
+CREATE TRIGGER trg_AddRevenueAfterRepair
+AFTER INSERT ON REPAIR
+FOR EACH ROW
+BEGIN
+    DECLARE v_brand_id INT;
+
+    -- Hiệu xe của phiếu sửa chữa: REPAIR -> CAR_RECEPTION -> CAR
+    SELECT c.BrandId INTO v_brand_id
+    FROM CAR_RECEPTION cr
+    JOIN CAR c ON cr.LicensePlate = c.LicensePlate
+    WHERE cr.ReceptionId = NEW.ReceptionId;
+
+    INSERT INTO REVENUE_DAILY_BRAND (Day, BrandId, Count, TotalMoney)
+    VALUES (NEW.RepairDate, v_brand_id, 1, COALESCE(NEW.RepairMoney, 0))
+    ON DUPLICATE KEY UPDATE
+        Count = Count + 1,
+        TotalMoney = TotalMoney + COALESCE(NEW.RepairMoney, 0);
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SyncRevenueAfterRepairUpdate //
+CREATE TRIGGER trg_SyncRevenueAfterRepairUpdate
+AFTER UPDATE ON REPAIR
+FOR EACH ROW
+BEGIN
+    DECLARE v_old_brand_id INT;
+    DECLARE v_new_brand_id INT;
+
+    -- Bỏ phần của dòng cũ rồi cộng phần của dòng mới (ngày / lượt tiếp nhận / số tiền có thể đổi)
+    SELECT c.BrandId INTO v_old_brand_id
+    FROM CAR_RECEPTION cr
+    JOIN CAR c ON cr.LicensePlate = c.LicensePlate
+    WHERE cr.ReceptionId = OLD.ReceptionId;
+
+    SELECT c.BrandId INTO v_new_brand_id
+    FROM CAR_RECEPTION cr
+    JOIN CAR c ON cr.LicensePlate = c.LicensePlate
+    WHERE cr.ReceptionId = NEW.ReceptionId;
+
+    UPDATE REVENUE_DAILY_BRAND
+    SET Count = Count - 1,
+        TotalMoney = TotalMoney - COALESCE(OLD.RepairMoney, 0)
+    WHERE Day = OLD.RepairDate AND BrandId = v_old_brand_id;
+
+    INSERT INTO REVENUE_DAILY_BRAND (Day, BrandId, Count, TotalMoney)
+    VALUES (NEW.RepairDate, v_new_brand_id, 1, COALESCE(NEW.RepairMoney, 0))
+    ON DUPLICATE KEY UPDATE
+        Count = Count + 1,
+        TotalMoney = TotalMoney + COALESCE(NEW.RepairMoney, 0);
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SubtractRevenueAfterRepairDelete //
+CREATE TRIGGER trg_SubtractRevenueAfterRepairDelete
+AFTER DELETE ON REPAIR
+FOR EACH ROW
+BEGIN
+    DECLARE v_brand_id INT;
+
+    SELECT c.BrandId INTO v_brand_id
+    FROM CAR_RECEPTION cr
+    JOIN CAR c ON cr.LicensePlate = c.LicensePlate
+    WHERE cr.ReceptionId = OLD.ReceptionId;
+
+    UPDATE REVENUE_DAILY_BRAND
+    SET Count = Count - 1,
+        TotalMoney = TotalMoney - COALESCE(OLD.RepairMoney, 0)
+    WHERE Day = OLD.RepairDate AND BrandId = v_brand_id;
+END //
+DELIMITER ;
+DELIMITER //
+DROP FUNCTION IF EXISTS fn_FoldVietnamese //
+-- Chữ thường, bỏ dấu tiếng Việt: 'Nguyễn Văn Đức' -> 'nguyen van duc'
+-- (cùng bảng chữ với utils.search_keys.fold_text phía ứng dụng)
+CREATE FUNCTION fn_FoldVietnamese(p_text VARCHAR(255) CHARSET utf8mb4)
+RETURNS VARCHAR(255) CHARSET utf8mb4
+DETERMINISTIC NO SQL
+BEGIN
+    DECLARE v_from VARCHAR(67) CHARSET utf8mb4 DEFAULT 'àáảãạăằắẳẵặâầấẩẫậèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵđ';
+    DECLARE v_to VARCHAR(67) CHARSET utf8mb4 DEFAULT 'aaaaaaaaaaaaaaaaaeeeeeeeeeeeiiiiiooooooooooooooooouuuuuuuuuuuyyyyyd';
+    DECLARE v_result VARCHAR(255) CHARSET utf8mb4 DEFAULT LOWER(p_text);
+    DECLARE i INT DEFAULT 1;
+
+    -- REPLACE so khớp phân biệt dấu nên thay được từng chữ có dấu
+    WHILE i <= CHAR_LENGTH(v_from) DO
+        SET v_result = REPLACE(v_result, SUBSTRING(v_from, i, 1), SUBSTRING(v_to, i, 1));
+        SET i = i + 1;
+    END WHILE;
+
+    RETURN TRIM(v_result);
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SetCarOwnerKeyBeforeInsert //
+CREATE TRIGGER trg_SetCarOwnerKeyBeforeInsert
+BEFORE INSERT ON CAR
+FOR EACH ROW
+BEGIN
+    SET NEW.OwnerKey = fn_FoldVietnamese(NEW.OwnerName);
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SetCarOwnerKeyBeforeUpdate //
+CREATE TRIGGER trg_SetCarOwnerKeyBeforeUpdate
+BEFORE UPDATE ON CAR
+FOR EACH ROW
+BEGIN
+    -- Chỉ chuẩn hóa lại khi tên chủ xe đổi (cập nhật nợ, SĐT... không gọi hàm gấp dấu)
+    IF NOT (NEW.OwnerName <=> OLD.OwnerName) THEN
+        SET NEW.OwnerKey = fn_FoldVietnamese(NEW.OwnerName);
+    END IF;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_MoveRevenueAfterCarBrandChange //
+CREATE TRIGGER trg_MoveRevenueAfterCarBrandChange
+AFTER UPDATE ON CAR
+FOR EACH ROW
+BEGIN
+    -- Đổi hiệu xe (sp_ReceiveCar cập nhật lại thông tin xe) -> chuyển doanh thu các phiếu sửa chữa cũ sang hiệu mới
+    IF OLD.BrandId <> NEW.BrandId THEN
+        UPDATE REVENUE_DAILY_BRAND rdb
+        JOIN (
+            SELECT r.RepairDate, COUNT(r.RepairId) AS cnt, COALESCE(SUM(r.RepairMoney), 0) AS money
+            FROM REPAIR r
+            JOIN CAR_RECEPTION cr ON r.ReceptionId = cr.ReceptionId
+            WHERE cr.LicensePlate = NEW.LicensePlate
+            GROUP BY r.RepairDate
+        ) moved ON rdb.Day = moved.RepairDate
+        SET rdb.Count = rdb.Count - moved.cnt,
+            rdb.TotalMoney = rdb.TotalMoney - moved.money
+        WHERE rdb.BrandId = OLD.BrandId;
+
+        INSERT INTO REVENUE_DAILY_BRAND (Day, BrandId, Count, TotalMoney)
+        SELECT moved.RepairDate, NEW.BrandId, moved.cnt, moved.money
+        FROM (
+            SELECT r.RepairDate, COUNT(r.RepairId) AS cnt, COALESCE(SUM(r.RepairMoney), 0) AS money
+            FROM REPAIR r
+            JOIN CAR_RECEPTION cr ON r.ReceptionId = cr.ReceptionId
+            WHERE cr.LicensePlate = NEW.LicensePlate
+            GROUP BY r.RepairDate
+        ) moved
+        ON DUPLICATE KEY UPDATE
+            Count = REVENUE_DAILY_BRAND.Count + moved.cnt,
+            TotalMoney = REVENUE_DAILY_BRAND.TotalMoney + moved.money;
+    END IF;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_LogCarChangeAfterInsert //
+CREATE TRIGGER trg_LogCarChangeAfterInsert
+AFTER INSERT ON CAR
+FOR EACH ROW
+BEGIN
+    INSERT INTO CAR_CHANGE_LOG (LicensePlate) VALUES (NEW.LicensePlate);
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_LogCarChangeAfterUpdate //
+CREATE TRIGGER trg_LogCarChangeAfterUpdate
+AFTER UPDATE ON CAR
+FOR EACH ROW
+BEGIN
+    -- Tiếp nhận, phiếu sửa chữa, phiếu thu đổi CAR.TotalDebt qua trigger của CAR_RECEPTION -> cũng được ghi ở đây
+    IF NOT (NEW.LicensePlate <=> OLD.LicensePlate
+            AND NEW.BrandId <=> OLD.BrandId
+            AND NEW.OwnerName <=> OLD.OwnerName
+            AND NEW.PhoneNumber <=> OLD.PhoneNumber
+            AND NEW.Address <=> OLD.Address
+            AND NEW.TotalDebt <=> OLD.TotalDebt) THEN
+        IF NEW.LicensePlate <> OLD.LicensePlate THEN
+            INSERT INTO CAR_CHANGE_LOG (LicensePlate) VALUES (OLD.LicensePlate);
+        END IF;
+        INSERT INTO CAR_CHANGE_LOG (LicensePlate) VALUES (NEW.LicensePlate);
+    END IF;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_LogCarChangeAfterDelete //
+CREATE TRIGGER trg_LogCarChangeAfterDelete
+AFTER DELETE ON CAR
+FOR EACH ROW
+BEGIN
+    INSERT INTO CAR_CHANGE_LOG (LicensePlate) VALUES (OLD.LicensePlate);
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_LogCarChangeAfterBrandRename //
+CREATE TRIGGER trg_LogCarChangeAfterBrandRename
+AFTER UPDATE ON CAR_BRAND
+FOR EACH ROW
+BEGIN
+    -- Tên hiệu xe hiển thị cùng từng xe -> đổi tên hiệu là thay đổi của mọi xe thuộc hiệu đó
+    IF NOT (NEW.BrandName <=> OLD.BrandName) THEN
+        INSERT INTO CAR_CHANGE_LOG (LicensePlate)
+        SELECT LicensePlate FROM CAR WHERE BrandId = NEW.BrandId;
+    END IF;
+END //
+DELIMITER ;
+-- Dọn nhật ký thay đổi cũ hơn 1 ngày (cần event_scheduler = ON, mặc định của MySQL 8).
+-- Luôn giữ dòng mới nhất để mã thay đổi hiện tại vẫn đọc được; nơi gọi có mã cũ hơn
+-- phần đã dọn sẽ được báo tải lại toàn bộ (xem VehicleLookupService.get_changes_since).
+DELIMITER //
+DROP EVENT IF EXISTS evt_PruneCarChangeLog //
+CREATE EVENT evt_PruneCarChangeLog
+ON SCHEDULE EVERY 1 HOUR
+DO
+BEGIN
+    DECLARE v_last_id BIGINT;
+
+    SELECT MAX(ChangeId) INTO v_last_id FROM CAR_CHANGE_LOG;
+
+    DELETE FROM CAR_CHANGE_LOG
+    WHERE ChangedAt < NOW(3) - INTERVAL 1 DAY
+      AND ChangeId < v_last_id;
+END //
+DELIMITER ;
+DELIMITER //
+-- Cập nhật INVENTORY_MONTHLY_BALANCE cho một biến động kho (gọi từ các trigger trên INVENTORY_LEDGER)
+-- p_import_qty / p_issue_qty có thể âm khi hoàn tác một biến động cũ
+DROP PROCEDURE IF EXISTS sp_ApplyInventoryMovement //
+CREATE PROCEDURE sp_ApplyInventoryMovement(
+    IN p_supplies_id INT,
+    IN p_move_date DATE,
+    IN p_import_qty INT,
+    IN p_issue_qty INT
+)
+BEGIN
+    DECLARE v_month DATE;
+    DECLARE v_prev_end INT DEFAULT 0;
+
+    SET v_month = p_move_date - INTERVAL (DAY(p_move_date) - 1) DAY;
+
+    -- Tháng chưa có dòng -> tạo mới với Tồn Cuối = Tồn Cuối của tháng gần nhất trước đó
+    IF NOT EXISTS (
+        SELECT 1 FROM INVENTORY_MONTHLY_BALANCE
+        WHERE BalanceMonth = v_month AND SuppliesId = p_supplies_id
+    ) THEN
+        SELECT COALESCE(
+            (SELECT EndQty FROM INVENTORY_MONTHLY_BALANCE
+             WHERE SuppliesId = p_supplies_id AND BalanceMonth < v_month
+             ORDER BY BalanceMonth DESC
+             LIMIT 1), 0) INTO v_prev_end;
+
+        INSERT INTO INVENTORY_MONTHLY_BALANCE (BalanceMonth, SuppliesId, ImportQty, IssueQty, EndQty)
+        VALUES (v_month, p_supplies_id, 0, 0, v_prev_end);
+    END IF;
+
+    UPDATE INVENTORY_MONTHLY_BALANCE
+    SET ImportQty = ImportQty + p_import_qty,
+        IssueQty = IssueQty + p_issue_qty
+    WHERE BalanceMonth = v_month AND SuppliesId = p_supplies_id;
+
+    -- Tồn Cuối của tháng này và mọi tháng sau đều thay đổi theo
+    UPDATE INVENTORY_MONTHLY_BALANCE
+    SET EndQty = EndQty + p_import_qty - p_issue_qty
+    WHERE SuppliesId = p_supplies_id AND BalanceMonth >= v_month;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_AddBalanceAfterLedgerInsert //
+CREATE TRIGGER trg_AddBalanceAfterLedgerInsert
+AFTER INSERT ON INVENTORY_LEDGER
+FOR EACH ROW
+BEGIN
+    CALL sp_ApplyInventoryMovement(NEW.SuppliesId, NEW.MoveDate,
+        GREATEST(NEW.Quantity, 0), GREATEST(-NEW.Quantity, 0));
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SyncBalanceAfterLedgerUpdate //
+CREATE TRIGGER trg_SyncBalanceAfterLedgerUpdate
+AFTER UPDATE ON INVENTORY_LEDGER
+FOR EACH ROW
+BEGIN
+    -- Hoàn tác biến động cũ rồi áp dụng biến động mới (vật tư / ngày / số lượng có thể đổi)
+    CALL sp_ApplyInventoryMovement(OLD.SuppliesId, OLD.MoveDate,
+        -GREATEST(OLD.Quantity, 0), -GREATEST(-OLD.Quantity, 0));
+    CALL sp_ApplyInventoryMovement(NEW.SuppliesId, NEW.MoveDate,
+        GREATEST(NEW.Quantity, 0), GREATEST(-NEW.Quantity, 0));
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SubtractBalanceAfterLedgerDelete //
+CREATE TRIGGER trg_SubtractBalanceAfterLedgerDelete
+AFTER DELETE ON INVENTORY_LEDGER
+FOR EACH ROW
+BEGIN
+    CALL sp_ApplyInventoryMovement(OLD.SuppliesId, OLD.MoveDate,
+        -GREATEST(OLD.Quantity, 0), -GREATEST(-OLD.Quantity, 0));
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_AddOpeningLedgerAfterSupplies //
+CREATE TRIGGER trg_AddOpeningLedgerAfterSupplies
+AFTER INSERT ON SUPPLIES
+FOR EACH ROW
+BEGIN
+    -- Tồn kho ban đầu khi tạo vật tư được ghi sổ như một lần nhập
+    IF COALESCE(NEW.InventoryNumber, 0) <> 0 THEN
+        INSERT INTO INVENTORY_LEDGER (SuppliesId, MoveDate, Quantity, SourceType, SourceId)
+        VALUES (NEW.SuppliesId, CURDATE(), NEW.InventoryNumber, 'OPENING', NEW.SuppliesId);
+    END IF;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_RemoveLedgerBeforeSuppliesDelete //
+CREATE TRIGGER trg_RemoveLedgerBeforeSuppliesDelete
+BEFORE DELETE ON SUPPLIES
+FOR EACH ROW
+BEGIN
+    DELETE FROM INVENTORY_LEDGER WHERE SuppliesId = OLD.SuppliesId;
+    DELETE FROM INVENTORY_MONTHLY_BALANCE WHERE SuppliesId = OLD.SuppliesId;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_AddLedgerAfterImport //
+CREATE TRIGGER trg_AddLedgerAfterImport
+AFTER INSERT ON SUPPLIES_IMPORT
+FOR EACH ROW
+BEGIN
+    INSERT INTO INVENTORY_LEDGER (SuppliesId, MoveDate, Quantity, SourceType, SourceId)
+    VALUES (NEW.SuppliesId, NEW.ImportDate, NEW.ImportAmount, 'IMPORT', NEW.ImportId);
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SyncLedgerAfterImportUpdate //
+CREATE TRIGGER trg_SyncLedgerAfterImportUpdate
+AFTER UPDATE ON SUPPLIES_IMPORT
+FOR EACH ROW
+BEGIN
+    UPDATE INVENTORY_LEDGER
+    SET SuppliesId = NEW.SuppliesId,
+        MoveDate = NEW.ImportDate,
+        Quantity = NEW.ImportAmount
+    WHERE SourceType = 'IMPORT' AND SourceId = NEW.ImportId;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_RemoveLedgerAfterImportDelete //
+CREATE TRIGGER trg_RemoveLedgerAfterImportDelete
+AFTER DELETE ON SUPPLIES_IMPORT
+FOR EACH ROW
+BEGIN
+    DELETE FROM INVENTORY_LEDGER
+    WHERE SourceType = 'IMPORT' AND SourceId = OLD.ImportId;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_AddLedgerAfterRepairDetail //
+CREATE TRIGGER trg_AddLedgerAfterRepairDetail
+AFTER INSERT ON REPAIR_DETAILS
+FOR EACH ROW
+BEGIN
+    -- Xuất kho ghi theo ngày của phiếu sửa chữa
+    INSERT INTO INVENTORY_LEDGER (SuppliesId, MoveDate, Quantity, SourceType, SourceId)
+    SELECT NEW.SuppliesId, r.RepairDate, -NEW.SuppliesAmount, 'ISSUE', NEW.RepairDetailId
+    FROM REPAIR r
+    WHERE r.RepairId = NEW.RepairId;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SyncLedgerAfterRepairDetailUpdate //
+CREATE TRIGGER trg_SyncLedgerAfterRepairDetailUpdate
+AFTER UPDATE ON REPAIR_DETAILS
+FOR EACH ROW
+BEGIN
+    UPDATE INVENTORY_LEDGER l
+    JOIN REPAIR r ON r.RepairId = NEW.RepairId
+    SET l.SuppliesId = NEW.SuppliesId,
+        l.MoveDate = r.RepairDate,
+        l.Quantity = -NEW.SuppliesAmount
+    WHERE l.SourceType = 'ISSUE' AND l.SourceId = NEW.RepairDetailId;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_RemoveLedgerAfterRepairDetailDelete //
+CREATE TRIGGER trg_RemoveLedgerAfterRepairDetailDelete
+AFTER DELETE ON REPAIR_DETAILS
+FOR EACH ROW
+BEGIN
+    DELETE FROM INVENTORY_LEDGER
+    WHERE SourceType = 'ISSUE' AND SourceId = OLD.RepairDetailId;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_MoveLedgerAfterRepairDateChange //
+CREATE TRIGGER trg_MoveLedgerAfterRepairDateChange
+AFTER UPDATE ON REPAIR
+FOR EACH ROW
+BEGIN
+    IF OLD.RepairDate <> NEW.RepairDate THEN
+        UPDATE INVENTORY_LEDGER l
+        JOIN REPAIR_DETAILS rd ON l.SourceType = 'ISSUE' AND l.SourceId = rd.RepairDetailId
+        SET l.MoveDate = NEW.RepairDate
+        WHERE rd.RepairId = NEW.RepairId;
+    END IF;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_BumpRevenueVersionAfterInsert //
+CREATE TRIGGER trg_BumpRevenueVersionAfterInsert
+AFTER INSERT ON REVENUE_DAILY_BRAND
+FOR EACH ROW
+BEGIN
+    -- Doanh thu của tháng thay đổi -> báo cáo doanh thu đã lưu của tháng đó hết hiệu lực
+    INSERT INTO REPORT_DATA_VERSION (DataMonth, RevenueVersion)
+    VALUES (NEW.Day - INTERVAL (DAY(NEW.Day) - 1) DAY, 1)
+    ON DUPLICATE KEY UPDATE RevenueVersion = RevenueVersion + 1;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_BumpRevenueVersionAfterUpdate //
+CREATE TRIGGER trg_BumpRevenueVersionAfterUpdate
+AFTER UPDATE ON REVENUE_DAILY_BRAND
+FOR EACH ROW
+BEGIN
+    INSERT INTO REPORT_DATA_VERSION (DataMonth, RevenueVersion)
+    VALUES (NEW.Day - INTERVAL (DAY(NEW.Day) - 1) DAY, 1)
+    ON DUPLICATE KEY UPDATE RevenueVersion = RevenueVersion + 1;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_BumpRevenueVersionAfterDelete //
+CREATE TRIGGER trg_BumpRevenueVersionAfterDelete
+AFTER DELETE ON REVENUE_DAILY_BRAND
+FOR EACH ROW
+BEGIN
+    INSERT INTO REPORT_DATA_VERSION (DataMonth, RevenueVersion)
+    VALUES (OLD.Day - INTERVAL (DAY(OLD.Day) - 1) DAY, 1)
+    ON DUPLICATE KEY UPDATE RevenueVersion = RevenueVersion + 1;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_BumpStockVersionAfterInsert //
+CREATE TRIGGER trg_BumpStockVersionAfterInsert
+AFTER INSERT ON INVENTORY_MONTHLY_BALANCE
+FOR EACH ROW
+BEGIN
+    -- Tồn kho của tháng thay đổi -> báo cáo tồn kho của tháng đó và các tháng sau hết hiệu lực
+    INSERT INTO REPORT_DATA_VERSION (DataMonth, StockVersion)
+    VALUES (NEW.BalanceMonth, 1)
+    ON DUPLICATE KEY UPDATE StockVersion = StockVersion + 1;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_BumpStockVersionAfterUpdate //
+CREATE TRIGGER trg_BumpStockVersionAfterUpdate
+AFTER UPDATE ON INVENTORY_MONTHLY_BALANCE
+FOR EACH ROW
+BEGIN
+    INSERT INTO REPORT_DATA_VERSION (DataMonth, StockVersion)
+    VALUES (NEW.BalanceMonth, 1)
+    ON DUPLICATE KEY UPDATE StockVersion = StockVersion + 1;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_BumpStockVersionAfterDelete //
+CREATE TRIGGER trg_BumpStockVersionAfterDelete
+AFTER DELETE ON INVENTORY_MONTHLY_BALANCE
+FOR EACH ROW
+BEGIN
+    INSERT INTO REPORT_DATA_VERSION (DataMonth, StockVersion)
+    VALUES (OLD.BalanceMonth, 1)
+    ON DUPLICATE KEY UPDATE StockVersion = StockVersion + 1;
+END //
+DELIMITER ;
 
 --
 -- Insert data after all table and trigger definitions
@@ -251,7 +877,7 @@ UNLOCK TABLES;
 
 LOCK TABLES `car` WRITE;
 /*!40000 ALTER TABLE `car` DISABLE KEYS */;
-INSERT INTO `car` VALUES ('30F-111.22',4,'Phạm Minh Dũng','0905111222','Hoàn Kiếm, Hà Nội','dung.pham@email.com'),('51A',5,'AAAA','9237287355','aaa',NULL),('51H-987.65',2,'Trần Thị Bích','0912345678','45 Nguyễn Trãi, Q5, TP.HCM','bich.tran@email.com'),('59A-123.45',1,'Nguyễn Văn An','0909123456','123 Lê Lợi, Q1, TP.HCM','an.nguyen@email.com'),('59K-234.56',1,'Võ Thị Em','0933444555','Thủ Đức, TP.HCM','em.vo@email.com'),('60C-555.88',3,'Lê Hoàng Cường','0988777666','Biên Hòa, Đồng Nai','cuong.le@email.com'),('62A-616.36',5,'Võ Thành Đạt','0369472671','Địa ngọc',NULL);
+INSERT INTO `car` (`LicensePlate`, `BrandId`, `OwnerName`, `PhoneNumber`, `Address`, `Email`) VALUES ('30F-111.22',4,'Phạm Minh Dũng','0905111222','Hoàn Kiếm, Hà Nội','dung.pham@email.com'),('51A',5,'AAAA','9237287355','aaa',NULL),('51H-987.65',2,'Trần Thị Bích','0912345678','45 Nguyễn Trãi, Q5, TP.HCM','bich.tran@email.com'),('59A-123.45',1,'Nguyễn Văn An','0909123456','123 Lê Lợi, Q1, TP.HCM','an.nguyen@email.com'),('59K-234.56',1,'Võ Thị Em','0933444555','Thủ Đức, TP.HCM','em.vo@email.com'),('60C-555.88',3,'Lê Hoàng Cường','0988777666','Biên Hòa, Đồng Nai','cuong.le@email.com'),('62A-616.36',5,'Võ Thành Đạt','0369472671','Địa ngọc',NULL);
 /*!40000 ALTER TABLE `car` ENABLE KEYS */;
 UNLOCK TABLES;
 
@@ -292,19 +918,18 @@ CREATE PROCEDURE sp_CreateStockReport(
 )
 BEGIN
     DECLARE v_existing_report_id INT DEFAULT NULL;
-    DECLARE v_prev_month INT;
-    DECLARE v_prev_year INT;
+    DECLARE v_start_date DATE;
+    DECLARE v_data_version INT DEFAULT 0;
     
-    -- ===============================================
-    -- Tính tháng trước để lấy Tồn Đầu (từ D3)
-    -- ===============================================
-    IF p_month = 1 THEN
-        SET v_prev_month = 12;
-        SET v_prev_year = p_year - 1;
-    ELSE
-        SET v_prev_month = p_month - 1;
-        SET v_prev_year = p_year;
-    END IF;
+    -- Ngày đầu tháng báo cáo = khóa BalanceMonth trong INVENTORY_MONTHLY_BALANCE
+    SET v_start_date = MAKEDATE(p_year, 1) + INTERVAL (p_month - 1) MONTH;
+    
+    -- Phiên bản dữ liệu tồn kho: tổng StockVersion từ đầu đến tháng báo cáo
+    -- (Tồn Đầu phụ thuộc mọi tháng trước đó). REPORT_DATA_VERSION có một dòng mỗi tháng:
+    -- đọc theo khoảng khóa chính các tháng <= tháng báo cáo, không đọc số dư từng vật tư
+    SELECT COALESCE(SUM(StockVersion), 0) INTO v_data_version
+    FROM REPORT_DATA_VERSION
+    WHERE DataMonth <= v_start_date;
     
     -- ===============================================
     -- 1. Kiểm tra báo cáo đã tồn tại → Xóa để tạo lại
@@ -322,60 +947,44 @@ BEGIN
     -- ===============================================
     -- 2. Tạo record chính D4: STOCK_REPORT
     -- ===============================================
-    INSERT INTO STOCK_REPORT (ReportMonth, ReportYear)
-    VALUES (p_month, p_year);
+    INSERT INTO STOCK_REPORT (ReportMonth, ReportYear, DataVersion)
+    VALUES (p_month, p_year, v_data_version);
     
     SET p_report_id = LAST_INSERT_ID();
     
     -- ===============================================
     -- 3. Tạo chi tiết D4: STOCK_REPORT_DETAILS
-    -- Xử lý D3:
+    -- Xử lý D3 (INVENTORY_MONTHLY_BALANCE do các trigger sổ kho duy trì):
     --   - Danh mục Vật Tư (SUPPLIES)
-    --   - Tồn Đầu: EndQty tháng trước từ STOCK_REPORT_DETAILS
-    --   - Phát Sinh: SUM(SuppliesAmount) từ REPAIR_DETAILS
-    --   - Tồn Cuối = Tồn Đầu - Phát Sinh
+    --   - Tồn Đầu: Tồn Cuối của tháng gần nhất trước tháng báo cáo có biến động
+    --   - Nhập / Phát Sinh: tổng nhập / xuất trong tháng báo cáo
+    --   - Tồn Cuối = Tồn Đầu + Nhập - Phát Sinh
+    -- Không phụ thuộc báo cáo các tháng trước, tạo lại được cho bất kỳ tháng nào
     -- ===============================================
-    INSERT INTO STOCK_REPORT_DETAILS (StockReportId, SuppliesId, BeginQty, IssueQty, EndQty)
+    INSERT INTO STOCK_REPORT_DETAILS (StockReportId, SuppliesId, BeginQty, ImportQty, IssueQty, EndQty)
     SELECT 
         p_report_id AS StockReportId,
         s.SuppliesId,
-        -- BeginQty (Tồn Đầu): Lấy từ Tồn Cuối tháng trước hoặc tính ngược từ inventory hiện tại
-        COALESCE(
-            (SELECT srd.EndQty 
-             FROM STOCK_REPORT_DETAILS srd
-             JOIN STOCK_REPORT sr ON srd.StockReportId = sr.StockReportId
-             WHERE sr.ReportMonth = v_prev_month 
-               AND sr.ReportYear = v_prev_year
-               AND srd.SuppliesId = s.SuppliesId
-             LIMIT 1),
-            -- Nếu không có tháng trước: Tồn hiện tại + Phát sinh = Tồn Đầu
-            s.InventoryNumber + COALESCE(issue.total_issued, 0)
-        ) AS BeginQty,
-        -- IssueQty (Phát Sinh): Tổng xuất kho trong tháng từ REPAIR_DETAILS
-        COALESCE(issue.total_issued, 0) AS IssueQty,
-        -- EndQty (Tồn Cuối): Tồn Đầu - Phát Sinh (không có nhập trong hệ thống)
-        COALESCE(
-            (SELECT srd.EndQty 
-             FROM STOCK_REPORT_DETAILS srd
-             JOIN STOCK_REPORT sr ON srd.StockReportId = sr.StockReportId
-             WHERE sr.ReportMonth = v_prev_month 
-               AND sr.ReportYear = v_prev_year
-               AND srd.SuppliesId = s.SuppliesId
-             LIMIT 1),
-            s.InventoryNumber + COALESCE(issue.total_issued, 0)
-        ) - COALESCE(issue.total_issued, 0) AS EndQty
+        COALESCE(prev.EndQty, 0) AS BeginQty,
+        COALESCE(cur.ImportQty, 0) AS ImportQty,
+        COALESCE(cur.IssueQty, 0) AS IssueQty,
+        COALESCE(prev.EndQty, 0) + COALESCE(cur.ImportQty, 0) - COALESCE(cur.IssueQty, 0) AS EndQty
     FROM SUPPLIES s
+    LEFT JOIN INVENTORY_MONTHLY_BALANCE cur
+        ON cur.BalanceMonth = v_start_date
+       AND cur.SuppliesId = s.SuppliesId
     LEFT JOIN (
-        -- D3: Tính Phát Sinh từ Chi tiết Phiếu Sửa Chữa trong tháng
-        SELECT 
-            rd.SuppliesId,
-            SUM(rd.SuppliesAmount) AS total_issued
-        FROM REPAIR_DETAILS rd
-        JOIN REPAIR r ON rd.RepairId = r.RepairId
-        WHERE MONTH(r.RepairDate) = p_month 
-          AND YEAR(r.RepairDate) = p_year
-        GROUP BY rd.SuppliesId
-    ) issue ON s.SuppliesId = issue.SuppliesId;
+        -- Tồn Cuối của tháng gần nhất trước tháng báo cáo (mỗi vật tư một dòng)
+        SELECT b.SuppliesId, b.EndQty
+        FROM INVENTORY_MONTHLY_BALANCE b
+        JOIN (
+            SELECT SuppliesId, MAX(BalanceMonth) AS BalanceMonth
+            FROM INVENTORY_MONTHLY_BALANCE
+            WHERE BalanceMonth < v_start_date
+            GROUP BY SuppliesId
+        ) last_month ON b.SuppliesId = last_month.SuppliesId
+                    AND b.BalanceMonth = last_month.BalanceMonth
+    ) prev ON s.SuppliesId = prev.SuppliesId;
     
 END //
 
@@ -395,6 +1004,14 @@ CREATE PROCEDURE sp_CreateRevenueReport(
 BEGIN
     DECLARE v_total_revenue DECIMAL(15, 2) DEFAULT 0;
     DECLARE v_existing_report_id INT DEFAULT NULL;
+    DECLARE v_start_date DATE;
+    DECLARE v_end_date DATE;
+    DECLARE v_data_version INT DEFAULT 0;
+    
+    -- Khoảng ngày nửa mở [v_start_date, v_end_date) của tháng báo cáo,
+    -- để điều kiện lọc Day trên REVENUE_DAILY_BRAND đọc theo khoảng khóa chính (Day, BrandId)
+    SET v_start_date = MAKEDATE(p_year, 1) + INTERVAL (p_month - 1) MONTH;
+    SET v_end_date = v_start_date + INTERVAL 1 MONTH;
     
     -- 1. Kiểm tra xem báo cáo tháng này đã tồn tại chưa
     SELECT ReportId INTO v_existing_report_id
@@ -410,43 +1027,206 @@ BEGIN
         DELETE FROM REVENUE_REPORT WHERE ReportId = v_existing_report_id;
     END IF;
     
-    -- 3. Tính tổng doanh thu tháng từ bảng REPAIR
-    SELECT COALESCE(SUM(r.RepairMoney), 0) INTO v_total_revenue
-    FROM REPAIR r
-    WHERE MONTH(r.RepairDate) = p_month 
-      AND YEAR(r.RepairDate) = p_year;
+    -- Phiên bản dữ liệu doanh thu của tháng, đọc trước khi tổng hợp: nếu dữ liệu đổi
+    -- trong lúc tổng hợp thì báo cáo mang phiên bản cũ và sẽ được lập lại ở lần xem sau.
+    -- Trigger tăng bộ đếm trong chính giao dịch ghi, nên giao dịch chưa commit lúc này
+    -- cũng làm phiên bản tăng khi commit (không bị bỏ sót như mốc thời gian ghi)
+    SELECT COALESCE(MAX(RevenueVersion), 0) INTO v_data_version
+    FROM REPORT_DATA_VERSION
+    WHERE DataMonth = v_start_date;
+    
+    -- 3. Tính tổng doanh thu tháng từ bảng tổng hợp REVENUE_DAILY_BRAND
+    -- (tối đa 31 ngày x số hiệu xe, không phụ thuộc số phiếu sửa chữa đã có)
+    SELECT COALESCE(SUM(TotalMoney), 0) INTO v_total_revenue
+    FROM REVENUE_DAILY_BRAND
+    WHERE Day >= v_start_date
+      AND Day < v_end_date;
     
     -- 4. Tạo record chính trong REVENUE_REPORT
-    INSERT INTO REVENUE_REPORT (ReportMonth, ReportYear, TotalRevenue)
-    VALUES (p_month, p_year, v_total_revenue);
+    INSERT INTO REVENUE_REPORT (ReportMonth, ReportYear, TotalRevenue, DataVersion)
+    VALUES (p_month, p_year, v_total_revenue, v_data_version);
     
     -- Lấy ID báo cáo vừa tạo
     SET p_report_id = LAST_INSERT_ID();
     
     -- 5. Tạo chi tiết theo từng hãng xe trong REVENUE_REPORT_DETAILS
-    -- Join: REPAIR -> CAR_RECEPTION -> CAR -> CAR_BRAND
+    -- Cộng dồn REVENUE_DAILY_BRAND theo BrandId (do các trigger trên REPAIR duy trì)
     -- Chỉ insert các hãng xe có dữ liệu sửa chữa trong tháng
     INSERT INTO REVENUE_REPORT_DETAILS (ReportId, BrandId, Count, TotalMoney, Rate)
     SELECT 
         p_report_id AS ReportId,
-        cb.BrandId,
-        COUNT(r.RepairId) AS Count,
-        COALESCE(SUM(r.RepairMoney), 0) AS TotalMoney,
+        d.BrandId,
+        SUM(d.Count) AS Count,
+        SUM(d.TotalMoney) AS TotalMoney,
         CASE 
             WHEN v_total_revenue > 0 THEN 
-                ROUND((COALESCE(SUM(r.RepairMoney), 0) / v_total_revenue) * 100, 2)
+                ROUND((SUM(d.TotalMoney) / v_total_revenue) * 100, 2)
             ELSE 0 
         END AS Rate
-    FROM REPAIR r
-    INNER JOIN CAR_RECEPTION cr ON r.ReceptionId = cr.ReceptionId
-    INNER JOIN CAR c ON cr.LicensePlate = c.LicensePlate
-    INNER JOIN CAR_BRAND cb ON c.BrandId = cb.BrandId
-    WHERE MONTH(r.RepairDate) = p_month 
-      AND YEAR(r.RepairDate) = p_year
-    GROUP BY cb.BrandId, cb.BrandName
-    HAVING COUNT(r.RepairId) > 0
+    FROM REVENUE_DAILY_BRAND d
+    WHERE d.Day >= v_start_date
+      AND d.Day < v_end_date
+    GROUP BY d.BrandId
+    HAVING SUM(d.Count) > 0
     ORDER BY TotalMoney DESC;
     
 END //
 
+DELIMITER ;
+
+DELIMITER //
+
+-- Xóa procedure cũ nếu tồn tại
+DROP PROCEDURE IF EXISTS sp_ReceiveCar //
+
+-- Tạo stored procedure
+CREATE PROCEDURE sp_ReceiveCar(
+    IN p_license_plate VARCHAR(255),   -- Biển số xe
+    IN p_brand_name VARCHAR(255),      -- Tên hiệu xe
+    IN p_owner_name VARCHAR(255),      -- Tên chủ xe
+    IN p_phone_number VARCHAR(20),     -- Số điện thoại
+    IN p_address VARCHAR(255),         -- Địa chỉ
+    IN p_email VARCHAR(255),           -- Email (có thể NULL)
+    IN p_reception_date DATE           -- Ngày tiếp nhận
+)
+BEGIN
+    DECLARE v_brand_id INT DEFAULT NULL;
+    DECLARE v_reception_id INT;
+
+    -- 1. Lấy BrandId từ tên hiệu xe
+    SELECT BrandId INTO v_brand_id
+    FROM CAR_BRAND
+    WHERE BrandName = p_brand_name;
+
+    IF v_brand_id IS NULL THEN
+        SIGNAL SQLSTATE '45001'
+        SET MESSAGE_TEXT = 'Lỗi: Không tìm thấy hiệu xe.';
+    END IF;
+
+    -- 2. Thêm mới hoặc cập nhật thông tin xe
+    INSERT INTO CAR (LicensePlate, BrandId, OwnerName, PhoneNumber, Address, Email)
+    VALUES (p_license_plate, v_brand_id, p_owner_name, p_phone_number, p_address, p_email)
+    ON DUPLICATE KEY UPDATE
+        BrandId = v_brand_id,
+        OwnerName = p_owner_name,
+        PhoneNumber = p_phone_number,
+        Address = p_address,
+        Email = p_email;
+
+    -- 3. Tạo phiếu tiếp nhận
+    -- Giới hạn số xe trong ngày do trigger trg_CheckMaxCarReception kiểm tra (SQLSTATE 45000)
+    INSERT INTO CAR_RECEPTION (LicensePlate, ReceptionDate, Debt)
+    VALUES (p_license_plate, p_reception_date, 0);
+
+    SET v_reception_id = LAST_INSERT_ID();
+
+    -- 4. Trả ID phiếu tiếp nhận thành result set của CALL (không cần SELECT @biến thêm một lần)
+    SELECT v_reception_id AS ReceptionId;
+END //
+
+DELIMITER ;
+
+DELIMITER //
+
+-- Xóa procedure cũ nếu tồn tại
+DROP PROCEDURE IF EXISTS sp_ReconcileCarDebt //
+
+-- Tạo stored procedure
+CREATE PROCEDURE sp_ReconcileCarDebt(
+    OUT p_fixed_rows INT         -- Số xe có TotalDebt bị lệch đã được sửa (OUT parameter)
+)
+BEGIN
+    -- Chỉ cập nhật các xe có TotalDebt khác với tổng Debt thực tế
+    UPDATE CAR c
+    LEFT JOIN (
+        SELECT LicensePlate, SUM(Debt) AS total_debt
+        FROM CAR_RECEPTION
+        GROUP BY LicensePlate
+    ) d ON c.LicensePlate = d.LicensePlate
+    SET c.TotalDebt = COALESCE(d.total_debt, 0)
+    WHERE c.TotalDebt <> COALESCE(d.total_debt, 0);
+
+    SET p_fixed_rows = ROW_COUNT();
+END //
+
+DELIMITER ;
+
+DELIMITER //
+
+-- Xóa procedure cũ nếu tồn tại
+DROP PROCEDURE IF EXISTS sp_GetVehicleDossier //
+
+-- Tạo stored procedure
+CREATE PROCEDURE sp_GetVehicleDossier(
+    IN p_license_plate VARCHAR(255),   -- Biển số xe
+    IN p_page_size INT                 -- Số dòng trang đầu của mỗi mục lịch sử
+)
+READS SQL DATA
+BEGIN
+    -- 1. Thông tin xe + tổng số dòng của từng mục lịch sử (để phân trang)
+    SELECT 
+        c.LicensePlate,
+        b.BrandName,
+        c.OwnerName,
+        c.PhoneNumber,
+        c.Address,
+        c.Email,
+        c.TotalDebt,
+        (SELECT COUNT(*) FROM CAR_RECEPTION cr
+         WHERE cr.LicensePlate = c.LicensePlate) AS ReceptionTotal,
+        (SELECT COUNT(*) FROM REPAIR r
+         JOIN CAR_RECEPTION cr ON r.ReceptionId = cr.ReceptionId
+         WHERE cr.LicensePlate = c.LicensePlate) AS RepairTotal,
+        (SELECT COUNT(*) FROM RECEIPT rc
+         JOIN CAR_RECEPTION cr ON rc.ReceptionId = cr.ReceptionId
+         WHERE cr.LicensePlate = c.LicensePlate) AS ReceiptTotal
+    FROM CAR c
+    JOIN CAR_BRAND b ON c.BrandId = b.BrandId
+    WHERE c.LicensePlate = p_license_plate;
+
+    -- 2. Lịch sử tiếp nhận (trang đầu)
+    SELECT 
+        cr.ReceptionId,
+        cr.ReceptionDate,
+        cr.Debt,
+        COUNT(r.RepairId) AS RepairCount,
+        COALESCE(SUM(r.RepairMoney), 0) AS TotalRepairMoney
+    FROM CAR_RECEPTION cr
+    LEFT JOIN REPAIR r ON cr.ReceptionId = r.ReceptionId
+    WHERE cr.LicensePlate = p_license_plate
+    GROUP BY cr.ReceptionId, cr.ReceptionDate, cr.Debt
+    ORDER BY cr.ReceptionDate DESC, cr.ReceptionId DESC
+    LIMIT p_page_size;
+
+    -- 3. Lịch sử sửa chữa (trang đầu)
+    SELECT 
+        r.RepairId,
+        r.RepairDate,
+        r.RepairMoney,
+        cr.ReceptionDate,
+        cr.ReceptionId
+    FROM REPAIR r
+    JOIN CAR_RECEPTION cr ON r.ReceptionId = cr.ReceptionId
+    WHERE cr.LicensePlate = p_license_plate
+    ORDER BY r.RepairDate DESC, r.RepairId DESC
+    LIMIT p_page_size;
+
+    -- 4. Lịch sử phiếu thu (trang đầu)
+    SELECT 
+        r.ReceiptId, r.ReceiptDate, r.MoneyAmount,
+        r.ReceptionId, cr.ReceptionDate
+    FROM RECEIPT r
+    JOIN CAR_RECEPTION cr ON r.ReceptionId = cr.ReceptionId
+    WHERE cr.LicensePlate = p_license_plate
+    ORDER BY r.ReceiptDate DESC, r.ReceiptId DESC
+    LIMIT p_page_size;
+
+    -- 5. Phiếu tiếp nhận mới nhất còn nợ (phiếu thu được lập cho phiếu này)
+    SELECT ReceptionId, LicensePlate, ReceptionDate, Debt
+    FROM CAR_RECEPTION
+    WHERE LicensePlate = p_license_plate AND Debt > 0
+    ORDER BY ReceptionDate DESC, ReceptionId DESC
+    LIMIT 1;
+END //
+
 DELIMITER ;
\ No newline at end of file
@@ -0,0 +1,77 @@
+-- =====================================================
+-- Migration 001: Index cho các truy vấn thường dùng
+-- Áp dụng cho database đã tạo trước khi TABLE+trigger.sql / init.sql có các index này.
+-- Database tạo mới từ init.sql đã có sẵn, không cần chạy file này.
+-- =====================================================
+
+USE GarageManagement;
+
+-- CAR_RECEPTION
+--   (LicensePlate, ReceptionDate): lịch sử tiếp nhận / phiếu còn nợ theo biển số,
+--     ORDER BY ReceptionDate DESC, ReceptionId DESC (ReceptionId nằm sẵn trong index phụ).
+--     Thay cho index ngầm định của khóa ngoại LicensePlate.
+--   (ReceptionDate): tra cứu theo ngày tiếp nhận.
+ALTER TABLE CAR_RECEPTION
+    ADD INDEX idx_car_reception_plate_date (LicensePlate, ReceptionDate),
+    ADD INDEX idx_car_reception_date (ReceptionDate),
+    DROP INDEX LicensePlate;
+
+-- REPAIR
+--   (ReceptionId, RepairMoney): COUNT/SUM RepairMoney theo lượt tiếp nhận (covering).
+--     Thay cho index ngầm định của khóa ngoại ReceptionId.
+--   (RepairDate, ReceptionId, RepairMoney): lọc theo tháng trong sp_CreateRevenueReport
+--     và sp_CreateStockReport (covering cho phần tổng doanh thu và join sang CAR_RECEPTION).
+ALTER TABLE REPAIR
+    ADD INDEX idx_repair_reception (ReceptionId, RepairMoney),
+    ADD INDEX idx_repair_date (RepairDate, ReceptionId, RepairMoney),
+    DROP INDEX ReceptionId;
+
+-- REPAIR_DETAILS
+--   (RepairId, SuppliesId, SuppliesAmount): SUM(SuppliesAmount) GROUP BY SuppliesId
+--     trong sp_CreateStockReport và get_repair_details (covering).
+--     Thay cho index ngầm định của khóa ngoại RepairId.
+ALTER TABLE REPAIR_DETAILS
+    ADD INDEX idx_repair_details_repair (RepairId, SuppliesId, SuppliesAmount),
+    DROP INDEX RepairId;
+
+-- RECEIPT (không có khóa ngoại nên trước đây không có index nào ngoài khóa chính)
+--   (ReceptionId, ReceiptDate): lịch sử phiếu thu theo xe, trigger trg_CheckPaymentLimit.
+--   (ReceiptDate): get_all_receipts_by_date_range.
+ALTER TABLE RECEIPT
+    ADD INDEX idx_receipt_reception (ReceptionId, ReceiptDate),
+    ADD INDEX idx_receipt_date (ReceiptDate);
+
+-- SUPPLIES
+--   (SuppliesName): tra vật tư theo tên khi lập phiếu sửa chữa.
+ALTER TABLE SUPPLIES
+    ADD INDEX idx_supplies_name (SuppliesName);
+
+-- SUPPLIES_IMPORT
+--   (ImportDate): lịch sử nhập ORDER BY ImportDate DESC, ImportId DESC LIMIT n.
+ALTER TABLE SUPPLIES_IMPORT
+    ADD INDEX idx_supplies_import_date (ImportDate);
+
+-- REVENUE_REPORT / STOCK_REPORT
+--   (ReportMonth, ReportYear): kiểm tra báo cáo tháng đã tồn tại.
+ALTER TABLE REVENUE_REPORT
+    ADD INDEX idx_revenue_report_period (ReportMonth, ReportYear);
+
+ALTER TABLE STOCK_REPORT
+    ADD INDEX idx_stock_report_period (ReportMonth, ReportYear);
+
+-- =====================================================
+-- Kiểm tra (chạy trước và sau migration để so sánh kế hoạch thực thi):
+-- =====================================================
+--   EXPLAIN SELECT ReceptionId, LicensePlate, ReceptionDate, Debt
+--   FROM CAR_RECEPTION WHERE LicensePlate = '59A-123.45' AND Debt > 0
+--   ORDER BY ReceptionDate DESC, ReceptionId DESC LIMIT 1;
+--
+--   EXPLAIN SELECT r.ReceiptId, r.ReceiptDate, r.MoneyAmount, r.ReceptionId, cr.ReceptionDate
+--   FROM RECEIPT r JOIN CAR_RECEPTION cr ON r.ReceptionId = cr.ReceptionId
+--   WHERE cr.LicensePlate = '59A-123.45'
+--   ORDER BY r.ReceiptDate DESC, r.ReceiptId DESC;
+--
+--   EXPLAIN SELECT SuppliesId FROM SUPPLIES WHERE SuppliesName = 'Bugi Denso';
+--
+--   EXPLAIN SELECT ReportId FROM REVENUE_REPORT WHERE ReportMonth = 12 AND ReportYear = 2025;
+-- =====================================================
@@ -0,0 +1,142 @@
+-- =====================================================
+-- Migration 002: Bảng tổng hợp doanh thu theo ngày và hiệu xe
+-- Tạo REVENUE_DAILY_BRAND + các trigger duy trì, rồi nạp dữ liệu từ REPAIR hiện có.
+-- Sau khi chạy file này, chạy lại database/sp_revenue_report.sql để
+-- sp_CreateRevenueReport đọc từ bảng tổng hợp.
+-- Nếu database có trigger trg_DeleteCarBrand (TABLE+trigger.sql), tạo lại trigger đó
+-- để khi xóa hiệu xe cũng xóa các dòng REVENUE_DAILY_BRAND tương ứng.
+-- Chạy khi không có ai đang dùng ứng dụng (trigger được tạo trước bước nạp dữ liệu).
+-- Database tạo mới từ init.sql đã có sẵn, không cần chạy file này.
+-- =====================================================
+
+USE GarageManagement;
+
+-- Stores revenue rolled up per day and car brand (maintained by REPAIR triggers)
+CREATE TABLE REVENUE_DAILY_BRAND (
+    Day DATE NOT NULL COMMENT 'Repair Date',
+    BrandId INTEGER NOT NULL COMMENT 'Brand ID (Foreign Key)',
+    Count INTEGER NOT NULL DEFAULT 0 COMMENT 'Number of repairs',
+    TotalMoney NUMERIC(15, 2) NOT NULL DEFAULT 0 COMMENT 'Total Amount',
+    PRIMARY KEY (Day, BrandId),
+    FOREIGN KEY (BrandId) REFERENCES CAR_BRAND(BrandId)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_AddRevenueAfterRepair //
+CREATE TRIGGER trg_AddRevenueAfterRepair
+AFTER INSERT ON REPAIR
+FOR EACH ROW
+BEGIN
+    DECLARE v_brand_id INT;
+
+    -- Hiệu xe của phiếu sửa chữa: REPAIR -> CAR_RECEPTION -> CAR
+    SELECT c.BrandId INTO v_brand_id
+    FROM CAR_RECEPTION cr
+    JOIN CAR c ON cr.LicensePlate = c.LicensePlate
+    WHERE cr.ReceptionId = NEW.ReceptionId;
+
+    INSERT INTO REVENUE_DAILY_BRAND (Day, BrandId, Count, TotalMoney)
+    VALUES (NEW.RepairDate, v_brand_id, 1, COALESCE(NEW.RepairMoney, 0))
+    ON DUPLICATE KEY UPDATE
+        Count = Count + 1,
+        TotalMoney = TotalMoney + COALESCE(NEW.RepairMoney, 0);
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SyncRevenueAfterRepairUpdate //
+CREATE TRIGGER trg_SyncRevenueAfterRepairUpdate
+AFTER UPDATE ON REPAIR
+FOR EACH ROW
+BEGIN
+    DECLARE v_old_brand_id INT;
+    DECLARE v_new_brand_id INT;
+
+    -- Bỏ phần của dòng cũ rồi cộng phần của dòng mới (ngày / lượt tiếp nhận / số tiền có thể đổi)
+    SELECT c.BrandId INTO v_old_brand_id
+    FROM CAR_RECEPTION cr
+    JOIN CAR c ON cr.LicensePlate = c.LicensePlate
+    WHERE cr.ReceptionId = OLD.ReceptionId;
+
+    SELECT c.BrandId INTO v_new_brand_id
+    FROM CAR_RECEPTION cr
+    JOIN CAR c ON cr.LicensePlate = c.LicensePlate
+    WHERE cr.ReceptionId = NEW.ReceptionId;
+
+    UPDATE REVENUE_DAILY_BRAND
+    SET Count = Count - 1,
+        TotalMoney = TotalMoney - COALESCE(OLD.RepairMoney, 0)
+    WHERE Day = OLD.RepairDate AND BrandId = v_old_brand_id;
+
+    INSERT INTO REVENUE_DAILY_BRAND (Day, BrandId, Count, TotalMoney)
+    VALUES (NEW.RepairDate, v_new_brand_id, 1, COALESCE(NEW.RepairMoney, 0))
+    ON DUPLICATE KEY UPDATE
+        Count = Count + 1,
+        TotalMoney = TotalMoney + COALESCE(NEW.RepairMoney, 0);
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SubtractRevenueAfterRepairDelete //
+CREATE TRIGGER trg_SubtractRevenueAfterRepairDelete
+AFTER DELETE ON REPAIR
+FOR EACH ROW
+BEGIN
+    DECLARE v_brand_id INT;
+
+    SELECT c.BrandId INTO v_brand_id
+    FROM CAR_RECEPTION cr
+    JOIN CAR c ON cr.LicensePlate = c.LicensePlate
+    WHERE cr.ReceptionId = OLD.ReceptionId;
+
+    UPDATE REVENUE_DAILY_BRAND
+    SET Count = Count - 1,
+        TotalMoney = TotalMoney - COALESCE(OLD.RepairMoney, 0)
+    WHERE Day = OLD.RepairDate AND BrandId = v_brand_id;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_MoveRevenueAfterCarBrandChange //
+CREATE TRIGGER trg_MoveRevenueAfterCarBrandChange
+AFTER UPDATE ON CAR
+FOR EACH ROW
+BEGIN
+    -- Đổi hiệu xe (sp_ReceiveCar cập nhật lại thông tin xe) -> chuyển doanh thu các phiếu sửa chữa cũ sang hiệu mới
+    IF OLD.BrandId <> NEW.BrandId THEN
+        UPDATE REVENUE_DAILY_BRAND rdb
+        JOIN (
+            SELECT r.RepairDate, COUNT(r.RepairId) AS cnt, COALESCE(SUM(r.RepairMoney), 0) AS money
+            FROM REPAIR r
+            JOIN CAR_RECEPTION cr ON r.ReceptionId = cr.ReceptionId
+            WHERE cr.LicensePlate = NEW.LicensePlate
+            GROUP BY r.RepairDate
+        ) moved ON rdb.Day = moved.RepairDate
+        SET rdb.Count = rdb.Count - moved.cnt,
+            rdb.TotalMoney = rdb.TotalMoney - moved.money
+        WHERE rdb.BrandId = OLD.BrandId;
+
+        INSERT INTO REVENUE_DAILY_BRAND (Day, BrandId, Count, TotalMoney)
+        SELECT moved.RepairDate, NEW.BrandId, moved.cnt, moved.money
+        FROM (
+            SELECT r.RepairDate, COUNT(r.RepairId) AS cnt, COALESCE(SUM(r.RepairMoney), 0) AS money
+            FROM REPAIR r
+            JOIN CAR_RECEPTION cr ON r.ReceptionId = cr.ReceptionId
+            WHERE cr.LicensePlate = NEW.LicensePlate
+            GROUP BY r.RepairDate
+        ) moved
+        ON DUPLICATE KEY UPDATE
+            Count = REVENUE_DAILY_BRAND.Count + moved.cnt,
+            TotalMoney = REVENUE_DAILY_BRAND.TotalMoney + moved.money;
+    END IF;
+END //
+DELIMITER ;
+
+-- Nạp dữ liệu ban đầu từ các phiếu sửa chữa đã có
+-- (cũng dùng được để dựng lại bảng: TRUNCATE TABLE REVENUE_DAILY_BRAND rồi chạy lại câu lệnh này)
+INSERT INTO REVENUE_DAILY_BRAND (Day, BrandId, Count, TotalMoney)
+SELECT r.RepairDate, c.BrandId, COUNT(r.RepairId), COALESCE(SUM(r.RepairMoney), 0)
+FROM REPAIR r
+JOIN CAR_RECEPTION cr ON r.ReceptionId = cr.ReceptionId
+JOIN CAR c ON cr.LicensePlate = c.LicensePlate
+GROUP BY r.RepairDate, c.BrandId;
+
+-- Báo cáo tháng đã lưu vẫn giữ nguyên; xóa REVENUE_REPORT / REVENUE_REPORT_DETAILS
+-- của tháng cần tạo lại nếu muốn đối chiếu với bảng tổng hợp.
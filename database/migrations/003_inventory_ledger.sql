@@ -0,0 +1,274 @@
+-- =====================================================
+-- Migration 003: Sổ kho (INVENTORY_LEDGER) và tồn kho theo tháng
+-- Tạo INVENTORY_LEDGER + INVENTORY_MONTHLY_BALANCE, procedure và các trigger duy trì,
+-- thêm cột ImportQty cho STOCK_REPORT_DETAILS, rồi ghi sổ lại toàn bộ lịch sử nhập / xuất.
+-- Sau khi chạy file này, chạy lại database/sp_stock_report.sql.
+-- Chạy khi không có ai đang dùng ứng dụng (trigger được tạo trước bước nạp dữ liệu).
+-- Database tạo mới từ init.sql đã có sẵn, không cần chạy file này.
+-- =====================================================
+
+USE GarageManagement;
+
+-- Stores every inventory movement (opening stock, import, issue), maintained by triggers
+CREATE TABLE INVENTORY_LEDGER (
+    LedgerId INTEGER AUTO_INCREMENT PRIMARY KEY COMMENT 'Ledger Entry ID (Auto-increment)',
+    SuppliesId INTEGER NOT NULL COMMENT 'Supply ID (Foreign Key)',
+    MoveDate DATE NOT NULL COMMENT 'Movement Date',
+    Quantity INTEGER NOT NULL COMMENT 'Signed Quantity (+ in / - out)',
+    SourceType VARCHAR(10) NOT NULL COMMENT 'OPENING / IMPORT / ISSUE',
+    SourceId INTEGER NOT NULL COMMENT 'SuppliesId / ImportId / RepairDetailId',
+    INDEX idx_inventory_ledger_source (SourceType, SourceId),
+    INDEX idx_inventory_ledger_supplies_date (SuppliesId, MoveDate),
+    FOREIGN KEY (SuppliesId) REFERENCES SUPPLIES(SuppliesId)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Stores per-month import/issue totals and closing balance of each supply
+CREATE TABLE INVENTORY_MONTHLY_BALANCE (
+    BalanceMonth DATE NOT NULL COMMENT 'First day of month',
+    SuppliesId INTEGER NOT NULL COMMENT 'Supply ID (Foreign Key)',
+    ImportQty INTEGER NOT NULL DEFAULT 0 COMMENT 'Quantity Imported in month',
+    IssueQty INTEGER NOT NULL DEFAULT 0 COMMENT 'Quantity Issued in month',
+    EndQty INTEGER NOT NULL DEFAULT 0 COMMENT 'Closing Balance',
+    PRIMARY KEY (BalanceMonth, SuppliesId),
+    INDEX idx_inventory_balance_supplies (SuppliesId, BalanceMonth, EndQty),
+    FOREIGN KEY (SuppliesId) REFERENCES SUPPLIES(SuppliesId)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+ALTER TABLE STOCK_REPORT_DETAILS
+    ADD COLUMN ImportQty INTEGER DEFAULT 0 COMMENT 'Imported Quantity' AFTER BeginQty,
+    MODIFY COLUMN IssueQty INTEGER DEFAULT 0 COMMENT 'Issued Quantity';
+
+DELIMITER //
+-- Cập nhật INVENTORY_MONTHLY_BALANCE cho một biến động kho (gọi từ các trigger trên INVENTORY_LEDGER)
+-- p_import_qty / p_issue_qty có thể âm khi hoàn tác một biến động cũ
+DROP PROCEDURE IF EXISTS sp_ApplyInventoryMovement //
+CREATE PROCEDURE sp_ApplyInventoryMovement(
+    IN p_supplies_id INT,
+    IN p_move_date DATE,
+    IN p_import_qty INT,
+    IN p_issue_qty INT
+)
+BEGIN
+    DECLARE v_month DATE;
+    DECLARE v_prev_end INT DEFAULT 0;
+
+    SET v_month = p_move_date - INTERVAL (DAY(p_move_date) - 1) DAY;
+
+    -- Tháng chưa có dòng -> tạo mới với Tồn Cuối = Tồn Cuối của tháng gần nhất trước đó
+    IF NOT EXISTS (
+        SELECT 1 FROM INVENTORY_MONTHLY_BALANCE
+        WHERE BalanceMonth = v_month AND SuppliesId = p_supplies_id
+    ) THEN
+        SELECT COALESCE(
+            (SELECT EndQty FROM INVENTORY_MONTHLY_BALANCE
+             WHERE SuppliesId = p_supplies_id AND BalanceMonth < v_month
+             ORDER BY BalanceMonth DESC
+             LIMIT 1), 0) INTO v_prev_end;
+
+        INSERT INTO INVENTORY_MONTHLY_BALANCE (BalanceMonth, SuppliesId, ImportQty, IssueQty, EndQty)
+        VALUES (v_month, p_supplies_id, 0, 0, v_prev_end);
+    END IF;
+
+    UPDATE INVENTORY_MONTHLY_BALANCE
+    SET ImportQty = ImportQty + p_import_qty,
+        IssueQty = IssueQty + p_issue_qty
+    WHERE BalanceMonth = v_month AND SuppliesId = p_supplies_id;
+
+    -- Tồn Cuối của tháng này và mọi tháng sau đều thay đổi theo
+    UPDATE INVENTORY_MONTHLY_BALANCE
+    SET EndQty = EndQty + p_import_qty - p_issue_qty
+    WHERE SuppliesId = p_supplies_id AND BalanceMonth >= v_month;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_AddBalanceAfterLedgerInsert //
+CREATE TRIGGER trg_AddBalanceAfterLedgerInsert
+AFTER INSERT ON INVENTORY_LEDGER
+FOR EACH ROW
+BEGIN
+    CALL sp_ApplyInventoryMovement(NEW.SuppliesId, NEW.MoveDate,
+        GREATEST(NEW.Quantity, 0), GREATEST(-NEW.Quantity, 0));
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SyncBalanceAfterLedgerUpdate //
+CREATE TRIGGER trg_SyncBalanceAfterLedgerUpdate
+AFTER UPDATE ON INVENTORY_LEDGER
+FOR EACH ROW
+BEGIN
+    -- Hoàn tác biến động cũ rồi áp dụng biến động mới (vật tư / ngày / số lượng có thể đổi)
+    CALL sp_ApplyInventoryMovement(OLD.SuppliesId, OLD.MoveDate,
+        -GREATEST(OLD.Quantity, 0), -GREATEST(-OLD.Quantity, 0));
+    CALL sp_ApplyInventoryMovement(NEW.SuppliesId, NEW.MoveDate,
+        GREATEST(NEW.Quantity, 0), GREATEST(-NEW.Quantity, 0));
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SubtractBalanceAfterLedgerDelete //
+CREATE TRIGGER trg_SubtractBalanceAfterLedgerDelete
+AFTER DELETE ON INVENTORY_LEDGER
+FOR EACH ROW
+BEGIN
+    CALL sp_ApplyInventoryMovement(OLD.SuppliesId, OLD.MoveDate,
+        -GREATEST(OLD.Quantity, 0), -GREATEST(-OLD.Quantity, 0));
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_AddOpeningLedgerAfterSupplies //
+CREATE TRIGGER trg_AddOpeningLedgerAfterSupplies
+AFTER INSERT ON SUPPLIES
+FOR EACH ROW
+BEGIN
+    -- Tồn kho ban đầu khi tạo vật tư được ghi sổ như một lần nhập
+    IF COALESCE(NEW.InventoryNumber, 0) <> 0 THEN
+        INSERT INTO INVENTORY_LEDGER (SuppliesId, MoveDate, Quantity, SourceType, SourceId)
+        VALUES (NEW.SuppliesId, CURDATE(), NEW.InventoryNumber, 'OPENING', NEW.SuppliesId);
+    END IF;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_RemoveLedgerBeforeSuppliesDelete //
+CREATE TRIGGER trg_RemoveLedgerBeforeSuppliesDelete
+BEFORE DELETE ON SUPPLIES
+FOR EACH ROW
+BEGIN
+    DELETE FROM INVENTORY_LEDGER WHERE SuppliesId = OLD.SuppliesId;
+    DELETE FROM INVENTORY_MONTHLY_BALANCE WHERE SuppliesId = OLD.SuppliesId;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_AddLedgerAfterImport //
+CREATE TRIGGER trg_AddLedgerAfterImport
+AFTER INSERT ON SUPPLIES_IMPORT
+FOR EACH ROW
+BEGIN
+    INSERT INTO INVENTORY_LEDGER (SuppliesId, MoveDate, Quantity, SourceType, SourceId)
+    VALUES (NEW.SuppliesId, NEW.ImportDate, NEW.ImportAmount, 'IMPORT', NEW.ImportId);
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SyncLedgerAfterImportUpdate //
+CREATE TRIGGER trg_SyncLedgerAfterImportUpdate
+AFTER UPDATE ON SUPPLIES_IMPORT
+FOR EACH ROW
+BEGIN
+    UPDATE INVENTORY_LEDGER
+    SET SuppliesId = NEW.SuppliesId,
+        MoveDate = NEW.ImportDate,
+        Quantity = NEW.ImportAmount
+    WHERE SourceType = 'IMPORT' AND SourceId = NEW.ImportId;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_RemoveLedgerAfterImportDelete //
+CREATE TRIGGER trg_RemoveLedgerAfterImportDelete
+AFTER DELETE ON SUPPLIES_IMPORT
+FOR EACH ROW
+BEGIN
+    DELETE FROM INVENTORY_LEDGER
+    WHERE SourceType = 'IMPORT' AND SourceId = OLD.ImportId;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_AddLedgerAfterRepairDetail //
+CREATE TRIGGER trg_AddLedgerAfterRepairDetail
+AFTER INSERT ON REPAIR_DETAILS
+FOR EACH ROW
+BEGIN
+    -- Xuất kho ghi theo ngày của phiếu sửa chữa
+    INSERT INTO INVENTORY_LEDGER (SuppliesId, MoveDate, Quantity, SourceType, SourceId)
+    SELECT NEW.SuppliesId, r.RepairDate, -NEW.SuppliesAmount, 'ISSUE', NEW.RepairDetailId
+    FROM REPAIR r
+    WHERE r.RepairId = NEW.RepairId;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SyncLedgerAfterRepairDetailUpdate //
+CREATE TRIGGER trg_SyncLedgerAfterRepairDetailUpdate
+AFTER UPDATE ON REPAIR_DETAILS
+FOR EACH ROW
+BEGIN
+    UPDATE INVENTORY_LEDGER l
+    JOIN REPAIR r ON r.RepairId = NEW.RepairId
+    SET l.SuppliesId = NEW.SuppliesId,
+        l.MoveDate = r.RepairDate,
+        l.Quantity = -NEW.SuppliesAmount
+    WHERE l.SourceType = 'ISSUE' AND l.SourceId = NEW.RepairDetailId;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_RemoveLedgerAfterRepairDetailDelete //
+CREATE TRIGGER trg_RemoveLedgerAfterRepairDetailDelete
+AFTER DELETE ON REPAIR_DETAILS
+FOR EACH ROW
+BEGIN
+    DELETE FROM INVENTORY_LEDGER
+    WHERE SourceType = 'ISSUE' AND SourceId = OLD.RepairDetailId;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_MoveLedgerAfterRepairDateChange //
+CREATE TRIGGER trg_MoveLedgerAfterRepairDateChange
+AFTER UPDATE ON REPAIR
+FOR EACH ROW
+BEGIN
+    IF OLD.RepairDate <> NEW.RepairDate THEN
+        UPDATE INVENTORY_LEDGER l
+        JOIN REPAIR_DETAILS rd ON l.SourceType = 'ISSUE' AND l.SourceId = rd.RepairDetailId
+        SET l.MoveDate = NEW.RepairDate
+        WHERE rd.RepairId = NEW.RepairId;
+    END IF;
+END //
+DELIMITER ;
+
+-- =====================================================
+-- Nạp sổ kho từ dữ liệu hiện có
+-- (các trigger trên INVENTORY_LEDGER tự dựng INVENTORY_MONTHLY_BALANCE)
+-- =====================================================
+
+-- Tồn đầu kỳ: phần tồn hiện tại không giải thích được bằng phiếu nhập / phiếu sửa chữa,
+-- ghi vào ngày có biến động sớm nhất của vật tư (hoặc hôm nay nếu chưa có biến động)
+INSERT INTO INVENTORY_LEDGER (SuppliesId, MoveDate, Quantity, SourceType, SourceId)
+SELECT 
+    s.SuppliesId,
+    COALESCE(LEAST(imp.first_date, iss.first_date), imp.first_date, iss.first_date, CURDATE()),
+    COALESCE(s.InventoryNumber, 0) - COALESCE(imp.total_qty, 0) + COALESCE(iss.total_qty, 0),
+    'OPENING',
+    s.SuppliesId
+FROM SUPPLIES s
+LEFT JOIN (
+    SELECT SuppliesId, MIN(ImportDate) AS first_date, SUM(ImportAmount) AS total_qty
+    FROM SUPPLIES_IMPORT
+    GROUP BY SuppliesId
+) imp ON s.SuppliesId = imp.SuppliesId
+LEFT JOIN (
+    SELECT rd.SuppliesId, MIN(r.RepairDate) AS first_date, SUM(rd.SuppliesAmount) AS total_qty
+    FROM REPAIR_DETAILS rd
+    JOIN REPAIR r ON rd.RepairId = r.RepairId
+    GROUP BY rd.SuppliesId
+) iss ON s.SuppliesId = iss.SuppliesId
+WHERE COALESCE(s.InventoryNumber, 0) - COALESCE(imp.total_qty, 0) + COALESCE(iss.total_qty, 0) <> 0;
+
+INSERT INTO INVENTORY_LEDGER (SuppliesId, MoveDate, Quantity, SourceType, SourceId)
+SELECT SuppliesId, ImportDate, ImportAmount, 'IMPORT', ImportId
+FROM SUPPLIES_IMPORT;
+
+INSERT INTO INVENTORY_LEDGER (SuppliesId, MoveDate, Quantity, SourceType, SourceId)
+SELECT rd.SuppliesId, r.RepairDate, -rd.SuppliesAmount, 'ISSUE', rd.RepairDetailId
+FROM REPAIR_DETAILS rd
+JOIN REPAIR r ON rd.RepairId = r.RepairId;
+
+-- Báo cáo tồn kho cũ được tính theo cách cũ (không có Nhập) -> xóa để lập lại khi xem
+DELETE FROM STOCK_REPORT_DETAILS;
+DELETE FROM STOCK_REPORT;
+
+-- =====================================================
+-- Kiểm tra: Tồn Cuối của tháng mới nhất phải bằng SUPPLIES.InventoryNumber
+-- =====================================================
+--   SELECT s.SuppliesId, s.InventoryNumber, b.EndQty
+--   FROM SUPPLIES s
+--   LEFT JOIN INVENTORY_MONTHLY_BALANCE b ON b.SuppliesId = s.SuppliesId
+--    AND b.BalanceMonth = (SELECT MAX(BalanceMonth) FROM INVENTORY_MONTHLY_BALANCE
+--                          WHERE SuppliesId = s.SuppliesId)
+--   WHERE COALESCE(b.EndQty, 0) <> COALESCE(s.InventoryNumber, 0);
+-- =====================================================
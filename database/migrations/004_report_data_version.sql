@@ -0,0 +1,143 @@
+-- =====================================================
+-- Migration 004: Phiên bản dữ liệu cho báo cáo đã lưu
+-- Tạo REPORT_DATA_VERSION + các trigger tăng phiên bản, thêm cột DataVersion và
+-- khóa UNIQUE (ReportMonth, ReportYear) cho REVENUE_REPORT / STOCK_REPORT.
+-- Cần chạy sau migration 002 và 003. Sau khi chạy file này, chạy lại
+-- database/sp_revenue_report.sql và database/sp_stock_report.sql.
+-- Database tạo mới từ init.sql đã có sẵn, không cần chạy file này.
+-- =====================================================
+
+USE GarageManagement;
+
+-- Stores per-month change counters used to detect stale stored reports
+CREATE TABLE REPORT_DATA_VERSION (
+    DataMonth DATE PRIMARY KEY COMMENT 'First day of month',
+    RevenueVersion INTEGER NOT NULL DEFAULT 0 COMMENT 'Revenue data change counter',
+    StockVersion INTEGER NOT NULL DEFAULT 0 COMMENT 'Stock data change counter'
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Xóa báo cáo trùng tháng/năm (giữ bản mới nhất) trước khi thêm khóa UNIQUE
+DELETE rd FROM REVENUE_REPORT_DETAILS rd
+JOIN REVENUE_REPORT r ON rd.ReportId = r.ReportId
+JOIN (
+    SELECT ReportMonth, ReportYear, MAX(ReportId) AS keep_id
+    FROM REVENUE_REPORT
+    GROUP BY ReportMonth, ReportYear
+) k ON r.ReportMonth = k.ReportMonth AND r.ReportYear = k.ReportYear
+WHERE r.ReportId <> k.keep_id;
+
+DELETE r FROM REVENUE_REPORT r
+JOIN (
+    SELECT ReportMonth, ReportYear, MAX(ReportId) AS keep_id
+    FROM REVENUE_REPORT
+    GROUP BY ReportMonth, ReportYear
+) k ON r.ReportMonth = k.ReportMonth AND r.ReportYear = k.ReportYear
+WHERE r.ReportId <> k.keep_id;
+
+DELETE srd FROM STOCK_REPORT_DETAILS srd
+JOIN STOCK_REPORT s ON srd.StockReportId = s.StockReportId
+JOIN (
+    SELECT ReportMonth, ReportYear, MAX(StockReportId) AS keep_id
+    FROM STOCK_REPORT
+    GROUP BY ReportMonth, ReportYear
+) k ON s.ReportMonth = k.ReportMonth AND s.ReportYear = k.ReportYear
+WHERE s.StockReportId <> k.keep_id;
+
+DELETE s FROM STOCK_REPORT s
+JOIN (
+    SELECT ReportMonth, ReportYear, MAX(StockReportId) AS keep_id
+    FROM STOCK_REPORT
+    GROUP BY ReportMonth, ReportYear
+) k ON s.ReportMonth = k.ReportMonth AND s.ReportYear = k.ReportYear
+WHERE s.StockReportId <> k.keep_id;
+
+ALTER TABLE REVENUE_REPORT
+    ADD COLUMN DataVersion INTEGER NOT NULL DEFAULT 0 COMMENT 'REPORT_DATA_VERSION.RevenueVersion at generation',
+    ADD UNIQUE INDEX uq_revenue_report_period (ReportMonth, ReportYear),
+    DROP INDEX idx_revenue_report_period;
+
+ALTER TABLE STOCK_REPORT
+    ADD COLUMN DataVersion INTEGER NOT NULL DEFAULT 0 COMMENT 'Sum of REPORT_DATA_VERSION.StockVersion up to this month at generation',
+    ADD UNIQUE INDEX uq_stock_report_period (ReportMonth, ReportYear),
+    DROP INDEX idx_stock_report_period;
+
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_BumpRevenueVersionAfterInsert //
+CREATE TRIGGER trg_BumpRevenueVersionAfterInsert
+AFTER INSERT ON REVENUE_DAILY_BRAND
+FOR EACH ROW
+BEGIN
+    -- Doanh thu của tháng thay đổi -> báo cáo doanh thu đã lưu của tháng đó hết hiệu lực
+    INSERT INTO REPORT_DATA_VERSION (DataMonth, RevenueVersion)
+    VALUES (NEW.Day - INTERVAL (DAY(NEW.Day) - 1) DAY, 1)
+    ON DUPLICATE KEY UPDATE RevenueVersion = RevenueVersion + 1;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_BumpRevenueVersionAfterUpdate //
+CREATE TRIGGER trg_BumpRevenueVersionAfterUpdate
+AFTER UPDATE ON REVENUE_DAILY_BRAND
+FOR EACH ROW
+BEGIN
+    INSERT INTO REPORT_DATA_VERSION (DataMonth, RevenueVersion)
+    VALUES (NEW.Day - INTERVAL (DAY(NEW.Day) - 1) DAY, 1)
+    ON DUPLICATE KEY UPDATE RevenueVersion = RevenueVersion + 1;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_BumpRevenueVersionAfterDelete //
+CREATE TRIGGER trg_BumpRevenueVersionAfterDelete
+AFTER DELETE ON REVENUE_DAILY_BRAND
+FOR EACH ROW
+BEGIN
+    INSERT INTO REPORT_DATA_VERSION (DataMonth, RevenueVersion)
+    VALUES (OLD.Day - INTERVAL (DAY(OLD.Day) - 1) DAY, 1)
+    ON DUPLICATE KEY UPDATE RevenueVersion = RevenueVersion + 1;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_BumpStockVersionAfterInsert //
+CREATE TRIGGER trg_BumpStockVersionAfterInsert
+AFTER INSERT ON INVENTORY_MONTHLY_BALANCE
+FOR EACH ROW
+BEGIN
+    -- Tồn kho của tháng thay đổi -> báo cáo tồn kho của tháng đó và các tháng sau hết hiệu lực
+    INSERT INTO REPORT_DATA_VERSION (DataMonth, StockVersion)
+    VALUES (NEW.BalanceMonth, 1)
+    ON DUPLICATE KEY UPDATE StockVersion = StockVersion + 1;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_BumpStockVersionAfterUpdate //
+CREATE TRIGGER trg_BumpStockVersionAfterUpdate
+AFTER UPDATE ON INVENTORY_MONTHLY_BALANCE
+FOR EACH ROW
+BEGIN
+    INSERT INTO REPORT_DATA_VERSION (DataMonth, StockVersion)
+    VALUES (NEW.BalanceMonth, 1)
+    ON DUPLICATE KEY UPDATE StockVersion = StockVersion + 1;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_BumpStockVersionAfterDelete //
+CREATE TRIGGER trg_BumpStockVersionAfterDelete
+AFTER DELETE ON INVENTORY_MONTHLY_BALANCE
+FOR EACH ROW
+BEGIN
+    INSERT INTO REPORT_DATA_VERSION (DataMonth, StockVersion)
+    VALUES (OLD.BalanceMonth, 1)
+    ON DUPLICATE KEY UPDATE StockVersion = StockVersion + 1;
+END //
+DELIMITER ;
+
+-- Khởi tạo phiên bản 1 cho mọi tháng đã có dữ liệu: các báo cáo đã lưu (DataVersion = 0)
+-- sẽ được lập lại một lần khi xem
+INSERT INTO REPORT_DATA_VERSION (DataMonth, RevenueVersion)
+SELECT DISTINCT Day - INTERVAL (DAY(Day) - 1) DAY, 1
+FROM REVENUE_DAILY_BRAND
+ON DUPLICATE KEY UPDATE RevenueVersion = RevenueVersion + 1;
+
+INSERT INTO REPORT_DATA_VERSION (DataMonth, StockVersion)
+SELECT DISTINCT BalanceMonth, 1
+FROM INVENTORY_MONTHLY_BALANCE
+ON DUPLICATE KEY UPDATE StockVersion = StockVersion + 1;
@@ -0,0 +1,92 @@
+-- =====================================================
+-- Migration 005: Khóa tìm kiếm đã chuẩn hóa cho tra cứu xe
+-- Thêm CAR.PlateKey (biển số bỏ '-', '.', khoảng trắng; cột sinh tự động) và
+-- CAR.OwnerKey (tên chủ xe chữ thường, bỏ dấu; do trigger duy trì vì cột sinh
+-- tự động không được gọi hàm lưu trữ), cùng index FULLTEXT dùng parser ngram để
+-- tìm chuỗi con bằng index thay vì quét LIKE '%x%'.
+-- Database tạo mới từ init.sql đã có sẵn, không cần chạy file này.
+-- =====================================================
+
+USE GarageManagement;
+
+DELIMITER //
+DROP FUNCTION IF EXISTS fn_FoldVietnamese //
+-- Chữ thường, bỏ dấu tiếng Việt: 'Nguyễn Văn Đức' -> 'nguyen van duc'
+-- (cùng bảng chữ với utils.search_keys.fold_text phía ứng dụng)
+CREATE FUNCTION fn_FoldVietnamese(p_text VARCHAR(255) CHARSET utf8mb4)
+RETURNS VARCHAR(255) CHARSET utf8mb4
+DETERMINISTIC NO SQL
+BEGIN
+    DECLARE v_from VARCHAR(67) CHARSET utf8mb4 DEFAULT 'àáảãạăằắẳẵặâầấẩẫậèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵđ';
+    DECLARE v_to VARCHAR(67) CHARSET utf8mb4 DEFAULT 'aaaaaaaaaaaaaaaaaeeeeeeeeeeeiiiiiooooooooooooooooouuuuuuuuuuuyyyyyd';
+    DECLARE v_result VARCHAR(255) CHARSET utf8mb4 DEFAULT LOWER(p_text);
+    DECLARE i INT DEFAULT 1;
+
+    -- REPLACE so khớp phân biệt dấu nên thay được từng chữ có dấu
+    WHILE i <= CHAR_LENGTH(v_from) DO
+        SET v_result = REPLACE(v_result, SUBSTRING(v_from, i, 1), SUBSTRING(v_to, i, 1));
+        SET i = i + 1;
+    END WHILE;
+
+    RETURN TRIM(v_result);
+END //
+DELIMITER ;
+
+-- Parser ngram loại mọi token chứa stopword (vd. 'a', 'i') -> tắt stopword cho các index bên dưới
+SET SESSION innodb_ft_enable_stopword = OFF;
+
+ALTER TABLE CAR
+    ADD COLUMN PlateKey VARCHAR(255)
+        GENERATED ALWAYS AS (UPPER(REPLACE(REPLACE(REPLACE(LicensePlate, '-', ''), '.', ''), ' ', ''))) STORED
+        COMMENT 'License plate without separators (search key)',
+    ADD COLUMN OwnerKey VARCHAR(255) NOT NULL DEFAULT ''
+        COMMENT 'Owner name lowercased without diacritics (maintained by CAR triggers)';
+
+UPDATE CAR SET OwnerKey = fn_FoldVietnamese(OwnerName);
+
+ALTER TABLE CAR
+    ADD FULLTEXT INDEX ftx_car_plate_key (PlateKey) WITH PARSER ngram;
+
+ALTER TABLE CAR
+    ADD FULLTEXT INDEX ftx_car_owner_key (OwnerKey) WITH PARSER ngram;
+
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SetCarOwnerKeyBeforeInsert //
+CREATE TRIGGER trg_SetCarOwnerKeyBeforeInsert
+BEFORE INSERT ON CAR
+FOR EACH ROW
+BEGIN
+    SET NEW.OwnerKey = fn_FoldVietnamese(NEW.OwnerName);
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SetCarOwnerKeyBeforeUpdate //
+CREATE TRIGGER trg_SetCarOwnerKeyBeforeUpdate
+BEFORE UPDATE ON CAR
+FOR EACH ROW
+BEGIN
+    -- Chỉ chuẩn hóa lại khi tên chủ xe đổi (cập nhật nợ, SĐT... không gọi hàm gấp dấu)
+    IF NOT (NEW.OwnerName <=> OLD.OwnerName) THEN
+        SET NEW.OwnerKey = fn_FoldVietnamese(NEW.OwnerName);
+    END IF;
+END //
+DELIMITER ;
+
+-- =====================================================
+-- Kiểm tra (so sánh kế hoạch thực thi và thời gian với cách quét LIKE cũ):
+-- =====================================================
+--   EXPLAIN SELECT LicensePlate FROM CAR
+--   WHERE MATCH(OwnerKey) AGAINST ('"nguyen van"' IN BOOLEAN MODE)
+--   ORDER BY LicensePlate LIMIT 200;
+--     -> type: fulltext, key: ftx_car_owner_key
+--
+--   EXPLAIN SELECT LicensePlate FROM CAR
+--   WHERE MATCH(PlateKey) AGAINST ('"12345"' IN BOOLEAN MODE);
+--     -> type: fulltext, key: ftx_car_plate_key
+--
+--   EXPLAIN SELECT LicensePlate FROM CAR WHERE OwnerName LIKE '%Nguyễn Văn%';
+--     -> type: ALL (quét toàn bảng)
+--
+-- Chuỗi tìm ngắn hơn ngram_token_size (mặc định 2) không dùng được index
+-- FULLTEXT; ứng dụng khi đó so khớp LIKE trên PlateKey / OwnerKey.
+-- =====================================================
@@ -0,0 +1,96 @@
+-- =====================================================
+-- Migration 006: Bộ đếm lượt tiếp nhận theo ngày
+-- Tạo RECEPTION_DAILY_COUNT, thay trg_CheckMaxCarReception (đếm bằng COUNT(*) trên
+-- CAR_RECEPTION) bằng bản tăng bộ đếm của ngày, thêm trigger giảm / chuyển bộ đếm
+-- khi xóa hoặc đổi ngày tiếp nhận, và khởi tạo bộ đếm từ dữ liệu hiện có.
+-- Chạy khi không có máy nào đang tiếp nhận xe (bộ đếm được khởi tạo trước khi
+-- trigger mới có hiệu lực).
+-- Database tạo mới từ init.sql đã có sẵn, không cần chạy file này.
+-- =====================================================
+
+USE GarageManagement;
+
+-- Stores the number of receptions per day (checked against MaxCarReception)
+CREATE TABLE RECEPTION_DAILY_COUNT (
+    ReceptionDate DATE PRIMARY KEY COMMENT 'Date of reception',
+    Count INTEGER NOT NULL DEFAULT 0 COMMENT 'Number of receptions on that date'
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT INTO RECEPTION_DAILY_COUNT (ReceptionDate, Count)
+SELECT ReceptionDate, COUNT(*)
+FROM CAR_RECEPTION
+GROUP BY ReceptionDate;
+
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_CheckMaxCarReception //
+CREATE TRIGGER trg_CheckMaxCarReception
+BEFORE INSERT ON CAR_RECEPTION
+FOR EACH ROW
+BEGIN
+    DECLARE max_cars INT;
+    DECLARE current_cars INT;
+
+    -- 1. Lấy giá trị từ bảng PARAMETER của bạn (cột name, value)
+    SELECT value INTO max_cars
+    FROM PARAMETER 
+    WHERE name = 'MaxCarReception';
+
+    -- 2. Tăng bộ đếm của ngày (upsert giữ khóa dòng đến hết transaction,
+    --    các máy tiếp nhận cùng lúc sẽ xếp hàng trên cùng một dòng)
+    INSERT INTO RECEPTION_DAILY_COUNT (ReceptionDate, Count)
+    VALUES (NEW.ReceptionDate, 1)
+    ON DUPLICATE KEY UPDATE Count = Count + 1;
+
+    SELECT Count INTO current_cars
+    FROM RECEPTION_DAILY_COUNT
+    WHERE ReceptionDate = NEW.ReceptionDate;
+
+    -- 3. Kiểm tra: Nếu số xe sau khi thêm > giới hạn thì báo lỗi
+    --    (lỗi trong trigger hủy luôn lần tăng bộ đếm ở bước 2)
+    IF current_cars > max_cars THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Lỗi: Số lượng xe tiếp nhận trong ngày đã vượt quá quy định (MaxCarReception).';
+    END IF;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_DecreaseReceptionCount //
+CREATE TRIGGER trg_DecreaseReceptionCount
+AFTER DELETE ON CAR_RECEPTION
+FOR EACH ROW
+BEGIN
+    -- Giảm bộ đếm của ngày tương ứng với lượt tiếp nhận vừa xóa
+    UPDATE RECEPTION_DAILY_COUNT
+    SET Count = Count - 1
+    WHERE ReceptionDate = OLD.ReceptionDate;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_MoveReceptionCount //
+CREATE TRIGGER trg_MoveReceptionCount
+AFTER UPDATE ON CAR_RECEPTION
+FOR EACH ROW
+BEGIN
+    -- Đổi ngày tiếp nhận: chuyển lượt đếm từ ngày cũ sang ngày mới
+    IF NEW.ReceptionDate <> OLD.ReceptionDate THEN
+        UPDATE RECEPTION_DAILY_COUNT
+        SET Count = Count - 1
+        WHERE ReceptionDate = OLD.ReceptionDate;
+
+        INSERT INTO RECEPTION_DAILY_COUNT (ReceptionDate, Count)
+        VALUES (NEW.ReceptionDate, 1)
+        ON DUPLICATE KEY UPDATE Count = Count + 1;
+    END IF;
+END //
+DELIMITER ;
+
+-- =====================================================
+-- Kiểm tra (bộ đếm phải khớp với CAR_RECEPTION):
+-- =====================================================
+--   SELECT d.ReceptionDate, d.Count, COUNT(cr.ReceptionId) AS Actual
+--   FROM RECEPTION_DAILY_COUNT d
+--   LEFT JOIN CAR_RECEPTION cr ON cr.ReceptionDate = d.ReceptionDate
+--   GROUP BY d.ReceptionDate, d.Count
+--   HAVING d.Count <> Actual;
+--     -> không có dòng nào
+-- =====================================================
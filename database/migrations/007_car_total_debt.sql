@@ -0,0 +1,72 @@
+-- =====================================================
+-- Migration 007: Tổng nợ của xe (CAR.TotalDebt)
+-- Thêm cột CAR.TotalDebt + index, các trigger trên CAR_RECEPTION giữ cột này
+-- đồng bộ với CAR_RECEPTION.Debt, và tính giá trị ban đầu từ dữ liệu hiện có.
+-- Sau khi chạy file này, chạy database/sp_reconcile_car_debt.sql (đối soát).
+-- Cần chạy trước migration 008 (trigger của CAR_CHANGE_LOG đọc TotalDebt).
+-- Database tạo mới từ init.sql đã có sẵn, không cần chạy file này.
+-- =====================================================
+
+USE GarageManagement;
+
+ALTER TABLE CAR
+    ADD COLUMN TotalDebt NUMERIC(15, 2) NOT NULL DEFAULT 0
+        COMMENT 'Total debt over all receptions (maintained by CAR_RECEPTION triggers)' AFTER Email,
+    ADD INDEX idx_car_total_debt (TotalDebt);
+
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_AddCarDebtAfterReception //
+CREATE TRIGGER trg_AddCarDebtAfterReception
+AFTER INSERT ON CAR_RECEPTION
+FOR EACH ROW
+BEGIN
+    -- Cộng nợ của lượt tiếp nhận mới vào tổng nợ của xe
+    IF COALESCE(NEW.Debt, 0) <> 0 THEN
+        UPDATE CAR
+        SET TotalDebt = TotalDebt + NEW.Debt
+        WHERE LicensePlate = NEW.LicensePlate;
+    END IF;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_SyncCarDebtAfterReceptionUpdate //
+CREATE TRIGGER trg_SyncCarDebtAfterReceptionUpdate
+AFTER UPDATE ON CAR_RECEPTION
+FOR EACH ROW
+BEGIN
+    -- Debt thay đổi do phiếu sửa chữa (tăng) hoặc phiếu thu (trg_UpdateDebtAfterReceipt, giảm)
+    IF NEW.LicensePlate = OLD.LicensePlate THEN
+        IF NOT (NEW.Debt <=> OLD.Debt) THEN
+            UPDATE CAR
+            SET TotalDebt = TotalDebt + COALESCE(NEW.Debt, 0) - COALESCE(OLD.Debt, 0)
+            WHERE LicensePlate = NEW.LicensePlate;
+        END IF;
+    ELSE
+        UPDATE CAR
+        SET TotalDebt = TotalDebt - COALESCE(OLD.Debt, 0)
+        WHERE LicensePlate = OLD.LicensePlate;
+
+        UPDATE CAR
+        SET TotalDebt = TotalDebt + COALESCE(NEW.Debt, 0)
+        WHERE LicensePlate = NEW.LicensePlate;
+    END IF;
+END //
+DELIMITER ;
+-- Lưu ý: không có trigger AFTER DELETE cho TotalDebt. Lượt tiếp nhận chỉ bị xóa bởi
+-- trg_DeleteCarBrand, câu lệnh đó đọc CAR nên trigger không được phép cập nhật CAR (lỗi 1442),
+-- và các xe liên quan cũng bị xóa ngay sau đó. Trường hợp khác: CALL sp_ReconcileCarDebt(@fixed).
+
+-- Tính tổng nợ hiện tại của từng xe (sau khi có trigger: giá trị tuyệt đối nên không bị cộng trùng)
+UPDATE CAR c
+SET TotalDebt = (
+    SELECT COALESCE(SUM(Debt), 0)
+    FROM CAR_RECEPTION
+    WHERE LicensePlate = c.LicensePlate
+);
+
+-- =====================================================
+-- Kiểm tra:
+-- =====================================================
+--   CALL sp_ReconcileCarDebt(@fixed_rows);
+--   SELECT @fixed_rows;   -- 0: TotalDebt khớp với tổng CAR_RECEPTION.Debt
+-- =====================================================
@@ -0,0 +1,100 @@
+-- =====================================================
+-- Migration 008: Nhật ký thay đổi của xe (change feed cho trang tra cứu)
+-- Tạo CAR_CHANGE_LOG + các trigger ghi biển số mỗi khi dòng CAR (hoặc tên hiệu xe)
+-- thay đổi, và event dọn nhật ký cũ. ChangeId lớn nhất là "mã thay đổi": ứng dụng
+-- chỉ đọc các xe có ChangeId lớn hơn mã đã biết thay vì tải lại toàn bộ CAR.
+-- Cần chạy sau migration 007 (trigger đọc CAR.TotalDebt).
+-- Database tạo mới từ init.sql đã có sẵn, không cần chạy file này.
+-- =====================================================
+
+USE GarageManagement;
+
+-- Stores one row per change of a CAR row (polled by the vehicle lookup page)
+CREATE TABLE CAR_CHANGE_LOG (
+    ChangeId BIGINT AUTO_INCREMENT PRIMARY KEY COMMENT 'Change sequence number (change token)',
+    LicensePlate VARCHAR(255) NOT NULL COMMENT 'Changed car (no foreign key: deletions are logged too)',
+    ChangedAt TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3) COMMENT 'Change time (for pruning)',
+    INDEX idx_car_change_log_time (ChangedAt)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_LogCarChangeAfterInsert //
+CREATE TRIGGER trg_LogCarChangeAfterInsert
+AFTER INSERT ON CAR
+FOR EACH ROW
+BEGIN
+    INSERT INTO CAR_CHANGE_LOG (LicensePlate) VALUES (NEW.LicensePlate);
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_LogCarChangeAfterUpdate //
+CREATE TRIGGER trg_LogCarChangeAfterUpdate
+AFTER UPDATE ON CAR
+FOR EACH ROW
+BEGIN
+    -- Tiếp nhận, phiếu sửa chữa, phiếu thu đổi CAR.TotalDebt qua trigger của CAR_RECEPTION -> cũng được ghi ở đây
+    IF NOT (NEW.LicensePlate <=> OLD.LicensePlate
+            AND NEW.BrandId <=> OLD.BrandId
+            AND NEW.OwnerName <=> OLD.OwnerName
+            AND NEW.PhoneNumber <=> OLD.PhoneNumber
+            AND NEW.Address <=> OLD.Address
+            AND NEW.TotalDebt <=> OLD.TotalDebt) THEN
+        IF NEW.LicensePlate <> OLD.LicensePlate THEN
+            INSERT INTO CAR_CHANGE_LOG (LicensePlate) VALUES (OLD.LicensePlate);
+        END IF;
+        INSERT INTO CAR_CHANGE_LOG (LicensePlate) VALUES (NEW.LicensePlate);
+    END IF;
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_LogCarChangeAfterDelete //
+CREATE TRIGGER trg_LogCarChangeAfterDelete
+AFTER DELETE ON CAR
+FOR EACH ROW
+BEGIN
+    INSERT INTO CAR_CHANGE_LOG (LicensePlate) VALUES (OLD.LicensePlate);
+END //
+DELIMITER ;
+DELIMITER //
+DROP TRIGGER IF EXISTS trg_LogCarChangeAfterBrandRename //
+CREATE TRIGGER trg_LogCarChangeAfterBrandRename
+AFTER UPDATE ON CAR_BRAND
+FOR EACH ROW
+BEGIN
+    -- Tên hiệu xe hiển thị cùng từng xe -> đổi tên hiệu là thay đổi của mọi xe thuộc hiệu đó
+    IF NOT (NEW.BrandName <=> OLD.BrandName) THEN
+        INSERT INTO CAR_CHANGE_LOG (LicensePlate)
+        SELECT LicensePlate FROM CAR WHERE BrandId = NEW.BrandId;
+    END IF;
+END //
+DELIMITER ;
+
+-- Dọn nhật ký thay đổi cũ hơn 1 ngày (cần event_scheduler = ON, mặc định của MySQL 8).
+-- Luôn giữ dòng mới nhất để mã thay đổi hiện tại vẫn đọc được; nơi gọi có mã cũ hơn
+-- phần đã dọn sẽ được báo tải lại toàn bộ (xem VehicleLookupService.get_changes_since).
+DELIMITER //
+DROP EVENT IF EXISTS evt_PruneCarChangeLog //
+CREATE EVENT evt_PruneCarChangeLog
+ON SCHEDULE EVERY 1 HOUR
+DO
+BEGIN
+    DECLARE v_last_id BIGINT;
+
+    SELECT MAX(ChangeId) INTO v_last_id FROM CAR_CHANGE_LOG;
+
+    DELETE FROM CAR_CHANGE_LOG
+    WHERE ChangedAt < NOW(3) - INTERVAL 1 DAY
+      AND ChangeId < v_last_id;
+END //
+DELIMITER ;
+
+-- =====================================================
+-- Kiểm tra:
+-- =====================================================
+--   SELECT MAX(ChangeId) FROM CAR_CHANGE_LOG;                 -- mã thay đổi hiện tại
+--   INSERT INTO RECEIPT (ReceptionId, ReceiptDate, MoneyAmount) VALUES (1, CURDATE(), 1000);
+--   SELECT * FROM CAR_CHANGE_LOG ORDER BY ChangeId DESC LIMIT 5; -- biển số của lượt tiếp nhận 1
+--
+--   EXPLAIN SELECT DISTINCT LicensePlate FROM CAR_CHANGE_LOG WHERE ChangeId > 100;
+--     -> type: range, key: PRIMARY
+-- =====================================================
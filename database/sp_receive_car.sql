@@ -0,0 +1,66 @@
+-- =====================================================
+-- Stored Procedure: Tiếp nhận xe (BM1)
+-- Upsert CAR + tạo CAR_RECEPTION trong một lần gọi
+-- =====================================================
+
+USE GarageManagement;
+
+DELIMITER //
+
+-- Xóa procedure cũ nếu tồn tại
+DROP PROCEDURE IF EXISTS sp_ReceiveCar //
+
+-- Tạo stored procedure
+CREATE PROCEDURE sp_ReceiveCar(
+    IN p_license_plate VARCHAR(255),   -- Biển số xe
+    IN p_brand_name VARCHAR(255),      -- Tên hiệu xe
+    IN p_owner_name VARCHAR(255),      -- Tên chủ xe
+    IN p_phone_number VARCHAR(20),     -- Số điện thoại
+    IN p_address VARCHAR(255),         -- Địa chỉ
+    IN p_email VARCHAR(255),           -- Email (có thể NULL)
+    IN p_reception_date DATE           -- Ngày tiếp nhận
+)
+BEGIN
+    DECLARE v_brand_id INT DEFAULT NULL;
+    DECLARE v_reception_id INT;
+
+    -- 1. Lấy BrandId từ tên hiệu xe
+    SELECT BrandId INTO v_brand_id
+    FROM CAR_BRAND
+    WHERE BrandName = p_brand_name;
+
+    IF v_brand_id IS NULL THEN
+        SIGNAL SQLSTATE '45001'
+        SET MESSAGE_TEXT = 'Lỗi: Không tìm thấy hiệu xe.';
+    END IF;
+
+    -- 2. Thêm mới hoặc cập nhật thông tin xe
+    INSERT INTO CAR (LicensePlate, BrandId, OwnerName, PhoneNumber, Address, Email)
+    VALUES (p_license_plate, v_brand_id, p_owner_name, p_phone_number, p_address, p_email)
+    ON DUPLICATE KEY UPDATE
+        BrandId = v_brand_id,
+        OwnerName = p_owner_name,
+        PhoneNumber = p_phone_number,
+        Address = p_address,
+        Email = p_email;
+
+    -- 3. Tạo phiếu tiếp nhận
+    -- Giới hạn số xe trong ngày do trigger trg_CheckMaxCarReception kiểm tra (SQLSTATE 45000)
+    INSERT INTO CAR_RECEPTION (LicensePlate, ReceptionDate, Debt)
+    VALUES (p_license_plate, p_reception_date, 0);
+
+    SET v_reception_id = LAST_INSERT_ID();
+
+    -- 4. Trả ID phiếu tiếp nhận thành result set của CALL (không cần SELECT @biến thêm một lần)
+    SELECT v_reception_id AS ReceptionId;
+END //
+
+DELIMITER ;
+
+-- =====================================================
+-- Cách sử dụng:
+-- =====================================================
+--   CALL sp_ReceiveCar('59A-123.45', 'Toyota', 'Nguyễn Văn An', '0909123456',
+--                      '123 Lê Lợi, Q1, TP.HCM', NULL, CURDATE());
+--   -> một dòng ReceptionId (ID phiếu tiếp nhận được tạo)
+-- =====================================================
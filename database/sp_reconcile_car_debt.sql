@@ -0,0 +1,39 @@
+-- =====================================================
+-- Stored Procedure: Đối soát tổng nợ của xe
+-- Tính lại CAR.TotalDebt từ CAR_RECEPTION.Debt
+-- =====================================================
+
+USE GarageManagement;
+
+DELIMITER //
+
+-- Xóa procedure cũ nếu tồn tại
+DROP PROCEDURE IF EXISTS sp_ReconcileCarDebt //
+
+-- Tạo stored procedure
+CREATE PROCEDURE sp_ReconcileCarDebt(
+    OUT p_fixed_rows INT         -- Số xe có TotalDebt bị lệch đã được sửa (OUT parameter)
+)
+BEGIN
+    -- Chỉ cập nhật các xe có TotalDebt khác với tổng Debt thực tế
+    UPDATE CAR c
+    LEFT JOIN (
+        SELECT LicensePlate, SUM(Debt) AS total_debt
+        FROM CAR_RECEPTION
+        GROUP BY LicensePlate
+    ) d ON c.LicensePlate = d.LicensePlate
+    SET c.TotalDebt = COALESCE(d.total_debt, 0)
+    WHERE c.TotalDebt <> COALESCE(d.total_debt, 0);
+
+    SET p_fixed_rows = ROW_COUNT();
+END //
+
+DELIMITER ;
+
+-- =====================================================
+-- Cách sử dụng:
+-- =====================================================
+--   CALL sp_ReconcileCarDebt(@fixed_rows);
+--   SELECT @fixed_rows AS 'Fixed Cars';
+-- Trong ứng dụng: nút "Đối soát công nợ xe" trên trang Thống kê kết nối (ADMIN)
+-- =====================================================
@@ -19,6 +19,14 @@ CREATE PROCEDURE sp_CreateRevenueReport(
 BEGIN
     DECLARE v_total_revenue DECIMAL(15, 2) DEFAULT 0;
     DECLARE v_existing_report_id INT DEFAULT NULL;
+    DECLARE v_start_date DATE;
+    DECLARE v_end_date DATE;
+    DECLARE v_data_version INT DEFAULT 0;
+    
+    -- Khoảng ngày nửa mở [v_start_date, v_end_date) của tháng báo cáo,
+    -- để điều kiện lọc Day trên REVENUE_DAILY_BRAND đọc theo khoảng khóa chính (Day, BrandId)
+    SET v_start_date = MAKEDATE(p_year, 1) + INTERVAL (p_month - 1) MONTH;
+    SET v_end_date = v_start_date + INTERVAL 1 MONTH;
     
     -- 1. Kiểm tra xem báo cáo tháng này đã tồn tại chưa
     SELECT ReportId INTO v_existing_report_id
@@ -34,41 +42,47 @@ BEGIN
         DELETE FROM REVENUE_REPORT WHERE ReportId = v_existing_report_id;
     END IF;
     
-    -- 3. Tính tổng doanh thu tháng từ bảng REPAIR
-    SELECT COALESCE(SUM(r.RepairMoney), 0) INTO v_total_revenue
-    FROM REPAIR r
-    WHERE MONTH(r.RepairDate) = p_month 
-      AND YEAR(r.RepairDate) = p_year;
+    -- Phiên bản dữ liệu doanh thu của tháng, đọc trước khi tổng hợp: nếu dữ liệu đổi
+    -- trong lúc tổng hợp thì báo cáo mang phiên bản cũ và sẽ được lập lại ở lần xem sau.
+    -- Trigger tăng bộ đếm trong chính giao dịch ghi, nên giao dịch chưa commit lúc này
+    -- cũng làm phiên bản tăng khi commit (không bị bỏ sót như mốc thời gian ghi)
+    SELECT COALESCE(MAX(RevenueVersion), 0) INTO v_data_version
+    FROM REPORT_DATA_VERSION
+    WHERE DataMonth = v_start_date;
+    
+    -- 3. Tính tổng doanh thu tháng từ bảng tổng hợp REVENUE_DAILY_BRAND
+    -- (tối đa 31 ngày x số hiệu xe, không phụ thuộc số phiếu sửa chữa đã có)
+    SELECT COALESCE(SUM(TotalMoney), 0) INTO v_total_revenue
+    FROM REVENUE_DAILY_BRAND
+    WHERE Day >= v_start_date
+      AND Day < v_end_date;
     
     -- 4. Tạo record chính trong REVENUE_REPORT
-    INSERT INTO REVENUE_REPORT (ReportMonth, ReportYear, TotalRevenue)
-    VALUES (p_month, p_year, v_total_revenue);
+    INSERT INTO REVENUE_REPORT (ReportMonth, ReportYear, TotalRevenue, DataVersion)
+    VALUES (p_month, p_year, v_total_revenue, v_data_version);
     
     -- Lấy ID báo cáo vừa tạo
     SET p_report_id = LAST_INSERT_ID();
     
     -- 5. Tạo chi tiết theo từng hãng xe trong REVENUE_REPORT_DETAILS
-    -- Join: REPAIR -> CAR_RECEPTION -> CAR -> CAR_BRAND
+    -- Cộng dồn REVENUE_DAILY_BRAND theo BrandId (do các trigger trên REPAIR duy trì)
     -- Chỉ insert các hãng xe có dữ liệu sửa chữa trong tháng
     INSERT INTO REVENUE_REPORT_DETAILS (ReportId, BrandId, Count, TotalMoney, Rate)
     SELECT 
         p_report_id AS ReportId,
-        cb.BrandId,
-        COUNT(r.RepairId) AS Count,
-        COALESCE(SUM(r.RepairMoney), 0) AS TotalMoney,
+        d.BrandId,
+        SUM(d.Count) AS Count,
+        SUM(d.TotalMoney) AS TotalMoney,
         CASE 
             WHEN v_total_revenue > 0 THEN 
-                ROUND((COALESCE(SUM(r.RepairMoney), 0) / v_total_revenue) * 100, 2)
+                ROUND((SUM(d.TotalMoney) / v_total_revenue) * 100, 2)
             ELSE 0 
         END AS Rate
-    FROM REPAIR r
-    INNER JOIN CAR_RECEPTION cr ON r.ReceptionId = cr.ReceptionId
-    INNER JOIN CAR c ON cr.LicensePlate = c.LicensePlate
-    INNER JOIN CAR_BRAND cb ON c.BrandId = cb.BrandId
-    WHERE MONTH(r.RepairDate) = p_month 
-      AND YEAR(r.RepairDate) = p_year
-    GROUP BY cb.BrandId, cb.BrandName
-    HAVING COUNT(r.RepairId) > 0
+    FROM REVENUE_DAILY_BRAND d
+    WHERE d.Day >= v_start_date
+      AND d.Day < v_end_date
+    GROUP BY d.BrandId
+    HAVING SUM(d.Count) > 0
     ORDER BY TotalMoney DESC;
     
 END //
@@ -18,19 +18,18 @@ CREATE PROCEDURE sp_CreateStockReport(
 )
 BEGIN
     DECLARE v_existing_report_id INT DEFAULT NULL;
-    DECLARE v_prev_month INT;
-    DECLARE v_prev_year INT;
+    DECLARE v_start_date DATE;
+    DECLARE v_data_version INT DEFAULT 0;
     
-    -- ===============================================
-    -- Tính tháng trước để lấy Tồn Đầu (từ D3)
-    -- ===============================================
-    IF p_month = 1 THEN
-        SET v_prev_month = 12;
-        SET v_prev_year = p_year - 1;
-    ELSE
-        SET v_prev_month = p_month - 1;
-        SET v_prev_year = p_year;
-    END IF;
+    -- Ngày đầu tháng báo cáo = khóa BalanceMonth trong INVENTORY_MONTHLY_BALANCE
+    SET v_start_date = MAKEDATE(p_year, 1) + INTERVAL (p_month - 1) MONTH;
+    
+    -- Phiên bản dữ liệu tồn kho: tổng StockVersion từ đầu đến tháng báo cáo
+    -- (Tồn Đầu phụ thuộc mọi tháng trước đó). REPORT_DATA_VERSION có một dòng mỗi tháng:
+    -- đọc theo khoảng khóa chính các tháng <= tháng báo cáo, không đọc số dư từng vật tư
+    SELECT COALESCE(SUM(StockVersion), 0) INTO v_data_version
+    FROM REPORT_DATA_VERSION
+    WHERE DataMonth <= v_start_date;
     
     -- ===============================================
     -- 1. Kiểm tra báo cáo đã tồn tại → Xóa để tạo lại
@@ -48,60 +47,44 @@ BEGIN
     -- ===============================================
     -- 2. Tạo record chính D4: STOCK_REPORT
     -- ===============================================
-    INSERT INTO STOCK_REPORT (ReportMonth, ReportYear)
-    VALUES (p_month, p_year);
+    INSERT INTO STOCK_REPORT (ReportMonth, ReportYear, DataVersion)
+    VALUES (p_month, p_year, v_data_version);
     
     SET p_report_id = LAST_INSERT_ID();
     
     -- ===============================================
     -- 3. Tạo chi tiết D4: STOCK_REPORT_DETAILS
-    -- Xử lý D3:
+    -- Xử lý D3 (INVENTORY_MONTHLY_BALANCE do các trigger sổ kho duy trì):
     --   - Danh mục Vật Tư (SUPPLIES)
-    --   - Tồn Đầu: EndQty tháng trước từ STOCK_REPORT_DETAILS
-    --   - Phát Sinh: SUM(SuppliesAmount) từ REPAIR_DETAILS
-    --   - Tồn Cuối = Tồn Đầu - Phát Sinh
+    --   - Tồn Đầu: Tồn Cuối của tháng gần nhất trước tháng báo cáo có biến động
+    --   - Nhập / Phát Sinh: tổng nhập / xuất trong tháng báo cáo
+    --   - Tồn Cuối = Tồn Đầu + Nhập - Phát Sinh
+    -- Không phụ thuộc báo cáo các tháng trước, tạo lại được cho bất kỳ tháng nào
     -- ===============================================
-    INSERT INTO STOCK_REPORT_DETAILS (StockReportId, SuppliesId, BeginQty, IssueQty, EndQty)
+    INSERT INTO STOCK_REPORT_DETAILS (StockReportId, SuppliesId, BeginQty, ImportQty, IssueQty, EndQty)
     SELECT 
         p_report_id AS StockReportId,
         s.SuppliesId,
-        -- BeginQty (Tồn Đầu): Lấy từ Tồn Cuối tháng trước hoặc tính ngược từ inventory hiện tại
-        COALESCE(
-            (SELECT srd.EndQty 
-             FROM STOCK_REPORT_DETAILS srd
-             JOIN STOCK_REPORT sr ON srd.StockReportId = sr.StockReportId
-             WHERE sr.ReportMonth = v_prev_month 
-               AND sr.ReportYear = v_prev_year
-               AND srd.SuppliesId = s.SuppliesId
-             LIMIT 1),
-            -- Nếu không có tháng trước: Tồn hiện tại + Phát sinh = Tồn Đầu
-            s.InventoryNumber + COALESCE(issue.total_issued, 0)
-        ) AS BeginQty,
-        -- IssueQty (Phát Sinh): Tổng xuất kho trong tháng từ REPAIR_DETAILS
-        COALESCE(issue.total_issued, 0) AS IssueQty,
-        -- EndQty (Tồn Cuối): Tồn Đầu - Phát Sinh (không có nhập trong hệ thống)
-        COALESCE(
-            (SELECT srd.EndQty 
-             FROM STOCK_REPORT_DETAILS srd
-             JOIN STOCK_REPORT sr ON srd.StockReportId = sr.StockReportId
-             WHERE sr.ReportMonth = v_prev_month 
-               AND sr.ReportYear = v_prev_year
-               AND srd.SuppliesId = s.SuppliesId
-             LIMIT 1),
-            s.InventoryNumber + COALESCE(issue.total_issued, 0)
-        ) - COALESCE(issue.total_issued, 0) AS EndQty
+        COALESCE(prev.EndQty, 0) AS BeginQty,
+        COALESCE(cur.ImportQty, 0) AS ImportQty,
+        COALESCE(cur.IssueQty, 0) AS IssueQty,
+        COALESCE(prev.EndQty, 0) + COALESCE(cur.ImportQty, 0) - COALESCE(cur.IssueQty, 0) AS EndQty
     FROM SUPPLIES s
+    LEFT JOIN INVENTORY_MONTHLY_BALANCE cur
+        ON cur.BalanceMonth = v_start_date
+       AND cur.SuppliesId = s.SuppliesId
     LEFT JOIN (
-        -- D3: Tính Phát Sinh từ Chi tiết Phiếu Sửa Chữa trong tháng
-        SELECT 
-            rd.SuppliesId,
-            SUM(rd.SuppliesAmount) AS total_issued
-        FROM REPAIR_DETAILS rd
-        JOIN REPAIR r ON rd.RepairId = r.RepairId
-        WHERE MONTH(r.RepairDate) = p_month 
-          AND YEAR(r.RepairDate) = p_year
-        GROUP BY rd.SuppliesId
-    ) issue ON s.SuppliesId = issue.SuppliesId;
+        -- Tồn Cuối của tháng gần nhất trước tháng báo cáo (mỗi vật tư một dòng)
+        SELECT b.SuppliesId, b.EndQty
+        FROM INVENTORY_MONTHLY_BALANCE b
+        JOIN (
+            SELECT SuppliesId, MAX(BalanceMonth) AS BalanceMonth
+            FROM INVENTORY_MONTHLY_BALANCE
+            WHERE BalanceMonth < v_start_date
+            GROUP BY SuppliesId
+        ) last_month ON b.SuppliesId = last_month.SuppliesId
+                    AND b.BalanceMonth = last_month.BalanceMonth
+    ) prev ON s.SuppliesId = prev.SuppliesId;
     
 END //
 
@@ -0,0 +1,95 @@
+-- =====================================================
+-- Stored Procedure: Hồ sơ xe theo biển số
+-- Thông tin xe, trang đầu lịch sử tiếp nhận / sửa chữa / phiếu thu và phiếu
+-- tiếp nhận mới nhất còn nợ, trả về thành 5 result set trong một lần gọi
+-- Cần chạy sau migration 007 (đọc CAR.TotalDebt)
+-- =====================================================
+
+USE GarageManagement;
+
+DELIMITER //
+
+-- Xóa procedure cũ nếu tồn tại
+DROP PROCEDURE IF EXISTS sp_GetVehicleDossier //
+
+-- Tạo stored procedure
+CREATE PROCEDURE sp_GetVehicleDossier(
+    IN p_license_plate VARCHAR(255),   -- Biển số xe
+    IN p_page_size INT                 -- Số dòng trang đầu của mỗi mục lịch sử
+)
+READS SQL DATA
+BEGIN
+    -- 1. Thông tin xe + tổng số dòng của từng mục lịch sử (để phân trang)
+    SELECT 
+        c.LicensePlate,
+        b.BrandName,
+        c.OwnerName,
+        c.PhoneNumber,
+        c.Address,
+        c.Email,
+        c.TotalDebt,
+        (SELECT COUNT(*) FROM CAR_RECEPTION cr
+         WHERE cr.LicensePlate = c.LicensePlate) AS ReceptionTotal,
+        (SELECT COUNT(*) FROM REPAIR r
+         JOIN CAR_RECEPTION cr ON r.ReceptionId = cr.ReceptionId
+         WHERE cr.LicensePlate = c.LicensePlate) AS RepairTotal,
+        (SELECT COUNT(*) FROM RECEIPT rc
+         JOIN CAR_RECEPTION cr ON rc.ReceptionId = cr.ReceptionId
+         WHERE cr.LicensePlate = c.LicensePlate) AS ReceiptTotal
+    FROM CAR c
+    JOIN CAR_BRAND b ON c.BrandId = b.BrandId
+    WHERE c.LicensePlate = p_license_plate;
+
+    -- 2. Lịch sử tiếp nhận (trang đầu)
+    SELECT 
+        cr.ReceptionId,
+        cr.ReceptionDate,
+        cr.Debt,
+        COUNT(r.RepairId) AS RepairCount,
+        COALESCE(SUM(r.RepairMoney), 0) AS TotalRepairMoney
+    FROM CAR_RECEPTION cr
+    LEFT JOIN REPAIR r ON cr.ReceptionId = r.ReceptionId
+    WHERE cr.LicensePlate = p_license_plate
+    GROUP BY cr.ReceptionId, cr.ReceptionDate, cr.Debt
+    ORDER BY cr.ReceptionDate DESC, cr.ReceptionId DESC
+    LIMIT p_page_size;
+
+    -- 3. Lịch sử sửa chữa (trang đầu)
+    SELECT 
+        r.RepairId,
+        r.RepairDate,
+        r.RepairMoney,
+        cr.ReceptionDate,
+        cr.ReceptionId
+    FROM REPAIR r
+    JOIN CAR_RECEPTION cr ON r.ReceptionId = cr.ReceptionId
+    WHERE cr.LicensePlate = p_license_plate
+    ORDER BY r.RepairDate DESC, r.RepairId DESC
+    LIMIT p_page_size;
+
+    -- 4. Lịch sử phiếu thu (trang đầu)
+    SELECT 
+        r.ReceiptId, r.ReceiptDate, r.MoneyAmount,
+        r.ReceptionId, cr.ReceptionDate
+    FROM RECEIPT r
+    JOIN CAR_RECEPTION cr ON r.ReceptionId = cr.ReceptionId
+    WHERE cr.LicensePlate = p_license_plate
+    ORDER BY r.ReceiptDate DESC, r.ReceiptId DESC
+    LIMIT p_page_size;
+
+    -- 5. Phiếu tiếp nhận mới nhất còn nợ (phiếu thu được lập cho phiếu này)
+    SELECT ReceptionId, LicensePlate, ReceptionDate, Debt
+    FROM CAR_RECEPTION
+    WHERE LicensePlate = p_license_plate AND Debt > 0
+    ORDER BY ReceptionDate DESC, ReceptionId DESC
+    LIMIT 1;
+END //
+
+DELIMITER ;
+
+-- =====================================================
+-- Cách sử dụng:
+-- =====================================================
+--   CALL sp_GetVehicleDossier('51F-123.45', 20);
+--   -- Xe không tồn tại: result set 1 rỗng, các result set còn lại cũng rỗng
+-- =====================================================
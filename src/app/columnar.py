@@ -0,0 +1,107 @@
+# src/app/columnar.py
+"""
+Columnar query results for analytics and report rendering.
+
+A result is a dict of column name -> column. Numeric columns are NumPy arrays
+when NumPy is installed and stdlib array.array otherwise; other columns are
+plain lists. The helpers below (total, percent_of, argsort_desc, take) work on
+both, so report code stays the same with or without NumPy.
+"""
+
+import math
+from array import array
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # NumPy là tùy chọn
+    np = None
+
+HAS_NUMPY = np is not None
+
+# Kiểu cột số (mã kiểu của array.array)
+INT = "q"    # int64
+FLOAT = "d"  # float64
+
+_NUMPY_DTYPES = {INT: "int64", FLOAT: "float64"}
+
+
+class ColumnBuilder:
+    """
+    Accumulates tuple rows into columns, one chunk at a time.
+
+    Numeric columns are appended to array.array buffers (8 bytes per value);
+    NULL becomes 0 in INT columns and NaN in FLOAT columns.
+    """
+
+    def __init__(self, names: Sequence[str], types: Optional[Mapping[str, str]] = None):
+        """
+        Args:
+            names: Column names in SELECT order
+            types: Column name -> INT or FLOAT; other columns are kept as lists
+        """
+        types = types or {}
+        unknown = set(types) - set(names)
+        if unknown:
+            raise ValueError(f"Unknown columns in types: {sorted(unknown)}")
+        self.names = tuple(names)
+        self._types = [types.get(name) for name in self.names]
+        self._columns: List[Any] = [
+            array(typecode) if typecode else [] for typecode in self._types
+        ]
+
+    def extend(self, rows: Sequence[tuple]):
+        """Append a chunk of tuple rows."""
+        if not rows:
+            return
+        for column, typecode, values in zip(self._columns, self._types, zip(*rows)):
+            if typecode == INT:
+                column.extend(0 if v is None else int(v) for v in values)
+            elif typecode == FLOAT:
+                column.extend(math.nan if v is None else float(v) for v in values)
+            else:
+                column.extend(values)
+
+    def build(self) -> Dict[str, Any]:
+        """Columns by name; numeric buffers are wrapped as NumPy arrays without copying."""
+        result = {}
+        for name, typecode, column in zip(self.names, self._types, self._columns):
+            if typecode and HAS_NUMPY:
+                column = np.frombuffer(column, dtype=_NUMPY_DTYPES[typecode])
+            result[name] = column
+        return result
+
+
+def total(column) -> float:
+    """Sum of a numeric column."""
+    if HAS_NUMPY and isinstance(column, np.ndarray):
+        return float(column.sum())
+    return math.fsum(column)
+
+
+def percent_of(column, whole: float, ndigits: int = 2):
+    """Each value as a percentage of whole, rounded (all zeros if whole <= 0)."""
+    if HAS_NUMPY and isinstance(column, np.ndarray):
+        if whole <= 0:
+            return np.zeros(len(column))
+        return np.round(column / whole * 100, ndigits)
+    if whole <= 0:
+        return array(FLOAT, bytes(8 * len(column)))
+    return array(FLOAT, (round(v / whole * 100, ndigits) for v in column))
+
+
+def argsort_desc(column) -> Sequence[int]:
+    """Row order by column, highest first (stable for equal values)."""
+    if HAS_NUMPY and isinstance(column, np.ndarray):
+        # kind="stable": giá trị bằng nhau giữ thứ tự ban đầu như sorted()
+        return np.argsort(-column, kind="stable")
+    return sorted(range(len(column)), key=column.__getitem__, reverse=True)
+
+
+def take(column, order: Sequence[int]):
+    """Reorder a column (any kind) by a row order."""
+    if HAS_NUMPY and isinstance(column, np.ndarray):
+        return column[order]
+    if isinstance(column, array):
+        return array(column.typecode, (column[i] for i in order))
+    return [column[i] for i in order]
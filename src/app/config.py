@@ -25,14 +25,42 @@ class DatabaseConfig:
     # Connection pool settings
     POOL_NAME: str = "garage_pool"
     POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
-    POOL_RESET_SESSION: bool = True
+    # Elastic mode when POOL_MAX_SIZE > POOL_SIZE: grows under load, extra
+    # connections are closed after POOL_IDLE_TTL seconds idle
+    POOL_MAX_SIZE: int = max(POOL_SIZE, int(os.getenv("DB_POOL_MAX_SIZE", str(POOL_SIZE))))
+    POOL_IDLE_TTL: int = int(os.getenv("DB_POOL_IDLE_TTL", "300"))
+    # Max seconds to wait for a free connection (0 = fail immediately)
+    POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+    # Ping a pooled connection before reuse only if it was idle longer than this (seconds)
+    POOL_VALIDATE_IDLE: float = float(os.getenv("DB_POOL_VALIDATE_IDLE", "30"))
+    # Reset session state on every release (one extra round trip); open
+    # transactions are rolled back regardless
+    POOL_RESET_SESSION: bool = os.getenv("DB_POOL_RESET_SESSION", "False").lower() == "true"
     
     # Connection timeout settings (in seconds)
     CONNECTION_TIMEOUT: int = int(os.getenv("DB_CONNECTION_TIMEOUT", "10"))
     
+    # Write transaction retry on deadlock / lock wait timeout (see app.retry_policy)
+    TX_RETRY_ATTEMPTS: int = int(os.getenv("DB_TX_RETRY_ATTEMPTS", "4"))
+    TX_RETRY_BASE_DELAY: float = float(os.getenv("DB_TX_RETRY_BASE_DELAY", "0.05"))
+    TX_RETRY_MAX_DELAY: float = float(os.getenv("DB_TX_RETRY_MAX_DELAY", "1.0"))
+    
     # Charset
     CHARSET: str = "utf8mb4"
     
+    # Slow query log (statements slower than SLOW_QUERY_MS; 0 disables it)
+    SLOW_QUERY_MS: int = int(os.getenv("DB_SLOW_QUERY_MS", "500"))
+    SLOW_QUERY_LOG: str = os.getenv("DB_SLOW_QUERY_LOG") or os.path.join(
+        os.environ.get("LOCALAPPDATA") or os.path.expanduser("~"),
+        "AutoGarageManagement",
+        "logs",
+        "slow_query.log",
+    )
+    SLOW_QUERY_LOG_MAX_BYTES: int = int(os.getenv("DB_SLOW_QUERY_LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+    SLOW_QUERY_LOG_BACKUPS: int = int(os.getenv("DB_SLOW_QUERY_LOG_BACKUPS", "3"))
+    # Capture EXPLAIN of slow SELECTs on a separate connection
+    SLOW_QUERY_EXPLAIN: bool = os.getenv("DB_SLOW_QUERY_EXPLAIN", "False").lower() == "true"
+    
     @classmethod
     def get_connection_config(cls) -> Dict[str, Any]:
         """
@@ -58,15 +86,16 @@ class DatabaseConfig:
         Get connection pool configuration as a dictionary.
         
         Returns:
-            Dictionary with pool parameters for mysql.connector.pooling
+            Dictionary with parameters for app.connection_pool.ConnectionPool
         """
-        config = cls.get_connection_config()
-        config.update({
-            "pool_name": cls.POOL_NAME,
-            "pool_size": cls.POOL_SIZE,
-            "pool_reset_session": cls.POOL_RESET_SESSION,
-        })
-        return config
+        return {
+            "min_size": cls.POOL_SIZE,
+            "max_size": cls.POOL_MAX_SIZE,
+            "timeout": cls.POOL_TIMEOUT,
+            "idle_ttl": cls.POOL_IDLE_TTL,
+            "validate_idle": cls.POOL_VALIDATE_IDLE,
+            "reset_session": cls.POOL_RESET_SESSION,
+        }
 
 
 # Application configuration
@@ -0,0 +1,299 @@
+# src/app/connection_pool.py
+"""
+Connection pool with bounded-wait checkout.
+
+Unlike mysql.connector.pooling.MySQLConnectionPool, which raises PoolError as
+soon as every connection is in use, callers wait (up to a timeout) in FIFO
+order for a connection to be returned. In elastic mode the pool grows from
+min_size up to max_size under load and closes connections above min_size
+once they have been idle for idle_ttl seconds.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
+
+logger = logging.getLogger(__name__)
+
+
+# Mã lỗi client khi kết nối đã đứt (server khởi động lại, hết wait_timeout, ...)
+#   2006 CR_SERVER_GONE_ERROR, 2013 CR_SERVER_LOST, 2055 CR_SERVER_LOST_EXTENDED,
+#   4031 ER_CLIENT_INTERACTION_TIMEOUT
+CONNECTION_LOST_ERRNOS = frozenset({2006, 2013, 2055, 4031})
+
+
+class PoolTimeoutError(PoolError):
+    """No connection became available within the checkout timeout."""
+
+
+def is_connection_lost(error: Exception) -> bool:
+    """True if the error means the connection to the server is gone."""
+    return getattr(error, "errno", None) in CONNECTION_LOST_ERRNOS
+
+
+class _Waiter:
+    """A caller queued for a connection."""
+
+    __slots__ = ("event", "connection", "may_create")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.connection = None
+        # Được phép tự mở kết nối mới (khi một kết nối hỏng bị bỏ khỏi pool)
+        self.may_create = False
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of MySQL connections.
+
+    Connections are handed to waiters directly on release, so a waiter is never
+    overtaken by a caller that arrived later. A connection that sat idle longer
+    than validate_idle seconds is pinged before it is handed out and replaced
+    if the server dropped it.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        min_size: int,
+        max_size: int,
+        timeout: float = 10.0,
+        idle_ttl: float = 300.0,
+        validate_idle: float = 30.0,
+        reset_session: bool = False,
+    ):
+        """
+        Args:
+            connect: Factory opening a new connection
+            min_size: Connections opened up front and never reaped
+            max_size: Upper bound on open connections (> min_size = elastic mode)
+            timeout: Default checkout wait in seconds (0 = fail immediately)
+            idle_ttl: Seconds before an idle connection above min_size is closed
+            validate_idle: Ping connections idle longer than this before reuse
+            reset_session: Reset session state (one round trip) when a connection
+                is returned; open transactions are rolled back either way
+        """
+        self._connect = connect
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self.timeout = timeout
+        self.idle_ttl = idle_ttl
+        self.validate_idle = validate_idle
+        self.reset_session = reset_session
+
+        self._lock = threading.Lock()
+        self._idle: Deque[Tuple[Any, float]] = deque()  # (connection, returned at)
+        self._waiters: Deque[_Waiter] = deque()
+        self._size = 0  # open connections, in use + idle
+        self._closed = False
+        self._replaced = 0  # dead connections replaced at checkout
+        # Kết nối trả về trước thời điểm này phải được kiểm tra lại (đã phát hiện kết nối chết)
+        self._invalidated_at = 0.0
+
+        for _ in range(self.min_size):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+
+        self._reaper: Optional[threading.Thread] = None
+        self._reaper_stop = threading.Event()
+        if self.is_elastic and self.idle_ttl > 0:
+            self._reaper = threading.Thread(
+                target=self._reap_loop, name="db-pool-reaper", daemon=True
+            )
+            self._reaper.start()
+
+    @property
+    def is_elastic(self) -> bool:
+        return self.max_size > self.min_size
+
+    def get_connection(self, timeout: Optional[float] = None):
+        """
+        Check out a connection, waiting if none is available.
+
+        Args:
+            timeout: Seconds to wait (default: the pool timeout)
+
+        Raises:
+            PoolTimeoutError: No connection was returned within the timeout
+        """
+        if timeout is None:
+            timeout = self.timeout
+
+        waiter = None
+        with self._lock:
+            if self._closed:
+                raise PoolError("Connection pool is closed")
+            idle_entry = None
+            create = False
+            if not self._waiters and self._idle:
+                # LIFO: dùng lại kết nối vừa trả, kết nối cũ nhất nằm đầu hàng đợi để bị thu hồi
+                idle_entry = self._idle.pop()
+            elif not self._waiters and self._size < self.max_size:
+                self._size += 1
+                create = True
+            else:
+                waiter = _Waiter()
+                self._waiters.append(waiter)
+
+        if idle_entry is not None:
+            return self._validate(*idle_entry)
+        if create:
+            return self._open_reserved()
+
+        waiter.event.wait(max(timeout, 0))
+        with self._lock:
+            if waiter.connection is None and not waiter.may_create:
+                self._waiters.remove(waiter)
+                raise PoolTimeoutError(
+                    f"No connection available within {timeout:g}s "
+                    f"(size={self._size}, max={self.max_size}, waiting={len(self._waiters)})"
+                )
+        if waiter.connection is not None:
+            return waiter.connection
+        return self._open_reserved()
+
+    def release(self, connection, broken: bool = False):
+        """
+        Return a connection to the pool.
+
+        Args:
+            connection: Connection obtained from get_connection
+            broken: The caller saw the connection fail; drop it instead of reusing it
+        """
+        if broken:
+            self._close_quietly(connection)
+            healthy = False
+        else:
+            healthy = self._prepare_for_reuse(connection)
+
+        with self._lock:
+            if not healthy:
+                self._size -= 1
+                # Thường là server khởi động lại -> kiểm tra mọi kết nối đang rảnh trước khi dùng
+                self._invalidated_at = time.monotonic()
+                # Chỗ trống -> người chờ đầu tiên được mở kết nối mới
+                if self._waiters and not self._closed:
+                    waiter = self._waiters.popleft()
+                    self._size += 1
+                    waiter.may_create = True
+                    waiter.event.set()
+                return
+            if self._closed:
+                self._size -= 1
+            elif self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.connection = connection
+                waiter.event.set()
+                return
+            else:
+                self._idle.append((connection, time.monotonic()))
+                return
+        self._close_quietly(connection)
+
+    def close(self):
+        """Close idle connections; connections in use are closed on release."""
+        with self._lock:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+        self._reaper_stop.set()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self) -> Dict[str, int]:
+        """Current pool state: size, max_size, idle, active, waiting."""
+        with self._lock:
+            return {
+                'pool_size': self._size,
+                'max_size': self.max_size,
+                'idle': len(self._idle),
+                'active': self._size - len(self._idle),
+                'waiting': len(self._waiters),
+                'replaced_connections': self._replaced,
+            }
+
+    # ---------------- Helpers ----------------
+    def _open_reserved(self):
+        """Open a connection for a slot already counted in _size."""
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+                # Chỗ trống -> người chờ đầu tiên được thử mở kết nối mới (như release)
+                if self._waiters and not self._closed:
+                    waiter = self._waiters.popleft()
+                    self._size += 1
+                    waiter.may_create = True
+                    waiter.event.set()
+            raise
+
+    def _validate(self, connection, returned_at: float):
+        """
+        Ping a connection that was idle for a while; replace it if it is dead.
+        Its slot is already counted in _size.
+        """
+        if (
+            time.monotonic() - returned_at <= self.validate_idle
+            and returned_at > self._invalidated_at
+        ):
+            return connection
+        if connection.is_connected():
+            return connection
+
+        logger.warning("Replacing stale pooled connection")
+        self._close_quietly(connection)
+        with self._lock:
+            self._replaced += 1
+            self._invalidated_at = time.monotonic()
+        return self._open_reserved()
+
+    def _prepare_for_reuse(self, connection) -> bool:
+        # Không ping khi trả kết nối: kết nối chết được phát hiện khi lấy ra (_validate)
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+            if self.reset_session:
+                connection.reset_session()
+            return True
+        except Error as e:
+            logger.warning(f"Dropping pooled connection: {e}")
+            self._close_quietly(connection)
+            return False
+
+    def _reap_loop(self):
+        interval = max(1.0, self.idle_ttl / 2)
+        while not self._reaper_stop.wait(interval):
+            self._reap_idle()
+
+    def _reap_idle(self):
+        """Close connections above min_size that have been idle longer than idle_ttl."""
+        expired = []
+        now = time.monotonic()
+        with self._lock:
+            # Đầu hàng đợi là kết nối trả về lâu nhất
+            while (
+                self._idle
+                and self._size > self.min_size
+                and now - self._idle[0][1] > self.idle_ttl
+            ):
+                expired.append(self._idle.popleft()[0])
+                self._size -= 1
+        for conn in expired:
+            self._close_quietly(conn)
+        if expired:
+            logger.debug(f"Closed {len(expired)} idle connection(s)")
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Error:
+            pass
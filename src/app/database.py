@@ -5,18 +5,165 @@ Manages MySQL database connections using connection pooling.
 """
 
 import mysql.connector
-from mysql.connector import pooling, Error
-from mysql.connector.pooling import PooledMySQLConnection
-from typing import Optional, List, Dict, Any, Tuple
+from mysql.connector import Error
+from mysql.connector.connection import MySQLConnection
+from typing import Optional, List, Dict, Any, Tuple, Callable, TypeVar, Iterator
 from contextlib import contextmanager
+from contextvars import ContextVar
 import logging
+import re
+import time
 
 from app.config import DatabaseConfig
+from app.connection_pool import ConnectionPool, is_connection_lost
+from app.db_metrics import PoolMetrics, StatementStats, fingerprint
+from app.retry_policy import RetryPolicy
+from app.row_format import ROW_DICT, ROW_RECORD, check_row_format, record_class
+from app.columnar import ColumnBuilder
+from app.slow_query_log import SlowQueryLog
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Câu lệnh chỉ đọc, chạy lại an toàn khi mất kết nối giữa chừng
+_IDEMPOTENT_READ_RE = re.compile(r"^\s*(SELECT|WITH|SHOW)\b", re.I)
+
+
+class _InstrumentedCursor:
+    """
+    Cursor wrapper that records per-statement statistics (see StatementStats)
+    and reports slow statements to the slow query log.
+    Everything else is delegated to the wrapped cursor.
+    """
+    
+    def __init__(self, cursor, statements: StatementStats, slow_log: SlowQueryLog):
+        self._cursor = cursor
+        self._statements = statements
+        self._slow_log = slow_log
+        self._fingerprint: Optional[str] = None
+    
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+    
+    def __iter__(self):
+        for row in self._cursor:
+            self._add_rows(1)
+            yield row
+    
+    def execute(self, operation, params=None, *args, **kwargs):
+        return self._timed(self._cursor.execute, operation, operation, params, *args, **kwargs)
+    
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        return self._timed(self._cursor.executemany, operation, operation, seq_params, *args, **kwargs)
+    
+    def callproc(self, procname, args=()):
+        return self._timed(self._cursor.callproc, f"CALL {procname}", procname, args)
+    
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._add_rows(1)
+        return row
+    
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._add_rows(len(rows))
+        return rows
+    
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._add_rows(len(rows))
+        return rows
+    
+    def _timed(self, fn, sql: str, *args, **kwargs):
+        """Run fn(*args, **kwargs) and record it under the fingerprint of sql."""
+        key = fingerprint(sql)
+        self._fingerprint = key
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Error:
+            self._statements.record(key, (time.perf_counter() - started) * 1000, error=True)
+            raise
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        # Câu lệnh trả về dữ liệu: số dòng được cộng khi fetch; DML: số dòng bị ảnh hưởng
+        rowcount = self._cursor.rowcount
+        has_rows = getattr(self._cursor, "with_rows", False)
+        self._statements.record(key, elapsed_ms, 0 if has_rows else max(rowcount, 0))
+        self._slow_log.record(sql, args[1] if len(args) > 1 else None, elapsed_ms, rowcount, key)
+        return result
+    
+    def _add_rows(self, rows: int):
+        if self._fingerprint is not None:
+            self._statements.add_rows(self._fingerprint, rows)
+
+
+class _InstrumentedConnection:
+    """Connection wrapper whose cursors are _InstrumentedCursor."""
+    
+    def __init__(self, connection: MySQLConnection, manager: 'DatabaseManager'):
+        self._connection = connection
+        self._manager = manager
+    
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+    
+    def cursor(self, *args, **kwargs):
+        return self._manager._instrument(self._connection.cursor(*args, **kwargs))
+
+
+class RollbackOnlyError(Error):
+    """A nested call failed inside the transaction, so it cannot be committed."""
+
+
+class _UnitOfWork:
+    """The open transaction of the current thread/context (see DatabaseManager.transaction)."""
+    
+    __slots__ = ("connection", "rollback_only", "errno")
+    
+    def __init__(self, connection: MySQLConnection):
+        self.connection = connection
+        self.rollback_only = False
+        self.errno: Optional[int] = None
+    
+    def fail(self, error: Optional[BaseException] = None):
+        """Mark the transaction rollback-only, keeping the errno of the first failure."""
+        self.rollback_only = True
+        if self.errno is None:
+            self.errno = getattr(error, "errno", None)
+
+
+# Giao dịch đang mở trong ngữ cảnh hiện tại; mỗi thread của QThreadPool có ngữ cảnh riêng
+_current_unit: ContextVar[Optional[_UnitOfWork]] = ContextVar("db_current_unit_of_work", default=None)
+
+
+class _JoinedConnection(_InstrumentedConnection):
+    """
+    Connection of the ambient transaction handed to a nested get_connection().
+    The outer transaction owns commit/rollback: commit() does nothing and
+    rollback() marks the transaction rollback-only.
+    """
+    
+    def __init__(self, unit: _UnitOfWork, manager: 'DatabaseManager'):
+        super().__init__(unit.connection, manager)
+        self._unit = unit
+    
+    def start_transaction(self, *args, **kwargs):
+        pass
+    
+    def commit(self):
+        pass
+    
+    def rollback(self):
+        self._unit.fail()
+    
+    def close(self):
+        pass
+
 
 class DatabaseManager:
     """
@@ -25,7 +172,10 @@ class DatabaseManager:
     """
     
     _instance: Optional['DatabaseManager'] = None
-    _pool: Optional[pooling.MySQLConnectionPool] = None
+    _pool: Optional[ConnectionPool] = None
+    _metrics: PoolMetrics = PoolMetrics(DatabaseConfig.POOL_SIZE)
+    _statements: StatementStats = StatementStats()
+    _slow_log: SlowQueryLog = SlowQueryLog()
     
     def __new__(cls):
         """Ensure only one instance exists (Singleton pattern)."""
@@ -42,16 +192,23 @@ class DatabaseManager:
         """Initialize the connection pool."""
         try:
             pool_config = DatabaseConfig.get_pool_config()
-            self._pool = pooling.MySQLConnectionPool(**pool_config)
+            self._pool = ConnectionPool(self._open_connection, **pool_config)
             logger.info(f"Database connection pool created successfully: {DatabaseConfig.DATABASE}")
         except Error as e:
             logger.error(f"Failed to create connection pool: {e}")
             raise
     
+    @staticmethod
+    def _open_connection() -> MySQLConnection:
+        """Open a new connection for the pool."""
+        return mysql.connector.connect(**DatabaseConfig.get_connection_config())
+    
     @contextmanager
-    def get_connection(self):
+    def get_connection(self, timeout: Optional[float] = None):
         """
         Context manager for getting a database connection from the pool.
+        Waits up to timeout seconds (default DB_POOL_TIMEOUT) when every
+        connection is in use, then raises PoolTimeoutError.
         
         Usage:
             with db_manager.get_connection() as conn:
@@ -59,22 +216,74 @@ class DatabaseManager:
                 cursor.execute("SELECT * FROM table")
                 results = cursor.fetchall()
         
+        Inside transaction() the transaction's own connection is yielded instead
+        (commit() is deferred to the transaction, see _JoinedConnection).
+        
         Yields:
-            PooledMySQLConnection: A database connection from the pool
+            MySQLConnection: A database connection from the pool
+            (its cursors record statement statistics)
         """
-        connection: Optional[PooledMySQLConnection] = None
+        unit = _current_unit.get()
+        if unit is not None:
+            try:
+                yield _JoinedConnection(unit, self)
+            except GeneratorExit:
+                # Generator (vd. iter_query) bị đóng giữa chừng: không phải lỗi của giao dịch
+                raise
+            except BaseException as e:
+                unit.fail(e)
+                raise
+            return
+        
+        connection: Optional[MySQLConnection] = None
+        checked_out_at = 0.0
+        broken = False
         try:
-            if self._pool is None:
-                raise RuntimeError("Connection pool not initialized")
-            
-            connection = self._pool.get_connection()
-            yield connection
+            connection, checked_out_at = self._checkout(timeout)
+            yield _InstrumentedConnection(connection, self)
         except Error as e:
+            broken = is_connection_lost(e)
             logger.error(f"Database connection error: {e}")
             raise
         finally:
-            if connection and connection.is_connected():
-                connection.close()
+            if connection:
+                self._release(connection, checked_out_at, broken)
+    
+    def _checkout(self, timeout: Optional[float] = None) -> Tuple[MySQLConnection, float]:
+        """
+        Take a connection from the pool and record the checkout wait.
+        
+        Returns:
+            (connection, checkout timestamp from time.perf_counter)
+        """
+        if self._pool is None:
+            raise RuntimeError("Connection pool not initialized")
+        
+        started = time.perf_counter()
+        try:
+            connection = self._pool.get_connection(timeout)
+        except Error:
+            # PoolTimeoutError khi chờ quá lâu cũng là Error
+            self._metrics.record_checkout_failure((time.perf_counter() - started) * 1000)
+            raise
+        checked_out_at = time.perf_counter()
+        self._metrics.record_checkout((checked_out_at - started) * 1000)
+        return connection, checked_out_at
+    
+    def _instrument(self, cursor) -> _InstrumentedCursor:
+        """Wrap a cursor so its statements are recorded."""
+        return _InstrumentedCursor(cursor, self._statements, self._slow_log)
+    
+    def _release(self, connection: MySQLConnection, checked_out_at: float, broken: bool = False):
+        """
+        Return a connection to the pool and record how long it was held.
+        A broken connection (lost during use) is dropped by the pool.
+        """
+        self._metrics.record_release((time.perf_counter() - checked_out_at) * 1000)
+        if self._pool is not None:
+            self._pool.release(connection, broken)
+        elif connection.is_connected():
+            connection.close()
     
     @contextmanager
     def get_cursor(self, dictionary=True, buffered=True):
@@ -95,11 +304,20 @@ class DatabaseManager:
         """
         with self.get_connection() as connection:
             cursor = connection.cursor(dictionary=dictionary, buffered=buffered)
+            # Trong transaction: commit/rollback do giao dịch ngoài cùng thực hiện
+            joined = isinstance(connection, _JoinedConnection)
             try:
                 yield cursor
                 connection.commit()
+                if not joined:
+                    self._metrics.record_commit()
             except Error as e:
-                connection.rollback()
+                self._metrics.record_error()
+                # Kết nối đã đứt thì không rollback được (server tự hủy giao dịch)
+                if not is_connection_lost(e):
+                    connection.rollback()
+                    if not joined:
+                        self._metrics.record_rollback()
                 logger.error(f"Query execution error: {e}")
                 raise
             finally:
@@ -110,7 +328,8 @@ class DatabaseManager:
         query: str,
         params: Optional[Tuple] = None,
         fetch_one: bool = False,
-        fetch_all: bool = True
+        fetch_all: bool = True,
+        row_format: str = ROW_DICT
     ) -> Optional[Any]:
         """
         Execute a SELECT query and return results.
@@ -120,22 +339,189 @@ class DatabaseManager:
             params: Query parameters (tuple)
             fetch_one: If True, return only first result
             fetch_all: If True, return all results (default)
+            row_format: ROW_DICT (default), ROW_TUPLE or ROW_RECORD (see app.row_format)
         
         Returns:
-            Query results (list of dicts, single dict, or None)
+            Query results (list of rows, single row, or None)
         """
-        try:
-            with self.get_cursor() as cursor:
+        check_row_format(row_format)
+        # Câu đọc được chạy lại một lần trên kết nối mới nếu kết nối bị mất
+        # (không áp dụng trong transaction: mất kết nối thì mất cả giao dịch)
+        attempts = 2 if _IDEMPOTENT_READ_RE.match(query) and not self.in_transaction() else 1
+        for attempt in range(attempts):
+            try:
+                with self.get_cursor(dictionary=row_format == ROW_DICT) as cursor:
+                    cursor.execute(query, params or ())
+                    
+                    if fetch_one:
+                        row = cursor.fetchone()
+                        if row is not None and row_format == ROW_RECORD:
+                            row = record_class(tuple(cursor.column_names))._make(row)
+                        return row
+                    elif fetch_all:
+                        rows = cursor.fetchall()
+                        if row_format == ROW_RECORD:
+                            rows = list(map(record_class(tuple(cursor.column_names))._make, rows))
+                        return rows
+                    return None
+            except Error as e:
+                if attempt + 1 < attempts and is_connection_lost(e):
+                    self._metrics.record_retry()
+                    logger.warning(f"Connection lost, retrying read: {e}")
+                    continue
+                logger.error(f"Query execution failed: {e}")
+                raise
+    
+    def iter_query(
+        self,
+        query: str,
+        params: Optional[Tuple] = None,
+        chunk_size: int = 1000,
+        row_format: str = ROW_DICT
+    ) -> Iterator[Any]:
+        """
+        Stream the rows of a SELECT query.
+        
+        Uses an unbuffered cursor and fetchmany(chunk_size), so at most one
+        chunk of rows is held in memory at a time instead of the whole result.
+        
+        The connection stays checked out until the generator is exhausted or
+        closed, so consume it promptly and do not run other queries on the
+        same thread in between (outside a transaction they would need a second
+        connection). Stopping early still reads and discards the remaining
+        rows from the server; use LIMIT when only the first rows are needed.
+        
+        Usage:
+            for row in db_manager.iter_query("SELECT * FROM CAR", chunk_size=500):
+                writer.writerow(row)
+        
+        Args:
+            query: SQL query string
+            params: Query parameters (tuple)
+            chunk_size: Rows fetched from the server per round trip
+            row_format: ROW_DICT (default), ROW_TUPLE or ROW_RECORD (see app.row_format)
+        
+        Yields:
+            One row at a time
+        """
+        check_row_format(row_format)
+        make = None
+        for columns, rows in self._iter_chunks(query, params, chunk_size, row_format == ROW_DICT):
+            if make is None and row_format == ROW_RECORD:
+                make = record_class(columns)._make
+            yield from (map(make, rows) if make else rows)
+    
+    def fetch_columns(
+        self,
+        query: str,
+        params: Optional[Tuple] = None,
+        types: Optional[Dict[str, str]] = None,
+        chunk_size: int = 5000
+    ) -> Dict[str, Any]:
+        """
+        Execute a SELECT query and return the result as columns.
+        
+        Numeric columns listed in types are NumPy arrays when NumPy is installed,
+        array.array otherwise; other columns are lists (see app.columnar).
+        Rows are streamed into the columns chunk by chunk, so no per-row
+        dicts or tuples are kept.
+        
+        Usage:
+            cols = db_manager.fetch_columns(
+                "SELECT BrandName, Count, TotalMoney FROM ...",
+                types={"Count": columnar.INT, "TotalMoney": columnar.FLOAT},
+            )
+            total = columnar.total(cols["TotalMoney"])
+        
+        Args:
+            query: SQL query string
+            params: Query parameters (tuple)
+            types: Column name -> columnar.INT / columnar.FLOAT
+            chunk_size: Rows fetched from the server per round trip
+        
+        Returns:
+            Dict of column name -> column, in SELECT order
+        """
+        builder = None
+        for columns, rows in self._iter_chunks(query, params, chunk_size, False):
+            if builder is None:
+                builder = ColumnBuilder(columns, types)
+            builder.extend(rows)
+        return builder.build()
+    
+    def call_procedure(
+        self,
+        procname: str,
+        params: Optional[Tuple] = None,
+        row_format: str = ROW_DICT
+    ) -> List[List[Any]]:
+        """
+        Call a stored procedure and return every result set it produces.
+        
+        The CALL is sent as one statement and all result sets come back in the
+        same response, so a procedure that SELECTs several things costs one
+        round trip (cursor.callproc would first send SET @_arg... for the
+        arguments). Needs mysql-connector-python >= 9.2 (cursor.nextset).
+        
+        Usage:
+            vehicle, receptions = db_manager.call_procedure(
+                "sp_GetVehicleDossier", (plate, 20)
+            )[:2]
+        
+        Args:
+            procname: Stored procedure name (not user input)
+            params: IN arguments (tuple)
+            row_format: ROW_DICT (default), ROW_TUPLE or ROW_RECORD (see app.row_format)
+        
+        Returns:
+            One list of rows per result set, in the order the procedure SELECTs them
+        """
+        check_row_format(row_format)
+        params = tuple(params or ())
+        statement = f"CALL {procname}({', '.join(['%s'] * len(params))})"
+        
+        result_sets = []
+        with self.get_cursor(dictionary=row_format == ROW_DICT) as cursor:
+            cursor.execute(statement, params)
+            while True:
+                # Kết quả cuối của CALL chỉ là trạng thái, không có dòng
+                if cursor.with_rows:
+                    rows = cursor.fetchall()
+                    if row_format == ROW_RECORD:
+                        rows = list(map(record_class(tuple(cursor.column_names))._make, rows))
+                    result_sets.append(rows)
+                if not cursor.nextset():
+                    break
+        return result_sets
+    
+    def _iter_chunks(
+        self,
+        query: str,
+        params: Optional[Tuple],
+        chunk_size: int,
+        dictionary: bool
+    ) -> Iterator[Tuple[Tuple[str, ...], List[Any]]]:
+        """
+        Run a query on an unbuffered cursor and yield (column names, rows)
+        for each fetchmany() chunk. Yields at least once, with an empty chunk
+        if the result has no rows.
+        """
+        with self.get_connection() as connection:
+            cursor = connection.cursor(dictionary=dictionary, buffered=False)
+            try:
                 cursor.execute(query, params or ())
-                
-                if fetch_one:
-                    return cursor.fetchone()
-                elif fetch_all:
-                    return cursor.fetchall()
-                return None
-        except Error as e:
-            logger.error(f"Query execution failed: {e}")
-            raise
+                columns = tuple(cursor.column_names)
+                rows = cursor.fetchmany(chunk_size)
+                yield columns, rows
+                while rows:
+                    rows = cursor.fetchmany(chunk_size)
+                    if rows:
+                        yield columns, rows
+            finally:
+                # Dừng giữa chừng: đọc bỏ phần còn lại để kết nối dùng lại được
+                if connection.unread_result:
+                    connection.consume_results()
+                cursor.close()
     
     def execute_update(
         self,
@@ -206,44 +592,138 @@ class DatabaseManager:
             logger.error(f"Batch execution failed: {e}")
             raise
     
+    def in_transaction(self) -> bool:
+        """True if a transaction() is open in the current thread/context."""
+        return _current_unit.get() is not None
+    
     @contextmanager
     def transaction(self):
         """
         Context manager for handling database transactions.
         Automatically commits on success, rolls back on error.
         
+        While the transaction is open it is the ambient unit of work of the
+        current thread: execute_query/execute_update/execute_insert/execute_many,
+        get_cursor, get_connection and nested transaction() calls all run on its
+        connection and are committed together. A nested call that raises marks
+        the transaction rollback-only; the outer block then rolls back and raises
+        RollbackOnlyError even if the error was caught in between.
+        
         Usage:
             with db_manager.transaction() as cursor:
                 cursor.execute("INSERT INTO table VALUES (%s)", (value,))
                 cursor.execute("UPDATE table SET field = %s", (new_value,))
+            
+            # Ghép nhiều service trong một giao dịch
+            with db_manager.transaction():
+                reception = CarReceptionService.receive_car(...)
+                repair = RepairService.create_repair_ticket(reception['reception_id'], ...)
         
         Yields:
             Cursor: A database cursor within a transaction
         """
-        connection: Optional[PooledMySQLConnection] = None
+        unit = _current_unit.get()
+        if unit is not None:
+            # Tham gia giao dịch bên ngoài: không commit, lỗi -> đánh dấu rollback
+            cursor = self._instrument(unit.connection.cursor(dictionary=True))
+            try:
+                yield cursor
+            except GeneratorExit:
+                raise
+            except BaseException as e:
+                unit.fail(e)
+                raise
+            finally:
+                cursor.close()
+            return
+        
+        connection: Optional[MySQLConnection] = None
+        checked_out_at = 0.0
+        broken = False
         cursor = None
+        token = None
         try:
-            if self._pool is None:
-                raise RuntimeError("Connection pool not initialized")
-            
-            connection = self._pool.get_connection()
+            connection, checked_out_at = self._checkout()
             connection.start_transaction()
-            cursor = connection.cursor(dictionary=True)
+            unit = _UnitOfWork(connection)
+            token = _current_unit.set(unit)
+            cursor = self._instrument(connection.cursor(dictionary=True))
             
             yield cursor
             
+            if unit.rollback_only:
+                # Giữ errno của lỗi gốc (vd. 1213) để run_transaction vẫn chạy lại được
+                raise RollbackOnlyError(
+                    msg="Transaction rolled back: a nested database call failed",
+                    errno=unit.errno,
+                )
             connection.commit()
+            self._metrics.record_commit()
             logger.debug("Transaction committed successfully")
         except Error as e:
-            if connection:
+            self._metrics.record_error()
+            broken = is_connection_lost(e)
+            if connection and not broken:
                 connection.rollback()
+                self._metrics.record_rollback()
                 logger.warning(f"Transaction rolled back due to error: {e}")
             raise
         finally:
+            if token is not None:
+                _current_unit.reset(token)
             if cursor:
                 cursor.close()
-            if connection and connection.is_connected():
-                connection.close()
+            if connection:
+                self._release(connection, checked_out_at, broken)
+    
+    def run_transaction(
+        self,
+        work: Callable[[Any], T],
+        retry: Optional[RetryPolicy] = None
+    ) -> T:
+        """
+        Run a unit of work in a transaction, retrying it on deadlock (1213)
+        or lock wait timeout (1205) with jittered exponential backoff.
+        
+        The work may run more than once, so it must only touch the database
+        through the cursor it receives (no side effects outside the transaction).
+        
+        Usage:
+            def work(cursor):
+                cursor.execute("UPDATE table SET field = %s", (value,))
+                return cursor.rowcount
+            
+            updated = db_manager.run_transaction(work)
+        
+        Args:
+            work: Callable receiving the transaction cursor; its return value is returned
+            retry: Retry policy (default: RetryPolicy(), configured by DB_TX_RETRY_*)
+        
+        Returns:
+            Return value of work from the attempt that committed
+        """
+        if self.in_transaction():
+            # Lồng trong giao dịch khác: chỉ giao dịch ngoài cùng được chạy lại
+            with self.transaction() as cursor:
+                return work(cursor)
+        
+        policy = retry or RetryPolicy()
+        attempt = 1
+        while True:
+            try:
+                with self.transaction() as cursor:
+                    return work(cursor)
+            except Error as e:
+                if not policy.should_retry(e, attempt):
+                    raise
+                delay = policy.backoff(attempt)
+                self._metrics.record_tx_retry()
+                logger.warning(
+                    f"Transaction aborted ({e.errno}), retrying in {delay * 1000:.0f} ms "
+                    f"(attempt {attempt + 1}/{policy.max_attempts})"
+                )
+                time.sleep(delay)
+                attempt += 1
     
     def test_connection(self) -> bool:
         """
@@ -262,12 +742,50 @@ class DatabaseManager:
             logger.error(f"Database connection test failed: {e}")
             return False
     
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        Get connection pool metrics collected since start (or the last reset).
+        
+        Returns:
+            Dictionary with pool_size, max_size, active, idle, waiting,
+            peak_active, checkouts, checkout_failures, commits, rollbacks,
+            errors and the 'checkout_wait' / 'hold_time' histograms
+            (count, avg/p50/p95/p99/max in ms and per-bucket counts)
+        """
+        stats = self._metrics.snapshot()
+        if self._pool is not None:
+            # Kích thước pool thay đổi ở chế độ co giãn -> lấy trạng thái thực tế
+            stats.update(self._pool.stats())
+        return stats
+    
+    def reset_pool_stats(self):
+        """Reset the connection pool metrics."""
+        self._metrics.reset()
+    
+    def get_statement_stats(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get per-statement statistics, grouped by normalized SQL fingerprint.
+        
+        Args:
+            limit: Maximum number of statements to return (None = all)
+        
+        Returns:
+            List of dicts with fingerprint, calls, errors, rows, total_ms,
+            avg_ms, p95_ms, max_ms, ordered by total_ms (highest first)
+        """
+        return self._statements.snapshot(limit)
+    
+    def reset_statement_stats(self):
+        """Reset the per-statement statistics."""
+        self._statements.reset()
+    
     def close_pool(self):
         """Close all connections in the pool."""
         if self._pool:
-            # Note: mysql.connector doesn't provide a direct way to close the pool
-            # Connections will be closed automatically when they're garbage collected
+            # Connections still in use are closed when they are released
+            self._pool.close()
             self._pool = None
+            self._slow_log.close()
             logger.info("Database connection pool closed")
 
 
@@ -286,9 +804,43 @@ def get_cursor(dictionary=True, buffered=True):
     return db_manager.get_cursor(dictionary=dictionary, buffered=buffered)
 
 
-def execute_query(query: str, params: Optional[Tuple] = None, fetch_one: bool = False) -> Optional[Any]:
+def execute_query(
+    query: str,
+    params: Optional[Tuple] = None,
+    fetch_one: bool = False,
+    row_format: str = ROW_DICT
+) -> Optional[Any]:
     """Execute a SELECT query."""
-    return db_manager.execute_query(query, params, fetch_one=fetch_one)
+    return db_manager.execute_query(query, params, fetch_one=fetch_one, row_format=row_format)
+
+
+def iter_query(
+    query: str,
+    params: Optional[Tuple] = None,
+    chunk_size: int = 1000,
+    row_format: str = ROW_DICT
+) -> Iterator[Any]:
+    """Stream the rows of a SELECT query."""
+    return db_manager.iter_query(query, params, chunk_size=chunk_size, row_format=row_format)
+
+
+def fetch_columns(
+    query: str,
+    params: Optional[Tuple] = None,
+    types: Optional[Dict[str, str]] = None,
+    chunk_size: int = 5000
+) -> Dict[str, Any]:
+    """Execute a SELECT query and return the result as columns."""
+    return db_manager.fetch_columns(query, params, types=types, chunk_size=chunk_size)
+
+
+def call_procedure(
+    procname: str,
+    params: Optional[Tuple] = None,
+    row_format: str = ROW_DICT
+) -> List[List[Any]]:
+    """Call a stored procedure and return all of its result sets."""
+    return db_manager.call_procedure(procname, params, row_format=row_format)
 
 
 def execute_update(query: str, params: Optional[Tuple] = None) -> int:
@@ -304,3 +856,13 @@ def execute_insert(query: str, params: Optional[Tuple] = None) -> int:
 def test_connection() -> bool:
     """Test the database connection."""
     return db_manager.test_connection()
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Get connection pool metrics."""
+    return db_manager.get_pool_stats()
+
+
+def get_statement_stats(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Get per-statement statistics."""
+    return db_manager.get_statement_stats(limit)
@@ -0,0 +1,286 @@
+# src/app/db_metrics.py
+"""
+Connection pool and statement instrumentation.
+Counters and latency histograms collected by DatabaseManager, used to size
+DB_POOL_SIZE from real usage (see DatabaseManager.get_pool_stats) and to find
+the statements that dominate latency (see DatabaseManager.get_statement_stats).
+"""
+
+import re
+import threading
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+
+
+# Ranh giới bucket (ms) cho thời gian chờ lấy kết nối và thời gian giữ kết nối
+DEFAULT_BUCKETS_MS: Tuple[float, ...] = (
+    1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000,
+)
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram (milliseconds).
+    Not thread-safe on its own; PoolMetrics serializes access.
+    """
+
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BUCKETS_MS):
+        self.bounds = tuple(bounds)
+        self.reset()
+
+    def reset(self):
+        # Bucket cuối cùng chứa các giá trị lớn hơn ranh giới lớn nhất
+        self.counts: List[int] = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value_ms: float):
+        self.counts[bisect_left(self.bounds, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+
+    def percentile(self, p: float) -> float:
+        """
+        Approximate percentile (upper bound of the bucket holding it, capped at max).
+
+        Args:
+            p: Percentile between 0 and 100
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, int(round(self.count * p / 100.0)))
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(float(self.bounds[i]), self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'avg_ms': self.total / self.count if self.count else 0.0,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'max_ms': self.max,
+            'buckets': list(zip(self.bucket_labels(), self.counts)),
+        }
+
+    def bucket_labels(self) -> List[str]:
+        return [f"<= {b:g}" for b in self.bounds] + [f"> {self.bounds[-1]:g}"]
+
+
+class PoolMetrics:
+    """Thread-safe counters and histograms for one connection pool."""
+
+    def __init__(self, pool_size: int = 0):
+        self._lock = threading.Lock()
+        self.pool_size = pool_size
+        self.checkout_wait = Histogram()
+        self.hold_time = Histogram()
+        self.reset()
+
+    def reset(self):
+        """Clear all counters (the number of connections in use is kept)."""
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.commits = 0
+            self.rollbacks = 0
+            self.errors = 0
+            self.retries = 0
+            self.tx_retries = 0
+            self.active = getattr(self, 'active', 0)
+            self.peak_active = self.active
+            self.checkout_wait.reset()
+            self.hold_time.reset()
+
+    def record_checkout(self, wait_ms: float):
+        with self._lock:
+            self.checkouts += 1
+            self.active += 1
+            if self.active > self.peak_active:
+                self.peak_active = self.active
+            self.checkout_wait.observe(wait_ms)
+
+    def record_checkout_failure(self, wait_ms: float):
+        with self._lock:
+            self.checkout_failures += 1
+            self.checkout_wait.observe(wait_ms)
+
+    def record_release(self, hold_ms: float):
+        with self._lock:
+            self.active = max(0, self.active - 1)
+            self.hold_time.observe(hold_ms)
+
+    def record_commit(self):
+        with self._lock:
+            self.commits += 1
+
+    def record_rollback(self):
+        with self._lock:
+            self.rollbacks += 1
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_tx_retry(self):
+        with self._lock:
+            self.tx_retries += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Consistent copy of all metrics.
+
+        Returns:
+            Dictionary with pool_size, active, idle, peak_active, counters
+            and the 'checkout_wait' / 'hold_time' histogram snapshots
+        """
+        with self._lock:
+            return {
+                'pool_size': self.pool_size,
+                'active': self.active,
+                'max_size': self.pool_size,
+                'idle': max(0, self.pool_size - self.active),
+                'waiting': 0,
+                'peak_active': self.peak_active,
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'commits': self.commits,
+                'rollbacks': self.rollbacks,
+                'errors': self.errors,
+                'retries': self.retries,
+                'tx_retries': self.tx_retries,
+                'checkout_wait': self.checkout_wait.snapshot(),
+                'hold_time': self.hold_time.snapshot(),
+            }
+
+
+# ---------------- Statement fingerprints ----------------
+
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+_COMMENT_RE = re.compile(r"/\*.*?\*/|--[^\n]*|#[^\n]*", re.S)
+_PLACEHOLDER_RE = re.compile(r"%\(\w+\)s|%s")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_REPEATED_LIST_RE = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+# Câu SQL trong services là chuỗi cố định nên cache gần như luôn trúng
+@lru_cache(maxsize=1024)
+def fingerprint(sql: str) -> str:
+    """
+    Normalize a statement so that calls differing only in literals group together.
+
+    Literals and placeholders become '?', value lists such as IN (...) or
+    multi-row VALUES collapse to '(...)', comments are removed and whitespace
+    is collapsed.
+
+    Example:
+        "SELECT * FROM CAR WHERE LicensePlate = %s AND BrandId IN (1, 2)"
+        -> "SELECT * FROM CAR WHERE LicensePlate = ? AND BrandId IN (...)"
+    """
+    text = _STRING_RE.sub("?", sql)
+    text = _COMMENT_RE.sub(" ", text)
+    text = _PLACEHOLDER_RE.sub("?", text)
+    text = _NUMBER_RE.sub("?", text)
+    text = _LIST_RE.sub("(...)", text)
+    text = _REPEATED_LIST_RE.sub("(...)", text)
+    return _SPACE_RE.sub(" ", text).strip().rstrip(";").strip()
+
+
+class _StatementEntry:
+    """Statistics of one statement fingerprint."""
+
+    __slots__ = ("calls", "errors", "rows", "latency")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.latency = Histogram()
+
+
+class StatementStats:
+    """
+    Thread-safe per-fingerprint call counts, row counts and latency
+    (client-side equivalent of pg_stat_statements).
+    """
+
+    # Nhóm chung khi số fingerprint vượt giới hạn (tránh tăng bộ nhớ không giới hạn)
+    OVERFLOW_KEY = "<other>"
+
+    def __init__(self, max_entries: int = 500):
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+        self._entries: Dict[str, _StatementEntry] = {}
+
+    def _entry(self, key: str) -> _StatementEntry:
+        entry = self._entries.get(key)
+        if entry is None:
+            if len(self._entries) >= self._max_entries:
+                key = self.OVERFLOW_KEY
+                entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _StatementEntry()
+        return entry
+
+    def record(self, key: str, elapsed_ms: float, rows: int = 0, error: bool = False):
+        """Record one execution of a statement."""
+        with self._lock:
+            entry = self._entry(key)
+            entry.calls += 1
+            entry.rows += rows
+            if error:
+                entry.errors += 1
+            entry.latency.observe(elapsed_ms)
+
+    def add_rows(self, key: str, rows: int):
+        """Add rows fetched after the statement was executed."""
+        if rows <= 0:
+            return
+        with self._lock:
+            self._entry(key).rows += rows
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Statement statistics ordered by total time, highest first.
+
+        Args:
+            limit: Maximum number of statements to return (None = all)
+
+        Returns:
+            List of dicts with fingerprint, calls, errors, rows, total_ms,
+            avg_ms, p95_ms, max_ms
+        """
+        with self._lock:
+            result = [
+                {
+                    'fingerprint': key,
+                    'calls': entry.calls,
+                    'errors': entry.errors,
+                    'rows': entry.rows,
+                    'total_ms': entry.latency.total,
+                    'avg_ms': entry.latency.total / entry.calls if entry.calls else 0.0,
+                    'p95_ms': entry.latency.percentile(95),
+                    'max_ms': entry.latency.max,
+                }
+                for key, entry in self._entries.items()
+            ]
+        result.sort(key=lambda item: item['total_ms'], reverse=True)
+        return result[:limit] if limit is not None else result
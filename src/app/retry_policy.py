@@ -0,0 +1,48 @@
+# src/app/retry_policy.py
+"""
+Retry policy for write transactions.
+Decides which errors abort a transaction in a way that is safe to retry
+(deadlock, lock wait timeout) and how long to back off between attempts.
+"""
+
+import random
+from dataclasses import dataclass
+from typing import FrozenSet
+
+from app.config import DatabaseConfig
+
+# 1213 ER_LOCK_DEADLOCK, 1205 ER_LOCK_WAIT_TIMEOUT
+DEFAULT_RETRY_ERRNOS: FrozenSet[int] = frozenset({1213, 1205})
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Retry settings for DatabaseManager.run_transaction.
+
+    The whole transaction is rolled back before a retry, so the unit of work
+    runs again from the start.
+    """
+    max_attempts: int = DatabaseConfig.TX_RETRY_ATTEMPTS
+    base_delay: float = DatabaseConfig.TX_RETRY_BASE_DELAY  # seconds
+    max_delay: float = DatabaseConfig.TX_RETRY_MAX_DELAY  # seconds
+    retry_errnos: FrozenSet[int] = DEFAULT_RETRY_ERRNOS
+
+    def should_retry(self, error: Exception, attempt: int) -> bool:
+        """
+        Args:
+            error: Error raised by the failed attempt
+            attempt: Number of the failed attempt (1-based)
+        """
+        return attempt < self.max_attempts and getattr(error, "errno", None) in self.retry_errnos
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Delay before the next attempt: exponential with full jitter, so
+        transactions that deadlocked together do not retry in lockstep.
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+# Không chạy lại (dùng cho giao dịch không an toàn khi chạy lại)
+NO_RETRY = RetryPolicy(max_attempts=1)
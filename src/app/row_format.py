@@ -0,0 +1,46 @@
+# src/app/row_format.py
+"""
+Row formats for query results.
+
+The default dict rows each carry their own key table (a few hundred bytes per
+row). For bulk reads the compact formats share one column index across all
+rows of a result:
+
+    ROW_DICT    {'LicensePlate': ..., 'BrandName': ...}   (default)
+    ROW_TUPLE   plain tuples in SELECT column order
+    ROW_RECORD  namedtuple records: row.LicensePlate, row[0], row._fields
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+from typing import Tuple
+
+ROW_DICT = "dict"
+ROW_TUPLE = "tuple"
+ROW_RECORD = "record"
+
+ROW_FORMATS = frozenset({ROW_DICT, ROW_TUPLE, ROW_RECORD})
+
+
+def check_row_format(row_format: str):
+    """
+    Raises:
+        ValueError: Unknown row format
+    """
+    if row_format not in ROW_FORMATS:
+        raise ValueError(
+            f"Unknown row format {row_format!r} (expected one of {sorted(ROW_FORMATS)})"
+        )
+
+
+# Câu SQL trong services là chuỗi cố định -> mỗi câu SELECT dùng chung một lớp record
+@lru_cache(maxsize=256)
+def record_class(columns: Tuple[str, ...]) -> type:
+    """
+    Record class (namedtuple) for a column list.
+
+    Column names that are not valid identifiers (e.g. 'COUNT(*)') are renamed
+    to _0, _1, ...; alias them in the SELECT to get a readable attribute.
+    """
+    return namedtuple("Row", columns, rename=True)
+
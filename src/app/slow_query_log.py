@@ -0,0 +1,158 @@
+# src/app/slow_query_log.py
+"""
+Slow query log.
+Writes statements slower than DatabaseConfig.SLOW_QUERY_MS to a rotating log
+file, optionally with the EXPLAIN plan captured on a separate connection.
+"""
+
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import RotatingFileHandler
+from typing import Any, Optional
+
+import mysql.connector
+from mysql.connector import Error
+
+from app.config import DatabaseConfig
+
+logger = logging.getLogger(__name__)
+
+# Chỉ EXPLAIN câu SELECT: EXPLAIN không thực thi câu lệnh nhưng tránh đụng tới DML
+_EXPLAINABLE_RE = re.compile(r"^\s*(SELECT|WITH)\b", re.I)
+
+# Giới hạn độ dài tham số ghi vào log
+_MAX_PARAMS_CHARS = 500
+
+
+class SlowQueryLog:
+    """Rotating log of slow statements."""
+
+    def __init__(
+        self,
+        threshold_ms: float = DatabaseConfig.SLOW_QUERY_MS,
+        path: str = DatabaseConfig.SLOW_QUERY_LOG,
+        explain: bool = DatabaseConfig.SLOW_QUERY_EXPLAIN,
+    ):
+        self.threshold_ms = threshold_ms
+        self.path = path
+        self.explain = explain
+        self._logger: Optional[logging.Logger] = None
+        self._lock = threading.Lock()
+        self._disabled = threshold_ms <= 0
+        # Một thread duy nhất sở hữu kết nối phụ dùng cho EXPLAIN
+        self._explain_executor: Optional[ThreadPoolExecutor] = None
+        self._explain_connection = None
+
+    def record(self, sql: str, params: Any, elapsed_ms: float, rows: int, key: str):
+        """
+        Log the statement if it took longer than the threshold.
+
+        Args:
+            sql: Statement as executed
+            params: Statement parameters
+            elapsed_ms: Execution time
+            rows: Row count reported by the cursor (-1 if unknown)
+            key: Statement fingerprint
+        """
+        if self._disabled or elapsed_ms < self.threshold_ms:
+            return
+
+        entry = (
+            f"{elapsed_ms:.1f} ms | rows={rows if rows >= 0 else '?'}\n"
+            f"  fingerprint: {key}\n"
+            f"  statement: {' '.join(sql.split())}\n"
+            f"  params: {self._format_params(params)}"
+        )
+
+        if self.explain and _EXPLAINABLE_RE.match(sql):
+            # EXPLAIN chạy trên thread riêng để không làm chậm thêm câu lệnh đang chạy
+            with self._lock:
+                if self._explain_executor is None:
+                    self._explain_executor = ThreadPoolExecutor(
+                        max_workers=1, thread_name_prefix="slow-query-explain"
+                    )
+                executor = self._explain_executor
+            executor.submit(self._write_with_explain, entry, sql, params)
+        else:
+            self._write(entry)
+
+    def close(self):
+        """Stop the EXPLAIN thread and close the side connection."""
+        with self._lock:
+            executor, self._explain_executor = self._explain_executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        if self._explain_connection is not None:
+            try:
+                self._explain_connection.close()
+            except Error:
+                pass
+            self._explain_connection = None
+
+    # ---------------- Helpers ----------------
+    def _write_with_explain(self, entry: str, sql: str, params: Any):
+        try:
+            plan = self._explain(sql, params)
+            entry += "\n  explain:\n" + "\n".join(f"    {line}" for line in plan.splitlines())
+        except Error as e:
+            entry += f"\n  explain failed: {e}"
+        self._write(entry)
+
+    def _explain(self, sql: str, params: Any) -> str:
+        """Run EXPLAIN FORMAT=TREE on the side connection (EXPLAIN thread only)."""
+        if self._explain_connection is None or not self._explain_connection.is_connected():
+            # Kết nối riêng, không lấy từ pool để không tranh kết nối với ứng dụng
+            self._explain_connection = mysql.connector.connect(
+                **DatabaseConfig.get_connection_config()
+            )
+        cursor = self._explain_connection.cursor()
+        try:
+            cursor.execute(f"EXPLAIN FORMAT=TREE {sql}", params or ())
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+            self._explain_connection.rollback()
+        return "\n".join(str(row[0]) for row in rows)
+
+    def _write(self, entry: str):
+        log = self._get_logger()
+        if log is not None:
+            log.warning(entry)
+
+    def _get_logger(self) -> Optional[logging.Logger]:
+        with self._lock:
+            return self._open_logger()
+
+    def _open_logger(self) -> Optional[logging.Logger]:
+        if self._logger is None and not self._disabled:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                handler = RotatingFileHandler(
+                    self.path,
+                    maxBytes=DatabaseConfig.SLOW_QUERY_LOG_MAX_BYTES,
+                    backupCount=DatabaseConfig.SLOW_QUERY_LOG_BACKUPS,
+                    encoding="utf-8",
+                )
+            except OSError as e:
+                logger.error(f"Cannot open slow query log {self.path}: {e}")
+                self._disabled = True
+                return None
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+
+            slow_logger = logging.getLogger("app.slow_query")
+            slow_logger.setLevel(logging.WARNING)
+            slow_logger.propagate = False
+            slow_logger.addHandler(handler)
+            self._logger = slow_logger
+            logger.info(f"Slow query log: {self.path} (threshold {self.threshold_ms} ms)")
+        return self._logger
+
+    @staticmethod
+    def _format_params(params: Any) -> str:
+        text = repr(params)
+        if len(text) > _MAX_PARAMS_CHARS:
+            text = text[:_MAX_PARAMS_CHARS] + "..."
+        return text
@@ -3,8 +3,11 @@
 Main controller for coordinating the application flow.
 """
 
+import logging
+import time
 from typing import Optional
 
+from PyQt6.QtCore import QTimer
 from PyQt6.QtWidgets import QApplication, QMessageBox
 
 from app.session import current_session
@@ -13,6 +16,8 @@ from presentation.views.main_window import MainWindow
 from presentation.controllers.login_controller import LoginController
 from utils.messages import Messages
 
+logger = logging.getLogger(__name__)
+
 
 class MainController:
     """
@@ -90,10 +95,17 @@ class MainController:
         if role is None or username is None:
             raise RuntimeError("User not logged in")
         
+        started = time.perf_counter()
         self._main_window = MainWindow(role=role, username=username)
         self._main_window.logout_requested.connect(self._on_logout)
         self._main_window.select_first_page()
         self._main_window.show()
+        
+        # Thời gian từ lúc đăng nhập xong tới khi cửa sổ chính dùng được:
+        # timer 0 ms chỉ chạy khi event loop rảnh, tức cửa sổ đã hiện và nhận sự kiện
+        QTimer.singleShot(0, lambda: logger.info(
+            "Main window interactive after %.1f ms", (time.perf_counter() - started) * 1000
+        ))
     
     def _on_logout(self):
         """Handle logout request from main window."""
@@ -25,6 +25,7 @@ class PagePermissions:
     THAY_DOI_QUY_DINH = "thay_doi_quy_dinh"
     QUAN_LY_USER = "quan_ly_user"
     NHAP_VAT_TU = "nhap_vat_tu"
+    THONG_KE_KET_NOI = "thong_ke_ket_noi"
 
 
 # Define permissions for each role
@@ -40,6 +41,7 @@ ROLE_PERMISSIONS = {
         PagePermissions.THAY_DOI_QUY_DINH,
         PagePermissions.QUAN_LY_USER,
         PagePermissions.NHAP_VAT_TU,
+        PagePermissions.THONG_KE_KET_NOI,
     ],
     Roles.STAFF: [
         PagePermissions.TIEP_NHAN_XE,
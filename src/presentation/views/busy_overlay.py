@@ -0,0 +1,74 @@
+# src/presentation/views/busy_overlay.py
+"""
+Busy indicator shown over a page while a background service call runs.
+"""
+
+from PyQt6.QtCore import Qt, QEvent
+from PyQt6.QtWidgets import QWidget, QLabel, QProgressBar, QVBoxLayout
+
+
+class BusyOverlay(QWidget):
+    """
+    Semi-transparent overlay covering its parent widget.
+    Blocks mouse input to the page and shows an indeterminate progress bar.
+
+    start()/stop() are reference counted, so several concurrent tasks
+    can share one overlay (see presentation.workers.run_async).
+    """
+
+    def __init__(self, parent: QWidget, text: str = "Đang xử lý..."):
+        super().__init__(parent)
+        self._count = 0
+
+        self.setAttribute(Qt.WidgetAttribute.WA_StyledBackground, True)
+        # Nhận focus để phím bấm không đi vào các ô nhập của trang khi đang xử lý
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        self.setStyleSheet(
+            "BusyOverlay { background-color: rgba(255, 255, 255, 160); }"
+            "QLabel { background: transparent; color: #334155; font-weight: 600; }"
+        )
+
+        layout = QVBoxLayout(self)
+        layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.setSpacing(8)
+
+        self.lbl_text = QLabel(text)
+        self.lbl_text.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+        self.progress = QProgressBar()
+        self.progress.setRange(0, 0)  # Indeterminate
+        self.progress.setTextVisible(False)
+        self.progress.setFixedWidth(220)
+
+        layout.addWidget(self.lbl_text, alignment=Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.progress, alignment=Qt.AlignmentFlag.AlignCenter)
+
+        parent.installEventFilter(self)
+        self.hide()
+
+    @property
+    def is_busy(self) -> bool:
+        return self._count > 0
+
+    def start(self):
+        """Show the overlay (nested calls are counted)."""
+        self._count += 1
+        if self._count == 1:
+            self.setGeometry(self.parentWidget().rect())
+            self.raise_()
+            self.show()
+            self.setFocus()
+
+    def stop(self):
+        """Hide the overlay once every start() has been matched."""
+        if self._count == 0:
+            return
+        self._count -= 1
+        if self._count == 0:
+            self.hide()
+
+    def eventFilter(self, obj, event):
+        # Luôn phủ kín trang khi trang thay đổi kích thước
+        if obj is self.parentWidget() and event.type() == QEvent.Type.Resize:
+            self.setGeometry(obj.rect())
+        return super().eventFilter(obj, event)
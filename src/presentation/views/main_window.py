@@ -3,6 +3,9 @@
 Main application window with navigation and content pages.
 """
 
+import logging
+import time
+
 from PyQt6.QtWidgets import (
     QMainWindow,
     QWidget,
@@ -15,7 +18,7 @@ from PyQt6.QtWidgets import (
     QMessageBox,
     QPushButton,
 )
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 
 from utils.messages import Messages
 from presentation.permissions import can_access, PagePermissions
@@ -30,8 +33,20 @@ from presentation.views.pages import (
     ThayDoiQuyDinhPage,
     # QuanLyUserPage,
     NhapVatTuPage,
+    ThongKeKetNoiPage,
 )
 
+logger = logging.getLogger(__name__)
+
+
+class _PagePlaceholder(QLabel):
+    """Lightweight stand-in kept in the page stack until the real page is built."""
+
+    def __init__(self, parent=None):
+        super().__init__("Đang tải...", parent)
+        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.setStyleSheet("QLabel { color: #7f8c8d; font-size: 14px; }")
+
 
 class MainWindow(QMainWindow):
     """Main application window with navigation sidebar and content area."""
@@ -51,13 +66,27 @@ class MainWindow(QMainWindow):
         (Messages.NAV_THAY_DOI_QUY_DINH, PagePermissions.THAY_DOI_QUY_DINH, ThayDoiQuyDinhPage),
 #         (Messages.NAV_QUAN_LY_USER, PagePermissions.QUAN_LY_USER, QuanLyUserPage),
         (Messages.NAV_NHAP_VAT_TU, PagePermissions.NHAP_VAT_TU, NhapVatTuPage),
+        (Messages.NAV_THONG_KE_KET_NOI, PagePermissions.THONG_KE_KET_NOI, ThongKeKetNoiPage),
     ]
     
-    def __init__(self, role: str, username: str, parent=None):
+    # Delay before building the next page in the background (ms)
+    PREFETCH_DELAY_MS = 800
+    
+    def __init__(self, role: str, username: str, parent=None, prefetch: bool = True):
         super().__init__(parent)
         self._role = role
         self._username = username
+        self._prefetch = prefetch
         self._page_indices = {}  # page_id -> stack index
+        self._page_classes = {}  # page_id -> page class
+        self._pages = {}  # page_id -> page widget (only pages built so far)
+        
+        # Trang được dựng trước khi rảnh (trang kế tiếp trong menu)
+        self._prefetch_page_id = None
+        self._prefetch_timer = QTimer(self)
+        self._prefetch_timer.setSingleShot(True)
+        self._prefetch_timer.timeout.connect(self._prefetch_next_page)
+        
         self._setup_ui()
     
     def _setup_ui(self):
@@ -238,13 +267,14 @@ class MainWindow(QMainWindow):
             }
         """)
         
-        # Create and add pages (only for accessible pages)
+        # Add a placeholder per accessible page; the real page (and its
+        # database loads) is only created on first navigation, see _ensure_page
         stack_index = 0
         for _, page_id, page_class in self.NAV_ITEMS:
             if can_access(self._role, page_id):
-                page = page_class()
-                self.page_stack.addWidget(page)
+                self.page_stack.addWidget(_PagePlaceholder())
                 self._page_indices[page_id] = stack_index
+                self._page_classes[page_id] = page_class
                 stack_index += 1
         
         content_layout.addWidget(self.page_stack)
@@ -273,7 +303,64 @@ class MainWindow(QMainWindow):
         
         # Switch to the page
         if page_id in self._page_indices:
+            self._ensure_page(page_id)
             self.page_stack.setCurrentIndex(self._page_indices[page_id])
+            self._schedule_prefetch(index)
+    
+    def _ensure_page(self, page_id: str) -> QWidget:
+        """
+        Build the page on first use and swap it in for its placeholder.
+        
+        Returns:
+            The page widget
+        """
+        page = self._pages.get(page_id)
+        if page is not None:
+            return page
+        
+        started = time.perf_counter()
+        page = self._page_classes[page_id]()
+        self._pages[page_id] = page
+        
+        index = self._page_indices[page_id]
+        placeholder = self.page_stack.widget(index)
+        was_current = self.page_stack.currentIndex() == index
+        self.page_stack.insertWidget(index, page)
+        self.page_stack.removeWidget(placeholder)
+        placeholder.deleteLater()
+        if was_current:
+            self.page_stack.setCurrentIndex(index)
+        
+        logger.debug(
+            "Page %s built in %.1f ms", page_id, (time.perf_counter() - started) * 1000
+        )
+        return page
+    
+    def _schedule_prefetch(self, row: int):
+        """Schedule building the page after the given navigation row."""
+        self._prefetch_timer.stop()
+        self._prefetch_page_id = None
+        if not self._prefetch:
+            return
+        
+        item = self.nav_list.item(row + 1)
+        if item is None:
+            return
+        page_id = item.data(Qt.ItemDataRole.UserRole)
+        if page_id in self._pages:
+            return
+        
+        self._prefetch_page_id = page_id
+        self._prefetch_timer.start(self.PREFETCH_DELAY_MS)
+    
+    def _prefetch_next_page(self):
+        """Build the scheduled page while the user is idle."""
+        page_id = self._prefetch_page_id
+        self._prefetch_page_id = None
+        if page_id is None or not can_access(self._role, page_id):
+            return
+        # Dữ liệu của trang được tải trên thread pool (run_async) nên không chặn giao diện
+        self._ensure_page(page_id)
     
     def select_first_page(self):
         """Select the first available navigation item."""
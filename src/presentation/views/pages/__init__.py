@@ -14,6 +14,7 @@ from presentation.views.pages.bao_cao_ton_page import BaoCaoTonPage
 from presentation.views.pages.thay_doi_quy_dinh_page import ThayDoiQuyDinhPage
 # from presentation.views.pages.quan_ly_user_page import QuanLyUserPage
 from presentation.views.pages.nhap_vat_tu_page import NhapVatTuPage
+from presentation.views.pages.thong_ke_ket_noi_page import ThongKeKetNoiPage
 
 __all__ = [
     "TiepNhanXePage",
@@ -26,4 +27,5 @@ __all__ = [
     "ThayDoiQuyDinhPage",
     # "QuanLyUserPage",
     "NhapVatTuPage",
+    "ThongKeKetNoiPage",
 ]
@@ -23,6 +23,8 @@ from PyQt6.QtWidgets import (
 from utils.style import STYLE
 from utils.print_dialog import print_widget_with_dialog
 from services.revenue_report_service import RevenueReportService
+from presentation.workers import run_async
+from presentation.views.busy_overlay import BusyOverlay
 
 
 class BaoCaoDoanhSoPage(QWidget):
@@ -37,6 +39,7 @@ class BaoCaoDoanhSoPage(QWidget):
         self.service = RevenueReportService()
 
         self._setup_ui()
+        self._busy = BusyOverlay(self, "Đang lập báo cáo...")
         self._init_default_month_year()
 
     def _setup_ui(self):
@@ -157,33 +160,39 @@ class BaoCaoDoanhSoPage(QWidget):
         month = int(self.cb_month.currentText())
         year = int(year_text)
 
-        try:
-            report = self.service.get_or_create_monthly_report(month, year)
-            data = [
-                {
-                    "brand": detail["brand_name"],
-                    "count": detail["count"],
-                    "amount": detail["total_money"],
-                }
-                for detail in report["details"]
-            ]
-
-            self._render_report(data)
-
-            if not data:
-                QMessageBox.information(
-                    self,
-                    "Thông báo",
-                    f"Không có dữ liệu sửa chữa trong tháng {month}/{year}."
-                )
-
-        except Exception as e:
-            QMessageBox.critical(
+        run_async(
+            self.service.get_or_create_monthly_report, month, year,
+            as_columns=True,
+            on_result=self._on_report_loaded,
+            on_error=self._on_report_failed,
+            busy=self._busy,
+            owner=self,
+        )
+
+    def _on_report_loaded(self, report: dict):
+        # Dữ liệu dạng cột (đã sắp theo doanh thu giảm dần), đổi sang số Python để hiển thị
+        cols = report["columns"]
+        data = [
+            {"brand": brand, "count": int(count), "amount": float(amount)}
+            for brand, count, amount in zip(cols["brand_name"], cols["count"], cols["total_money"])
+        ]
+
+        self._render_report(data)
+
+        if not data:
+            QMessageBox.information(
                 self,
-                "Lỗi",
-                f"Không thể lập báo cáo: {str(e)}"
+                "Thông báo",
+                f"Không có dữ liệu sửa chữa trong tháng {report['month']}/{report['year']}."
             )
 
+    def _on_report_failed(self, e: Exception):
+        QMessageBox.critical(
+            self,
+            "Lỗi",
+            f"Không thể lập báo cáo: {str(e)}"
+        )
+
     def _on_clear_clicked(self):
         self._init_default_month_year()
         self.table.setRowCount(0)
@@ -23,6 +23,8 @@ from PyQt6.QtWidgets import (
 from utils.style import STYLE
 from utils.print_dialog import print_widget_with_dialog
 from services import StockReportService
+from presentation.workers import run_async
+from presentation.views.busy_overlay import BusyOverlay
 
 
 class BaoCaoTonPage(QWidget):
@@ -38,6 +40,7 @@ class BaoCaoTonPage(QWidget):
         self.service = StockReportService()
 
         self._setup_ui()
+        self._busy = BusyOverlay(self, "Đang lập báo cáo...")
         self._init_default_month_year()
 
     def _setup_ui(self):
@@ -160,12 +163,13 @@ class BaoCaoTonPage(QWidget):
         month = int(self.cb_month.currentText())
         year = int(year_text)
 
-        try:
-            report = self.service.get_or_create_monthly_report(month, year)
-            self._render(report["items"])
-        except Exception as e:
-            QMessageBox.critical(self, "Lỗi", f"Không thể lập báo cáo:\n{str(e)}")
-            return
+        run_async(
+            self.service.get_or_create_monthly_report, month, year,
+            on_result=lambda report: self._render(report["items"]),
+            on_error=lambda e: QMessageBox.critical(self, "Lỗi", f"Không thể lập báo cáo:\n{str(e)}"),
+            busy=self._busy,
+            owner=self,
+        )
 
     def _on_clear_clicked(self):
         self._init_default_month_year()
@@ -187,11 +191,11 @@ class BaoCaoTonPage(QWidget):
             row = self.table.rowCount()
             self.table.insertRow(row)
 
-            # Data từ service: supply_name, begin_qty, issue_qty, end_qty
+            # Data từ service: supply_name, begin_qty, import_qty, issue_qty, end_qty
             self._set_item(row, 0, str(i), align_right=True)
             self._set_item(row, 1, item["supply_name"])
             self._set_item(row, 2, str(item["begin_qty"]), align_right=True)
-            self._set_item(row, 3, "0", align_right=True)  # Hệ thống không có Nhập
+            self._set_item(row, 3, str(item["import_qty"]), align_right=True)
             self._set_item(row, 4, str(item["issue_qty"]), align_right=True)
             self._set_item(row, 5, str(item["end_qty"]), align_right=True)
 
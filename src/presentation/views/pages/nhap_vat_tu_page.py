@@ -25,6 +25,8 @@ from PyQt6.QtWidgets import (
 
 from utils.style import STYLE
 from services import SuppliesImportService
+from presentation.workers import run_async
+from presentation.views.busy_overlay import BusyOverlay
 
 
 @dataclass(frozen=True)
@@ -46,28 +48,40 @@ class NhapVatTuPage(QWidget):
         # Service xử lý nhập vật tư
         self.service = SuppliesImportService()
         
-        # Load danh sách vật tư từ DB
         self._supplies: List[SupplyRow] = []
-        self._load_supplies_from_db()
 
         self._setup_ui()
+        self._busy = BusyOverlay(self)
         self._render_table()
 
+        # Load danh sách vật tư từ DB
+        self._load_supplies_from_db()
+
     # ---------------- Data Loading ----------------
     def _load_supplies_from_db(self):
-        """Load danh sách vật tư từ database."""
-        try:
-            supplies_data = self.service.get_all_supplies_for_import()
-            self._supplies = [
-                SupplyRow(
-                    name=s['name'],
-                    price=int(s['price']),
-                    stock=s['stock']
-                ) for s in supplies_data
-            ]
-        except Exception as e:
-            QMessageBox.critical(self, "Lỗi", f"Không thể load danh sách vật tư:\n{str(e)}")
-            self._supplies = []
+        """Load danh sách vật tư từ database (chạy nền), xong thì vẽ lại bảng."""
+        run_async(
+            self.service.get_all_supplies_for_import,
+            on_result=self._on_supplies_loaded,
+            on_error=self._on_supplies_load_failed,
+            busy=self._busy,
+            owner=self,
+        )
+
+    def _on_supplies_loaded(self, supplies_data: list):
+        self._supplies = [
+            SupplyRow(
+                name=s['name'],
+                price=int(s['price']),
+                stock=s['stock']
+            ) for s in supplies_data
+        ]
+        self._render_table()
+
+    def _on_supplies_load_failed(self, e: Exception):
+        QMessageBox.critical(self, "Lỗi", f"Không thể load danh sách vật tư:\n{str(e)}")
+        self._supplies = []
+        self._render_table()
     
     # ---------------- UI ----------------
     def _setup_ui(self):
@@ -249,55 +263,57 @@ class NhapVatTuPage(QWidget):
         # Chuẩn bị dữ liệu cho service
         import_date = self.import_date.date().toPyDate()
         
-        # Tìm SuppliesId từ tên (map từ _supplies)
-        name_to_supply = {s.name: s for s in self._supplies}
-        
+        # Lưu vào DB (chạy nền)
+        run_async(
+            self._save_import_ticket, import_date, lines,
+            on_result=lambda result: self._on_import_saved(import_date, lines, result),
+            on_error=lambda e: QMessageBox.critical(self, "Lỗi", f"Không thể lưu phiếu nhập:\n{str(e)}"),
+            busy=self._busy,
+            owner=self,
+        )
+
+    def _save_import_ticket(self, import_date, lines: list[dict]) -> dict:
+        """Chạy trên thread nền: map tên vật tư -> SuppliesId rồi tạo phiếu nhập."""
         # Lấy supplies_data từ service để có ID
-        try:
-            supplies_data = self.service.get_all_supplies_for_import()
-            name_to_id = {s['name']: s['id'] for s in supplies_data}
-            
-            # Chuẩn bị items cho service
-            items = []
-            for line in lines:
-                supply_id = name_to_id.get(line['name'])
-                if supply_id is None:
-                    QMessageBox.warning(self, "Lỗi", f"Không tìm thấy ID cho vật tư: {line['name']}")
-                    return
-                items.append({
-                    'supply_id': supply_id,
-                    'import_qty': line['import_qty']
-                })
-            
-            # Lưu vào DB
-            result = self.service.create_import_ticket(import_date, items)
-            
-            # Hiển thị kết quả
-            total_money = result['total_money']
-            text_lines = []
-            for i, x in enumerate(lines, start=1):
-                text_lines.append(
-                    f"{i}. {x['name']} | SL nhập: {x['import_qty']} | "
-                    f"Tồn: {x['stock_before']} -> {x['stock_after']} | "
-                    f"Tiền: {self._fmt_money(x['line_money'])}"
-                )
-
-            QMessageBox.information(
-                self,
-                "Lưu phiếu nhập thành công",
-                f"Ngày nhập: {import_date.strftime('%Y-%m-%d')}\n\n" +
-                "\n".join(text_lines) +
-                f"\n\nTổng tiền nhập: {self._fmt_money(int(total_money))}\n" +
-                f"Số phiếu đã tạo: {result['total_items']}"
+        supplies_data = self.service.get_all_supplies_for_import()
+        name_to_id = {s['name']: s['id'] for s in supplies_data}
+        
+        # Chuẩn bị items cho service
+        items = []
+        for line in lines:
+            supply_id = name_to_id.get(line['name'])
+            if supply_id is None:
+                raise ValueError(f"Không tìm thấy ID cho vật tư: {line['name']}")
+            items.append({
+                'supply_id': supply_id,
+                'import_qty': line['import_qty']
+            })
+        
+        return self.service.create_import_ticket(import_date, items)
+
+    def _on_import_saved(self, import_date, lines: list[dict], result: dict):
+        # Hiển thị kết quả
+        total_money = result['total_money']
+        text_lines = []
+        for i, x in enumerate(lines, start=1):
+            text_lines.append(
+                f"{i}. {x['name']} | SL nhập: {x['import_qty']} | "
+                f"Tồn: {x['stock_before']} -> {x['stock_after']} | "
+                f"Tiền: {self._fmt_money(x['line_money'])}"
             )
-            
-            # Reload dữ liệu và reset form
-            self._load_supplies_from_db()
-            self._render_table()
-            self.import_date.setDate(QDate.currentDate())
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Lỗi", f"Không thể lưu phiếu nhập:\n{str(e)}")
+
+        QMessageBox.information(
+            self,
+            "Lưu phiếu nhập thành công",
+            f"Ngày nhập: {import_date.strftime('%Y-%m-%d')}\n\n" +
+            "\n".join(text_lines) +
+            f"\n\nTổng tiền nhập: {self._fmt_money(int(total_money))}\n" +
+            f"Số phiếu đã tạo: {result['total_items']}"
+        )
+        
+        # Reload dữ liệu và reset form
+        self._load_supplies_from_db()
+        self.import_date.setDate(QDate.currentDate())
 
     def _on_reset_clicked(self):
         self.import_date.setDate(QDate.currentDate())
@@ -27,6 +27,8 @@ from PyQt6.QtWidgets import (
 from utils.style import STYLE
 from utils.print_dialog import print_widget_with_dialog
 from services.repair_service import RepairService
+from presentation.workers import run_async
+from presentation.views.busy_overlay import BusyOverlay
 
 logger = logging.getLogger(__name__)
 
@@ -58,6 +60,7 @@ class PhieuSuaChuaPage(QWidget):
 
         self._setup_ui()
         self._apply_style()
+        self._busy = BusyOverlay(self)
 
         self._load_supplies_and_wages()
         self._recalc_total()
@@ -368,28 +371,34 @@ class PhieuSuaChuaPage(QWidget):
 
     # ---------------- Data Loading ----------------
     def _load_supplies_and_wages(self):
-        """Load danh sách vật tư và tiền công từ database."""
-        try:
-            db_supplies = self.service.get_all_supplies()
-            self._supplies = [SupplyItem(s["SuppliesName"], int(s["SuppliesPrice"])) for s in db_supplies]
-
-            db_wages = self.service.get_all_wages()
-            self._wages = [WageItem(w["WageName"], int(w["WageValue"])) for w in db_wages]
+        """Load danh sách vật tư và tiền công từ database (chạy nền)."""
+        run_async(
+            lambda: (self.service.get_all_supplies(), self.service.get_all_wages()),
+            on_result=self._on_supplies_and_wages_loaded,
+            on_error=self._on_supplies_and_wages_failed,
+            busy=self._busy,
+            owner=self,
+        )
 
-            logger.info("Loaded %s supplies and %s wages", len(self._supplies), len(self._wages))
+    def _on_supplies_and_wages_loaded(self, data: tuple):
+        db_supplies, db_wages = data
+        self._supplies = [SupplyItem(s["SuppliesName"], int(s["SuppliesPrice"])) for s in db_supplies]
+        self._wages = [WageItem(w["WageName"], int(w["WageValue"])) for w in db_wages]
 
-            # Refresh comboboxes in all existing rows
-            for r in range(self.table.rowCount()):
-                self._refresh_row_combos(r)
+        logger.info("Loaded %s supplies and %s wages", len(self._supplies), len(self._wages))
 
-        except Exception as e:
-            logger.error("Failed to load supplies and wages: %s", e)
-            QMessageBox.warning(
-                self,
-                "Cảnh báo",
-                "Không thể tải danh sách vật tư và tiền công từ database.\n" \
-                "Vui lòng kiểm tra kết nối database.",
-            )
+        # Refresh comboboxes in all existing rows
+        for r in range(self.table.rowCount()):
+            self._refresh_row_combos(r)
+
+    def _on_supplies_and_wages_failed(self, e: Exception):
+        logger.error("Failed to load supplies and wages: %s", e)
+        QMessageBox.warning(
+            self,
+            "Cảnh báo",
+            "Không thể tải danh sách vật tư và tiền công từ database.\n" \
+            "Vui lòng kiểm tra kết nối database.",
+        )
 
     def _refresh_row_combos(self, row: int):
         """Refresh combobox items in a specific row."""
@@ -486,67 +495,92 @@ class PhieuSuaChuaPage(QWidget):
                 QMessageBox.warning(self, "Thông tin không hợp lệ", f"Số lượng phải > 0 cho dòng {idx}")
                 return
 
-        try:
-            reception = self.service.get_latest_reception_by_license_plate(data["license_plate"])
-            if not reception:
-                QMessageBox.critical(
-                    self,
-                    "Lỗi",
-                    f"Biển số xe: {data['license_plate']}\n"
-                    "Vui lòng tiếp nhận xe trước khi tạo phiếu sửa chữa.",
-                )
-                return
+        run_async(
+            self._submit_repair_ticket, data,
+            on_result=lambda outcome: self._on_repair_submitted(data, outcome),
+            on_error=self._on_repair_submit_failed,
+            busy=self._busy,
+            owner=self,
+        )
+
+    def _submit_repair_ticket(self, data: dict) -> tuple:
+        """
+        Chạy trên thread nền: tìm phiếu tiếp nhận, kiểm tra tồn kho rồi tạo phiếu sửa chữa.
+
+        Returns:
+            ("no_reception", None) | ("insufficient", message) | ("done", (reception, result))
+        """
+        reception = self.service.get_latest_reception_by_license_plate(data["license_plate"])
+        if not reception:
+            return "no_reception", None
+
+        # Kiểm tra tồn kho
+        for detail in data["details"]:
+            check = self.service.check_supply_inventory(detail["supply"], detail["qty"])
+            if not check["available"]:
+                return "insufficient", check["message"]
+
+        # Chuẩn bị dữ liệu chi tiết
+        repair_details = []
+        for detail in data["details"]:
+            repair_details.append(
+                {
+                    "content": detail["content"],
+                    "supply_name": detail["supply"],
+                    "supply_amount": detail["qty"],
+                    "wage_name": detail["wage"] if detail["wage"] != "-- Chọn tiền công --" else None,
+                }
+            )
+
+        result = self.service.create_repair_ticket(
+            reception_id=reception["ReceptionId"],
+            repair_date=data["repair_date"],
+            repair_money=data["total"],
+            details=repair_details,
+        )
+        return "done", (reception, result)
+
+    def _on_repair_submitted(self, data: dict, outcome: tuple):
+        status, payload = outcome
+
+        if status == "no_reception":
+            QMessageBox.critical(
+                self,
+                "Lỗi",
+                f"Biển số xe: {data['license_plate']}\n"
+                "Vui lòng tiếp nhận xe trước khi tạo phiếu sửa chữa.",
+            )
+            return
 
-            # Kiểm tra tồn kho
-            for detail in data["details"]:
-                check = self.service.check_supply_inventory(detail["supply"], detail["qty"])
-                if not check["available"]:
-                    QMessageBox.warning(self, "Không đủ tồn kho", check["message"])
-                    return
-
-            # Chuẩn bị dữ liệu chi tiết
-            repair_details = []
-            for detail in data["details"]:
-                repair_details.append(
-                    {
-                        "content": detail["content"],
-                        "supply_name": detail["supply"],
-                        "supply_amount": detail["qty"],
-                        "wage_name": detail["wage"] if detail["wage"] != "-- Chọn tiền công --" else None,
-                    }
-                )
-
-            result = self.service.create_repair_ticket(
-                reception_id=reception["ReceptionId"],
-                repair_date=data["repair_date"],
-                repair_money=data["total"],
-                details=repair_details,
+        if status == "insufficient":
+            QMessageBox.warning(self, "Không đủ tồn kho", payload)
+            return
+
+        reception, result = payload
+        if result.get("success"):
+            msg = QMessageBox(self)
+            msg.setIcon(QMessageBox.Icon.Information)
+            msg.setWindowTitle("Thành công")
+            msg.setText(result.get("message", "Tạo phiếu thành công."))
+            msg.setInformativeText(
+                f"Mã phiếu sửa chữa: {result.get('repair_id')}\n"
+                f"Biển số xe: {data['license_plate']}\n"
+                f"Chủ xe: {reception.get('OwnerName', '')}\n"
+                f"Ngày sửa: {data['repair_date']}\n"
+                f"Tổng tiền: {self._fmt_money(data['total'])}\n"
+                f"Số dòng chi tiết: {len(data['details'])}"
             )
+            msg.setStandardButtons(QMessageBox.StandardButton.Ok)
+            msg.exec()
+
+            self.last_repair_id = result.get("repair_id")
+            self._on_reset_clicked()
+        else:
+            QMessageBox.critical(self, "Lỗi", f"Không thể tạo phiếu sửa chữa:\n{result.get("message")}")
 
-            if result.get("success"):
-                msg = QMessageBox(self)
-                msg.setIcon(QMessageBox.Icon.Information)
-                msg.setWindowTitle("Thành công")
-                msg.setText(result.get("message", "Tạo phiếu thành công."))
-                msg.setInformativeText(
-                    f"Mã phiếu sửa chữa: {result.get('repair_id')}\n"
-                    f"Biển số xe: {data['license_plate']}\n"
-                    f"Chủ xe: {reception.get('OwnerName', '')}\n"
-                    f"Ngày sửa: {data['repair_date']}\n"
-                    f"Tổng tiền: {self._fmt_money(data['total'])}\n"
-                    f"Số dòng chi tiết: {len(data['details'])}"
-                )
-                msg.setStandardButtons(QMessageBox.StandardButton.Ok)
-                msg.exec()
-
-                self.last_repair_id = result.get("repair_id")
-                self._on_reset_clicked()
-            else:
-                QMessageBox.critical(self, "Lỗi", f"Không thể tạo phiếu sửa chữa:\n{result.get("message")}")
-
-        except Exception as e:
-            logger.error("Error saving repair ticket: %s", e)
-            QMessageBox.critical(self, "Lỗi", f"Đã xảy ra lỗi khi lưu dữ liệu:\n{str(e)}")
+    def _on_repair_submit_failed(self, e: Exception):
+        logger.error("Error saving repair ticket: %s", e)
+        QMessageBox.critical(self, "Lỗi", f"Đã xảy ra lỗi khi lưu dữ liệu:\n{str(e)}")
 
     def _on_reset_clicked(self):
         self.license_plate.clear()
@@ -19,7 +19,10 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
+from presentation.views.busy_overlay import BusyOverlay
+from presentation.workers import run_async
 from services.receipt_service import ReceiptService
+from services.vehicle_lookup_service import VehicleLookupService
 from utils.print_dialog import print_widget_with_dialog
 from utils.style import STYLE
 
@@ -39,6 +42,7 @@ class PhieuThuPage(QWidget):
         self.current_reception_id = None  # Lưu ReceptionId hiện tại để tạo phiếu thu
 
         self._setup_ui()
+        self._busy = BusyOverlay(self)
         self._apply_view_state(empty=True)
 
     def _setup_ui(self):
@@ -188,70 +192,84 @@ class PhieuThuPage(QWidget):
             QMessageBox.warning(self, "Thiếu thông tin", "Vui lòng nhập biển số.")
             return
 
-        try:
-            # Lấy thông tin xe và tổng nợ
-            info = self.service.get_vehicle_debt_info(plate)
-            if not info:
-                self._apply_view_state(empty=True)
-                self.current_reception_id = None
-                QMessageBox.information(
-                    self,
-                    "Không tìm thấy",
-                    f"Không tìm thấy xe có biển số {plate} trong hệ thống."
-                )
-                return
-
-            total_debt = float(info["TotalDebt"]) if info["TotalDebt"] else 0
-
-            if total_debt <= 0:
-                self._apply_view_state(empty=False)
-                self.out_owner.setText(info["OwnerName"])
-                self.out_phone.setText(info["PhoneNumber"] or "")
-                self.out_address.setText(info["Address"] or "")
-                self._set_debt(0)
-                self.lbl_debt_hint.setText("Xe này không có nợ.")
-                self.current_reception_id = None
-                QMessageBox.information(
-                    self,
-                    "Không có nợ",
-                    f"Xe {plate} không có công nợ."
-                )
-                return
-
-            # Lấy phiếu tiếp nhận mới nhất có nợ
-            reception = self.service.get_latest_reception_with_debt(plate)
-            if not reception:
-                self._apply_view_state(empty=True)
-                self.current_reception_id = None
-                QMessageBox.warning(
-                    self,
-                    "Lỗi",
-                    "Không tìm thấy phiếu tiếp nhận có nợ cho xe này."
-                )
-                return
+        run_async(
+            self._fetch_debt_info, plate,
+            on_result=lambda data: self._on_debt_info_loaded(plate, *data),
+            on_error=self._on_debt_info_failed,
+            busy=self._busy,
+            owner=self,
+        )
 
-            # Hiển thị thông tin
+    def _fetch_debt_info(self, plate: str):
+        """Chạy trên thread nền: thông tin nợ của xe và phiếu tiếp nhận mới nhất còn nợ."""
+        # Một lần gọi database; không cần lịch sử nên page_size=0
+        dossier = VehicleLookupService.get_dossier(plate, page_size=0)
+        if not dossier:
+            return None, None
+        return dossier["vehicle"], dossier["latest_reception_with_debt"]
+
+    def _on_debt_info_loaded(self, plate: str, info, reception):
+        # Lấy thông tin xe và tổng nợ
+        if not info:
+            self._apply_view_state(empty=True)
+            self.current_reception_id = None
+            QMessageBox.information(
+                self,
+                "Không tìm thấy",
+                f"Không tìm thấy xe có biển số {plate} trong hệ thống."
+            )
+            return
+
+        total_debt = float(info["TotalDebt"]) if info["TotalDebt"] else 0
+
+        if total_debt <= 0:
             self._apply_view_state(empty=False)
             self.out_owner.setText(info["OwnerName"])
             self.out_phone.setText(info["PhoneNumber"] or "")
             self.out_address.setText(info["Address"] or "")
-            self._set_debt(int(total_debt))
-            self.current_reception_id = reception["ReceptionId"]
-
-            self.lbl_debt_hint.setText("Quy định: Tiền thu không vượt quá tiền nợ.")
-            self._on_amount_changed()
-
-            logger.info("Loaded debt info for %s: %s", plate, total_debt)
+            self._set_debt(0)
+            self.lbl_debt_hint.setText("Xe này không có nợ.")
+            self.current_reception_id = None
+            QMessageBox.information(
+                self,
+                "Không có nợ",
+                f"Xe {plate} không có công nợ."
+            )
+            return
 
-        except Exception as e:
-            logger.error("Error loading vehicle debt info: %s", e)
+        # Phiếu tiếp nhận mới nhất có nợ
+        if not reception:
             self._apply_view_state(empty=True)
             self.current_reception_id = None
-            QMessageBox.critical(
+            QMessageBox.warning(
                 self,
                 "Lỗi",
-                f"Đã xảy ra lỗi khi tải thông tin:\n{str(e)}"
+                "Không tìm thấy phiếu tiếp nhận có nợ cho xe này."
             )
+            return
+
+        # Hiển thị thông tin
+        self._apply_view_state(empty=False)
+        self.out_owner.setText(info["OwnerName"])
+        self.out_phone.setText(info["PhoneNumber"] or "")
+        self.out_address.setText(info["Address"] or "")
+        self._set_debt(int(total_debt))
+        self.current_reception_id = reception["ReceptionId"]
+
+        self.lbl_debt_hint.setText("Quy định: Tiền thu không vượt quá tiền nợ.")
+        self._on_amount_changed()
+
+        logger.info("Loaded debt info for %s: %s", plate, total_debt)
+
+    def _on_debt_info_failed(self, e: Exception):
+        logger.error("Error loading vehicle debt info: %s", e)
+        self._apply_view_state(empty=True)
+        self.current_reception_id = None
+        QMessageBox.critical(
+            self,
+            "Lỗi",
+            f"Đã xảy ra lỗi khi tải thông tin:\n{str(e)}"
+        )
 
     def _on_amount_changed(self):
         debt = self._get_debt()
@@ -287,63 +305,71 @@ class PhieuThuPage(QWidget):
             )
             return
 
-        try:
-            # Tạo phiếu thu
-            result = self.service.create_receipt(
-                reception_id=self.current_reception_id,
-                receipt_date=self.receipt_date.date().toString("yyyy-MM-dd"),
-                money_amount=amount,
+        receipt_date = self.receipt_date.date().toString("yyyy-MM-dd")
+
+        # Tạo phiếu thu (chạy nền)
+        run_async(
+            self.service.create_receipt,
+            reception_id=self.current_reception_id,
+            receipt_date=receipt_date,
+            money_amount=amount,
+            on_result=lambda result: self._on_receipt_saved(plate, receipt_date, amount, result),
+            on_error=self._on_receipt_save_failed,
+            busy=self._busy,
+            owner=self,
+        )
+
+    def _on_receipt_saved(self, plate: str, receipt_date: str, amount: int, result: dict):
+        if result["success"]:
+            remaining_debt = result.get("remaining_debt", 0)
+
+            # Hiển thị thông báo thành công
+            msg = QMessageBox(self)
+            msg.setIcon(QMessageBox.Icon.Information)
+            msg.setWindowTitle("Thành công")
+            msg.setText(result["message"])
+            msg.setInformativeText(
+                f"Mã phiếu thu: {result['receipt_id']}\n"
+                f"Biển số: {plate}\n"
+                f"Ngày thu: {receipt_date}\n"
+                f"Tiền thu: {self._fmt_money(amount)}\n"
+                f"Còn nợ: {self._fmt_money(int(remaining_debt))}"
             )
+            msg.setStandardButtons(QMessageBox.StandardButton.Ok)
+            msg.exec()
 
-            if result["success"]:
-                remaining_debt = result.get("remaining_debt", 0)
-
-                # Hiển thị thông báo thành công
-                msg = QMessageBox(self)
-                msg.setIcon(QMessageBox.Icon.Information)
-                msg.setWindowTitle("Thành công")
-                msg.setText(result["message"])
-                msg.setInformativeText(
-                    f"Mã phiếu thu: {result['receipt_id']}\n"
-                    f"Biển số: {plate}\n"
-                    f"Ngày thu: {self.receipt_date.date().toString('yyyy-MM-dd')}\n"
-                    f"Tiền thu: {self._fmt_money(amount)}\n"
-                    f"Còn nợ: {self._fmt_money(int(remaining_debt))}"
-                )
-                msg.setStandardButtons(QMessageBox.StandardButton.Ok)
-                msg.exec()
-
-                # Lưu receipt_id để có thể in phiếu
-                self.last_receipt_id = result["receipt_id"]
-
-                # Cập nhật hiển thị nợ mới
-                self._set_debt(int(remaining_debt))
-                self.inp_amount.clear()
-                self._on_amount_changed()
-
-                # Nếu hết nợ, reset form
-                if remaining_debt <= 0:
-                    QMessageBox.information(
-                        self,
-                        "Thông báo",
-                        "Xe đã thanh toán hết nợ!"
-                    )
-                    self._on_reset_clicked()
-            else:
-                # Hiển thị lỗi
-                QMessageBox.critical(
+            # Lưu receipt_id để có thể in phiếu
+            self.last_receipt_id = result["receipt_id"]
+
+            # Cập nhật hiển thị nợ mới
+            self._set_debt(int(remaining_debt))
+            self.inp_amount.clear()
+            self._on_amount_changed()
+
+            # Nếu hết nợ, reset form
+            if remaining_debt <= 0:
+                QMessageBox.information(
                     self,
-                    "Lỗi",
-                    f"Không thể tạo phiếu thu:\n{result['message']}"
+                    "Thông báo",
+                    "Xe đã thanh toán hết nợ!"
                 )
-        except Exception as e:
-            logger.error("Error saving receipt: %s", e)
+                self._on_reset_clicked()
+        else:
+            # Hiển thị lỗi
             QMessageBox.critical(
                 self,
                 "Lỗi",
-                f"Đã xảy ra lỗi khi lưu phiếu thu:\n{str(e)}"
+                f"Không thể tạo phiếu thu:\n{result['message']}"
             )
 
+    def _on_receipt_save_failed(self, e: Exception):
+        logger.error("Error saving receipt: %s", e)
+        QMessageBox.critical(
+            self,
+            "Lỗi",
+            f"Đã xảy ra lỗi khi lưu phiếu thu:\n{str(e)}"
+        )
+
     def _on_print_clicked(self):
         """In phiếu thu (demo)."""
         plate = self.inp_plate.text().strip().upper()
@@ -12,6 +12,8 @@ from PyQt6.QtWidgets import (
 
 from utils.style import STYLE
 from services import SystemSettingsService
+from presentation.workers import run_async
+from presentation.views.busy_overlay import BusyOverlay
 
 
 class ThayDoiQuyDinhPage(QWidget):
@@ -37,30 +39,49 @@ class ThayDoiQuyDinhPage(QWidget):
         self._wages = []
 
         self._setup_ui()
-        self._load_from_db()
+        self._busy = BusyOverlay(self)
         self._render_all()
+        self._load_from_db()
 
     # ---------------- Data Loading ----------------
-    def _load_from_db(self):
-        """Load dữ liệu từ database qua service."""
-        try:
-            # Load max cars per day
-            self._max_cars_per_day = self.service.get_max_cars_per_day()
-            
-            # Load brands
-            brands_data = self.service.get_all_brands()
-            self._brands = [b['name'] for b in brands_data]
-            
-            # Load supplies
-            supplies_data = self.service.get_all_supplies()
-            self._supplies = [(s['name'], int(s['price'])) for s in supplies_data]
-            
-            # Load wages
-            wages_data = self.service.get_all_wages()
-            self._wages = [(w['name'], int(w['value'])) for w in wages_data]
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Lỗi", f"Không thể load dữ liệu từ database:\n{str(e)}")
+    def _load_from_db(self, on_loaded=None):
+        """Load dữ liệu từ database qua service (chạy nền), xong thì vẽ lại các bảng."""
+        run_async(
+            self._fetch_settings,
+            on_result=lambda data: self._on_settings_loaded(data, on_loaded),
+            on_error=lambda e: QMessageBox.critical(
+                self, "Lỗi", f"Không thể load dữ liệu từ database:\n{str(e)}"
+            ),
+            busy=self._busy,
+            owner=self,
+        )
+
+    def _fetch_settings(self) -> dict:
+        """Chạy trên thread nền: đọc toàn bộ quy định hiện tại."""
+        return {
+            'max_cars': self.service.get_max_cars_per_day(),
+            'brands': self.service.get_all_brands(),
+            'supplies': self.service.get_all_supplies(),
+            'wages': self.service.get_all_wages(),
+        }
+
+    def _on_settings_loaded(self, data: dict, on_loaded=None):
+        # Load max cars per day
+        self._max_cars_per_day = data['max_cars']
+        self.spin_max_cars.setValue(self._max_cars_per_day)
+        
+        # Load brands
+        self._brands = [b['name'] for b in data['brands']]
+        
+        # Load supplies
+        self._supplies = [(s['name'], int(s['price'])) for s in data['supplies']]
+        
+        # Load wages
+        self._wages = [(w['name'], int(w['value'])) for w in data['wages']]
+        
+        self._render_all()
+        if on_loaded:
+            on_loaded()
     
     # ---------------- UI ----------------
     def _setup_ui(self):
@@ -447,27 +468,31 @@ class ThayDoiQuyDinhPage(QWidget):
                 return
             wages.append((name, value))
 
-        # Lưu vào database
-        try:
-            self.service.save_all_settings(max_cars, brands, supplies, wages)
-            
-            # Cập nhật lại in-memory sau khi lưu thành công
-            self._max_cars_per_day = max_cars
-            self._brands = brands
-            self._supplies = supplies
-            self._wages = wages
-            
-            QMessageBox.information(
-                self,
-                "Thành công",
-                "Đã áp dụng thay đổi và lưu vào database thành công."
-            )
-        except Exception as e:
-            QMessageBox.critical(
+        # Lưu vào database (chạy nền)
+        run_async(
+            self.service.save_all_settings, max_cars, brands, supplies, wages,
+            on_result=lambda _: self._on_settings_saved(max_cars, brands, supplies, wages),
+            on_error=lambda e: QMessageBox.critical(
                 self,
                 "Lỗi",
                 f"Không thể lưu thay đổi vào database:\n{str(e)}"
-            )
+            ),
+            busy=self._busy,
+            owner=self,
+        )
+
+    def _on_settings_saved(self, max_cars: int, brands: list, supplies: list, wages: list):
+        # Cập nhật lại in-memory sau khi lưu thành công
+        self._max_cars_per_day = max_cars
+        self._brands = brands
+        self._supplies = supplies
+        self._wages = wages
+        
+        QMessageBox.information(
+            self,
+            "Thành công",
+            "Đã áp dụng thay đổi và lưu vào database thành công."
+        )
 
     def _on_reset_clicked(self):
         """Reload dữ liệu từ database."""
@@ -479,9 +504,9 @@ class ThayDoiQuyDinhPage(QWidget):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            self._load_from_db()
-            self._render_all()
-            QMessageBox.information(self, "Thành công", "Đã tải lại dữ liệu từ database.")
+            self._load_from_db(
+                on_loaded=lambda: QMessageBox.information(self, "Thành công", "Đã tải lại dữ liệu từ database.")
+            )
 
     # ---------------- Helpers ----------------
     def _prompt_text(self, title: str, label: str):
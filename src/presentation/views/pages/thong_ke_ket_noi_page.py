@@ -0,0 +1,254 @@
+# src/presentation/views/pages/thong_ke_ket_noi_page.py
+
+from __future__ import annotations
+
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtWidgets import (
+    QWidget,
+    QLabel,
+    QPushButton,
+    QHBoxLayout,
+    QVBoxLayout,
+    QGridLayout,
+    QGroupBox,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+    QMessageBox,
+)
+
+from utils.style import STYLE
+from app.database import db_manager
+from services import VehicleLookupService
+from presentation.workers import run_async
+
+
+class ThongKeKetNoiPage(QWidget):
+    """Thống kê pool kết nối database (chỉ ADMIN)."""
+
+    PAGE_ID = "thong_ke_ket_noi"
+
+    # Chu kỳ làm mới (ms). Số liệu nằm sẵn trong bộ nhớ nên không cần chạy nền.
+    REFRESH_INTERVAL_MS = 1000
+
+    # Số câu lệnh tốn thời gian nhất được hiển thị
+    TOP_STATEMENTS = 20
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setStyleSheet(STYLE)
+
+        self._setup_ui()
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.REFRESH_INTERVAL_MS)
+        self._timer.timeout.connect(self._refresh)
+
+    def _setup_ui(self):
+        root = QVBoxLayout(self)
+        root.setContentsMargins(18, 18, 18, 18)
+        root.setSpacing(14)
+        root.setAlignment(Qt.AlignmentFlag.AlignTop)
+
+        container = QWidget(self)
+        container.setObjectName("pageContainer")
+        container_layout = QVBoxLayout(container)
+        container_layout.setContentsMargins(18, 18, 18, 18)
+        container_layout.setSpacing(12)
+
+        title = QLabel("THỐNG KÊ KẾT NỐI")
+        title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        title.setObjectName("pageTitle")
+
+        subtitle = QLabel("Theo dõi pool kết nối database để chọn DB_POOL_SIZE phù hợp.")
+        subtitle.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        subtitle.setWordWrap(True)
+        subtitle.setObjectName("pageSubtitle")
+
+        container_layout.addWidget(title)
+        container_layout.addWidget(subtitle)
+
+        # --- Tổng quan ---
+        group_summary = QGroupBox("Tổng quan")
+        grid = QGridLayout(group_summary)
+        grid.setHorizontalSpacing(24)
+        grid.setVerticalSpacing(8)
+
+        self._summary_labels: dict[str, QLabel] = {}
+        fields = [
+            ("pool_size", "Kích thước pool"),
+            ("max_size", "Kích thước tối đa"),
+            ("active", "Đang dùng"),
+            ("idle", "Rảnh"),
+            ("waiting", "Đang chờ"),
+            ("peak_active", "Dùng cao nhất"),
+            ("checkouts", "Lượt lấy kết nối"),
+            ("checkout_failures", "Lấy thất bại (hết thời gian chờ)"),
+            ("commits", "Commit"),
+            ("rollbacks", "Rollback"),
+            ("errors", "Lỗi truy vấn"),
+            ("replaced_connections", "Kết nối chết đã thay"),
+            ("retries", "Chạy lại câu đọc"),
+            ("tx_retries", "Chạy lại giao dịch (deadlock)"),
+        ]
+        for i, (key, text) in enumerate(fields):
+            value = QLabel("0")
+            value.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            self._summary_labels[key] = value
+            row, col = divmod(i, 3)
+            grid.addWidget(QLabel(text), row, col * 2)
+            grid.addWidget(value, row, col * 2 + 1)
+
+        container_layout.addWidget(group_summary)
+
+        # --- Độ trễ ---
+        group_latency = QGroupBox("Độ trễ (ms)")
+        latency_layout = QVBoxLayout(group_latency)
+        latency_layout.setSpacing(10)
+
+        self.table_latency = QTableWidget(2, 7, self)
+        self.table_latency.setObjectName("dataTable")
+        self.table_latency.setHorizontalHeaderLabels(
+            ["Chỉ số", "Số lượt", "TB", "p50", "p95", "p99", "Max"]
+        )
+        self.table_latency.verticalHeader().setVisible(False)
+        self.table_latency.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table_latency.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table_latency.setFixedHeight(110)
+        latency_layout.addWidget(self.table_latency)
+
+        # Phân bố theo bucket
+        self.table_buckets = QTableWidget(0, 3, self)
+        self.table_buckets.setObjectName("dataTable")
+        self.table_buckets.setHorizontalHeaderLabels(
+            ["Khoảng (ms)", "Chờ lấy kết nối", "Thời gian giữ kết nối"]
+        )
+        self.table_buckets.verticalHeader().setVisible(False)
+        self.table_buckets.setAlternatingRowColors(True)
+        self.table_buckets.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table_buckets.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        latency_layout.addWidget(self.table_buckets)
+
+        bottom = QHBoxLayout()
+        self.lbl_hint = QLabel(
+            "Gợi ý: nếu p95 chờ lấy kết nối cao hoặc có lượt lấy thất bại, "
+            "hãy tăng DB_POOL_SIZE hoặc DB_POOL_MAX_SIZE."
+        )
+        self.lbl_hint.setObjectName("hintText")
+        self.lbl_hint.setWordWrap(True)
+
+        self.btn_reset = QPushButton("Đặt lại số liệu")
+        self.btn_reset.setObjectName("btnReset")
+        self.btn_reset.clicked.connect(self._on_reset_clicked)
+
+        # Sửa CAR.TotalDebt lệch với tổng nợ các phiếu tiếp nhận
+        self.btn_reconcile = QPushButton("Đối soát công nợ xe")
+        self.btn_reconcile.setObjectName("btnReconcile")
+        self.btn_reconcile.clicked.connect(self._on_reconcile_clicked)
+
+        bottom.addWidget(self.lbl_hint, 1)
+        bottom.addWidget(self.btn_reset)
+        bottom.addWidget(self.btn_reconcile)
+        latency_layout.addLayout(bottom)
+
+        container_layout.addWidget(group_latency)
+
+        # --- Câu lệnh SQL ---
+        group_statements = QGroupBox("Câu lệnh tốn thời gian nhất")
+        statements_layout = QVBoxLayout(group_statements)
+
+        self.table_statements = QTableWidget(0, 8, self)
+        self.table_statements.setObjectName("dataTable")
+        self.table_statements.setHorizontalHeaderLabels(
+            ["Câu lệnh", "Số lượt", "Lỗi", "Số dòng", "Tổng (ms)", "TB (ms)", "p95 (ms)", "Max (ms)"]
+        )
+        self.table_statements.verticalHeader().setVisible(False)
+        self.table_statements.setAlternatingRowColors(True)
+        self.table_statements.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        statement_header = self.table_statements.horizontalHeader()
+        statement_header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        for col in range(1, 8):
+            statement_header.setSectionResizeMode(col, QHeaderView.ResizeMode.ResizeToContents)
+        statements_layout.addWidget(self.table_statements)
+
+        container_layout.addWidget(group_statements)
+
+        root.addWidget(container)
+        root.addStretch(1)
+
+    # ---------------- Events ----------------
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._refresh()
+        self._timer.start()
+
+    def hideEvent(self, event):
+        # Không làm mới khi trang không hiển thị
+        self._timer.stop()
+        super().hideEvent(event)
+
+    # ---------------- Actions ----------------
+    def _on_reset_clicked(self):
+        db_manager.reset_pool_stats()
+        db_manager.reset_statement_stats()
+        self._refresh()
+
+    def _on_reconcile_clicked(self):
+        self.btn_reconcile.setEnabled(False)
+        run_async(
+            VehicleLookupService.reconcile_total_debt,
+            on_result=self._on_reconciled,
+            on_error=lambda e: QMessageBox.critical(self, "Lỗi", f"Không thể đối soát công nợ:\n{str(e)}"),
+            on_finished=lambda: self.btn_reconcile.setEnabled(True),
+            owner=self,
+        )
+
+    def _on_reconciled(self, fixed_rows: int):
+        if fixed_rows:
+            QMessageBox.warning(self, "Đối soát công nợ", f"Đã sửa tổng nợ của {fixed_rows} xe.")
+        else:
+            QMessageBox.information(self, "Đối soát công nợ", "Tổng nợ của mọi xe đều khớp.")
+
+    # ---------------- Render ----------------
+    def _refresh(self):
+        stats = db_manager.get_pool_stats()
+
+        for key, label in self._summary_labels.items():
+            label.setText(str(stats.get(key, 0)))
+
+        wait = stats["checkout_wait"]
+        hold = stats["hold_time"]
+        for row, (name, hist) in enumerate(
+            [("Chờ lấy kết nối", wait), ("Thời gian giữ kết nối", hold)]
+        ):
+            self._set_item(self.table_latency, row, 0, name)
+            self._set_item(self.table_latency, row, 1, str(hist["count"]), align_right=True)
+            for col, key in enumerate(["avg_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"], start=2):
+                self._set_item(self.table_latency, row, col, f"{hist[key]:.1f}", align_right=True)
+
+        self.table_buckets.setRowCount(len(wait["buckets"]))
+        for row, ((label, wait_count), (_, hold_count)) in enumerate(
+            zip(wait["buckets"], hold["buckets"])
+        ):
+            self._set_item(self.table_buckets, row, 0, label)
+            self._set_item(self.table_buckets, row, 1, str(wait_count), align_right=True)
+            self._set_item(self.table_buckets, row, 2, str(hold_count), align_right=True)
+
+        statements = db_manager.get_statement_stats(self.TOP_STATEMENTS)
+        self.table_statements.setRowCount(len(statements))
+        for row, stmt in enumerate(statements):
+            self._set_item(self.table_statements, row, 0, stmt["fingerprint"])
+            self.table_statements.item(row, 0).setToolTip(stmt["fingerprint"])
+            for col, key in enumerate(["calls", "errors", "rows"], start=1):
+                self._set_item(self.table_statements, row, col, str(stmt[key]), align_right=True)
+            for col, key in enumerate(["total_ms", "avg_ms", "p95_ms", "max_ms"], start=4):
+                self._set_item(self.table_statements, row, col, f"{stmt[key]:.1f}", align_right=True)
+
+    def _set_item(self, table: QTableWidget, row: int, col: int, text: str, align_right: bool = False):
+        item = QTableWidgetItem(text)
+        if align_right:
+            item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        else:
+            item.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
+        item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+        table.setItem(row, col, item)
@@ -20,6 +20,8 @@ from PyQt6.QtWidgets import QDialog, QFrame, QFormLayout
 import logging
 
 from services.car_reception_service import CarReceptionService
+from presentation.workers import run_async
+from presentation.views.busy_overlay import BusyOverlay
 
 logger = logging.getLogger(__name__)
 from utils.style import STYLE
@@ -117,6 +119,7 @@ class TiepNhanXePage(QWidget):
         self.service = CarReceptionService()
         self._setup_ui()
         self._apply_style()
+        self._busy = BusyOverlay(self)
         self._load_brands()
 
     def _setup_ui(self):
@@ -268,53 +271,59 @@ class TiepNhanXePage(QWidget):
             QMessageBox.warning(self, "Thiếu thông tin", "Vui lòng nhập:\n- " + "\n- ".join(missing))
             return
         
-        # Gọi service để lưu vào database
-        try:
-            result = self.service.receive_car(
-                license_plate=data["license_plate"],
-                brand_name=data["brand"],
-                owner_name=data["owner_name"],
-                phone_number=data["owner_phone"],
-                address=data["owner_address"],
-                reception_date=data["reception_date"],
-                email=None
+        # Gọi service để lưu vào database (chạy nền)
+        run_async(
+            self.service.receive_car,
+            license_plate=data["license_plate"],
+            brand_name=data["brand"],
+            owner_name=data["owner_name"],
+            phone_number=data["owner_phone"],
+            address=data["owner_address"],
+            reception_date=data["reception_date"],
+            email=None,
+            on_result=lambda result: self._on_saved(data, result),
+            on_error=self._on_save_failed,
+            busy=self._busy,
+            owner=self,
+        )
+
+    def _on_saved(self, data: dict, result: dict):
+        if result['success']:
+            # Hiển thị thông báo thành công
+            msg = QMessageBox(self)
+            msg.setIcon(QMessageBox.Icon.Information)
+            msg.setWindowTitle("Thành công")
+            msg.setText(result["message"])
+            msg.setInformativeText(
+                f"Mã tiếp nhận: {result['reception_id']}\n"
+                f"Biển số: {data['license_plate']}\n"
+                f"Chủ xe: {data['owner_name']}\n"
+                f"Ngày tiếp nhận: {data['reception_date']}"
             )
+            msg.setStandardButtons(QMessageBox.StandardButton.Ok)
+            msg.exec()
             
-            if result['success']:
-                # Hiển thị thông báo thành công
-                msg = QMessageBox(self)
-                msg.setIcon(QMessageBox.Icon.Information)
-                msg.setWindowTitle("Thành công")
-                msg.setText(result["message"])
-                msg.setInformativeText(
-                    f"Mã tiếp nhận: {result['reception_id']}\n"
-                    f"Biển số: {data['license_plate']}\n"
-                    f"Chủ xe: {data['owner_name']}\n"
-                    f"Ngày tiếp nhận: {data['reception_date']}"
-                )
-                msg.setStandardButtons(QMessageBox.StandardButton.Ok)
-                msg.exec()
-                
-                # Lưu reception_id để có thể in biên nhận
-                self.last_reception_id = result['reception_id']
-                
-                # Reset form sau khi lưu thành công
-                self._on_reset_clicked()
-            else:
-                # Hiển thị lỗi
-                QMessageBox.critical(
-                    self,
-                    "Lỗi",
-                    f"Không thể tiếp nhận xe:\n{result["message"]}"
-                )
-        except Exception as e:
-            logger.error(f"Error saving car reception: {e}")
+            # Lưu reception_id để có thể in biên nhận
+            self.last_reception_id = result['reception_id']
+            
+            # Reset form sau khi lưu thành công
+            self._on_reset_clicked()
+        else:
+            # Hiển thị lỗi
             QMessageBox.critical(
                 self,
                 "Lỗi",
-                f"Đã xảy ra lỗi khi lưu dữ liệu:\n{str(e)}"
+                f"Không thể tiếp nhận xe:\n{result["message"]}"
             )
 
+    def _on_save_failed(self, e: Exception):
+        logger.error(f"Error saving car reception: {e}")
+        QMessageBox.critical(
+            self,
+            "Lỗi",
+            f"Đã xảy ra lỗi khi lưu dữ liệu:\n{str(e)}"
+        )
+
     def _on_reset_clicked(self):
         """Reset tất cả các trường nhập liệu về trạng thái ban đầu."""
         self.owner_name.clear()
@@ -326,26 +335,34 @@ class TiepNhanXePage(QWidget):
         self.last_reception_id = None
     
     def _load_brands(self):
-        """Load danh sách hiệu xe từ database."""
-        try:
-            brands = self.service.get_all_brands()
-            # Clear existing items except placeholder
-            self.brand.clear()
-            self.brand.addItem("-- Chọn hiệu xe --")
-            
-            # Add brands from database
-            for brand in brands:
-                self.brand.addItem(brand['BrandName'])
-            
-            logger.info(f"Loaded {len(brands)} car brands")
-        except Exception as e:
-            logger.error(f"Failed to load car brands: {e}")
-            QMessageBox.warning(
-                self,
-                "Cảnh báo",
-                "Không thể tải danh sách hiệu xe từ database.\n"
-                "Vui lòng kiểm tra kết nối database."
-            )
+        """Load danh sách hiệu xe từ database (chạy nền)."""
+        run_async(
+            self.service.get_all_brands,
+            on_result=self._on_brands_loaded,
+            on_error=self._on_brands_load_failed,
+            busy=self._busy,
+            owner=self,
+        )
+
+    def _on_brands_loaded(self, brands: list):
+        # Clear existing items except placeholder
+        self.brand.clear()
+        self.brand.addItem("-- Chọn hiệu xe --")
+        
+        # Add brands from database
+        for brand in brands:
+            self.brand.addItem(brand['BrandName'])
+        
+        logger.info(f"Loaded {len(brands)} car brands")
+
+    def _on_brands_load_failed(self, e: Exception):
+        logger.error(f"Failed to load car brands: {e}")
+        QMessageBox.warning(
+            self,
+            "Cảnh báo",
+            "Không thể tải danh sách hiệu xe từ database.\n"
+            "Vui lòng kiểm tra kết nối database."
+        )
 
     def _on_print_clicked(self):
         data = self.get_form_data()
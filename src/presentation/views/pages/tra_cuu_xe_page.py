@@ -5,7 +5,7 @@ Tra Cuu Xe (Vehicle Lookup) page - BM3 (UI only).
 
 from __future__ import annotations
 
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtWidgets import (
     QWidget,
     QLabel,
@@ -16,16 +16,23 @@ from PyQt6.QtWidgets import (
     QVBoxLayout,
     QGridLayout,
     QGroupBox,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QHeaderView,
     QMessageBox,
+    QFileDialog,
 )
 import logging
+import time
+from functools import partial
 
 from utils.style import STYLE
 from utils.print_dialog import print_widget_with_dialog
-from services.vehicle_lookup_service import VehicleLookupService
+from services.vehicle_lookup_service import VehicleLookupService, ChangeToken
+from app.row_format import ROW_RECORD
+from presentation.workers import run_async
+from presentation.views.busy_overlay import BusyOverlay
+from presentation.views.vehicle_table_model import VehicleTableModel
+from utils.vehicle_index import VehicleIndex
 
 logger = logging.getLogger(__name__)
 
@@ -34,17 +41,49 @@ class TraCuuXePage(QWidget):
 
     PAGE_ID = "tra_cuu_xe"
 
+    # Chờ người dùng ngừng gõ trước khi lọc trên server (chưa có index trong bộ nhớ)
+    FILTER_DEBOUNCE_MS = 250
+
+    # Bảng CAR lớn hơn mức này thì không dựng index trong bộ nhớ, chỉ lọc trên server
+    INDEX_MAX_ROWS = 300_000
+
+    # Chu kỳ hỏi server các xe thay đổi (tiếp nhận, phiếu thu...) khi trang đang hiển thị
+    CHANGE_POLL_INTERVAL_MS = 5000
+
     def __init__(self, parent=None):
         super().__init__(parent)
         # Nếu bạn apply STYLE ở mức app rồi thì có thể bỏ dòng dưới
         self.setStyleSheet(STYLE)
         
         self.service = VehicleLookupService()
-        self._rows = []  # Will be loaded from DB
+        self._load_task = None
+        self._token_task = None
+        self._index_task = None
+        self._index: VehicleIndex | None = None
+        self._poll_task = None
+        # Mã thay đổi (CAR_CHANGE_LOG) tương ứng với dữ liệu đang hiển thị
+        self._change_token: ChangeToken | None = None
+
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(self.FILTER_DEBOUNCE_MS)
+        self._filter_timer.timeout.connect(self._apply_filter)
+
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(self.CHANGE_POLL_INTERVAL_MS)
+        self._poll_timer.timeout.connect(self._poll_changes)
+
+        # Xe được tải theo trang khi cuộn (keyset theo biển số)
+        self._model = VehicleTableModel(
+            partial(self.service.search_vehicles, row_format=ROW_RECORD), parent=self
+        )
+        self._model.rows_loaded.connect(self._on_rows_loaded)
+        self._model.load_failed.connect(self._on_data_load_failed)
 
         self._setup_ui()
+        self._busy = BusyOverlay(self, "Đang tải danh sách hiệu xe...")
+        self._export_busy = BusyOverlay(self, "Đang xuất file CSV...")
         self._load_data_from_db()
-        self._apply_filter()
 
     def _setup_ui(self):
         root = QVBoxLayout(self)
@@ -85,6 +124,11 @@ class TraCuuXePage(QWidget):
         self.cb_brand = QComboBox()
         self.cb_brand.addItem("-- Tất cả hiệu xe --")  # Will be populated from DB
 
+        # Lọc ngay khi gõ / chọn hiệu xe
+        self.inp_plate.textChanged.connect(self._on_filter_changed)
+        self.inp_owner.textChanged.connect(self._on_filter_changed)
+        self.cb_brand.currentIndexChanged.connect(self._on_filter_changed)
+
         self.btn_search = QPushButton("Tìm kiếm")
         self.btn_search.setObjectName("btnPrimary")
         self.btn_search.clicked.connect(self._apply_filter)
@@ -97,6 +141,10 @@ class TraCuuXePage(QWidget):
         self.btn_print.setObjectName("btnPrint")
         self.btn_print.clicked.connect(self._on_print_clicked)
 
+        self.btn_export = QPushButton("Xuất CSV")
+        self.btn_export.setObjectName("btnPrint")
+        self.btn_export.clicked.connect(self._on_export_clicked)
+
         grid.addWidget(QLabel("Biển số"), 0, 0)
         grid.addWidget(self.inp_plate, 0, 1)
         grid.addWidget(QLabel("Chủ xe"), 0, 2)
@@ -110,6 +158,7 @@ class TraCuuXePage(QWidget):
         btn_row.addWidget(self.btn_search)
         btn_row.addWidget(self.btn_clear)
         btn_row.addWidget(self.btn_print)
+        btn_row.addWidget(self.btn_export)
 
         grid.addLayout(btn_row, 1, 2, 1, 2)
 
@@ -120,11 +169,12 @@ class TraCuuXePage(QWidget):
         result_layout = QVBoxLayout(group_result)
         result_layout.setSpacing(10)
 
-        self.table = QTableWidget(0, 5, self)
+        self.table = QTableView(self)
         self.table.setObjectName("dataTable")
-        self.table.setHorizontalHeaderLabels(["STT", "Biển số", "Hiệu xe", "Chủ xe", "Tiền nợ"])
+        self.table.setModel(self._model)
         self.table.verticalHeader().setVisible(False)
         self.table.setAlternatingRowColors(True)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
 
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
@@ -144,42 +194,166 @@ class TraCuuXePage(QWidget):
         root.addWidget(container)
         root.addStretch(1)
 
+    # ---------------- Events ----------------
+    def showEvent(self, event):
+        super().showEvent(event)
+        # Cập nhật các thay đổi trong lúc trang bị ẩn
+        self._poll_changes()
+        self._poll_timer.start()
+
+    def hideEvent(self, event):
+        # Không hỏi server khi trang không hiển thị
+        self._poll_timer.stop()
+        super().hideEvent(event)
+
     # ---------------- Data Loading ----------------
     def _load_data_from_db(self):
-        """Load danh sách xe từ database."""
-        try:
-            # Load all vehicles with their debt
-            vehicles = self.service.get_all_vehicles_with_debt()
-            
-            self._rows = []
-            for v in vehicles:
-                self._rows.append({
-                    "plate": v['LicensePlate'],
-                    "brand": v['BrandName'],
-                    "owner": v['OwnerName'],
-                    "debt": int(v['TotalDebt']) if v['TotalDebt'] else 0
-                })
-            
-            logger.info(f"Loaded {len(self._rows)} vehicles from database")
-            
-            # Load brands for combobox
-            self._load_brands()
-            
-        except Exception as e:
-            logger.error(f"Failed to load vehicles from database: {e}")
-            QMessageBox.warning(
-                self,
-                "Cảnh báo",
-                "Không thể tải danh sách xe từ database.\n"
-                "Vui lòng kiểm tra kết nối database."
-            )
-            self._rows = []
+        """Load danh sách hiệu xe (chạy nền) và trang xe đầu tiên."""
+        if self._load_task is not None:
+            self._load_task.cancel()
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            self._poll_task = None
+        self._change_token = None
+        
+        # Mã thay đổi lấy riêng: lọc trên server vẫn nhận thay đổi khi không có index
+        if self._token_task is not None:
+            self._token_task.cancel()
+        self._token_task = run_async(
+            self.service.get_changes_since,
+            None,
+            on_result=self._on_change_token,
+            on_error=lambda e: logger.warning(f"Failed to read vehicle change token: {e}"),
+            owner=self,
+        )
+        
+        self._load_task = run_async(
+            self.service.get_all_brands,
+            on_result=self._load_brands,
+            on_error=lambda e: logger.error(f"Failed to load car brands: {e}"),
+            busy=self._busy,
+            owner=self,
+        )
+        self._apply_filter()
+        
+        # Dựng index trong bộ nhớ ở nền; trong lúc chờ, bảng lọc và tải theo trang trên server
+        if self._index_task is not None:
+            self._index_task.cancel()
+        self._index_task = run_async(
+            self._build_index,
+            on_result=self._on_index_built,
+            on_error=self._on_index_failed,
+            owner=self,
+        )
+    
+    def _on_change_token(self, changes: dict):
+        self._token_task = None
+        # Index dựng xong trước thì giữ mã của index (cũ hơn, thay đổi được áp dụng lại)
+        if self._change_token is None:
+            self._change_token = changes["token"]
+    
+    def _build_index(self):
+        """
+        Chạy trên thread nền: tải toàn bộ xe và dựng index, không đụng tới widget.
+        
+        Returns:
+            (mã thay đổi lấy trước khi đọc dữ liệu, index hoặc None nếu CAR quá lớn)
+        """
+        # Lấy mã trước: thay đổi xảy ra trong lúc đọc sẽ được áp dụng lại ở lần hỏi sau
+        token = self.service.get_changes_since(None)["token"]
+        total = self.service.count_vehicles()
+        if total > self.INDEX_MAX_ROWS:
+            logger.info(f"{total} vehicles: skipping in-memory index, filtering on the server")
+            return token, None
+        started = time.perf_counter()
+        index = VehicleIndex(self.service.iter_all_vehicles_with_debt(row_format=ROW_RECORD))
+        logger.info(
+            f"Built vehicle index for {len(index)} vehicles in "
+            f"{(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+        return token, index
+    
+    def _on_index_built(self, result):
+        self._index_task = None
+        # Mã lấy trước khi đọc index: các thay đổi từ đó được áp dụng vào index ở lần hỏi sau
+        self._change_token, index = result
+        if index is None:
+            return
+        self._index = index
+        self._apply_filter()
+    
+    def _on_index_failed(self, e: Exception):
+        # Tiếp tục lọc trên server; hỏi thay đổi bằng mã của _token_task
+        logger.error(f"Failed to build vehicle index: {e}")
+        self._index_task = None
+    
+    # ---------------- Change feed ----------------
+    def _poll_changes(self):
+        # Chưa có mã thay đổi, đang dựng index hoặc lần hỏi trước chưa xong
+        if self._change_token is None or self._poll_task is not None or self._index_task is not None:
+            return
+        self._poll_task = run_async(
+            self._fetch_changes,
+            self._change_token,
+            self._index,
+            on_result=self._on_changes_fetched,
+            on_error=lambda e: logger.warning(f"Failed to poll vehicle changes: {e}"),
+            on_finished=self._on_poll_finished,
+            owner=self,
+        )
+    
+    def _fetch_changes(self, token: ChangeToken, index: VehicleIndex | None) -> dict:
+        """Chạy trên thread nền: đọc các xe thay đổi và cập nhật index (nếu có)."""
+        changes = self.service.get_changes_since(token, row_format=ROW_RECORD)
+        if index is not None and (changes["changed"] or changes["deleted"]):
+            changes["index"] = index.with_changes(changes["changed"], changes["deleted"])
+        return changes
+    
+    def _on_poll_finished(self):
+        self._poll_task = None
+    
+    def _on_changes_fetched(self, changes: dict):
+        if changes["reset"]:
+            logger.info("Vehicle change log cannot be applied incrementally, reloading")
+            self._load_data_from_db()
+            return
+        
+        self._change_token = changes["token"]
+        changed, deleted = changes["changed"], changes["deleted"]
+        if not changed and not deleted:
+            return
+        logger.info(f"Applying {len(changed)} changed and {len(deleted)} deleted vehicle(s)")
+        
+        if self._index is None:
+            # Lọc trên server: chỉ cập nhật các dòng đã tải, xe mới hiện ở lần tìm / cuộn sau
+            self._model.patch_rows(changed, deleted, insert_new=False)
+            return
+        
+        self._index = changes["index"]
+        # Chỉ các xe thay đổi được so với bộ lọc hiện tại; xe không còn khớp bị bỏ khỏi bảng
+        matching = VehicleIndex(changed).filter(*self._filter_values())
+        matched = {r.LicensePlate for r in matching}
+        removed = list(deleted) + [r.LicensePlate for r in changed if r.LicensePlate not in matched]
+        self._model.patch_rows(matching, removed)
+    
+    def _on_rows_loaded(self, count: int, has_more: bool):
+        if has_more:
+            self.lbl_count.setText(f"{count}+ kết quả (cuộn xuống để tải thêm)")
+        else:
+            self.lbl_count.setText(f"{count} kết quả")
     
-    def _load_brands(self):
+    def _on_data_load_failed(self, e: Exception):
+        logger.error(f"Failed to load vehicles from database: {e}")
+        QMessageBox.warning(
+            self,
+            "Cảnh báo",
+            "Không thể tải danh sách xe từ database.\n"
+            "Vui lòng kiểm tra kết nối database."
+        )
+    
+    def _load_brands(self, brands: list[dict]):
         """Load danh sách hiệu xe vào combobox."""
         try:
-            brands = self.service.get_all_brands()
-            
             # Clear existing items except the first one ("-- Tất cả hiệu xe --")
             current_brand = self.cb_brand.currentText()
             self.cb_brand.clear()
@@ -198,46 +372,39 @@ class TraCuuXePage(QWidget):
         except Exception as e:
             logger.error(f"Failed to load car brands: {e}")
 
+    def _on_filter_changed(self):
+        if self._index is not None:
+            # Lọc trong bộ nhớ chỉ mất vài ms -> lọc ngay theo từng phím
+            self._apply_filter()
+        else:
+            self._filter_timer.start()
+
     def _apply_filter(self):
-        plate_q = self.inp_plate.text().strip().upper()
-        owner_q = self.inp_owner.text().strip().lower()
+        """
+        Lọc bằng index trong bộ nhớ nếu đã dựng xong, ngược lại lọc trên server
+        (bảng chỉ tải thêm xe khi người dùng cuộn xuống).
+        """
+        self._filter_timer.stop()
+
+        plate_q, owner_q, brand_q = self._filter_values()
+
+        if self._index is not None:
+            self._model.set_rows(self._index.filter(plate_q, owner_q, brand_q))
+            return
+
+        self.lbl_count.setText("Đang tải...")
+        self._model.set_filter(
+            license_plate=plate_q or None,
+            owner_name=owner_q or None,
+            brand_name=brand_q or None,
+        )
+
+    def _filter_values(self):
+        """(biển số, chủ xe, hiệu xe) đang nhập; chuỗi rỗng = không lọc."""
         brand_q = self.cb_brand.currentText()
-
-        filtered = []
-        for r in self._rows:
-            if plate_q and plate_q not in r["plate"].upper():
-                continue
-            if owner_q and owner_q not in r["owner"].lower():
-                continue
-            if brand_q != "-- Tất cả hiệu xe --" and brand_q != r["brand"]:
-                continue
-            filtered.append(r)
-
-        self._render_table(filtered)
-
-    def _render_table(self, data: list[dict]):
-        self.table.setRowCount(0)
-
-        for i, r in enumerate(data, start=1):
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-
-            self._set_item(row, 0, str(i), align_right=True)
-            self._set_item(row, 1, r["plate"])
-            self._set_item(row, 2, r["brand"])
-            self._set_item(row, 3, r["owner"])
-            self._set_item(row, 4, self._fmt_money(r["debt"]), align_right=True)
-
-        self.lbl_count.setText(f"{len(data)} kết quả")
-
-    def _set_item(self, row: int, col: int, text: str, align_right: bool = False):
-        item = QTableWidgetItem(text)
-        if align_right:
-            item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-        else:
-            item.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-        item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-        self.table.setItem(row, col, item)
+        if brand_q == "-- Tất cả hiệu xe --":
+            brand_q = ""
+        return self.inp_plate.text().strip(), self.inp_owner.text().strip(), brand_q
 
     def _clear_filter(self):
         self.inp_plate.clear()
@@ -248,8 +415,28 @@ class TraCuuXePage(QWidget):
     def _on_print_clicked(self):
         print_widget_with_dialog(self, self, "In danh sach")
 
-    def _fmt_money(self, v: int) -> str:
-        return f"{v:,}"
-
+    def _on_export_clicked(self):
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Xuất danh sách xe", "danh_sach_xe.csv", "CSV (*.csv)"
+        )
+        if not file_path:
+            return
+
+        self.btn_export.setEnabled(False)
+        run_async(
+            self.service.export_vehicles_csv,
+            file_path,
+            on_result=lambda count: QMessageBox.information(
+                self, "Xuất CSV", f"Đã xuất {count} xe ra file:\n{file_path}"
+            ),
+            on_error=self._on_export_failed,
+            on_finished=lambda: self.btn_export.setEnabled(True),
+            busy=self._export_busy,
+            owner=self,
+        )
+
+    def _on_export_failed(self, e: Exception):
+        logger.error(f"Failed to export vehicles: {e}")
+        QMessageBox.critical(self, "Lỗi", f"Không thể xuất danh sách xe:\n{e}")
 
 
@@ -0,0 +1,196 @@
+# src/presentation/views/vehicle_table_model.py
+"""
+Table model for the vehicle lookup page.
+Rows are loaded page by page as the view scrolls (canFetchMore/fetchMore),
+so only the visible part of a large CAR table is ever materialized.
+Once the page has an in-memory index, filtered rows are set directly (set_rows).
+Changes polled from the server are applied row by row (patch_rows).
+"""
+
+from __future__ import annotations
+
+import logging
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+
+from presentation.workers import TaskHandle, run_async
+
+logger = logging.getLogger(__name__)
+
+
+class VehicleTableModel(QAbstractTableModel):
+    """
+    Vehicles matching the current filter, fetched with keyset pagination.
+
+    fetch_page(after_plate=..., limit=..., **filters) is called on the service
+    thread pool and must return records with LicensePlate, BrandName,
+    OwnerName and TotalDebt (see VehicleLookupService.search_vehicles).
+    """
+
+    HEADERS = ["STT", "Biển số", "Hiệu xe", "Chủ xe", "Tiền nợ"]
+
+    # Số xe mỗi lần tải
+    PAGE_SIZE = 200
+
+    # (số xe đã tải, còn dữ liệu để tải tiếp)
+    rows_loaded = pyqtSignal(int, bool)
+    load_failed = pyqtSignal(object)
+
+    def __init__(
+        self,
+        fetch_page: Callable[..., List[Any]],
+        page_size: int = PAGE_SIZE,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self._fetch_page = fetch_page
+        self._page_size = page_size
+        self._rows: List[Any] = []
+        self._filters: Dict[str, Any] = {}
+        self._has_more = False
+        self._task: Optional[TaskHandle] = None
+
+    # ---------------- Filter ----------------
+    def set_filter(self, **filters):
+        """Drop loaded rows and start loading from the first page with new filters."""
+        self._cancel_fetch()
+
+        self.beginResetModel()
+        self._rows = []
+        self._filters = filters
+        self._has_more = True
+        self.endResetModel()
+
+        self.fetchMore()
+
+    def set_rows(self, rows: List[Any]):
+        """Show a complete, already filtered row list (no further pages)."""
+        self._cancel_fetch()
+
+        self.beginResetModel()
+        self._rows = rows
+        self._has_more = False
+        self.endResetModel()
+
+        self.rows_loaded.emit(len(self._rows), False)
+
+    def patch_rows(self, rows: Iterable[Any], removed: Iterable[str] = (), insert_new: bool = True):
+        """
+        Apply changed vehicles without reloading the model.
+
+        Rows already shown are replaced in place, plates in removed are dropped,
+        and other rows are inserted in plate order when insert_new is set.
+        """
+        positions = {r.LicensePlate: i for i, r in enumerate(self._rows)}
+
+        # Xóa từ dưới lên để vị trí các dòng phía trên không đổi
+        for i in sorted((positions[p] for p in set(removed) if p in positions), reverse=True):
+            self.beginRemoveRows(QModelIndex(), i, i)
+            del self._rows[i]
+            self.endRemoveRows()
+
+        positions = {r.LicensePlate: i for i, r in enumerate(self._rows)}
+        new_rows = []
+        last_col = len(self.HEADERS) - 1
+        for r in rows:
+            i = positions.get(r.LicensePlate)
+            if i is None:
+                new_rows.append(r)
+                continue
+            self._rows[i] = r
+            self.dataChanged.emit(self.index(i, 0), self.index(i, last_col))
+
+        if insert_new and new_rows:
+            plates = [r.LicensePlate for r in self._rows]
+            for r in sorted(new_rows, key=lambda r: r.LicensePlate):
+                i = bisect_left(plates, r.LicensePlate)
+                self.beginInsertRows(QModelIndex(), i, i)
+                self._rows.insert(i, r)
+                plates.insert(i, r.LicensePlate)
+                self.endInsertRows()
+
+        self.rows_loaded.emit(len(self._rows), self._has_more)
+
+    def _cancel_fetch(self):
+        if self._task is not None:
+            # Trang của bộ lọc cũ về sau sẽ bị bỏ qua
+            self._task.cancel()
+            self._task = None
+
+    @property
+    def has_more(self) -> bool:
+        return self._has_more
+
+    def row_at(self, row: int) -> Any:
+        return self._rows[row]
+
+    # ---------------- Incremental loading ----------------
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and self._has_more and self._task is None
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        after_plate = self._rows[-1].LicensePlate if self._rows else None
+        self._task = run_async(
+            self._fetch_page,
+            on_result=self._on_page_loaded,
+            on_error=self._on_page_failed,
+            owner=self,
+            after_plate=after_plate,
+            limit=self._page_size,
+            **self._filters,
+        )
+
+    def _on_page_loaded(self, rows: List[Any]):
+        self._task = None
+        if rows:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._rows.extend(rows)
+            self.endInsertRows()
+        self._has_more = len(rows) == self._page_size
+        self.rows_loaded.emit(len(self._rows), self._has_more)
+
+    def _on_page_failed(self, e: Exception):
+        self._task = None
+        self._has_more = False
+        logger.error(f"Failed to load vehicle page: {e}")
+        self.load_failed.emit(e)
+
+    # ---------------- QAbstractTableModel ----------------
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row, col = index.row(), index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            r = self._rows[row]
+            if col == 0:
+                return str(row + 1)
+            if col == 1:
+                return r.LicensePlate
+            if col == 2:
+                return r.BrandName
+            if col == 3:
+                return r.OwnerName
+            if col == 4:
+                return f"{int(r.TotalDebt or 0):,}"
+        elif role == Qt.ItemDataRole.TextAlignmentRole:
+            if col in (0, 4):
+                return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+            return Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
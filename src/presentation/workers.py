@@ -0,0 +1,198 @@
+# src/presentation/workers.py
+"""
+Background execution of service calls.
+Runs blocking service methods on a QThreadPool and delivers the result
+back to the GUI thread through Qt signals, so pages never touch the
+database on the UI thread.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Optional
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal, pyqtSlot
+
+from app.config import DatabaseConfig
+
+logger = logging.getLogger(__name__)
+
+
+# Thread pool dùng riêng cho service: số thread không vượt quá số kết nối tối đa của pool MySQL
+_thread_pool: Optional[QThreadPool] = None
+
+# Giữ tham chiếu tới các task đang chạy để không bị garbage collect trước khi trả kết quả
+_active_tasks: set = set()
+
+
+def get_thread_pool() -> QThreadPool:
+    """Get the thread pool used for service calls."""
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = QThreadPool()
+        _thread_pool.setMaxThreadCount(max(1, DatabaseConfig.POOL_MAX_SIZE))
+    return _thread_pool
+
+
+class TaskHandle(QObject):
+    """
+    Handle of a background service call.
+
+    Lives in the GUI thread; the worker emits its signals from the pool thread
+    and Qt queues them back, so callbacks always run on the GUI thread.
+    """
+
+    _succeeded = pyqtSignal(object)
+    _failed = pyqtSignal(object)
+
+    def __init__(
+        self,
+        on_result: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        on_finished: Optional[Callable[[], None]] = None,
+        on_cancelled: Optional[Callable[[], None]] = None,
+        busy=None,
+    ):
+        super().__init__()
+        self._on_result = on_result
+        self._on_error = on_error
+        self._on_finished = on_finished
+        self._on_cancelled = on_cancelled
+        self._busy = busy
+        self._cancel_event = threading.Event()
+        self._done = False
+
+        self._succeeded.connect(self._deliver_result, Qt.ConnectionType.QueuedConnection)
+        self._failed.connect(self._deliver_error, Qt.ConnectionType.QueuedConnection)
+
+    @property
+    def is_cancelled(self) -> bool:
+        """True once cancel() has been called."""
+        return self._cancel_event.is_set()
+
+    @property
+    def is_done(self) -> bool:
+        """True once the task finished, failed or was cancelled."""
+        return self._done
+
+    def cancel(self):
+        """
+        Cancel the task.
+        A task that has not started yet is skipped; a running service call
+        cannot be interrupted, but its result/error callbacks are not called.
+        """
+        if self._done or self._cancel_event.is_set():
+            return
+        self._cancel_event.set()
+        self._complete()
+        if self._on_cancelled:
+            self._on_cancelled()
+
+    def _abandon(self, *_):
+        """Cancel without touching the owner's widgets (owner is being destroyed)."""
+        self._on_cancelled = None
+        self._busy = None
+        self.cancel()
+
+    @pyqtSlot(object)
+    def _deliver_result(self, result):
+        if self._done:
+            return
+        self._complete()
+        try:
+            if self._on_result:
+                self._on_result(result)
+        finally:
+            if self._on_finished:
+                self._on_finished()
+
+    @pyqtSlot(object)
+    def _deliver_error(self, error):
+        if self._done:
+            return
+        self._complete()
+        try:
+            if self._on_error:
+                self._on_error(error)
+            else:
+                logger.error(f"Unhandled error in background task: {error}")
+        finally:
+            if self._on_finished:
+                self._on_finished()
+
+    def _complete(self):
+        self._done = True
+        if self._busy is not None:
+            self._busy.stop()
+            self._busy = None
+        _active_tasks.discard(self)
+
+
+class _ServiceRunnable(QRunnable):
+    """Runs one service call on a pool thread."""
+
+    def __init__(self, handle: TaskHandle, fn: Callable, args: tuple, kwargs: dict):
+        super().__init__()
+        self._handle = handle
+        self._fn = fn
+        self._args = args
+        self._kwargs = kwargs
+
+    def run(self):
+        if self._handle.is_cancelled:
+            return
+        try:
+            result = self._fn(*self._args, **self._kwargs)
+        except Exception as e:
+            logger.error(f"Background task {getattr(self._fn, '__qualname__', self._fn)} failed: {e}")
+            if not self._handle.is_cancelled:
+                self._handle._failed.emit(e)
+            return
+        if not self._handle.is_cancelled:
+            self._handle._succeeded.emit(result)
+
+
+def run_async(
+    fn: Callable,
+    *args,
+    on_result: Optional[Callable[[Any], None]] = None,
+    on_error: Optional[Callable[[Exception], None]] = None,
+    on_finished: Optional[Callable[[], None]] = None,
+    on_cancelled: Optional[Callable[[], None]] = None,
+    busy=None,
+    owner: Optional[QObject] = None,
+    **kwargs,
+) -> TaskHandle:
+    """
+    Call fn(*args, **kwargs) on the service thread pool.
+    Must be called from the GUI thread.
+
+    Usage:
+        run_async(self.service.get_all_brands,
+                  on_result=self._on_brands_loaded,
+                  on_error=self._on_load_failed,
+                  busy=self._busy, owner=self)
+
+    Args:
+        fn: Blocking callable (usually a service method)
+        on_result: Called on the GUI thread with the return value
+        on_error: Called on the GUI thread with the raised exception
+        on_finished: Called on the GUI thread after on_result/on_error (not after cancel)
+        on_cancelled: Called on the GUI thread when the task is cancelled
+        busy: Object with start()/stop() (e.g. BusyOverlay), shown while the task runs
+        owner: QObject whose destruction cancels the task
+
+    Returns:
+        TaskHandle that can be used to cancel the task
+    """
+    handle = TaskHandle(on_result, on_error, on_finished, on_cancelled, busy)
+    _active_tasks.add(handle)
+
+    if owner is not None:
+        # Trang bị hủy -> bỏ qua kết quả, không gọi callback vào widget đã hủy
+        owner.destroyed.connect(handle._abandon)
+
+    if busy is not None:
+        busy.start()
+
+    get_thread_pool().start(_ServiceRunnable(handle, fn, args, kwargs))
+    return handle
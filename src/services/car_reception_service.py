@@ -105,9 +105,10 @@ class CarReceptionService:
             Số lượng xe đã tiếp nhận
         """
         try:
-            query = "SELECT COUNT(*) as count FROM CAR_RECEPTION WHERE ReceptionDate = %s"
+            # Bộ đếm theo ngày do trigger trên CAR_RECEPTION duy trì: tra theo khóa chính
+            query = "SELECT Count FROM RECEPTION_DAILY_COUNT WHERE ReceptionDate = %s"
             result = db_manager.execute_query(query, params=(reception_date,), fetch_one=True)
-            return result['count'] if result else 0
+            return result['Count'] if result else 0
         except Error as e:
             logger.error(f"Failed to get daily reception count: {e}")
             return 0
@@ -244,62 +245,23 @@ class CarReceptionService:
             Dictionary with success status, reception_id, and message
         """
         try:
-            # Sử dụng transaction để đảm bảo tính toàn vẹn dữ liệu
+            # Một lần gọi sp_ReceiveCar: upsert CAR + tạo CAR_RECEPTION trên cùng một kết nối,
+            # giới hạn số xe trong ngày do trigger trg_CheckMaxCarReception kiểm tra
             with db_manager.transaction() as cursor:
-                # 1. Lấy BrandId từ tên hiệu xe
-                brand_id = CarReceptionService.get_brand_id_by_name(brand_name)
-                if not brand_id:
-                    return {
-                        'success': False,
-                        'message': f"Không tìm thấy hiệu xe: {brand_name}"
-                    }
-                
-                # 2. Tạo hoặc cập nhật thông tin xe
-                cursor.execute("""
-                    SELECT LicensePlate FROM CAR WHERE LicensePlate = %s
-                """, (license_plate,))
-                existing_car = cursor.fetchone()
-                
-                if existing_car:
-                    # Cập nhật thông tin xe
-                    cursor.execute("""
-                        UPDATE CAR 
-                        SET BrandId = %s, OwnerName = %s, PhoneNumber = %s, 
-                            Address = %s, Email = %s
-                        WHERE LicensePlate = %s
-                    """, (brand_id, owner_name, phone_number, address, email, license_plate))
-                else:
-                    # Thêm xe mới
-                    cursor.execute("""
-                        INSERT INTO CAR (LicensePlate, BrandId, OwnerName, PhoneNumber, Address, Email)
-                        VALUES (%s, %s, %s, %s, %s, %s)
-                    """, (license_plate, brand_id, owner_name, phone_number, address, email))
-                
-                # 3. Kiểm tra giới hạn tiếp nhận trong ngày
-                cursor.execute("SELECT value FROM PARAMETER WHERE name = 'MaxCarReception'")
-                max_result = cursor.fetchone()
-                max_limit = max_result['value'] if max_result else 30
-                
                 cursor.execute(
-                    "SELECT COUNT(*) as count FROM CAR_RECEPTION WHERE ReceptionDate = %s",
-                    (reception_date,)
+                    "CALL sp_ReceiveCar(%s, %s, %s, %s, %s, %s, %s)",
+                    (license_plate, brand_name, owner_name, phone_number,
+                     address, email, reception_date)
                 )
-                count_result = cursor.fetchone()
-                current_count = count_result['count'] if count_result else 0
+                # ID phiếu tiếp nhận là result set của chính lệnh CALL
+                result = cursor.fetchone()
+                reception_id = result['ReceptionId'] if result else None
+                # Đọc hết kết quả trạng thái còn lại của CALL trước câu lệnh tiếp theo trên kết nối
+                while cursor.nextset():
+                    pass
                 
-                if current_count >= max_limit:
-                    return {
-                        'success': False,
-                        'message': f"Đã đạt giới hạn tiếp nhận xe trong ngày ({max_limit} xe)"
-                    }
-                
-                # 4. Tạo phiếu tiếp nhận
-                cursor.execute("""
-                    INSERT INTO CAR_RECEPTION (LicensePlate, ReceptionDate, Debt)
-                    VALUES (%s, %s, 0)
-                """, (license_plate, reception_date))
-                
-                reception_id = cursor.lastrowid
+                if reception_id is None:
+                    raise ValueError("Failed to get reception ID from stored procedure")
                 
                 logger.info(
                     f"Successfully received car {license_plate} with reception ID {reception_id}"
@@ -319,8 +281,13 @@ class CarReceptionService:
                 
         except Error as e:
             logger.error(f"Failed to receive car {license_plate}: {e}")
-            # Check if it's a trigger error
+            # Check if it's a procedure/trigger error
             error_message = str(e)
+            if getattr(e, 'sqlstate', None) == '45001':
+                return {
+                    'success': False,
+                    'message': f"Không tìm thấy hiệu xe: {brand_name}"
+                }
             if "45000" in error_message or "vượt quá quy định" in error_message:
                 return {
                     'success': False,
@@ -5,10 +5,12 @@ Handles business logic for creating payment receipts and managing debt.
 """
 
 from typing import Optional, Dict, Any, List
+import csv
 import logging
 from mysql.connector import Error
 
 from app.database import db_manager
+from app.row_format import ROW_DICT, ROW_TUPLE
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +18,17 @@ logger = logging.getLogger(__name__)
 class ReceiptService:
     """Service class for handling payment receipt operations."""
     
+    _RECEIPTS_BY_DATE_RANGE_QUERY = """
+        SELECT 
+            r.ReceiptId, r.ReceiptDate, r.MoneyAmount,
+            cr.LicensePlate, c.OwnerName
+        FROM RECEIPT r
+        JOIN CAR_RECEPTION cr ON r.ReceptionId = cr.ReceptionId
+        JOIN CAR c ON cr.LicensePlate = c.LicensePlate
+        WHERE r.ReceiptDate BETWEEN %s AND %s
+        ORDER BY r.ReceiptDate DESC, r.ReceiptId DESC
+    """
+    
     @staticmethod
     def get_vehicle_debt_info(license_plate: str) -> Optional[Dict[str, Any]]:
         """
@@ -36,13 +49,10 @@ class ReceiptService:
                     c.Address,
                     c.Email,
                     b.BrandName,
-                    COALESCE(SUM(cr.Debt), 0) as TotalDebt
+                    c.TotalDebt
                 FROM CAR c
                 JOIN CAR_BRAND b ON c.BrandId = b.BrandId
-                LEFT JOIN CAR_RECEPTION cr ON c.LicensePlate = cr.LicensePlate
                 WHERE c.LicensePlate = %s
-                GROUP BY c.LicensePlate, c.OwnerName, c.PhoneNumber, 
-                         c.Address, c.Email, b.BrandName
             """
             result = db_manager.execute_query(query, params=(license_plate,), fetch_one=True)
             return result
@@ -265,12 +275,18 @@ class ReceiptService:
             return None
     
     @staticmethod
-    def get_receipts_by_license_plate(license_plate: str) -> List[Dict[str, Any]]:
+    def get_receipts_by_license_plate(
+        license_plate: str,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
         """
         Lấy lịch sử phiếu thu của xe theo biển số.
         
         Args:
             license_plate: Biển số xe
+            limit: Số dòng tối đa (None = tất cả)
+            offset: Bỏ qua offset dòng đầu (phân trang)
             
         Returns:
             List of receipt dictionaries
@@ -285,7 +301,11 @@ class ReceiptService:
                 WHERE cr.LicensePlate = %s
                 ORDER BY r.ReceiptDate DESC, r.ReceiptId DESC
             """
-            receipts = db_manager.execute_query(query, params=(license_plate,), fetch_all=True)
+            params = (license_plate,)
+            if limit is not None:
+                query += " LIMIT %s OFFSET %s"
+                params += (limit, offset)
+            receipts = db_manager.execute_query(query, params=params, fetch_all=True)
             return receipts or []
         except Error as e:
             logger.error(f"Failed to get receipt history for {license_plate}: {e}")
@@ -294,7 +314,8 @@ class ReceiptService:
     @staticmethod
     def get_all_receipts_by_date_range(
         start_date: str,
-        end_date: str
+        end_date: str,
+        row_format: str = ROW_DICT
     ) -> List[Dict[str, Any]]:
         """
         Lấy danh sách phiếu thu trong khoảng thời gian.
@@ -302,27 +323,60 @@ class ReceiptService:
         Args:
             start_date: Ngày bắt đầu (format: YYYY-MM-DD)
             end_date: Ngày kết thúc (format: YYYY-MM-DD)
+            row_format: Định dạng dòng kết quả: ROW_DICT (mặc định), ROW_TUPLE, ROW_RECORD
             
         Returns:
-            List of receipt dictionaries
+            List of receipt rows
         """
         try:
-            query = """
-                SELECT 
-                    r.ReceiptId, r.ReceiptDate, r.MoneyAmount,
-                    cr.LicensePlate, c.OwnerName
-                FROM RECEIPT r
-                JOIN CAR_RECEPTION cr ON r.ReceptionId = cr.ReceptionId
-                JOIN CAR c ON cr.LicensePlate = c.LicensePlate
-                WHERE r.ReceiptDate BETWEEN %s AND %s
-                ORDER BY r.ReceiptDate DESC, r.ReceiptId DESC
-            """
             receipts = db_manager.execute_query(
-                query,
+                ReceiptService._RECEIPTS_BY_DATE_RANGE_QUERY,
                 params=(start_date, end_date),
-                fetch_all=True
+                fetch_all=True,
+                row_format=row_format
             )
             return receipts or []
         except Error as e:
             logger.error(f"Failed to get receipts by date range: {e}")
             return []
+    
+    @staticmethod
+    def export_receipts_csv(
+        file_path: str,
+        start_date: str,
+        end_date: str,
+        chunk_size: int = 1000
+    ) -> int:
+        """
+        Xuất phiếu thu trong khoảng thời gian ra file CSV, ghi dần theo từng đợt
+        dòng đọc được (không giữ toàn bộ kết quả trong bộ nhớ).
+        
+        Args:
+            file_path: Đường dẫn file CSV
+            start_date: Ngày bắt đầu (format: YYYY-MM-DD)
+            end_date: Ngày kết thúc (format: YYYY-MM-DD)
+            chunk_size: Số dòng đọc từ server mỗi lần
+            
+        Returns:
+            Số phiếu thu đã xuất
+        """
+        count = 0
+        try:
+            # utf-8-sig để Excel đọc đúng tiếng Việt
+            with open(file_path, "w", newline="", encoding="utf-8-sig") as f:
+                writer = csv.writer(f)
+                writer.writerow(["Mã phiếu", "Ngày thu", "Số tiền", "Biển số", "Chủ xe"])
+                rows = db_manager.iter_query(
+                    ReceiptService._RECEIPTS_BY_DATE_RANGE_QUERY,
+                    (start_date, end_date),
+                    chunk_size=chunk_size,
+                    row_format=ROW_TUPLE,
+                )
+                for row in rows:
+                    writer.writerow(row)
+                    count += 1
+        except Error as e:
+            logger.error(f"Failed to export receipts to {file_path}: {e}")
+            raise
+        logger.info(f"Exported {count} receipts to {file_path}")
+        return count
@@ -4,11 +4,12 @@ Service layer for repair operations.
 Handles business logic for creating repair tickets and managing repair details.
 """
 
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 import logging
 from mysql.connector import Error
 
 from app.database import db_manager
+from services.supplies_import_service import SuppliesImportService
 
 logger = logging.getLogger(__name__)
 
@@ -145,82 +146,72 @@ class RepairService:
         Returns:
             Dictionary with success status, repair_id, and message
         """
-        try:
-            with db_manager.transaction() as cursor:
-                # 1. Tạo phiếu sửa chữa
-                cursor.execute("""
-                    INSERT INTO REPAIR (ReceptionId, RepairDate, RepairMoney)
-                    VALUES (%s, %s, %s)
-                """, (reception_id, repair_date, repair_money))
-                
-                repair_id = cursor.lastrowid
-                
-                # 2. Thêm chi tiết sửa chữa
+        def create(cursor) -> Dict[str, Any]:
+            # 1. Tra ID vật tư/tiền công và khóa các dòng SUPPLIES trước khi ghi
+            #    (cùng thứ tự khóa với phiếu nhập vật tư, xem SuppliesImportService.lock_supplies)
+            supply_ids: Dict[str, int] = {}
+            wage_ids: Dict[str, int] = {}
+            if details:
+                supply_ids, wage_ids = RepairService._resolve_detail_ids(cursor, details)
+
                 for detail in details:
-                    # Lấy SuppliesId từ tên vật tư
-                    cursor.execute(
-                        "SELECT SuppliesId FROM SUPPLIES WHERE SuppliesName = %s",
-                        (detail['supply_name'],)
-                    )
-                    supply_result = cursor.fetchone()
-                    
-                    if not supply_result:
+                    if detail['supply_name'] not in supply_ids:
                         return {
                             'success': False,
                             'message': f"Không tìm thấy vật tư: {detail['supply_name']}"
                         }
-                    
-                    supply_id = supply_result['SuppliesId']
-                    
-                    # Lấy WageId từ tên tiền công (nếu có)
-                    wage_id = None
-                    if detail.get('wage_name') and detail['wage_name'] != "-- Chọn tiền công --":
-                        cursor.execute(
-                            "SELECT WageId FROM WAGE WHERE WageName = %s",
-                            (detail['wage_name'],)
-                        )
-                        wage_result = cursor.fetchone()
-                        if wage_result:
-                            wage_id = wage_result['WageId']
-                    
-                    # Thêm chi tiết sửa chữa
-                    cursor.execute("""
-                        INSERT INTO REPAIR_DETAILS 
-                        (RepairId, Content, SuppliesId, SuppliesAmount, WageId)
-                        VALUES (%s, %s, %s, %s, %s)
-                    """, (
+
+                SuppliesImportService.lock_supplies(cursor, supply_ids.values())
+
+            # 2. Tạo phiếu sửa chữa
+            cursor.execute("""
+                INSERT INTO REPAIR (ReceptionId, RepairDate, RepairMoney)
+                VALUES (%s, %s, %s)
+            """, (reception_id, repair_date, repair_money))
+            
+            repair_id = cursor.lastrowid
+
+            # 3. Thêm chi tiết sửa chữa (xử lý theo lô, số round trip không phụ thuộc số dòng)
+            if details:
+                rows = [
+                    (
                         repair_id,
                         detail['content'],
-                        supply_id,
+                        supply_ids[detail['supply_name']],
                         detail['supply_amount'],
-                        wage_id
-                    ))
-                    
-                    # Cập nhật số lượng tồn kho
-                    cursor.execute("""
-                        UPDATE SUPPLIES 
-                        SET InventoryNumber = InventoryNumber - %s
-                        WHERE SuppliesId = %s
-                    """, (detail['supply_amount'], supply_id))
-                
-                # 3. Cập nhật số nợ trong phiếu tiếp nhận
-                cursor.execute("""
-                    UPDATE CAR_RECEPTION 
-                    SET Debt = Debt + %s
-                    WHERE ReceptionId = %s
-                """, (repair_money, reception_id))
-                
-                logger.info(
-                    f"Successfully created repair ticket {repair_id} "
-                    f"for reception {reception_id}"
-                )
-                
-                return {
-                    'success': True,
-                    'repair_id': repair_id,
-                    'message': 'Tạo phiếu sửa chữa thành công'
-                }
-                
+                        wage_ids.get(RepairService._wage_name_of(detail))
+                    )
+                    for detail in details
+                ]
+                RepairService._insert_repair_details(cursor, rows)
+
+                # Cập nhật số lượng tồn kho cho tất cả vật tư trong một câu lệnh
+                issued: Dict[int, int] = {}
+                for _, _, supply_id, amount, _ in rows:
+                    issued[supply_id] = issued.get(supply_id, 0) + amount
+                RepairService._decrement_inventory(cursor, issued)
+
+            # 4. Cập nhật số nợ trong phiếu tiếp nhận
+            cursor.execute("""
+                UPDATE CAR_RECEPTION 
+                SET Debt = Debt + %s
+                WHERE ReceptionId = %s
+            """, (repair_money, reception_id))
+            
+            logger.info(
+                f"Successfully created repair ticket {repair_id} "
+                f"for reception {reception_id}"
+            )
+            
+            return {
+                'success': True,
+                'repair_id': repair_id,
+                'message': 'Tạo phiếu sửa chữa thành công'
+            }
+
+        try:
+            # Deadlock / hết thời gian chờ khóa -> chạy lại cả giao dịch (RetryPolicy mặc định)
+            return db_manager.run_transaction(create)
         except Error as e:
             logger.error(f"Failed to create repair ticket: {e}")
             return {
@@ -234,6 +225,88 @@ class RepairService:
                 'message': f"Lỗi không xác định: {str(e)}"
             }
     
+    @staticmethod
+    def _wage_name_of(detail: Dict[str, Any]) -> Optional[str]:
+        """Trả về tên tiền công của dòng chi tiết, None nếu chưa chọn."""
+        wage_name = detail.get('wage_name')
+        if wage_name and wage_name != "-- Chọn tiền công --":
+            return wage_name
+        return None
+
+    @staticmethod
+    def _resolve_detail_ids(cursor, details: List[Dict[str, Any]]) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        Tra SuppliesId và WageId cho tất cả dòng chi tiết bằng một truy vấn IN (...).
+
+        Args:
+            cursor: Cursor của transaction hiện tại
+            details: Danh sách dòng chi tiết sửa chữa
+
+        Returns:
+            Tuple (supply_name -> SuppliesId, wage_name -> WageId)
+        """
+        supply_names = list(dict.fromkeys(d['supply_name'] for d in details))
+        wage_names = list(dict.fromkeys(
+            name for name in (RepairService._wage_name_of(d) for d in details) if name
+        ))
+
+        query = f"""
+            SELECT 'S' AS Kind, SuppliesId AS Id, SuppliesName AS Name
+            FROM SUPPLIES
+            WHERE SuppliesName IN ({', '.join(['%s'] * len(supply_names))})
+        """
+        params: List[Any] = list(supply_names)
+        if wage_names:
+            query += f"""
+            UNION ALL
+            SELECT 'W' AS Kind, WageId AS Id, WageName AS Name
+            FROM WAGE
+            WHERE WageName IN ({', '.join(['%s'] * len(wage_names))})
+            """
+            params.extend(wage_names)
+        query += " ORDER BY Kind, Id"
+
+        cursor.execute(query, tuple(params))
+
+        supply_ids: Dict[str, int] = {}
+        wage_ids: Dict[str, int] = {}
+        for row in cursor.fetchall():
+            # Tên vật tư không unique: giữ ID nhỏ nhất giống như cách tra từng dòng trước đây
+            target = supply_ids if row['Kind'] == 'S' else wage_ids
+            target.setdefault(row['Name'], row['Id'])
+        return supply_ids, wage_ids
+
+    @staticmethod
+    def _insert_repair_details(cursor, rows: List[Tuple]):
+        """Thêm tất cả dòng REPAIR_DETAILS bằng một câu INSERT nhiều giá trị."""
+        placeholders = ', '.join(['(%s, %s, %s, %s, %s)'] * len(rows))
+        cursor.execute(f"""
+            INSERT INTO REPAIR_DETAILS
+            (RepairId, Content, SuppliesId, SuppliesAmount, WageId)
+            VALUES {placeholders}
+        """, tuple(value for row in rows for value in row))
+
+    @staticmethod
+    def _decrement_inventory(cursor, issued: Dict[int, int]):
+        """
+        Trừ tồn kho cho tất cả vật tư đã dùng bằng một câu UPDATE.
+
+        Args:
+            cursor: Cursor của transaction hiện tại
+            issued: SuppliesId -> tổng số lượng xuất
+        """
+        supply_ids = sorted(issued)
+        cases = ' '.join(['WHEN %s THEN %s'] * len(supply_ids))
+        params: List[Any] = []
+        for supply_id in supply_ids:
+            params.extend((supply_id, issued[supply_id]))
+        params.extend(supply_ids)
+        cursor.execute(f"""
+            UPDATE SUPPLIES
+            SET InventoryNumber = InventoryNumber - CASE SuppliesId {cases} END
+            WHERE SuppliesId IN ({', '.join(['%s'] * len(supply_ids))})
+        """, tuple(params))
+
     @staticmethod
     def get_repair_by_id(repair_id: int) -> Optional[Dict[str, Any]]:
         """
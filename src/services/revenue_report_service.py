@@ -1,12 +1,17 @@
 # src/services/revenue_report_service.py
 """
 Service for revenue report operations.
-Handles generating and retrieving monthly revenue reports.
+Handles generating and retrieving monthly revenue reports,
+and quarterly/yearly summaries aggregated from REVENUE_DAILY_BRAND.
 """
 
 import logging
+from datetime import date
 from typing import Optional
 
+from mysql.connector import Error
+
+from app import columnar
 from app.database import db_manager
 
 logger = logging.getLogger(__name__)
@@ -19,13 +24,16 @@ class RevenueReportService:
         """Initialize the service."""
         pass
 
-    def get_or_create_monthly_report(self, month: int, year: int) -> dict:
+    def get_or_create_monthly_report(self, month: int, year: int, as_columns: bool = False) -> dict:
         """
-        Get monthly revenue report. If not exists, generate it first.
+        Get monthly revenue report. Generate it first if it does not exist
+        or the month's revenue data changed since it was stored.
         
         Args:
             month: Report month (1-12)
             year: Report year (e.g., 2025)
+            as_columns: Return details as columns instead of a list of dicts
+                (see _fetch_report_columns)
             
         Returns:
             dict with keys:
@@ -40,23 +48,108 @@ class RevenueReportService:
                     - 'rate': float (percentage)
         """
         try:
-            # 1. Check if report already exists
-            report_id = self._get_existing_report_id(month, year)
+            # 1. Check if report already exists and is still up to date
+            stored = self._get_stored_report(month, year)
             
-            if report_id is None:
+            if stored is None:
                 # 2. Generate new report using stored procedure
                 logger.info(f"Generating new revenue report for {month}/{year}")
                 report_id = self._generate_report(month, year)
+            elif stored['data_version'] != stored['current_version']:
+                # 2b. Month's data changed since the report was stored -> regenerate
+                logger.info(
+                    f"Revenue report (ID={stored['report_id']}) for {month}/{year} is stale "
+                    f"(version {stored['data_version']} -> {stored['current_version']}), regenerating"
+                )
+                report_id = self._generate_report(month, year)
             else:
+                report_id = stored['report_id']
                 logger.info(f"Found existing revenue report (ID={report_id}) for {month}/{year}")
             
             # 3. Fetch report details
+            if as_columns:
+                return self._fetch_report_columns(report_id)
             return self._fetch_report_data(report_id)
             
         except Exception as e:
             logger.error(f"Error in get_or_create_monthly_report: {e}")
             raise
 
+    def get_quarterly_report(self, quarter: int, year: int) -> dict:
+        """
+        Get quarterly revenue summary from the daily rollup table.
+        
+        Args:
+            quarter: Report quarter (1-4)
+            year: Report year (e.g., 2025)
+            
+        Returns:
+            dict with keys 'quarter', 'year', 'total_revenue', 'details'
+            ('details' has the same shape as in get_or_create_monthly_report)
+        """
+        if quarter < 1 or quarter > 4:
+            raise ValueError(f"Invalid quarter: {quarter}")
+        
+        start_date = date(year, 3 * (quarter - 1) + 1, 1)
+        end_date = date(year + 1, 1, 1) if quarter == 4 else date(year, 3 * quarter + 1, 1)
+        
+        summary = self._aggregate_daily_rollup(start_date, end_date)
+        summary.update({'quarter': quarter, 'year': year})
+        return summary
+
+    def get_yearly_report(self, year: int) -> dict:
+        """
+        Get yearly revenue summary from the daily rollup table.
+        
+        Returns:
+            dict with keys 'year', 'total_revenue', 'details'
+            ('details' has the same shape as in get_or_create_monthly_report)
+        """
+        summary = self._aggregate_daily_rollup(date(year, 1, 1), date(year + 1, 1, 1))
+        summary['year'] = year
+        return summary
+
+    def _aggregate_daily_rollup(self, start_date: date, end_date: date) -> dict:
+        """
+        Sum REVENUE_DAILY_BRAND over [start_date, end_date) grouped by brand.
+        Reads at most (days in range x brands) rows regardless of REPAIR history size.
+        """
+        try:
+            with db_manager.get_cursor() as cursor:
+                query = """
+                    SELECT 
+                        cb.BrandName,
+                        SUM(d.Count) AS Count,
+                        SUM(d.TotalMoney) AS TotalMoney
+                    FROM REVENUE_DAILY_BRAND d
+                    JOIN CAR_BRAND cb ON d.BrandId = cb.BrandId
+                    WHERE d.Day >= %s AND d.Day < %s
+                    GROUP BY d.BrandId, cb.BrandName
+                    HAVING SUM(d.Count) > 0
+                    ORDER BY TotalMoney DESC
+                """
+                cursor.execute(query, (start_date, end_date))
+                rows = cursor.fetchall()
+                
+                total_revenue = sum(float(row['TotalMoney']) for row in rows)
+                
+                return {
+                    'total_revenue': total_revenue,
+                    'details': [
+                        {
+                            'brand_name': row['BrandName'],
+                            'count': int(row['Count']),
+                            'total_money': float(row['TotalMoney']),
+                            'rate': round(float(row['TotalMoney']) / total_revenue * 100, 2)
+                                    if total_revenue > 0 else 0.0
+                        }
+                        for row in rows
+                    ]
+                }
+        except Exception as e:
+            logger.error(f"Error aggregating revenue rollup: {e}")
+            raise
+
     def _get_existing_report_id(self, month: int, year: int) -> Optional[int]:
         """Check if report exists and return its ID."""
         try:
@@ -74,6 +167,38 @@ class RevenueReportService:
             logger.error(f"Error checking existing report: {e}")
             raise
 
+    def _get_stored_report(self, month: int, year: int) -> Optional[dict]:
+        """
+        Get stored report ID with the data version it was built from and
+        the month's current revenue data version (REPORT_DATA_VERSION).
+        
+        Returns:
+            dict with keys 'report_id', 'data_version', 'current_version', or None
+        """
+        try:
+            with db_manager.get_cursor() as cursor:
+                query = """
+                    SELECT rr.ReportId, rr.DataVersion,
+                           COALESCE(v.RevenueVersion, 0) AS CurrentVersion
+                    FROM REVENUE_REPORT rr
+                    LEFT JOIN REPORT_DATA_VERSION v ON v.DataMonth = %s
+                    WHERE rr.ReportMonth = %s AND rr.ReportYear = %s
+                """
+                cursor.execute(query, (date(year, month, 1), month, year))
+                result = cursor.fetchone()
+                
+                if not result:
+                    return None
+                
+                return {
+                    'report_id': result['ReportId'],
+                    'data_version': int(result['DataVersion']),
+                    'current_version': int(result['CurrentVersion'])
+                }
+        except Exception as e:
+            logger.error(f"Error checking stored report: {e}")
+            raise
+
     def _generate_report(self, month: int, year: int) -> int:
         """
         Generate new revenue report using stored procedure.
@@ -104,6 +229,15 @@ class RevenueReportService:
                 
                 return report_id
                 
+        except Error as e:
+            # Another client generated the same month concurrently (uq_revenue_report_period)
+            if e.errno == 1062:
+                report_id = self._get_existing_report_id(month, year)
+                if report_id is not None:
+                    logger.info(f"Revenue report for {month}/{year} was created concurrently (ID={report_id})")
+                    return report_id
+            logger.error(f"Error generating report: {e}", exc_info=True)
+            raise
         except Exception as e:
             logger.error(f"Error generating report: {e}", exc_info=True)
             raise
@@ -158,6 +292,63 @@ class RevenueReportService:
             logger.error(f"Error fetching report data: {e}")
             raise
 
+    def _fetch_report_columns(self, report_id: int) -> dict:
+        """
+        Columnar variant of _fetch_report_data.
+        
+        Returns:
+            dict with keys 'report_id', 'month', 'year', 'total_revenue' and
+            'columns': {'brand_name': list, 'count': INT column,
+            'total_money': FLOAT column, 'rate': FLOAT column}, ordered by
+            total_money descending. Numeric columns are NumPy arrays when
+            NumPy is installed (see app.columnar).
+        """
+        try:
+            report = db_manager.execute_query(
+                """
+                    SELECT ReportId, ReportMonth, ReportYear, TotalRevenue
+                    FROM REVENUE_REPORT
+                    WHERE ReportId = %s
+                """,
+                (report_id,),
+                fetch_one=True
+            )
+            if not report:
+                raise ValueError(f"Report ID {report_id} not found")
+            
+            cols = db_manager.fetch_columns(
+                """
+                    SELECT cb.BrandName, rd.Count, rd.TotalMoney
+                    FROM REVENUE_REPORT_DETAILS rd
+                    JOIN CAR_BRAND cb ON rd.BrandId = cb.BrandId
+                    WHERE rd.ReportId = %s
+                """,
+                (report_id,),
+                types={'Count': columnar.INT, 'TotalMoney': columnar.FLOAT}
+            )
+            
+            # Tỷ lệ và thứ tự tính trên cả cột (cùng công thức làm tròn với sp_CreateRevenueReport)
+            total_revenue = float(report['TotalRevenue'])
+            money = cols['TotalMoney']
+            rate = columnar.percent_of(money, total_revenue)
+            order = columnar.argsort_desc(money)
+            
+            return {
+                'report_id': report['ReportId'],
+                'month': report['ReportMonth'],
+                'year': report['ReportYear'],
+                'total_revenue': total_revenue,
+                'columns': {
+                    'brand_name': columnar.take(cols['BrandName'], order),
+                    'count': columnar.take(cols['Count'], order),
+                    'total_money': columnar.take(money, order),
+                    'rate': columnar.take(rate, order),
+                }
+            }
+        except Exception as e:
+            logger.error(f"Error fetching report columns: {e}")
+            raise
+
     def delete_report(self, month: int, year: int) -> bool:
         """
         Delete existing report for re-generation.
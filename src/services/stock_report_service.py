@@ -5,9 +5,12 @@ Xử lý luồng dữ liệu D1→D3→D4→D6 theo DFD.
 """
 
 from typing import Optional, Dict, List, Any
-from datetime import datetime
+from datetime import datetime, date
 import logging
 
+from mysql.connector import Error
+
+from app import columnar
 from app.database import db_manager
 
 logger = logging.getLogger(__name__)
@@ -19,7 +22,7 @@ class StockReportService:
     
     Luồng DFD:
     - D1: Nhận input (tháng, năm) từ Người dùng
-    - D3: Lấy dữ liệu từ Bộ nhớ phụ (SUPPLIES, STOCK_REPORT_DETAILS tháng trước, REPAIR_DETAILS)
+    - D3: Lấy dữ liệu từ Bộ nhớ phụ (SUPPLIES, INVENTORY_MONTHLY_BALANCE do sổ kho INVENTORY_LEDGER duy trì)
     - D4: Xử lý và lưu vào STOCK_REPORT + STOCK_REPORT_DETAILS
     - D6: Trả kết quả về Người dùng (màn hình)
     """
@@ -28,21 +31,29 @@ class StockReportService:
         """Khởi tạo service."""
         pass
     
-    def get_or_create_monthly_report(self, month: int, year: int) -> Dict[str, Any]:
+    def get_or_create_monthly_report(
+        self,
+        month: int,
+        year: int,
+        as_columns: bool = False
+    ) -> Dict[str, Any]:
         """
         Lấy hoặc tạo báo cáo tồn kho tháng.
+        Báo cáo đã lưu được dùng lại nếu dữ liệu tồn kho đến tháng đó chưa thay đổi,
+        ngược lại được lập lại.
         Xử lý D1 → D6.
         
         Args:
             month: Tháng báo cáo (1-12) - từ D1
             year: Năm báo cáo - từ D1
+            as_columns: Trả dữ liệu dạng cột thay vì danh sách dòng (xem _fetch_report_columns)
             
         Returns:
             Dict chứa:
                 - report_id: ID báo cáo
                 - month: Tháng
                 - year: Năm
-                - items: List các dòng báo cáo [supply_name, begin_qty, issue_qty, end_qty]
+                - items: List các dòng báo cáo [supply_name, begin_qty, import_qty, issue_qty, end_qty]
                 
         Raises:
             ValueError: Nếu tháng/năm không hợp lệ
@@ -56,19 +67,26 @@ class StockReportService:
         
         logger.info(f"Processing stock report for {month}/{year}")
         
-        # Kiểm tra báo cáo đã tồn tại (D3)
-        existing_id = self._get_existing_report_id(month, year)
+        # Kiểm tra báo cáo đã tồn tại và còn đúng phiên bản dữ liệu (D3)
+        stored = self._get_stored_report(month, year)
         
-        if existing_id:
-            logger.info(f"Report exists with ID: {existing_id}")
-            report_id = existing_id
+        if stored and stored['data_version'] == stored['current_version']:
+            logger.info(f"Report exists with ID: {stored['report_id']}")
+            report_id = stored['report_id']
         else:
+            if stored:
+                logger.info(
+                    f"Report {stored['report_id']} is stale "
+                    f"(version {stored['data_version']} -> {stored['current_version']})"
+                )
             # Tạo báo cáo mới: D3 → D4
             logger.info("Generating new stock report...")
             report_id = self._generate_report(month, year)
             logger.info(f"Report created with ID: {report_id}")
         
         # Lấy dữ liệu chi tiết để trả về D6
+        if as_columns:
+            return self._fetch_report_columns(report_id, month, year)
         report_data = self._fetch_report_data(report_id, month, year)
         
         return report_data
@@ -99,6 +117,45 @@ class StockReportService:
             logger.error(f"Error checking existing report: {e}")
             raise
     
+    def _get_stored_report(self, month: int, year: int) -> Optional[Dict[str, int]]:
+        """
+        Lấy báo cáo đã lưu kèm phiên bản dữ liệu lúc lập và phiên bản hiện tại.
+        Phiên bản hiện tại = tổng StockVersion từ đầu đến tháng báo cáo
+        (Tồn Đầu phụ thuộc mọi tháng trước đó).
+        
+        Returns:
+            Dict {'report_id', 'data_version', 'current_version'} hoặc None nếu chưa có
+        """
+        try:
+            with db_manager.get_connection() as conn:
+                cursor = conn.cursor()
+                query = """
+                    SELECT 
+                        sr.StockReportId,
+                        sr.DataVersion,
+                        (SELECT COALESCE(SUM(v.StockVersion), 0)
+                         FROM REPORT_DATA_VERSION v
+                         WHERE v.DataMonth <= %s) AS CurrentVersion
+                    FROM STOCK_REPORT sr
+                    WHERE sr.ReportMonth = %s AND sr.ReportYear = %s
+                """
+                cursor.execute(query, (date(year, month, 1), month, year))
+                result = cursor.fetchone()
+                cursor.close()
+                
+                if not result:
+                    return None
+                
+                return {
+                    'report_id': result[0],
+                    'data_version': int(result[1]),
+                    'current_version': int(result[2])
+                }
+                
+        except Exception as e:
+            logger.error(f"Error checking stored report: {e}")
+            raise
+    
     def _generate_report(self, month: int, year: int) -> int:
         """
         Tạo báo cáo mới bằng stored procedure.
@@ -128,6 +185,15 @@ class StockReportService:
                 
                 return report_id
                 
+        except Error as e:
+            # Báo cáo cùng tháng vừa được lập song song (uq_stock_report_period)
+            if e.errno == 1062:
+                report_id = self._get_existing_report_id(month, year)
+                if report_id is not None:
+                    logger.info(f"Stock report {month}/{year} was created concurrently: {report_id}")
+                    return report_id
+            logger.error(f"Error generating stock report: {e}")
+            raise
         except Exception as e:
             logger.error(f"Error generating stock report: {e}")
             raise
@@ -148,6 +214,7 @@ class StockReportService:
                     SELECT 
                         s.SuppliesName,
                         srd.BeginQty,
+                        srd.ImportQty,
                         srd.IssueQty,
                         srd.EndQty
                     FROM STOCK_REPORT_DETAILS srd
@@ -165,8 +232,9 @@ class StockReportService:
                     items.append({
                         'supply_name': row[0],
                         'begin_qty': row[1],
-                        'issue_qty': row[2],
-                        'end_qty': row[3]
+                        'import_qty': row[2],
+                        'issue_qty': row[3],
+                        'end_qty': row[4]
                     })
                 
                 return {
@@ -180,6 +248,64 @@ class StockReportService:
             logger.error(f"Error fetching report data: {e}")
             raise
 
+    
+    def _fetch_report_columns(self, report_id: int, month: int, year: int) -> Dict[str, Any]:
+        """
+        Dữ liệu báo cáo dạng cột (biến thể của _fetch_report_data cho phân tích).
+        
+        Returns:
+            Dict chứa report_id, month, year,
+                - columns: supply_name (list), begin_qty, import_qty, issue_qty,
+                  end_qty (cột INT; mảng NumPy nếu có cài NumPy, xem app.columnar)
+                - totals: tổng từng cột số lượng
+        """
+        try:
+            cols = db_manager.fetch_columns(
+                """
+                    SELECT 
+                        s.SuppliesName,
+                        srd.BeginQty,
+                        srd.ImportQty,
+                        srd.IssueQty,
+                        srd.EndQty
+                    FROM STOCK_REPORT_DETAILS srd
+                    JOIN SUPPLIES s ON srd.SuppliesId = s.SuppliesId
+                    WHERE srd.StockReportId = %s
+                    ORDER BY s.SuppliesName
+                """,
+                (report_id,),
+                types={
+                    'BeginQty': columnar.INT,
+                    'ImportQty': columnar.INT,
+                    'IssueQty': columnar.INT,
+                    'EndQty': columnar.INT,
+                }
+            )
+            
+            columns = {
+                'supply_name': cols['SuppliesName'],
+                'begin_qty': cols['BeginQty'],
+                'import_qty': cols['ImportQty'],
+                'issue_qty': cols['IssueQty'],
+                'end_qty': cols['EndQty'],
+            }
+            
+            return {
+                'report_id': report_id,
+                'month': month,
+                'year': year,
+                'columns': columns,
+                'totals': {
+                    key: int(columnar.total(column))
+                    for key, column in columns.items()
+                    if key != 'supply_name'
+                }
+            }
+            
+        except Exception as e:
+            logger.error(f"Error fetching report columns: {e}")
+            raise
+
 
 # Singleton instance
 _stock_report_service = None
@@ -4,7 +4,7 @@ Business logic cho Nhập vật tư/phụ tùng.
 Xử lý CRUD cho SUPPLIES_IMPORT và cập nhật tồn kho.
 """
 
-from typing import List, Dict, Tuple
+from typing import Iterable, List, Dict, Tuple
 from datetime import date
 import logging
 
@@ -86,66 +86,88 @@ class SuppliesImportService:
             if item['import_qty'] <= 0:
                 raise ValueError(f"Số lượng nhập phải > 0 (SuppliesId={item['supply_id']})")
         
-        try:
-            with db_manager.get_connection() as conn:
-                cursor = conn.cursor()
+        def create(cursor) -> Dict[str, any]:
+            # 1. Khóa các dòng SUPPLIES theo thứ tự SuppliesId và lấy giá vật tư
+            prices = self.lock_supplies(cursor, (item['supply_id'] for item in items))
+            
+            imported_ids = []
+            total_money = 0.0
+            
+            for item in items:
+                supply_id = item['supply_id']
+                import_qty = item['import_qty']
                 
-                imported_ids = []
-                total_money = 0.0
+                if supply_id not in prices:
+                    raise ValueError(f"Không tìm thấy vật tư ID {supply_id}")
                 
-                for item in items:
-                    supply_id = item['supply_id']
-                    import_qty = item['import_qty']
-                    
-                    # 1. Lấy giá vật tư
-                    cursor.execute(
-                        "SELECT SuppliesPrice FROM SUPPLIES WHERE SuppliesId = %s",
-                        (supply_id,)
-                    )
-                    result = cursor.fetchone()
-                    if not result:
-                        raise ValueError(f"Không tìm thấy vật tư ID {supply_id}")
-                    
-                    supply_price = float(result[0])
-                    line_money = supply_price * import_qty
-                    total_money += line_money
-                    
-                    # 2. Insert vào SUPPLIES_IMPORT
-                    insert_query = """
-                        INSERT INTO SUPPLIES_IMPORT (SuppliesId, ImportAmount, ImportDate)
-                        VALUES (%s, %s, %s)
-                    """
-                    cursor.execute(insert_query, (supply_id, import_qty, import_date))
-                    import_id = cursor.lastrowid
-                    imported_ids.append(import_id)
-                    
-                    # 3. Cập nhật tồn kho trong SUPPLIES
-                    update_query = """
-                        UPDATE SUPPLIES 
-                        SET InventoryNumber = InventoryNumber + %s
-                        WHERE SuppliesId = %s
-                    """
-                    cursor.execute(update_query, (import_qty, supply_id))
-                    
-                    logger.info(f"Imported {import_qty} of SuppliesId={supply_id}, ImportId={import_id}")
+                supply_price = float(prices[supply_id])
+                line_money = supply_price * import_qty
+                total_money += line_money
                 
-                cursor.close()
-                conn.commit()
-                
-                logger.info(f"Created import ticket: {len(items)} items, total: {total_money}")
+                # 2. Insert vào SUPPLIES_IMPORT
+                insert_query = """
+                    INSERT INTO SUPPLIES_IMPORT (SuppliesId, ImportAmount, ImportDate)
+                    VALUES (%s, %s, %s)
+                """
+                cursor.execute(insert_query, (supply_id, import_qty, import_date))
+                import_id = cursor.lastrowid
+                imported_ids.append(import_id)
                 
-                return {
-                    'total_items': len(items),
-                    'total_money': total_money,
-                    'imported_ids': imported_ids
-                }
+                # 3. Cập nhật tồn kho trong SUPPLIES
+                update_query = """
+                    UPDATE SUPPLIES 
+                    SET InventoryNumber = InventoryNumber + %s
+                    WHERE SuppliesId = %s
+                """
+                cursor.execute(update_query, (import_qty, supply_id))
                 
+                logger.info(f"Imported {import_qty} of SuppliesId={supply_id}, ImportId={import_id}")
+            
+            logger.info(f"Created import ticket: {len(items)} items, total: {total_money}")
+            
+            return {
+                'total_items': len(items),
+                'total_money': total_money,
+                'imported_ids': imported_ids
+            }
+        
+        try:
+            # Deadlock / hết thời gian chờ khóa -> chạy lại cả giao dịch (RetryPolicy mặc định)
+            return db_manager.run_transaction(create)
         except ValueError:
             raise
         except Exception as e:
             logger.error(f"Error creating import ticket: {e}")
             raise
     
+    @staticmethod
+    def lock_supplies(cursor, supply_ids: Iterable[int]) -> Dict[int, float]:
+        """
+        Khóa (FOR UPDATE) các dòng SUPPLIES theo thứ tự SuppliesId tăng dần.
+        
+        Mọi giao dịch ghi tồn kho (phiếu nhập, phiếu sửa chữa) gọi hàm này trước
+        khi ghi bảng khác, nên các dòng luôn bị khóa theo cùng một thứ tự và hai
+        giao dịch không thể chờ khóa vòng tròn trên SUPPLIES.
+        
+        Args:
+            cursor: Cursor (dictionary) của transaction hiện tại
+            supply_ids: Các SuppliesId cần khóa (có thể trùng, không cần sắp xếp)
+        
+        Returns:
+            Dict SuppliesId -> SuppliesPrice của các vật tư tồn tại
+        """
+        ids = sorted(set(supply_ids))
+        if not ids:
+            return {}
+        cursor.execute(f"""
+            SELECT SuppliesId, SuppliesPrice
+            FROM SUPPLIES
+            WHERE SuppliesId IN ({', '.join(['%s'] * len(ids))})
+            ORDER BY SuppliesId
+            FOR UPDATE
+        """, tuple(ids))
+        return {row['SuppliesId']: row['SuppliesPrice'] for row in cursor.fetchall()}
+    
     # ==================== History ====================
     
     def get_import_history(self, limit: int = 100) -> List[Dict[str, any]]:
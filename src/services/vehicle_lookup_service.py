@@ -4,63 +4,202 @@ Service layer for vehicle lookup operations.
 Handles business logic for searching and retrieving vehicle information with debt.
 """
 
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterator, FrozenSet
+import csv
 import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from operator import itemgetter
 from mysql.connector import Error
 
 from app.database import db_manager
+from app.row_format import ROW_DICT, ROW_TUPLE
+from utils.search_keys import fold_text, plate_key
 
 logger = logging.getLogger(__name__)
 
+# ngram_token_size của server (mặc định 2): chuỗi tìm ngắn hơn không dùng được index FULLTEXT
+NGRAM_TOKEN_SIZE = 2
+
+# ChangeId và ChangedAt cấp khi INSERT nhưng giao dịch có thể commit muộn hơn nhiều ->
+# mỗi lần hỏi đọc lại các dòng ghi trong khoảng này trước lần đọc trước.
+# Giới hạn: thay đổi của giao dịch kéo dài hơn khoảng này (từ lúc ghi CAR_CHANGE_LOG
+# đến lúc commit) có thể bị bỏ sót cho tới lần tải lại toàn bộ tiếp theo.
+MAX_TRANSACTION_SECONDS = 300
+
+# Quá nhiều xe thay đổi kể từ lần trước -> tải lại toàn bộ rẻ hơn vá từng dòng
+MAX_CHANGED_ROWS = 5000
+
+# Số dòng trang đầu của mỗi mục lịch sử trong hồ sơ xe (get_dossier)
+HISTORY_PAGE_SIZE = 20
+
+# Thứ tự result set của sp_GetVehicleDossier và các cột tổng số trên dòng thông tin xe
+DOSSIER_RESULT_SETS = ("vehicle", "receptions", "repairs", "receipts", "latest_reception_with_debt")
+DOSSIER_TOTAL_COLUMNS = ("ReceptionTotal", "RepairTotal", "ReceiptTotal")
+
+
+@dataclass(frozen=True)
+class ChangeToken:
+    """
+    Vị trí đã đọc trong CAR_CHANGE_LOG (mã thay đổi của get_changes_since).
+    """
+    last_id: int  # ChangeId lớn nhất đã thấy
+    read_at: datetime  # giờ server lúc đọc
+    # ChangeId đã áp dụng nằm trong khoảng đọc lại của lần hỏi sau (không áp dụng lại)
+    recent_ids: FrozenSet[int] = frozenset()
+
 
 class VehicleLookupService:
     """Service class for handling vehicle lookup operations."""
     
+    _ALL_VEHICLES_QUERY = """
+        SELECT 
+            c.LicensePlate,
+            b.BrandName,
+            c.OwnerName,
+            c.PhoneNumber,
+            c.Address,
+            c.TotalDebt
+        FROM CAR c
+        JOIN CAR_BRAND b ON c.BrandId = b.BrandId
+        ORDER BY c.LicensePlate
+    """
+    
+    # Dòng hiện tại của các xe theo biển số (cùng cột với _ALL_VEHICLES_QUERY)
+    _VEHICLES_BY_PLATES_QUERY = """
+        SELECT 
+            c.LicensePlate,
+            b.BrandName,
+            c.OwnerName,
+            c.PhoneNumber,
+            c.Address,
+            c.TotalDebt
+        FROM CAR c
+        JOIN CAR_BRAND b ON c.BrandId = b.BrandId
+        WHERE c.LicensePlate IN ({placeholders})
+        ORDER BY c.LicensePlate
+    """
+    
+    # Tiêu đề cột file CSV xuất danh sách xe (theo thứ tự cột của _ALL_VEHICLES_QUERY)
+    CSV_HEADER = ["Biển số", "Hiệu xe", "Chủ xe", "Điện thoại", "Địa chỉ", "Tiền nợ"]
+    
     @staticmethod
-    def get_all_vehicles_with_debt() -> List[Dict[str, Any]]:
+    def get_all_vehicles_with_debt(row_format: str = ROW_DICT) -> List[Dict[str, Any]]:
         """
         Lấy danh sách tất cả xe với tổng tiền nợ hiện tại.
         
+        Args:
+            row_format: Định dạng dòng kết quả: ROW_DICT (mặc định), ROW_TUPLE, ROW_RECORD
+            
         Returns:
-            List of vehicle dictionaries with LicensePlate, BrandName, OwnerName, TotalDebt
+            List of vehicle rows with LicensePlate, BrandName, OwnerName, TotalDebt
         """
         try:
-            query = """
-                SELECT 
-                    c.LicensePlate,
-                    b.BrandName,
-                    c.OwnerName,
-                    c.PhoneNumber,
-                    c.Address,
-                    COALESCE(SUM(cr.Debt), 0) as TotalDebt
-                FROM CAR c
-                JOIN CAR_BRAND b ON c.BrandId = b.BrandId
-                LEFT JOIN CAR_RECEPTION cr ON c.LicensePlate = cr.LicensePlate
-                GROUP BY c.LicensePlate, b.BrandName, c.OwnerName, c.PhoneNumber, c.Address
-                ORDER BY c.LicensePlate
-            """
-            vehicles = db_manager.execute_query(query, fetch_all=True)
+            vehicles = db_manager.execute_query(
+                VehicleLookupService._ALL_VEHICLES_QUERY, fetch_all=True, row_format=row_format
+            )
             return vehicles or []
         except Error as e:
             logger.error(f"Failed to fetch vehicles with debt: {e}")
             return []
     
+    @staticmethod
+    def count_vehicles() -> int:
+        """
+        Đếm tổng số xe.
+        
+        Returns:
+            Số xe trong bảng CAR
+        """
+        result = db_manager.execute_query("SELECT COUNT(*) AS Total FROM CAR", fetch_one=True)
+        return int(result['Total']) if result else 0
+    
+    @staticmethod
+    def iter_all_vehicles_with_debt(
+        chunk_size: int = 1000,
+        row_format: str = ROW_DICT
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Duyệt tất cả xe với tổng tiền nợ hiện tại, đọc từng đợt chunk_size dòng.
+        
+        Khác get_all_vehicles_with_debt: không giữ toàn bộ kết quả trong bộ nhớ
+        và lỗi database được ném ra cho nơi gọi.
+        
+        Args:
+            chunk_size: Số dòng đọc từ server mỗi lần
+            row_format: Định dạng dòng kết quả: ROW_DICT (mặc định), ROW_TUPLE, ROW_RECORD
+            
+        Yields:
+            Vehicle rows with LicensePlate, BrandName, OwnerName, TotalDebt
+        """
+        return db_manager.iter_query(
+            VehicleLookupService._ALL_VEHICLES_QUERY,
+            chunk_size=chunk_size,
+            row_format=row_format,
+        )
+    
+    @staticmethod
+    def export_vehicles_csv(file_path: str, chunk_size: int = 1000) -> int:
+        """
+        Xuất danh sách xe ra file CSV, ghi dần theo từng đợt dòng đọc được.
+        
+        Args:
+            file_path: Đường dẫn file CSV
+            chunk_size: Số dòng đọc từ server mỗi lần
+            
+        Returns:
+            Số xe đã xuất
+        """
+        count = 0
+        try:
+            # utf-8-sig để Excel đọc đúng tiếng Việt
+            with open(file_path, "w", newline="", encoding="utf-8-sig") as f:
+                writer = csv.writer(f)
+                writer.writerow(VehicleLookupService.CSV_HEADER)
+                rows = db_manager.iter_query(
+                    VehicleLookupService._ALL_VEHICLES_QUERY,
+                    chunk_size=chunk_size,
+                    row_format=ROW_TUPLE,
+                )
+                for row in rows:
+                    writer.writerow(row)
+                    count += 1
+        except Error as e:
+            logger.error(f"Failed to export vehicles to {file_path}: {e}")
+            raise
+        logger.info(f"Exported {count} vehicles to {file_path}")
+        return count
+    
     @staticmethod
     def search_vehicles(
         license_plate: Optional[str] = None,
         owner_name: Optional[str] = None,
-        brand_name: Optional[str] = None
+        brand_name: Optional[str] = None,
+        row_format: str = ROW_DICT,
+        after_plate: Optional[str] = None,
+        limit: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
-        Tìm kiếm xe theo các tiêu chí.
+        Tìm kiếm xe theo các tiêu chí, sắp xếp theo biển số.
+        
+        Biển số và tên chủ xe được so khớp chuỗi con trên khóa đã chuẩn hóa
+        (CAR.PlateKey bỏ '-', '.'; CAR.OwnerKey chữ thường, bỏ dấu) qua index
+        FULLTEXT ngram, nên "nguyen" khớp "Nguyễn" và "12345" khớp "51F-123.45".
+        
+        Phân trang kiểu keyset: trang tiếp theo bắt đầu sau biển số cuối cùng của
+        trang trước (after_plate) thay vì OFFSET, nên mỗi trang chỉ đọc limit dòng
+        theo khóa chính dù bảng CAR lớn tới đâu.
         
         Args:
             license_plate: Biển số xe (tìm kiếm gần đúng)
             owner_name: Tên chủ xe (tìm kiếm gần đúng)
             brand_name: Tên hiệu xe (chính xác)
+            row_format: Định dạng dòng kết quả: ROW_DICT (mặc định), ROW_TUPLE, ROW_RECORD
+            after_plate: Chỉ lấy xe có biển số lớn hơn giá trị này (con trỏ trang)
+            limit: Số xe tối đa trả về (None = tất cả)
             
         Returns:
-            List of vehicle dictionaries matching the criteria
+            List of vehicle rows matching the criteria
         """
         try:
             # Base query
@@ -71,10 +210,9 @@ class VehicleLookupService:
                     c.OwnerName,
                     c.PhoneNumber,
                     c.Address,
-                    COALESCE(SUM(cr.Debt), 0) as TotalDebt
+                    c.TotalDebt
                 FROM CAR c
                 JOIN CAR_BRAND b ON c.BrandId = b.BrandId
-                LEFT JOIN CAR_RECEPTION cr ON c.LicensePlate = cr.LicensePlate
                 WHERE 1=1
             """
             
@@ -82,28 +220,156 @@ class VehicleLookupService:
             
             # Add conditions based on provided filters
             if license_plate:
-                query += " AND c.LicensePlate LIKE %s"
-                params.append(f"%{license_plate}%")
+                condition, param = VehicleLookupService._substring_match(
+                    "c.PlateKey", plate_key(license_plate)
+                )
+                query += condition
+                params.append(param)
             
             if owner_name:
-                query += " AND c.OwnerName LIKE %s"
-                params.append(f"%{owner_name}%")
+                condition, param = VehicleLookupService._substring_match(
+                    "c.OwnerKey", fold_text(owner_name)
+                )
+                query += condition
+                params.append(param)
             
             if brand_name:
                 query += " AND b.BrandName = %s"
                 params.append(brand_name)
             
-            query += """
-                GROUP BY c.LicensePlate, b.BrandName, c.OwnerName, c.PhoneNumber, c.Address
-                ORDER BY c.LicensePlate
-            """
+            if after_plate is not None:
+                query += " AND c.LicensePlate > %s"
+                params.append(after_plate)
             
-            vehicles = db_manager.execute_query(query, params=tuple(params), fetch_all=True)
+            query += " ORDER BY c.LicensePlate"
+            
+            if limit is not None:
+                query += " LIMIT %s"
+                params.append(limit)
+            
+            vehicles = db_manager.execute_query(
+                query, params=tuple(params), fetch_all=True, row_format=row_format
+            )
             return vehicles or []
         except Error as e:
             logger.error(f"Failed to search vehicles: {e}")
             return []
     
+    @staticmethod
+    def get_changes_since(
+        token: Optional[ChangeToken],
+        row_format: str = ROW_DICT
+    ) -> Dict[str, Any]:
+        """
+        Các xe thay đổi kể từ mã thay đổi token (đọc từ CAR_CHANGE_LOG).
+        
+        Lấy token trước khi tải dữ liệu, sau đó gọi định kỳ với token nhận được lần
+        trước. Ngoài các dòng mới hơn token, mỗi lần hỏi đọc lại các dòng ghi trong
+        MAX_TRANSACTION_SECONDS trước lần đọc trước (giao dịch commit muộn); khi không
+        có gì thay đổi chỉ tốn hai câu đọc theo khoảng trên index.
+        
+        Args:
+            token: Mã thay đổi lần trước (None = chưa có, chỉ lấy mã hiện tại)
+            row_format: Định dạng dòng kết quả: ROW_DICT (mặc định), ROW_TUPLE, ROW_RECORD
+            
+        Returns:
+            {
+                "token": mã thay đổi mới (ChangeToken),
+                "reset": True nếu nơi gọi phải tải lại toàn bộ (token None, nhật ký
+                         đã bị dọn qua token, database tạo lại, quá nhiều thay đổi),
+                "changed": dòng hiện tại của các xe thêm mới / thay đổi
+                           (cùng cột với search_vehicles, theo biển số),
+                "deleted": biển số các xe đã bị xóa,
+            }
+        """
+        try:
+            bounds = db_manager.execute_query(
+                "SELECT MIN(ChangeId) AS FirstId, MAX(ChangeId) AS LastId, NOW(3) AS ReadAt "
+                "FROM CAR_CHANGE_LOG",
+                fetch_one=True,
+            )
+            first_id = bounds['FirstId'] or 0
+            last_id = bounds['LastId'] or 0
+            read_at = bounds['ReadAt']
+            
+            result = {
+                "token": ChangeToken(last_id, read_at),
+                "reset": False,
+                "changed": [],
+                "deleted": [],
+            }
+            if (
+                token is None
+                or token.last_id > last_id
+                or (first_id and token.last_id < first_id - 1)
+            ):
+                result["reset"] = True
+                return result
+            
+            # Dòng mới hơn token và dòng ghi gần lần đọc trước (có thể vừa commit)
+            rows = db_manager.execute_query(
+                """
+                SELECT ChangeId, LicensePlate, ChangedAt FROM CAR_CHANGE_LOG
+                WHERE ChangeId <= %s AND (ChangeId > %s OR ChangedAt >= %s)
+                """,
+                params=(
+                    last_id,
+                    token.last_id,
+                    token.read_at - timedelta(seconds=MAX_TRANSACTION_SECONDS),
+                ),
+                fetch_all=True,
+                row_format=ROW_TUPLE,
+            ) or []
+            window_start = read_at - timedelta(seconds=MAX_TRANSACTION_SECONDS)
+            result["token"] = ChangeToken(
+                last_id,
+                read_at,
+                frozenset(change_id for change_id, _, changed_at in rows if changed_at >= window_start),
+            )
+            
+            plates = list(dict.fromkeys(
+                plate for change_id, plate, _ in rows if change_id not in token.recent_ids
+            ))
+            if not plates:
+                return result
+            if len(plates) > MAX_CHANGED_ROWS:
+                result["reset"] = True
+                return result
+            
+            query = VehicleLookupService._VEHICLES_BY_PLATES_QUERY.format(
+                placeholders=", ".join(["%s"] * len(plates))
+            )
+            changed = db_manager.execute_query(
+                query, params=tuple(plates), fetch_all=True, row_format=row_format
+            ) or []
+            
+            # Biển số có trong nhật ký nhưng không còn trong CAR -> xe đã bị xóa
+            plate_of = itemgetter('LicensePlate' if row_format == ROW_DICT else 0)
+            remaining = {plate_of(row) for row in changed}
+            result["changed"] = changed
+            result["deleted"] = [plate for plate in plates if plate not in remaining]
+            return result
+        except Error as e:
+            logger.error(f"Failed to read vehicle changes since {token}: {e}")
+            raise
+    
+    @staticmethod
+    def _substring_match(column: str, key: str):
+        """
+        Điều kiện tìm chuỗi con trên cột khóa đã chuẩn hóa.
+        
+        Returns:
+            (đoạn SQL " AND ...", tham số)
+        """
+        # Bỏ ký tự đặc biệt của BOOLEAN MODE để chuỗi tìm luôn là một cụm từ
+        key = " ".join(key.replace('"', " ").split())
+        if len(key) >= NGRAM_TOKEN_SIZE:
+            # Tìm cụm từ: các ngram phải liền nhau -> đúng nghĩa chuỗi con, dùng index
+            return f" AND MATCH({column}) AGAINST (%s IN BOOLEAN MODE)", f'"{key}"'
+        # Thoát ký tự đại diện của LIKE để "_" / "%" trong chuỗi tìm được so khớp đúng nghĩa
+        key = key.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return f" AND {column} LIKE %s", f"%{key}%"
+    
     @staticmethod
     def get_vehicle_detail_by_license_plate(license_plate: str) -> Optional[Dict[str, Any]]:
         """
@@ -124,13 +390,10 @@ class VehicleLookupService:
                     c.PhoneNumber,
                     c.Address,
                     c.Email,
-                    COALESCE(SUM(cr.Debt), 0) as TotalDebt
+                    c.TotalDebt
                 FROM CAR c
                 JOIN CAR_BRAND b ON c.BrandId = b.BrandId
-                LEFT JOIN CAR_RECEPTION cr ON c.LicensePlate = cr.LicensePlate
                 WHERE c.LicensePlate = %s
-                GROUP BY c.LicensePlate, b.BrandName, c.OwnerName, 
-                         c.PhoneNumber, c.Address, c.Email
             """
             result = db_manager.execute_query(query, params=(license_plate,), fetch_one=True)
             return result
@@ -139,12 +402,76 @@ class VehicleLookupService:
             return None
     
     @staticmethod
-    def get_vehicle_reception_history(license_plate: str) -> List[Dict[str, Any]]:
+    def get_dossier(
+        license_plate: str,
+        page_size: int = HISTORY_PAGE_SIZE
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Lấy toàn bộ hồ sơ xe trong một lần gọi sp_GetVehicleDossier (một round trip).
+        
+        Thay cho việc gọi lần lượt get_vehicle_detail_by_license_plate,
+        get_vehicle_reception_history, get_vehicle_repair_history,
+        ReceiptService.get_receipts_by_license_plate và
+        ReceiptService.get_latest_reception_with_debt. Các mục lịch sử chỉ có trang
+        đầu; trang sau lấy bằng hàm lịch sử tương ứng với offset = số dòng đã có.
+        
+        Args:
+            license_plate: Biển số xe
+            page_size: Số dòng trang đầu của mỗi mục lịch sử (0 = chỉ lấy tổng số)
+            
+        Returns:
+            {
+                "vehicle": thông tin xe (như get_vehicle_detail_by_license_plate),
+                "receptions" / "repairs" / "receipts": {"rows": trang đầu, "total": tổng số dòng},
+                "latest_reception_with_debt": phiếu tiếp nhận mới nhất còn nợ hoặc None,
+            }
+            hoặc None nếu không tìm thấy xe / lỗi database
+        """
+        try:
+            results = db_manager.call_procedure(
+                "sp_GetVehicleDossier", (license_plate, page_size)
+            )
+        except Error as e:
+            logger.error(f"Failed to get dossier for {license_plate}: {e}")
+            return None
+        
+        # Procedure cũ (chưa chạy lại sp_vehicle_dossier.sql) trả về khác 5 result set
+        if len(results) != len(DOSSIER_RESULT_SETS):
+            logger.error(
+                f"sp_GetVehicleDossier returned {len(results)} result set(s), "
+                f"expected {len(DOSSIER_RESULT_SETS)}"
+            )
+            return None
+        vehicle_rows, receptions, repairs, receipts, debt_rows = results
+        
+        if not vehicle_rows:
+            return None
+        vehicle = vehicle_rows[0]
+        missing = [column for column in DOSSIER_TOTAL_COLUMNS if column not in vehicle]
+        if missing:
+            logger.error(f"sp_GetVehicleDossier vehicle row is missing {', '.join(missing)}")
+            return None
+        return {
+            "vehicle": vehicle,
+            "receptions": {"rows": receptions, "total": int(vehicle.pop('ReceptionTotal'))},
+            "repairs": {"rows": repairs, "total": int(vehicle.pop('RepairTotal'))},
+            "receipts": {"rows": receipts, "total": int(vehicle.pop('ReceiptTotal'))},
+            "latest_reception_with_debt": debt_rows[0] if debt_rows else None,
+        }
+    
+    @staticmethod
+    def get_vehicle_reception_history(
+        license_plate: str,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
         """
         Lấy lịch sử tiếp nhận của xe.
         
         Args:
             license_plate: Biển số xe
+            limit: Số dòng tối đa (None = tất cả)
+            offset: Bỏ qua offset dòng đầu (phân trang)
             
         Returns:
             List of reception history dictionaries
@@ -163,19 +490,29 @@ class VehicleLookupService:
                 GROUP BY cr.ReceptionId, cr.ReceptionDate, cr.Debt
                 ORDER BY cr.ReceptionDate DESC, cr.ReceptionId DESC
             """
-            history = db_manager.execute_query(query, params=(license_plate,), fetch_all=True)
+            params = (license_plate,)
+            if limit is not None:
+                query += " LIMIT %s OFFSET %s"
+                params += (limit, offset)
+            history = db_manager.execute_query(query, params=params, fetch_all=True)
             return history or []
         except Error as e:
             logger.error(f"Failed to get reception history for {license_plate}: {e}")
             return []
     
     @staticmethod
-    def get_vehicle_repair_history(license_plate: str) -> List[Dict[str, Any]]:
+    def get_vehicle_repair_history(
+        license_plate: str,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
         """
         Lấy lịch sử sửa chữa của xe.
         
         Args:
             license_plate: Biển số xe
+            limit: Số dòng tối đa (None = tất cả)
+            offset: Bỏ qua offset dòng đầu (phân trang)
             
         Returns:
             List of repair history dictionaries
@@ -193,7 +530,11 @@ class VehicleLookupService:
                 WHERE cr.LicensePlate = %s
                 ORDER BY r.RepairDate DESC, r.RepairId DESC
             """
-            repairs = db_manager.execute_query(query, params=(license_plate,), fetch_all=True)
+            params = (license_plate,)
+            if limit is not None:
+                query += " LIMIT %s OFFSET %s"
+                params += (limit, offset)
+            repairs = db_manager.execute_query(query, params=params, fetch_all=True)
             return repairs or []
         except Error as e:
             logger.error(f"Failed to get repair history for {license_plate}: {e}")
@@ -216,12 +557,13 @@ class VehicleLookupService:
             return []
     
     @staticmethod
-    def get_vehicles_by_brand(brand_name: str) -> List[Dict[str, Any]]:
+    def get_vehicles_by_brand(brand_name: str, row_format: str = ROW_DICT) -> List[Dict[str, Any]]:
         """
         Lấy danh sách xe theo hiệu xe.
         
         Args:
             brand_name: Tên hiệu xe
+            row_format: Định dạng dòng kết quả: ROW_DICT (mặc định), ROW_TUPLE, ROW_RECORD
             
         Returns:
             List of vehicle dictionaries
@@ -233,27 +575,30 @@ class VehicleLookupService:
                     b.BrandName,
                     c.OwnerName,
                     c.PhoneNumber,
-                    COALESCE(SUM(cr.Debt), 0) as TotalDebt
+                    c.TotalDebt
                 FROM CAR c
                 JOIN CAR_BRAND b ON c.BrandId = b.BrandId
-                LEFT JOIN CAR_RECEPTION cr ON c.LicensePlate = cr.LicensePlate
                 WHERE b.BrandName = %s
-                GROUP BY c.LicensePlate, b.BrandName, c.OwnerName, c.PhoneNumber
                 ORDER BY c.LicensePlate
             """
-            vehicles = db_manager.execute_query(query, params=(brand_name,), fetch_all=True)
+            vehicles = db_manager.execute_query(
+                query, params=(brand_name,), fetch_all=True, row_format=row_format
+            )
             return vehicles or []
         except Error as e:
             logger.error(f"Failed to get vehicles for brand {brand_name}: {e}")
             return []
     
     @staticmethod
-    def get_vehicles_with_debt_only() -> List[Dict[str, Any]]:
+    def get_vehicles_with_debt_only(row_format: str = ROW_DICT) -> List[Dict[str, Any]]:
         """
         Lấy danh sách các xe đang có nợ.
         
+        Args:
+            row_format: Định dạng dòng kết quả: ROW_DICT (mặc định), ROW_TUPLE, ROW_RECORD
+            
         Returns:
-            List of vehicle dictionaries with debt > 0
+            List of vehicle rows with debt > 0
         """
         try:
             query = """
@@ -262,17 +607,38 @@ class VehicleLookupService:
                     b.BrandName,
                     c.OwnerName,
                     c.PhoneNumber,
-                    SUM(cr.Debt) as TotalDebt
+                    c.TotalDebt
                 FROM CAR c
                 JOIN CAR_BRAND b ON c.BrandId = b.BrandId
-                JOIN CAR_RECEPTION cr ON c.LicensePlate = cr.LicensePlate
-                WHERE cr.Debt > 0
-                GROUP BY c.LicensePlate, b.BrandName, c.OwnerName, c.PhoneNumber
-                HAVING SUM(cr.Debt) > 0
-                ORDER BY TotalDebt DESC
+                WHERE c.TotalDebt > 0
+                ORDER BY c.TotalDebt DESC
             """
-            vehicles = db_manager.execute_query(query, fetch_all=True)
+            vehicles = db_manager.execute_query(query, fetch_all=True, row_format=row_format)
             return vehicles or []
         except Error as e:
             logger.error(f"Failed to get vehicles with debt: {e}")
             return []
+    
+    @staticmethod
+    def reconcile_total_debt() -> int:
+        """
+        Đối soát CAR.TotalDebt với tổng CAR_RECEPTION.Debt (gọi sp_ReconcileCarDebt).
+        Chạy từ trang Thống kê kết nối (ADMIN), vd. sau khi áp dụng migration 007
+        hoặc khi sửa dữ liệu trực tiếp trong database.
+        
+        Returns:
+            Số xe có tổng nợ bị lệch đã được sửa
+        """
+        try:
+            with db_manager.transaction() as cursor:
+                cursor.execute("CALL sp_ReconcileCarDebt(@fixed_rows)")
+                cursor.execute("SELECT @fixed_rows AS fixed_rows")
+                result = cursor.fetchone()
+            
+            fixed_rows = result['fixed_rows'] if result and result['fixed_rows'] is not None else 0
+            if fixed_rows:
+                logger.warning(f"Reconciled TotalDebt for {fixed_rows} car(s)")
+            return fixed_rows
+        except Error as e:
+            logger.error(f"Failed to reconcile car total debt: {e}")
+            raise
@@ -64,3 +64,5 @@ class Messages:
     PAGE_NHAP_VAT_TU_TITLE = "NHẬP VẬT TƯ"
     PAGE_NHAP_VAT_TU_DESC = "Tạo phiếu nhập vật tư vào kho."
 
+    NAV_THONG_KE_KET_NOI = "Thống kê kết nối"
+
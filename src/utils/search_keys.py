@@ -0,0 +1,49 @@
+# src/utils/search_keys.py
+"""
+Normalized search keys for vehicle lookup.
+Must stay in sync with the database side: CAR.PlateKey (generated column) and
+CAR.OwnerKey (fn_FoldVietnamese, see database/migrations/005_vehicle_search_keys.sql).
+"""
+
+import re
+import unicodedata
+
+# Chữ có dấu tiếng Việt -> chữ không dấu (cùng bảng với fn_FoldVietnamese)
+_FOLD_FROM = "àáảãạăằắẳẵặâầấẩẫậèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵđ"
+_FOLD_TO = "aaaaaaaaaaaaaaaaaeeeeeeeeeeeiiiiiooooooooooooooooouuuuuuuuuuuyyyyyd"
+_FOLD_TABLE = str.maketrans(_FOLD_FROM, _FOLD_TO)
+
+# Ký tự bỏ khỏi biển số khi so khớp (giống biểu thức của CAR.PlateKey)
+_PLATE_SEPARATORS_RE = re.compile(r"[-. ]")
+
+
+def fold_text(text: str) -> str:
+    """
+    Lowercase and strip Vietnamese diacritics.
+
+    Example:
+        fold_text("Nguyễn Văn Đức") -> "nguyen van duc"
+    """
+    # NFC: chữ nhập dạng tổ hợp (e + dấu) được gộp lại trước khi tra bảng
+    return unicodedata.normalize("NFC", text).lower().translate(_FOLD_TABLE).strip()
+
+
+def owner_key(name: str) -> str:
+    """
+    Owner name folded with fold_text and runs of whitespace collapsed, as the
+    search text is before it is matched against CAR.OwnerKey.
+
+    Example:
+        owner_key("Nguyễn  Văn Đức") -> "nguyen van duc"
+    """
+    return " ".join(fold_text(name).split())
+
+
+def plate_key(plate: str) -> str:
+    """
+    License plate without separators, uppercased.
+
+    Example:
+        plate_key("51F-123.45") -> "51F12345"
+    """
+    return _PLATE_SEPARATORS_RE.sub("", plate).upper()
@@ -178,7 +178,8 @@ STYLE = """
             selection-background-color: #2563eb;
             selection-color: #ffffff;
         }
-        QTableWidget#dataTable {
+        /* QTableView#dataTable cũng khớp QTableWidget (lớp con của QTableView) */
+        QTableView#dataTable {
             border: 1px solid #e5e7eb;
             border-radius: 8px;
             gridline-color: #e5e7eb;
@@ -210,31 +211,31 @@ STYLE = """
             color: #ffffff;
         }
 
-        QTableWidget#dataTable::item {
+        QTableView#dataTable::item {
             color: #111827;
             padding: 6px;
         }
 
-        QTableWidget#dataTable::item:selected {
+        QTableView#dataTable::item:selected {
             background: #2563eb;
             color: #ffffff;
         }
 
-        QTableWidget#dataTable::item:disabled {
+        QTableView#dataTable::item:disabled {
             color: #9ca3af;
         }
 
         /* Optional: make selection look consistent */
-        QTableWidget#dataTable {
+        QTableView#dataTable {
             selection-background-color: #2563eb;
             selection-color: #ffffff;
         }
-        QTableWidget#dataTable QLineEdit,
-        QTableWidget#dataTable QComboBox {
+        QTableView#dataTable QLineEdit,
+        QTableView#dataTable QComboBox {
             min-height: 30px;
         }
 
-        QTableWidget#dataTable QPushButton {
+        QTableView#dataTable QPushButton {
             min-height: 30px;
             padding: 4px 10px;
         }
@@ -250,7 +251,7 @@ STYLE = """
         }
 
         /* make table cell widgets not stick to edges */
-        QTableWidget#dataTable {
+        QTableView#dataTable {
             padding: 2px;
         }
 
@@ -0,0 +1,193 @@
+# src/utils/vehicle_index.py
+"""
+In-memory index of vehicles for as-you-type filtering on the lookup page.
+
+Built once from the full vehicle list; every filter is then answered from
+precomputed structures instead of normalizing and scanning every row:
+
+- plate: postings of row ids per character and per bigram of the normalized
+  plate (short queries, which match many rows), and a newline-joined blob of
+  all plates searched with str.find at C speed (longer queries)
+- owner: postings of row ids per character and per bigram of the folded
+  owner name; longer queries check only the rows of their rarest bigram.
+  The query is a substring of the name, like the server-side search on
+  CAR.OwnerKey ("uyen van" matches "Nguyễn Văn A")
+- brand: row id buckets per brand
+"""
+
+from __future__ import annotations
+
+import copy
+from array import array
+from bisect import bisect_right
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from utils.search_keys import owner_key, plate_key
+
+
+class VehicleIndex:
+    """
+    Immutable index over vehicle records.
+
+    Records need LicensePlate, OwnerName and BrandName attributes (see
+    app.row_format.ROW_RECORD); results keep the input order.
+    """
+
+    def __init__(self, rows: Sequence[Any]):
+        self.rows = list(rows)
+
+        plate_keys = [plate_key(r.LicensePlate) for r in self.rows]
+
+        # Biển số: danh sách row id theo từng ký tự và từng cặp ký tự liền nhau
+        self._plate_postings = self._gram_postings(plate_keys)
+
+        # Biển số: chuỗi nối để tìm chuỗi con dài bằng str.find, _plate_starts là vị trí đầu mỗi dòng
+        self._plate_blob, self._plate_starts = self._join_keys(plate_keys)
+
+        # Chủ xe: tên đã bỏ dấu (khoảng trắng gộp lại như chuỗi tìm) và postings như biển số
+        self._owner_keys = [owner_key(r.OwnerName or "") for r in self.rows]
+        self._owner_postings = self._gram_postings(self._owner_keys)
+
+        # Hiệu xe: row id theo từng hiệu
+        self._brand_buckets: Dict[str, array] = {}
+        for row_id, r in enumerate(self.rows):
+            bucket = self._brand_buckets.get(r.BrandName)
+            if bucket is None:
+                bucket = self._brand_buckets[r.BrandName] = array("i")
+            bucket.append(row_id)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def with_changes(self, changed: Iterable[Any], deleted: Iterable[str] = ()) -> "VehicleIndex":
+        """
+        New index with changed rows replaced or added and deleted plates removed.
+
+        When only non-indexed fields changed (e.g. TotalDebt after a payment) the
+        new index shares all lookup structures with this one; otherwise it is
+        rebuilt from the merged rows, in plate order.
+        """
+        changed = list(changed)
+        positions = {r.LicensePlate: i for i, r in enumerate(self.rows)}
+
+        rebuild = any(plate in positions for plate in deleted)
+        rows = list(self.rows)
+        for r in changed:
+            i = positions.get(r.LicensePlate)
+            if i is None or rows[i].OwnerName != r.OwnerName or rows[i].BrandName != r.BrandName:
+                rebuild = True
+                break
+            rows[i] = r
+
+        if not rebuild:
+            # Row id không đổi -> dùng lại postings, chỉ thay danh sách dòng
+            index = copy.copy(self)
+            index.rows = rows
+            return index
+
+        merged = {r.LicensePlate: r for r in self.rows}
+        for plate in deleted:
+            merged.pop(plate, None)
+        for r in changed:
+            merged[r.LicensePlate] = r
+        return VehicleIndex(sorted(merged.values(), key=attrgetter("LicensePlate")))
+
+    def filter(
+        self,
+        plate: Optional[str] = None,
+        owner: Optional[str] = None,
+        brand: Optional[str] = None,
+    ) -> List[Any]:
+        """
+        Rows matching every given criterion.
+
+        Args:
+            plate: Substring of the plate (separators and case ignored)
+            owner: Substring of the owner name (case, diacritics and repeated
+                spaces ignored)
+            brand: Exact brand name
+        """
+        candidates: List[Sequence[int]] = []
+
+        if brand:
+            candidates.append(self._brand_buckets.get(brand, ()))
+        if plate:
+            key = plate_key(plate)
+            if key:
+                candidates.append(self._match_plate(key))
+        if owner:
+            key = owner_key(owner)
+            if key:
+                candidates.append(self._match_owner(key))
+
+        if not candidates:
+            return self.rows
+
+        # Giao từ tập nhỏ nhất để số phần tử phải kiểm tra ít nhất
+        candidates.sort(key=len)
+        if len(candidates) == 1:
+            ids = candidates[0]
+        else:
+            selected = set(candidates[0])
+            for other in candidates[1:]:
+                if not selected:
+                    break
+                selected.intersection_update(other)
+            ids = sorted(selected)
+
+        rows = self.rows
+        return [rows[i] for i in ids]
+
+    # ---------------- Helpers ----------------
+    @staticmethod
+    def _gram_postings(keys: Sequence[str]) -> Dict[str, array]:
+        """Row ids per character and per bigram of each key, in row order."""
+        postings: Dict[str, array] = {}
+        for row_id, key in enumerate(keys):
+            for gram in {key[i:i + n] for n in (1, 2) for i in range(len(key) - n + 1)}:
+                ids = postings.get(gram)
+                if ids is None:
+                    ids = postings[gram] = array("i")
+                ids.append(row_id)
+        return postings
+
+    @staticmethod
+    def _join_keys(keys: Iterable[str]):
+        """(keys joined by newlines, start offset of each key in the blob)"""
+        keys = list(keys)
+        starts = array("i")
+        offset = 0
+        for key in keys:
+            starts.append(offset)
+            offset += len(key) + 1
+        return "\n".join(keys), starts
+
+    def _match_plate(self, key: str) -> Sequence[int]:
+        if len(key) <= 2:
+            return self._plate_postings.get(key, ())
+        return self._find_rows(self._plate_blob, self._plate_starts, key)
+
+    def _match_owner(self, key: str) -> Sequence[int]:
+        postings = self._owner_postings
+        if len(key) <= 2:
+            return postings.get(key, ())
+        # Chỉ kiểm tra các dòng chứa cặp ký tự hiếm nhất của chuỗi tìm
+        rarest = min((postings.get(key[i:i + 2], ()) for i in range(len(key) - 1)), key=len)
+        keys = self._owner_keys
+        return [i for i in rarest if key in keys[i]]
+
+    @staticmethod
+    def _find_rows(blob: str, starts: Sequence[int], key: str) -> Sequence[int]:
+        """Row ids whose key in blob contains key, in row order."""
+        ids = array("i")
+        last_id = -1
+        pos = blob.find(key)
+        while pos >= 0:
+            row_id = bisect_right(starts, pos) - 1
+            if row_id != last_id:
+                ids.append(row_id)
+                last_id = row_id
+            # Bỏ qua phần còn lại của dòng đã khớp
+            pos = blob.find(key, starts[row_id + 1] if row_id + 1 < len(starts) else len(blob))
+        return ids
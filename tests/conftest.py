@@ -0,0 +1,128 @@
+"""
+Shared fixtures: an in-memory stand-in for mysql.connector connections, so the
+pool and transaction code can run without a MySQL server.
+"""
+
+import itertools
+import threading
+
+import mysql.connector
+import pytest
+from mysql.connector import Error
+
+from app.connection_pool import ConnectionPool
+from app.db_metrics import PoolMetrics, StatementStats
+from app.slow_query_log import SlowQueryLog
+
+
+class FakeCursor:
+    """Cursor that records statements and returns the connection's canned rows."""
+
+    rowcount = 0
+    with_rows = False
+
+    def __init__(self, connection: "FakeConnection"):
+        self._connection = connection
+        self._pending = []
+
+    @property
+    def column_names(self):
+        return self._connection.columns
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self._connection.statements.append(operation)
+        self._pending = list(self._connection.rows)
+
+    def fetchall(self):
+        rows, self._pending = self._pending, []
+        return rows
+
+    def fetchmany(self, size=1):
+        rows, self._pending = self._pending[:size], self._pending[size:]
+        return rows
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Just enough of MySQLConnection for ConnectionPool and DatabaseManager."""
+
+    _ids = itertools.count(1)
+    unread_result = False
+
+    def __init__(self):
+        self.id = next(self._ids)
+        self.open = True
+        self.in_transaction = False
+        self.commits = 0
+        self.rollbacks = 0
+        self.statements = []
+        # Cột và dòng trả về cho mọi câu lệnh (xem FakeCursor)
+        self.columns = ("value",)
+        self.rows = []
+
+    def start_transaction(self, *args, **kwargs):
+        self.in_transaction = True
+
+    def commit(self):
+        self.in_transaction = False
+        self.commits += 1
+
+    def rollback(self):
+        self.in_transaction = False
+        self.rollbacks += 1
+
+    def reset_session(self):
+        pass
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def is_connected(self):
+        return self.open
+
+    def close(self):
+        self.open = False
+
+
+class FakeConnect:
+    """Connection factory counting opened connections; fail_next makes connect() raise."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.fail_next = 0
+
+    def __call__(self):
+        with self._lock:
+            if self.fail_next:
+                self.fail_next -= 1
+                raise Error(msg="Can't connect to MySQL server", errno=2003)
+            self.opened += 1
+        return FakeConnection()
+
+
+@pytest.fixture
+def fake_connect():
+    return FakeConnect()
+
+
+@pytest.fixture
+def manager(monkeypatch, fake_connect):
+    """DatabaseManager on a pool of four fake connections."""
+    # app.database mở pool của db_manager ngay khi import
+    monkeypatch.setattr(mysql.connector, "connect", lambda **kwargs: fake_connect())
+    from app.database import DatabaseManager
+
+    manager = object.__new__(DatabaseManager)
+    manager._pool = ConnectionPool(fake_connect, 4, 4, timeout=5.0)
+    manager._metrics = PoolMetrics(4)
+    manager._statements = StatementStats()
+    manager._slow_log = SlowQueryLog(threshold_ms=0)
+    yield manager
+    manager._pool.close()
@@ -0,0 +1,79 @@
+"""Tests for app.columnar and DatabaseManager.fetch_columns, with and without NumPy."""
+
+import math
+from array import array
+
+import pytest
+
+from app import columnar
+from app.columnar import FLOAT, INT, ColumnBuilder
+
+TYPES = {"Count": INT, "TotalMoney": FLOAT}
+
+
+@pytest.fixture(params=["numpy", "array"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        if not columnar.HAS_NUMPY:
+            pytest.skip("app.columnar was imported without NumPy")
+    else:
+        # Như khi chưa cài NumPy: cột số là array.array
+        monkeypatch.setattr(columnar, "HAS_NUMPY", False)
+    return request.param
+
+
+def as_list(column):
+    return [float(v) for v in column]
+
+
+def test_builder_appends_chunks_and_maps_nulls(backend):
+    builder = ColumnBuilder(["BrandName", "Count", "TotalMoney"], TYPES)
+    builder.extend([("Kia", 2, 150.5), ("Honda", None, None)])
+    builder.extend([])
+    builder.extend([("Toyota", 5, 300)])
+    cols = builder.build()
+
+    assert list(cols) == ["BrandName", "Count", "TotalMoney"]
+    assert cols["BrandName"] == ["Kia", "Honda", "Toyota"]
+    assert as_list(cols["Count"]) == [2, 0, 5]
+    assert cols["TotalMoney"][0] == 150.5 and math.isnan(cols["TotalMoney"][1])
+    if backend == "array":
+        assert isinstance(cols["Count"], array) and cols["Count"].typecode == INT
+    else:
+        assert cols["Count"].dtype.name == "int64"
+        assert cols["TotalMoney"].dtype.name == "float64"
+
+
+def test_builder_rejects_unknown_typed_columns():
+    with pytest.raises(ValueError):
+        ColumnBuilder(["BrandName"], {"Count": INT})
+
+
+def test_report_helpers_give_the_same_result_on_both_backends(backend):
+    builder = ColumnBuilder(["BrandName", "TotalMoney"], {"TotalMoney": FLOAT})
+    builder.extend([("Kia", 100.0), ("Honda", 300.0), ("Ford", 100.0)])
+    cols = builder.build()
+    money = cols["TotalMoney"]
+
+    assert columnar.total(money) == 500.0
+    assert as_list(columnar.percent_of(money, 500.0)) == [20.0, 60.0, 20.0]
+    assert as_list(columnar.percent_of(money, 0)) == [0.0, 0.0, 0.0]
+
+    order = columnar.argsort_desc(money)
+    assert [int(i) for i in order] == [1, 0, 2]
+    assert columnar.take(cols["BrandName"], order) == ["Honda", "Kia", "Ford"]
+    assert as_list(columnar.take(money, order)) == [300.0, 100.0, 100.0]
+
+
+def test_fetch_columns_streams_chunks_into_columns(manager, backend):
+    for conn, _ in manager._pool._idle:
+        conn.columns = ("BrandName", "Count", "TotalMoney")
+        conn.rows = [(f"Brand {n}", n, n * 1.5) for n in range(7)]
+
+    cols = manager.fetch_columns("SELECT BrandName, Count, TotalMoney FROM t", types=TYPES, chunk_size=3)
+
+    assert cols["BrandName"] == [f"Brand {n}" for n in range(7)]
+    assert as_list(cols["Count"]) == list(range(7))
+    assert as_list(cols["TotalMoney"]) == [n * 1.5 for n in range(7)]
+    assert manager.get_pool_stats()['active'] == 0
@@ -0,0 +1,155 @@
+"""Tests for app.connection_pool under concurrent load (fake connections, no MySQL)."""
+
+import threading
+import time
+
+import pytest
+from mysql.connector import Error
+
+from app.connection_pool import ConnectionPool, PoolTimeoutError
+
+
+def wait_until(predicate, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached in time")
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def make_pool(fake_connect):
+    pools = []
+
+    def make(min_size=1, max_size=1, timeout=5.0, idle_ttl=300.0):
+        pool = ConnectionPool(fake_connect, min_size, max_size, timeout=timeout, idle_ttl=idle_ttl)
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+def test_waiters_are_served_in_arrival_order(make_pool):
+    pool = make_pool()
+    held = pool.get_connection()
+    served = []
+
+    def worker(n):
+        conn = pool.get_connection()
+        served.append(n)
+        pool.release(conn)
+
+    threads = []
+    for n in range(10):
+        t = threading.Thread(target=worker, args=(n,))
+        t.start()
+        threads.append(t)
+        # Người chờ thứ n phải vào hàng trước khi người tiếp theo đến
+        wait_until(lambda: pool.stats()['waiting'] == n + 1)
+
+    pool.release(held)
+    for t in threads:
+        t.join()
+    assert served == list(range(10))
+
+
+def test_checkout_times_out_when_pool_is_exhausted(make_pool):
+    pool = make_pool()
+    held = pool.get_connection()
+
+    started = time.monotonic()
+    with pytest.raises(PoolTimeoutError):
+        pool.get_connection(timeout=0.05)
+    assert time.monotonic() - started >= 0.05
+
+    with pytest.raises(PoolTimeoutError):
+        pool.get_connection(timeout=0)
+    assert pool.stats()['waiting'] == 0
+
+    pool.release(held)
+    pool.release(pool.get_connection(timeout=0))
+
+
+def test_elastic_pool_grows_to_max_and_reaps_idle(make_pool, fake_connect):
+    pool = make_pool(min_size=2, max_size=4, idle_ttl=0.05)
+    conns = [pool.get_connection() for _ in range(4)]
+    assert pool.stats()['pool_size'] == 4
+    assert fake_connect.opened == 4
+    with pytest.raises(PoolTimeoutError):
+        pool.get_connection(timeout=0.01)
+
+    for conn in conns:
+        pool.release(conn)
+    time.sleep(0.1)
+    pool._reap_idle()
+
+    stats = pool.stats()
+    assert stats['pool_size'] == 2
+    assert stats['idle'] == 2
+    assert sum(not c.is_connected() for c in conns) == 2
+
+
+def test_failed_connect_hands_slot_to_next_waiter(make_pool, fake_connect):
+    pool = make_pool()
+    held = pool.get_connection()
+    results = {}
+
+    def worker(name):
+        try:
+            results[name] = pool.get_connection()
+        except Error as e:
+            results[name] = e
+
+    first = threading.Thread(target=worker, args=("first",))
+    second = threading.Thread(target=worker, args=("second",))
+    first.start()
+    wait_until(lambda: pool.stats()['waiting'] == 1)
+    second.start()
+    wait_until(lambda: pool.stats()['waiting'] == 2)
+
+    # Server khởi động lại: kết nối đang dùng hỏng và lần mở lại đầu tiên thất bại
+    fake_connect.fail_next = 1
+    started = time.monotonic()
+    pool.release(held, broken=True)
+    first.join()
+    second.join()
+
+    assert isinstance(results["first"], Error)
+    assert results["second"].is_connected()
+    assert time.monotonic() - started < pool.timeout
+    assert pool.stats()['pool_size'] == 1
+
+
+def test_concurrent_checkouts_stay_within_max_size(make_pool, fake_connect):
+    pool = make_pool(min_size=3, max_size=6, timeout=5.0)
+    peak = 0
+    peak_lock = threading.Lock()
+    errors = []
+
+    def worker():
+        nonlocal peak
+        try:
+            for _ in range(20):
+                conn = pool.get_connection()
+                with peak_lock:
+                    peak = max(peak, pool.stats()['active'])
+                time.sleep(0.0005)
+                pool.release(conn)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(50)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = pool.stats()
+    assert errors == []
+    assert peak <= 6
+    assert stats['pool_size'] <= 6
+    assert stats['active'] == 0
+    assert stats['waiting'] == 0
+    assert fake_connect.opened == stats['pool_size']
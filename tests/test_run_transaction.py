@@ -0,0 +1,127 @@
+"""Tests for DatabaseManager.run_transaction and the ambient transaction across threads."""
+
+import threading
+import time
+
+import pytest
+from mysql.connector import Error
+
+from app.retry_policy import RetryPolicy
+
+FAST_RETRY = RetryPolicy(max_attempts=6, base_delay=0.001, max_delay=0.005)
+
+
+def test_retries_injected_deadlocks_and_lock_waits_across_threads(manager):
+    threads_count = 16
+    failures_per_thread = 3
+    attempts = [0] * threads_count
+    committed = []
+    errors = []
+
+    def worker(n):
+        def work(cursor):
+            attempts[n] += 1
+            cursor.execute("UPDATE SUPPLIES SET InventoryNumber = InventoryNumber - 1")
+            if attempts[n] <= failures_per_thread:
+                # Xen kẽ deadlock và hết thời gian chờ khóa
+                errno = 1213 if (n + attempts[n]) % 2 else 1205
+                raise Error(msg="injected", errno=errno)
+            return n
+
+        try:
+            committed.append(manager.run_transaction(work, retry=FAST_RETRY))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(threads_count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = manager.get_pool_stats()
+    assert errors == []
+    assert sorted(committed) == list(range(threads_count))
+    assert attempts == [failures_per_thread + 1] * threads_count
+    assert stats['tx_retries'] == threads_count * failures_per_thread
+    assert stats['commits'] == threads_count
+    assert stats['rollbacks'] == threads_count * failures_per_thread
+    assert stats['active'] == 0
+
+
+def test_lock_order_contention_completes(manager):
+    # Hai "dòng" bị khóa theo thứ tự ngược nhau: hết thời gian chờ khóa -> lỗi 1213 như InnoDB
+    rows = [threading.Lock(), threading.Lock()]
+    completed = []
+
+    def worker(n):
+        order = rows if n % 2 else rows[::-1]
+
+        def work(cursor):
+            taken = []
+            try:
+                for lock in order:
+                    if not lock.acquire(timeout=0.01):
+                        raise Error(msg="Deadlock found when trying to get lock", errno=1213)
+                    taken.append(lock)
+                    time.sleep(0.001)
+                return n
+            finally:
+                for lock in reversed(taken):
+                    lock.release()
+
+        policy = RetryPolicy(max_attempts=50, base_delay=0.002, max_delay=0.02)
+        completed.append(manager.run_transaction(work, retry=policy))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(completed) == list(range(8))
+    assert manager.get_pool_stats()['commits'] == 8
+    assert time.monotonic() - started < 10
+
+
+def test_gives_up_after_max_attempts(manager):
+    calls = []
+
+    def work(cursor):
+        calls.append(1)
+        raise Error(msg="injected", errno=1213)
+
+    with pytest.raises(Error) as exc:
+        manager.run_transaction(work, retry=RetryPolicy(max_attempts=3, base_delay=0.001))
+    assert exc.value.errno == 1213
+    assert len(calls) == 3
+
+
+def test_other_errors_are_not_retried(manager):
+    calls = []
+
+    def work(cursor):
+        calls.append(1)
+        raise Error(msg="Duplicate entry", errno=1062)
+
+    with pytest.raises(Error):
+        manager.run_transaction(work, retry=FAST_RETRY)
+    assert len(calls) == 1
+    assert manager.get_pool_stats()['tx_retries'] == 0
+
+
+def test_closing_a_stream_early_does_not_fail_the_transaction(manager):
+    for conn, _ in manager._pool._idle:
+        conn.rows = [(n,) for n in range(10)]
+
+    with manager.transaction() as cursor:
+        rows = manager.iter_query("SELECT value FROM t", chunk_size=3, row_format="tuple")
+        assert next(rows) == (0,)
+        # Dừng đọc giữa chừng: GeneratorExit đi qua get_connection của giao dịch
+        rows.close()
+        cursor.execute("UPDATE t SET value = 0")
+
+    stats = manager.get_pool_stats()
+    assert stats['commits'] == 1
+    assert stats['rollbacks'] == 0
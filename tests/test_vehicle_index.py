@@ -0,0 +1,36 @@
+"""Tests for utils.vehicle_index matching the server-side lookup semantics."""
+
+from collections import namedtuple
+
+from utils.vehicle_index import VehicleIndex
+
+Vehicle = namedtuple("Vehicle", "LicensePlate OwnerName BrandName")
+
+ROWS = [
+    Vehicle("29B-111.11", "Lê  Văn   Bình", "Kia"),
+    Vehicle("30A-999.99", "Trần Thị Uyên", "Honda"),
+    Vehicle("51F-123.45", "Nguyễn Văn An", "Toyota"),
+]
+
+
+def owners(rows):
+    return [r.OwnerName for r in rows]
+
+
+def test_owner_matches_any_substring_like_the_server():
+    index = VehicleIndex(ROWS)
+    # Giữa từ, không chỉ đầu từ (giống MATCH ... AGAINST cụm từ / LIKE trên CAR.OwnerKey)
+    assert owners(index.filter(owner="uyen")) == ["Trần Thị Uyên", "Nguyễn Văn An"]
+    assert owners(index.filter(owner="YỄN VĂN")) == ["Nguyễn Văn An"]
+    assert owners(index.filter(owner="van  b")) == ["Lê  Văn   Bình"]
+    assert owners(index.filter(owner="ng v")) == []
+
+
+def test_filters_combine_and_follow_changes():
+    index = VehicleIndex(ROWS)
+    assert owners(index.filter(plate="999", owner="thi")) == ["Trần Thị Uyên"]
+    assert index.filter(owner="uyen", brand="Kia") == []
+
+    changed = index.with_changes([Vehicle("29B-111.11", "Phạm Thị Lan", "Kia")], ["51F-123.45"])
+    assert owners(changed.filter(owner="lan")) == ["Phạm Thị Lan"]
+    assert changed.filter(plate="51F") == []